@@ -1,9 +1,16 @@
 # backend/db.py
 from sqlmodel import SQLModel, create_engine
 from backend.config import settings
+from backend.services import json_codec
 
 # Crée l'engine SQLModel / SQLAlchemy
-engine = create_engine(settings.DATABASE_URL, echo=True)
+# ⚡ colonnes JSON/JSONB (de)sérialisées par orjson (json_content des livrables = plusieurs centaines de Ko)
+engine = create_engine(
+    settings.DATABASE_URL,
+    echo=True,
+    json_serializer=json_codec.dumps_str,
+    json_deserializer=json_codec.loads,
+)
 
 def init_db() -> None:
     """
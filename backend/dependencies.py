@@ -1,6 +1,7 @@
 # backend/dependencies.py
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
+from backend.services import rate_limit as rate_limit_service
 from backend.services.user_service import get_user_from_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
@@ -37,4 +38,12 @@ def require_startnow(user = Depends(get_current_user)):
 def require_admin(user = Depends(get_current_user)):
     if not getattr(user, "is_admin", False):
         raise HTTPException(403, "Admin requis")
-    return user
\ No newline at end of file
+    return user
+
+
+def rate_limit(route_class: str):
+    """Dépendance : seaux à jetons user / IP de la classe (idea, premium, download, lead, auth) → 429 si vide.
+    À déclarer dans dependencies=[...] : elle passe avant get_current_user (aucun accès DB)."""
+    async def _check(request: Request):
+        await rate_limit_service.check(route_class, request)
+    return _check
@@ -1,9 +1,9 @@
 # backend/main.py
+import asyncio
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.staticfiles import StaticFiles
 from backend.db import engine
 from sqlalchemy import text
 # importe et initialise la BDD
@@ -18,9 +18,29 @@ from backend.routers.account import router as account_router
 from backend.routers.projects import router as projects_router
 from backend.routers.ideas import router as ideas_router
 from backend.services.deliverable_service import STORAGE_DIR
+from backend.services.asset_store import ASSETS_DIR, ImmutableStaticFiles
 from backend.routers.admin import router as admin_router
+from backend.services import (compression, json_codec, llm_usage, memory_diag, metrics, profiler, rate_limit,
+                              storage_gc, stripe_client, stripe_events, tracing)
 
-app = FastAPI()
+# ⚡ réponses JSON sérialisées par orjson
+app = FastAPI(default_response_class=json_codec.ORJSONResponse)
+
+# 🗜️ Compression gzip / brotli (types textuels, au-delà de COMPRESSION_MIN_BYTES) — au plus près de l'app :
+# le coût CPU est compté dans les métriques / traces
+app.add_middleware(compression.CompressionMiddleware)
+
+# 📈 Métriques Prometheus : latence par route + requêtes en cours (GET /metrics)
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+
+# 🔭 Tracing échantillonné (TRACE_EXPORTER / TRACE_SAMPLE_RATE) : span racine par requête + requêtes SQL
+app.add_middleware(tracing.TracingMiddleware)
+tracing.instrument_engine(engine)
+
+# 🔥 Profilage à la demande d'une requête par un admin (monté seulement si PROFILING_ENABLED=1)
+if profiler.PROFILING_ENABLED:
+    app.add_middleware(profiler.ProfilingMiddleware)
 
 ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -43,8 +63,12 @@ app.add_middleware(
 STORAGE_ROOT = Path(STORAGE_DIR)
 STORAGE_ROOT.mkdir(parents=True, exist_ok=True)
 
-# 👇 html=True pour servir index.html sur les répertoires
-app.mount("/public", StaticFiles(directory=str(STORAGE_ROOT), html=True), name="public")
+# 👇 assets adressés par contenu (logos…) : URLs immuables → cache navigateur/CDN 1 an
+Path(ASSETS_DIR).mkdir(parents=True, exist_ok=True)
+app.mount("/assets", ImmutableStaticFiles(directory=ASSETS_DIR), name="assets")
+
+# 👇 html=True pour servir index.html sur les répertoires ; variantes .br / .gz servies si présentes
+app.mount("/public", compression.PrecompressedStaticFiles(directory=str(STORAGE_ROOT), html=True), name="public")
 # Création des tables si elles n'existent pas
 init_db()
 
@@ -53,6 +77,57 @@ with engine.begin() as conn:
     conn.execute(text(
         "ALTER TABLE users ADD COLUMN IF NOT EXISTS is_admin BOOLEAN NOT NULL DEFAULT false;"
     ))
+    conn.execute(text(
+        "ALTER TABLE deliverables ADD COLUMN IF NOT EXISTS storage_bytes BIGINT NOT NULL DEFAULT 0;"
+    ))
+    # 🔎 admin : recherche par préfixe d'email + filtre plan, pagination keyset sur id
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_users_email_lower_prefix ON users (lower(email) text_pattern_ops);"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_users_plan_id ON users (plan, id DESC);"
+    ))
+
+# 🧹 GC du stockage (orphelins HTML/PDF/ICS) en tâche de fond
+@app.on_event("startup")
+async def _start_storage_gc():
+    app.state.storage_gc_task = asyncio.create_task(storage_gc.gc_loop())
+
+# 💳 Worker des webhooks Stripe (journal stripe_events, retries)
+@app.on_event("startup")
+async def _start_stripe_events_worker():
+    app.state.stripe_events_task = asyncio.create_task(stripe_events.stripe_events_loop())
+
+# 🤖 Écriture par lots des appels LLM instrumentés
+@app.on_event("startup")
+async def _start_llm_usage_writer():
+    app.state.llm_usage_task = asyncio.create_task(llm_usage.flush_loop())
+
+# 🧠 Plafond mémoire soft : recyclage gracieux du worker (MEMORY_SOFT_LIMIT_MB)
+@app.on_event("startup")
+async def _start_memory_watchdog():
+    if memory_diag.MEMORY_SOFT_LIMIT_MB > 0:
+        app.state.memory_watchdog_task = asyncio.create_task(memory_diag.memory_watchdog_loop())
+
+@app.on_event("shutdown")
+async def _close_stripe_client():
+    await stripe_client.aclose()
+
+@app.on_event("shutdown")
+async def _close_rate_limit_backend():
+    await rate_limit.aclose()
+
+@app.on_event("shutdown")
+async def _flush_llm_usage():
+    await asyncio.to_thread(llm_usage.flush)
+
+@app.get(metrics.METRICS_PATH, include_in_schema=False)
+def metrics_endpoint(authorization: str | None = Header(None)):
+    out = metrics.render(authorization)
+    if out is None:
+        return Response(status_code=401)
+    body, content_type = out
+    return Response(body, media_type=content_type)
 
 @app.get("/")
 def read_root():
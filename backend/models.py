@@ -1,9 +1,9 @@
 # backend/models.py
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List, Dict, Any
 
 from sqlmodel import Field, SQLModel
-from sqlalchemy import Column, Text, String
+from sqlalchemy import Column, Text, String, BigInteger
 from sqlalchemy.dialects.postgresql import JSONB
 
 class BusinessIdea(SQLModel, table=True):
@@ -79,4 +79,61 @@ class Deliverable(SQLModel, table=True):
     # Utiliser sa_column pour JSONB
     json_content: Optional[Dict[str, Any]] = Field(sa_column=Column(JSONB))
     file_path: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    storage_bytes: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))  # HTML + PDF + ICS référencés
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ✅ Compteurs d'usage disque par utilisateur (mis à jour incrémentalement, réconciliés par le GC)
+class StorageUsage(SQLModel, table=True):
+    __tablename__ = "storage_usage"
+
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    bytes_used: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))
+    files: int = Field(default=0, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ✅ Journal des événements Stripe (idempotence webhook) : clé = id d'événement Stripe
+class StripeEvent(SQLModel, table=True):
+    __tablename__ = "stripe_events"
+
+    id: str = Field(primary_key=True)  # evt_...
+    type: str = Field(index=True)
+    payload: Dict[str, Any] = Field(sa_column=Column(JSONB, nullable=False))  # événement brut
+    stripe_created: int = Field(default=0, index=True)  # horodatage Stripe → ordre de traitement
+    status: str = Field(default="pending", index=True)  # "pending" | "processed" | "failed"
+    attempts: int = Field(default=0, nullable=False)
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    received_at: datetime = Field(default_factory=datetime.utcnow)
+    processed_at: Optional[datetime] = None
+
+
+# ✅ Rollups analytics journaliers (incrémentés dans la transaction de l'événement métier)
+class DailyRollup(SQLModel, table=True):
+    __tablename__ = "daily_rollups"
+
+    day: date = Field(primary_key=True)
+    metric: str = Field(primary_key=True)  # "deliverables" | "ideas" | "signups" | "conversions" | "credits_*"
+    dim: str = Field(default="", primary_key=True)  # kind, plan, pack… ("" = sans dimension)
+    value: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))
+
+
+# ✅ Appels LLM instrumentés (tokens, latence, coût estimé) — écrits par lots par llm_usage
+class LLMCall(SQLModel, table=True):
+    __tablename__ = "llm_calls"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    user_id: Optional[int] = Field(default=None, index=True)
+    project_id: Optional[int] = Field(default=None, index=True)
+    kind: Optional[str] = Field(default=None, index=True)  # idea | offer | model | brand | landing | marketing | plan
+    stage: str  # site d'appel : "offer", "bp_copy", "plan_translate"…
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+    retries: int = 0
+    cost_usd: float = 0.0
+    ok: bool = True
+    error: Optional[str] = None
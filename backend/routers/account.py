@@ -1,14 +1,16 @@
 # backend/routers/account.py
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from pydantic import BaseModel, Field
 from sqlmodel import delete
-import stripe
 
 from backend.config import settings
 from backend.db import get_session
-from backend.dependencies import get_current_user
-from backend.models import User, Deliverable, BusinessIdea
-from backend.services.auth_service import verify_password, hash_password  # 👈 tes helpers existants
+from backend.dependencies import get_current_user, rate_limit
+from backend.models import User, Deliverable, BusinessIdea, StorageUsage
+from backend.services.auth_service import verify_password_async, hash_password_async  # 👈 pool de hachage dédié
+from backend.services import stripe_client
 
 router = APIRouter(tags=["account"])
 
@@ -41,31 +43,65 @@ def me(user = Depends(get_current_user)):
         is_admin=getattr(user, "is_admin", False),  # ⬅️ ADD
     )
 
-@router.put("/me/password", status_code=status.HTTP_204_NO_CONTENT)
-def change_password(payload: ChangePasswordIn, user = Depends(get_current_user)):
+def _set_password(user_id: int, hashed_password: str) -> bool:
+    with get_session() as s:
+        db_user = s.get(User, user_id)
+        if not db_user:
+            return False
+        db_user.hashed_password = hashed_password
+        s.add(db_user)
+        s.commit()
+    return True
+
+@router.put("/me/password", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(rate_limit("auth"))])
+async def change_password(payload: ChangePasswordIn, user = Depends(get_current_user)):
     """
     Change le mot de passe (vérifie l'ancien, enregistre le nouveau).
     Renvoie 204 No Content si OK.
     """
+    # user vient d'être lu par get_current_user : son hash sert à la vérification (pas de session ouverte
+    # pendant les ~250 ms de bcrypt)
+    if not await verify_password_async(payload.current_password, user.hashed_password):
+        raise HTTPException(400, "Mot de passe actuel invalide")
+
+    if len(payload.new_password) < 8:
+        raise HTTPException(400, "Le nouveau mot de passe doit contenir au moins 8 caractères")
+
+    hashed = await hash_password_async(payload.new_password)
+    if not await asyncio.to_thread(_set_password, user.id, hashed):
+        raise HTTPException(404, "Utilisateur introuvable")
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+async def _cancel_stripe(user) -> None:
+    # user vient d'être lu par get_current_user : son stripe_subscription_id est à jour
+    if not (getattr(user, "stripe_subscription_id", None) and settings.STRIPE_SECRET_KEY):
+        return
+    try:
+        # annule immédiatement (ou utilise cancel_at_period_end=True si tu préfères en fin de période)
+        await stripe_client.cancel_subscription(user.stripe_subscription_id)
+    except Exception as e:
+        # On n'empêche pas la suppression du compte si l’annulation Stripe échoue
+        print("[Stripe] Erreur d’annulation:", e)
+
+def _delete_account(user_id: int) -> bool:
     with get_session() as s:
-        db_user = s.get(User, user.id)
+        db_user = s.get(User, user_id)
         if not db_user:
-            raise HTTPException(404, "Utilisateur introuvable")
+            return False
 
-        if not verify_password(payload.current_password, db_user.hashed_password):
-            raise HTTPException(400, "Mot de passe actuel invalide")
-
-        if len(payload.new_password) < 8:
-            raise HTTPException(400, "Le nouveau mot de passe doit contenir au moins 8 caractères")
+        # Supprimer les dépendances (fichiers orphelins → GC stockage)
+        s.exec(delete(StorageUsage).where(StorageUsage.user_id == db_user.id))
+        s.exec(delete(Deliverable).where(Deliverable.user_id == db_user.id))
+        s.exec(delete(BusinessIdea).where(BusinessIdea.user_id == db_user.id))
 
-        db_user.hashed_password = hash_password(payload.new_password)  # 👈 ton helper
-        s.add(db_user)
+        # Supprimer l’utilisateur
+        s.delete(db_user)
         s.commit()
+    return True
 
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
-
-@router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
-def delete_me(payload: DeleteMeIn, user = Depends(get_current_user)):
+@router.delete("/me", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(rate_limit("auth"))])
+async def delete_me(payload: DeleteMeIn, user = Depends(get_current_user)):
     """
     Supprime définitivement le compte :
     - (option) annule l’abonnement Stripe si demandé
@@ -73,51 +109,26 @@ def delete_me(payload: DeleteMeIn, user = Depends(get_current_user)):
     - supprime l’utilisateur
     Renvoie 204 si OK.
     """
-    with get_session() as s:
-        db_user = s.get(User, user.id)
-        if not db_user:
-            raise HTTPException(404, "Utilisateur introuvable")
-
-        if not verify_password(payload.current_password, db_user.hashed_password):
-            raise HTTPException(400, "Mot de passe invalide")
-
-        # Annulation Stripe (optionnelle)
-        if payload.cancel_stripe and getattr(db_user, "stripe_subscription_id", None) and settings.STRIPE_SECRET_KEY:
-            try:
-                stripe.api_key = settings.STRIPE_SECRET_KEY
-                # annule immédiatement (ou utilise cancel_at_period_end=True si tu préfères en fin de période)
-                stripe.Subscription.delete(db_user.stripe_subscription_id)
-            except Exception as e:
-                # On n'empêche pas la suppression du compte si l’annulation Stripe échoue
-                print("[Stripe] Erreur d’annulation:", e)
-
-        # Supprimer les dépendances
-        s.exec(delete(Deliverable).where(Deliverable.user_id == db_user.id))
-        s.exec(delete(BusinessIdea).where(BusinessIdea.user_id == db_user.id))
+    # vérification hors session (pool de hachage dédié, la boucle d'événements n'est plus bloquée)
+    if not await verify_password_async(payload.current_password, user.hashed_password):
+        raise HTTPException(400, "Mot de passe invalide")
 
-        # Supprimer l’utilisateur
-        s.delete(db_user)
-        s.commit()
+    # Annulation Stripe (optionnelle) avant d'ouvrir la session : aucune connexion DB tenue pendant l'appel
+    if payload.cancel_stripe:
+        await _cancel_stripe(user)
+
+    if not await asyncio.to_thread(_delete_account, user.id):
+        raise HTTPException(404, "Utilisateur introuvable")
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-@router.post("/me/delete", status_code=status.HTTP_204_NO_CONTENT)
-def delete_me_post(payload: DeleteMeIn, user = Depends(get_current_user)):
-    with get_session() as s:
-        db_user = s.get(User, user.id)
-        if not db_user:
-            raise HTTPException(404, "Utilisateur introuvable")
-        if not verify_password(payload.current_password, db_user.hashed_password):
-            raise HTTPException(400, "Mot de passe invalide")
-        if payload.cancel_stripe and getattr(db_user, "stripe_subscription_id", None) and settings.STRIPE_SECRET_KEY:
-            try:
-                stripe.api_key = settings.STRIPE_SECRET_KEY
-                stripe.Subscription.delete(db_user.stripe_subscription_id)
-            except Exception as e:
-                print("[Stripe] Erreur d’annulation:", e)
-        s.exec(delete(Deliverable).where(Deliverable.user_id == db_user.id))
-        s.exec(delete(BusinessIdea).where(BusinessIdea.user_id == db_user.id))
-        s.delete(db_user)
-        s.commit()
+@router.post("/me/delete", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(rate_limit("auth"))])
+async def delete_me_post(payload: DeleteMeIn, user = Depends(get_current_user)):
+    if not await verify_password_async(payload.current_password, user.hashed_password):
+        raise HTTPException(400, "Mot de passe invalide")
+    if payload.cancel_stripe:
+        await _cancel_stripe(user)
+    if not await asyncio.to_thread(_delete_account, user.id):
+        raise HTTPException(404, "Utilisateur introuvable")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -1,31 +1,77 @@
 # backend/routers/admin.py
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, literal, union_all
 from sqlmodel import select
 from backend.db import get_session
-from backend.models import User
+from backend.models import User, Project, BusinessIdea, Deliverable, StorageUsage, StripeEvent
 from backend.dependencies import require_admin
+from backend.services import sector_kb
+from backend.services import analytics, deliverable_service, llm_usage, memory_diag, profiler, storage_gc, stripe_client, stripe_events
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
-import os, stripe
+from datetime import date, datetime
+import os
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+def _stripe_link(cid: str | None) -> str | None:
+    is_test = os.getenv("STRIPE_SECRET_KEY", "").startswith("sk_test_")
+    return cid and f"https://dashboard.stripe.com/{'test/' if is_test else ''}customers/{cid}"
+
+def _user_counts(s, ids: list[int]) -> dict[int, dict[str, int]]:
+    """Projets / idées / livrables d'une page d'utilisateurs : UNE requête (UNION ALL de GROUP BY indexés)."""
+    counts = {uid: {"projects": 0, "ideas": 0, "deliverables": 0} for uid in ids}
+    if not ids:
+        return counts
+    q = union_all(*(
+        select(model.user_id, literal(label), func.count()).where(model.user_id.in_(ids)).group_by(model.user_id)
+        for model, label in ((Project, "projects"), (BusinessIdea, "ideas"), (Deliverable, "deliverables"))
+    ))
+    for uid, label, n in s.execute(q).all():
+        counts[uid][label] = n
+    return counts
+
 @router.get("/users")
-def list_users(_: User = Depends(require_admin)):
+def list_users(
+    q: str | None = None,            # préfixe d'email (index lower(email) text_pattern_ops)
+    plan: str | None = None,         # free | infinity | startnow
+    cursor: int | None = None,       # pagination keyset : id du dernier user de la page précédente
+    limit: int = Query(50, ge=1, le=200),
+    _: User = Depends(require_admin),
+):
     with get_session() as s:
-        rows = s.exec(select(User).order_by(User.created_at.desc())).all()
-        out = []
-        is_test = (os.getenv("STRIPE_SECRET_KEY","").startswith("sk_test_"))
-        for u in rows:
-            cid = getattr(u, "stripe_customer_id", None)
-            link = cid and f"https://dashboard.stripe.com/{'test/' if is_test else ''}customers/{cid}"
-            out.append({
+        stmt = select(User)
+        if q and q.strip():
+            prefix = q.strip().lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            stmt = stmt.where(func.lower(User.email).like(prefix + "%", escape="\\"))
+        if plan:
+            stmt = stmt.where(User.plan == plan)
+        if cursor is not None:
+            stmt = stmt.where(User.id < cursor)
+        # limit + 1 : sait s'il reste une page sans COUNT(*)
+        rows = s.exec(stmt.order_by(User.id.desc()).limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        counts = _user_counts(s, [u.id for u in rows])
+
+        out = {
+            "items": [{
                 "id": u.id, "email": u.email, "plan": u.plan,
                 "startnow_credits": u.startnow_credits,
                 "idea_used": u.idea_used,
                 "is_admin": u.is_admin,
-                "stripe_customer_id": cid,
-                "stripe_link": link
-            })
+                "created_at": u.created_at.isoformat() if u.created_at else None,
+                "stripe_customer_id": u.stripe_customer_id,
+                "stripe_link": _stripe_link(u.stripe_customer_id),
+                **counts[u.id],
+            } for u in rows],
+            "next_cursor": rows[-1].id if has_more and rows else None,
+        }
+        # 1re page seulement : répartition par plan (index-only scan sur ix_users_plan_id)
+        if cursor is None:
+            out["plan_counts"] = {p: n for p, n in s.exec(select(User.plan, func.count()).group_by(User.plan)).all()}
         return out
 
 class AdminUserPatch(BaseModel):
@@ -35,23 +81,200 @@ class AdminUserPatch(BaseModel):
     is_admin: bool | None = None
     cancel_stripe: bool | None = None
 
-@router.patch("/users/{user_id}")
-def update_user(user_id: int, patch: AdminUserPatch, _: User = Depends(require_admin)):
+def _get_user(user_id: int) -> User | None:
+    with get_session() as s:
+        return s.get(User, user_id)
+
+def _patch_user(user_id: int, fields: dict) -> bool:
     with get_session() as s:
         u = s.get(User, user_id)
         if not u:
-            raise HTTPException(404, "User introuvable")
+            return False
+        for k, v in fields.items():
+            setattr(u, k, v)
+        s.add(u); s.commit()
+    return True
+
+@router.patch("/users/{user_id}")
+async def update_user(user_id: int, patch: AdminUserPatch, _: User = Depends(require_admin)):
+    # DB dans le threadpool, Stripe entre les deux : aucune session tenue pendant l'appel réseau
+    u = await asyncio.to_thread(_get_user, user_id)
+    if not u:
+        raise HTTPException(404, "User introuvable")
 
-        if patch.cancel_stripe and getattr(u, "stripe_subscription_id", None):
-            try:
-                stripe.api_key = os.getenv("STRIPE_SECRET_KEY","")
-                stripe.Subscription.delete(u.stripe_subscription_id)
-            except Exception as e:
-                print("[admin] Stripe cancel failed:", e)
+    if patch.cancel_stripe and getattr(u, "stripe_subscription_id", None):
+        try:
+            await stripe_client.cancel_subscription(u.stripe_subscription_id)
+        except Exception as e:
+            print("[admin] Stripe cancel failed:", e)
 
-        for k, v in patch.dict(exclude_unset=True).items():
-            if k != "cancel_stripe":
-                setattr(u, k, v)
+    fields = {k: v for k, v in patch.dict(exclude_unset=True).items() if k != "cancel_stripe"}
+    if not await asyncio.to_thread(_patch_user, user_id, fields):
+        raise HTTPException(404, "User introuvable")
+    return {"ok": True}
 
-        s.add(u); s.commit()
-    return {"ok": True}
\ No newline at end of file
+# ─────────────────────────────────────────────────────────────────────────────
+# Base de connaissances secteur (data/sector_kb.json)
+# ─────────────────────────────────────────────────────────────────────────────
+@router.get("/sector-kb")
+def sector_kb_info(_: User = Depends(require_admin)):
+    return sector_kb.get_kb().describe()
+
+@router.post("/sector-kb/reload")
+def sector_kb_reload(_: User = Depends(require_admin)):
+    try:
+        return sector_kb.reload_kb()
+    except (OSError, ValueError, KeyError) as e:
+        # l'ancienne KB reste active
+        raise HTTPException(400, f"KB secteur invalide: {e}")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Re-rendu en masse des livrables (après une release de templates, sans GPT)
+# ─────────────────────────────────────────────────────────────────────────────
+class AdminRerenderRequest(BaseModel):
+    kinds: list[str] | None = None            # défaut: tous les types re-rendables
+    created_before: datetime | None = None    # ex: date de la release des templates
+    ids: list[int] | None = None
+    concurrency: int | None = None            # défaut: RERENDER_CONCURRENCY
+
+@router.post("/deliverables/rerender")
+async def rerender_deliverables(req: AdminRerenderRequest, _: User = Depends(require_admin)):
+    unknown = [k for k in (req.kinds or []) if k not in deliverable_service.RERENDERERS]
+    if unknown:
+        raise HTTPException(400, f"Types non re-rendables: {', '.join(unknown)}")
+    # sélection SQL dans le threadpool : la route est async (le job tourne ensuite sur la boucle)
+    ids = await asyncio.to_thread(deliverable_service.rerenderable_ids, req.kinds, req.created_before, req.ids)
+    return deliverable_service.start_rerender_job(ids, req.concurrency)
+
+@router.get("/deliverables/rerender/{job_id}")
+def rerender_job_status(job_id: str, _: User = Depends(require_admin)):
+    job = deliverable_service.get_rerender_job(job_id)
+    if not job:
+        raise HTTPException(404, "Job introuvable")
+    return job
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Stockage : usage par utilisateur + GC des fichiers orphelins
+# ─────────────────────────────────────────────────────────────────────────────
+@router.get("/storage")
+def storage_overview(limit: int = 20, _: User = Depends(require_admin)):
+    from sqlalchemy import func
+    with get_session() as s:
+        total_bytes, total_files = s.exec(
+            select(func.coalesce(func.sum(StorageUsage.bytes_used), 0), func.coalesce(func.sum(StorageUsage.files), 0))
+        ).one()
+        top = s.exec(select(StorageUsage).order_by(StorageUsage.bytes_used.desc()).limit(max(1, min(limit, 200)))).all()
+    return {
+        "total_bytes": int(total_bytes),
+        "total_files": int(total_files),
+        "top_users": [{"user_id": u.user_id, "bytes_used": u.bytes_used, "files": u.files} for u in top],
+        "gc": storage_gc.GC_METRICS,
+    }
+
+@router.post("/storage/gc")
+async def storage_gc_run(dry_run: bool = True, _: User = Depends(require_admin)):
+    return await storage_gc.run_gc_async(dry_run=dry_run)
+
+@router.get("/stripe/events")
+def stripe_events_list(status: str | None = "failed", limit: int = 50, _: User = Depends(require_admin)):
+    with get_session() as s:
+        q = select(StripeEvent)
+        if status:
+            q = q.where(StripeEvent.status == status)
+        rows = s.exec(q.order_by(StripeEvent.received_at.desc()).limit(min(limit, 500))).all()
+    return [{
+        "id": e.id, "type": e.type, "status": e.status, "attempts": e.attempts,
+        "last_error": e.last_error, "received_at": e.received_at.isoformat(),
+        "processed_at": e.processed_at.isoformat() if e.processed_at else None,
+    } for e in rows]
+
+@router.post("/stripe/events/{event_id}/retry")
+def stripe_event_retry(event_id: str, _: User = Depends(require_admin)):
+    if not stripe_events.requeue(event_id):
+        raise HTTPException(404, "Événement introuvable ou déjà traité")
+    return {"ok": True}
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 📊 Analytics (lecture des rollups journaliers uniquement)
+# ─────────────────────────────────────────────────────────────────────────────
+
+@router.get("/stats")
+def stats(days: int = Query(30, ge=1, le=366), end: date | None = None, _: User = Depends(require_admin)):
+    return analytics.get_stats(days=days, end=end)
+
+@router.post("/stats/backfill")
+def stats_backfill(since: date | None = None, _: User = Depends(require_admin)):
+    """Reconstruit livrables / idées / inscriptions depuis les tables (une fois, après déploiement)."""
+    return {"ok": True, "rows": analytics.backfill(since)}
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 🤖 Usage LLM (tokens, latence, coût estimé)
+# ─────────────────────────────────────────────────────────────────────────────
+
+@router.get("/llm/usage")
+def llm_usage_summary(
+    group_by: str = Query("kind", pattern="^(kind|stage|user|model)$"),
+    days: int = Query(30, ge=1, le=366),
+    user_id: int | None = None,
+    kind: str | None = None,
+    _: User = Depends(require_admin),
+):
+    return llm_usage.usage_summary(group_by=group_by, days=days, user_id=user_id, kind=kind)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 🔥 Profils de requêtes (X-Profile: 1 ou ?__profile=1 avec un token admin, si PROFILING_ENABLED=1)
+# ─────────────────────────────────────────────────────────────────────────────
+
+@router.get("/profiles")
+def profiles_list(limit: int = Query(50, ge=1, le=200), _: User = Depends(require_admin)):
+    return {"enabled": profiler.PROFILING_ENABLED, "items": profiler.list_profiles(limit)}
+
+@router.get("/profiles/{profile_id}")
+def profile_download(profile_id: str, kind: str = Query("wall", pattern="^(wall|cpu)$"), _: User = Depends(require_admin)):
+    """Piles repliées (flamegraph.pl, speedscope, inferno)."""
+    path = profiler.profile_path(profile_id, kind)
+    if path is None:
+        raise HTTPException(404, "Profil introuvable")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=f"{profile_id}.{kind}.folded")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 🧠 Mémoire du worker (RSS, tracemalloc, Playwright, caches)
+# ─────────────────────────────────────────────────────────────────────────────
+
+@router.get("/memory")
+def memory_overview(_: User = Depends(require_admin)):
+    return memory_diag.overview()
+
+@router.post("/memory/tracemalloc")
+def memory_tracemalloc(enable: bool = True, frames: int = Query(10, ge=1, le=50), _: User = Depends(require_admin)):
+    return memory_diag.start_tracing(frames) if enable else memory_diag.stop_tracing()
+
+@router.post("/memory/snapshot")
+def memory_snapshot(_: User = Depends(require_admin)):
+    """Snapshot de référence pour /memory/diff."""
+    try:
+        return memory_diag.take_baseline()
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+
+@router.get("/memory/top")
+def memory_top(
+    limit: int = Query(25, ge=1, le=200),
+    key: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    _: User = Depends(require_admin),
+):
+    try:
+        return memory_diag.top_allocations(limit, key)
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
+
+@router.get("/memory/diff")
+def memory_diff(
+    limit: int = Query(25, ge=1, le=200),
+    key: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    _: User = Depends(require_admin),
+):
+    try:
+        return memory_diag.diff_allocations(limit, key)
+    except RuntimeError as e:
+        raise HTTPException(409, str(e))
@@ -1,40 +1,68 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import select
 from backend.db import get_session
+from backend.dependencies import rate_limit
 from backend.models import User
 from backend.schemas import UserCreate, Token, TokenData
+from backend.services import analytics, metrics
 from backend.services.auth_service import (
-    hash_password, verify_password, create_access_token, decode_token
+    hash_password_async, verify_and_update_async, create_access_token, decode_token
 )
 
 router = APIRouter(tags=["auth"])
 
-@router.post("/register", status_code=201)
-def register(user: UserCreate):
+# Routes async : le hachage bcrypt part dans le pool dédié (hash_pool), les accès DB (courts)
+# dans le threadpool → une rafale de connexions n'affame plus les autres routes.
+
+def _user_by_email(email: str):
+    with get_session() as session:
+        return session.exec(select(User).where(User.email == email)).first()
+
+def _create_user(email: str, hashed_password: str) -> dict:
     with get_session() as session:
-        exists = session.exec(select(User).where(User.email == user.email)).first()
-        if exists:
-            raise HTTPException(400, "Email déjà utilisé")
         db_user = User(
-            email=user.email,
-            hashed_password=hash_password(user.password),
+            email=email,
+            hashed_password=hashed_password,
             plan="free"
         )
         session.add(db_user)
+        analytics.incr(session, "signups")
         session.commit()
         session.refresh(db_user)
-    return {"id": db_user.id, "email": db_user.email, "plan": db_user.plan}
+        return {"id": db_user.id, "email": db_user.email, "plan": db_user.plan}
 
-@router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
+def _store_rehash(user_id: int, old_hash: str, new_hash: str) -> None:
     with get_session() as session:
-        user = session.exec(select(User).where(User.email == form_data.username)).first()
-        if not user or not verify_password(form_data.password, user.hashed_password):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Email ou mot de passe incorrect",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        db_user = session.get(User, user_id)
+        if db_user and db_user.hashed_password == old_hash:  # pas de changement de mot de passe entre-temps
+            db_user.hashed_password = new_hash
+            session.add(db_user)
+            session.commit()
+            metrics.PASSWORD_REHASH.inc()
+
+@router.post("/register", status_code=201, dependencies=[Depends(rate_limit("auth"))])
+async def register(user: UserCreate):
+    # vérifie l'email avant de hacher : un doublon ne coûte pas un bcrypt
+    if await asyncio.to_thread(_user_by_email, user.email):
+        raise HTTPException(400, "Email déjà utilisé")
+    hashed = await hash_password_async(user.password)
+    return await asyncio.to_thread(_create_user, user.email, hashed)
+
+@router.post("/token", response_model=Token, dependencies=[Depends(rate_limit("auth"))])
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await asyncio.to_thread(_user_by_email, form_data.username)
+    ok, new_hash = (await verify_and_update_async(form_data.password, user.hashed_password)) if user else (False, None)
+    if not ok:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Email ou mot de passe incorrect",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if new_hash:
+        # ♻️ paramètres de hachage changés (BCRYPT_ROUNDS) : ré-écrit au coût courant
+        await asyncio.to_thread(_store_rehash, user.id, user.hashed_password, new_hash)
     token = create_access_token(sub=str(user.id))
     return {"access_token": token, "token_type": "bearer"}
\ No newline at end of file
@@ -1,4 +1,7 @@
 # backend/routers/billing.py
+import asyncio
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from fastapi.responses import RedirectResponse
@@ -6,14 +9,13 @@ from fastapi.responses import RedirectResponse
 from backend.db import get_session
 from backend.models import User
 from sqlmodel import select
-import stripe
 from backend.config import settings
 from backend.dependencies import get_current_user
+from backend.services import analytics, stripe_client
+from backend.services.stripe_client import StripeAPIError
 
 router = APIRouter(tags=["billing"])
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
-
 class CheckoutPayload(BaseModel):
     pack: str = Field(
         ...,
@@ -25,7 +27,7 @@ class PortalOut(BaseModel):
     url: str
 
 @router.post("/create-checkout-session")
-def create_checkout_session(
+async def create_checkout_session(
     payload: CheckoutPayload,
     user: User = Depends(get_current_user),
 ):
@@ -70,25 +72,37 @@ def create_checkout_session(
     )
     cancel_url = f"{settings.FRONTEND_BASE_URL}/premium?canceled=1"
 
-    session = stripe.checkout.Session.create(
-        mode=mode,
-        line_items=line_items,
-        customer_email=user.email,
-        client_reference_id=str(user.id),
-        metadata={"user_id": str(user.id), "pack": requested},
-        success_url=success_url,
-        cancel_url=cancel_url,
-        allow_promotion_codes=True,
-    )
-
-    return {"sessionId": session.id}
+    try:
+        session = await stripe_client.create_checkout_session(
+            mode=mode,
+            line_items=line_items,
+            customer_email=user.email,
+            client_reference_id=str(user.id),
+            metadata={"user_id": str(user.id), "pack": requested},
+            success_url=success_url,
+            cancel_url=cancel_url,
+            allow_promotion_codes=True,
+        )
+    except StripeAPIError as e:
+        raise HTTPException(502, f"Stripe: {e}")
+
+    return {"sessionId": session["id"]}
 
 @router.get("/verify-checkout-session")
-def verify_checkout_session(
+async def verify_checkout_session(
     session_id: str,
     user = Depends(get_current_user),
 ):
-    s = stripe.checkout.Session.retrieve(session_id)
+    # ⚡ Session déjà appliquée (webhook ou vérification précédente) : aucun appel Stripe
+    if user.last_checkout_session_id == session_id:
+        cached = stripe_client.cached_checkout_session(session_id) or {}
+        pack = ((cached.get("metadata") or {}).get("pack") or user.plan).lower()
+        return {"ok": True, "pack": pack, "startnow_credits": user.startnow_credits}
+
+    try:
+        s = await stripe_client.retrieve_checkout_session(session_id)  # sessions payées mises en cache
+    except StripeAPIError as e:
+        raise HTTPException(404 if e.status == 404 else 502, f"Stripe: {e}")
     paid = s.get("payment_status") == "paid" or s.get("status") == "complete"
     metadata = s.get("metadata") or {}
     pack = (metadata.get("pack") or "").lower()
@@ -99,13 +113,25 @@ def verify_checkout_session(
     if pack not in ("infinity", "startnow", "startnow-one-time"):
         raise HTTPException(400, "Pack inconnu")
 
-    customer_id = s.get("customer")
-    subscription_id = s.get("subscription")
+    credits = await asyncio.to_thread(
+        _apply_checkout, user.id, session_id, pack, s.get("customer"), s.get("subscription")
+    )
+    if credits is None:
+        raise HTTPException(404, "Utilisateur introuvable")
+
+    return {"ok": True, "pack": pack, "startnow_credits": credits}
 
+def _apply_checkout(
+    user_id: int, session_id: str, pack: str, customer_id: Optional[str], subscription_id: Optional[str]
+) -> Optional[int]:
+    """Applique une session payée (plan, crédit StartNow, IDs Stripe) ; crédits restants, None si user absent."""
     with get_session() as db:
-        me = db.exec(select(User).where(User.id == user.id)).first()
+        # FOR UPDATE : sérialisé avec le webhook checkout.session.completed (un seul crédit par session)
+        me = db.exec(select(User).where(User.id == user_id).with_for_update()).first()
         if not me:
-            raise HTTPException(404, "Utilisateur introuvable")
+            return None
+
+        old_plan = me.plan
 
         # 1) Mise à jour du plan si nécessaire
         if pack == "infinity" and me.plan != "infinity":
@@ -120,6 +146,7 @@ def verify_checkout_session(
             if me.last_checkout_session_id != session_id:
                 me.startnow_credits = (me.startnow_credits or 0) + 1
                 me.last_checkout_session_id = session_id
+                analytics.incr(db, "credits_purchased", pack)
 
         # 3) Stocker les IDs Stripe
         if hasattr(me, "stripe_customer_id") and customer_id:
@@ -127,40 +154,37 @@ def verify_checkout_session(
         if hasattr(me, "stripe_subscription_id") and subscription_id:
             me.stripe_subscription_id = subscription_id
 
+        analytics.record_plan_change(db, old_plan, me.plan)  # 📊 conversion free → payant
         db.add(me)
         db.commit()
-        credits = me.startnow_credits
+        return me.startnow_credits
 
-    return {"ok": True, "pack": pack, "startnow_credits": credits}
+def _store_customer_id(user_id: int, customer_id: str) -> None:
+    with get_session() as s:
+        me = s.get(User, user_id)
+        me.stripe_customer_id = customer_id
+        s.add(me)
+        s.commit()
 
 @router.post("/billing-portal", response_model=PortalOut)
-def create_billing_portal_session(user: User = Depends(get_current_user)):
+async def create_billing_portal_session(user: User = Depends(get_current_user)):
     if not settings.STRIPE_SECRET_KEY:
         raise HTTPException(500, "STRIPE_SECRET_KEY manquant")
     if not settings.FRONTEND_BASE_URL:
         raise HTTPException(500, "FRONTEND_BASE_URL manquant")
 
-    stripe.api_key = settings.STRIPE_SECRET_KEY
-
-    # Récupère/assure le customer_id Stripe
-    with get_session() as s:
-        me = s.get(User, user.id)
-        cid = getattr(me, "stripe_customer_id", None)
-
+    try:
+        # Récupère/assure le customer_id Stripe
+        cid = getattr(user, "stripe_customer_id", None)
         if not cid:
-            # essaie de retrouver par email
-            existing = stripe.Customer.list(email=me.email, limit=1).data
-            if existing:
-                cid = existing[0].id
-            else:
-                created = stripe.Customer.create(email=me.email)
-                cid = created.id
-            me.stripe_customer_id = cid
-            s.add(me)
-            s.commit()
-
-    session = stripe.billing_portal.Session.create(
-        customer=cid,
-        return_url=f"{settings.FRONTEND_BASE_URL}/settings"
-    )
-    return {"url": session.url}
\ No newline at end of file
+            # essaie de retrouver par email, sinon crée
+            cid = await stripe_client.find_or_create_customer(user.email)
+            await asyncio.to_thread(_store_customer_id, user.id, cid)
+
+        session = await stripe_client.create_billing_portal_session(
+            customer=cid,
+            return_url=f"{settings.FRONTEND_BASE_URL}/settings"
+        )
+    except StripeAPIError as e:
+        raise HTTPException(502, f"Stripe: {e}")
+    return {"url": session["url"]}
\ No newline at end of file
@@ -1,22 +1,24 @@
 # backend/routers/deliverables.py
-from pathlib import Path
+import asyncio
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import Optional
-from backend.dependencies import get_current_user, require_startnow
+from backend.dependencies import get_current_user, rate_limit, require_startnow
 from backend.db import get_session
 from backend.models import Deliverable
 from sqlmodel import select
-from fastapi.responses import FileResponse, JSONResponse
 from backend.services.pdf_service import make_pdf_from_deliverable
-from backend.services.deliverable_service import export_pdf_from_html
+from backend.services.deliverable_service import export_pdf_from_html, rerender_deliverable, RerenderError
 from backend.services.calendar_service import ics_from_events
-import os
+from backend.services import asset_store, export_service, storage_service
+from backend.services.download_service import file_download, json_download
+from backend.services.json_codec import ORJSONResponse
 
 router = APIRouter(prefix="/me", tags=["me"])
 
-@router.get("/deliverables")
-def list_deliverables(kind: Optional[str] = None, project_id: Optional[int] = None, user=Depends(get_current_user)) -> list[dict]:
+# ⚡ json_content complets : réponse orjson directe (sans jsonable_encoder ni validation du response_model)
+@router.get("/deliverables", response_model=list[dict])
+def list_deliverables(kind: Optional[str] = None, project_id: Optional[int] = None, user=Depends(get_current_user)) -> ORJSONResponse:
     with get_session() as s:
         from backend.models import Project
         q = select(Deliverable).where(Deliverable.user_id == user.id)
@@ -42,26 +44,27 @@ def list_deliverables(kind: Optional[str] = None, project_id: Optional[int] = No
             "has_file": bool(d.file_path),
             "json": d.json_content,
         })
-    return out
+    return ORJSONResponse(out)
 
-@router.get("/deliverables/{deliverable_id}")
-def get_deliverable(deliverable_id: int, user=Depends(get_current_user)) -> dict:
+@router.get("/deliverables/{deliverable_id}", response_model=dict)
+def get_deliverable(deliverable_id: int, user=Depends(get_current_user)) -> ORJSONResponse:
     with get_session() as s:
         d = s.get(Deliverable, deliverable_id)
         if not d or d.user_id != user.id:
             raise HTTPException(404, "Livrable introuvable")
-    return {
+    return ORJSONResponse({
         "id": d.id,
         "kind": d.kind,
         "title": d.title,
         "created_at": d.created_at.isoformat(),
         "has_file": bool(d.file_path),
         "json": d.json_content,
-    }
+    })
 
-@router.get("/deliverables/{deliverable_id}/download")
+@router.get("/deliverables/{deliverable_id}/download", dependencies=[Depends(rate_limit("download"))])
 def download_deliverable_file(
     deliverable_id: int,
+    request: Request,
     format: Optional[str] = "auto",  # auto|html|json|md|pdf
     user=Depends(get_current_user)
 ):
@@ -75,9 +78,9 @@ def download_deliverable_file(
             j = d.json_content or {}
             ics_path = (j or {}).get("ics_path")
             # 1) Si un fichier ICS existe, on le renvoie tel quel
-            if ics_path and os.path.exists(ics_path):
-                return FileResponse(
-                    ics_path,
+            if ics_path and storage_service.exists(ics_path):
+                return file_download(
+                    request, ics_path,
                     filename=f"{(d.title or d.kind).replace(' ', '_')}.ics",
                     media_type="text/calendar; charset=utf-8"
                 )
@@ -95,16 +98,20 @@ def download_deliverable_file(
                 headers={"Content-Disposition": f'attachment; filename="{filename}"'}
             )
 
-    # 1) Cas fichier existant (landing HTML)
-    if d.file_path and (format in ("auto", "file", "html")):
+    # 1) Cas fichier existant (landing HTML) ; les assets "/assets/..." ne résolvent que sous /public → inlinés
+    if d.file_path and (format in ("auto", "file", "html")) and storage_service.exists(d.file_path):
         filename = d.title or f"{d.kind}-{d.id}.html"
-        return FileResponse(d.file_path, filename=filename, media_type="text/html")
+        ref = asset_store.standalone_html(d.file_path) or d.file_path
+        return file_download(request, ref, filename=filename, media_type="text/html")
 
-    # 2) PDF à la volée
+    # 2) PDF : fichier Playwright existant servi depuis le disque, sinon ReportLab à la volée
     if format == "pdf" or format == "auto":
+        filename = f"{d.kind}-{d.id}.pdf"
+        pdf_path = (d.json_content or {}).get("pdf_path")
+        if storage_service.exists(pdf_path):
+            return file_download(request, pdf_path, filename=filename, media_type="application/pdf")
         try:
             pdf_bytes = make_pdf_from_deliverable(d)
-            filename = f"{d.kind}-{d.id}.pdf"
             return Response(
                 pdf_bytes,
                 media_type="application/pdf",
@@ -114,42 +121,50 @@ def download_deliverable_file(
             # En cas d'erreur de génération PDF, on bascule sur JSON
             print("[PDF ERROR]", e)
 
-    # 3) Fallback JSON
-    filename = f"{d.kind}-{d.id}.json"
-    return JSONResponse(
-        d.json_content or {},
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
-    )
+    # 3) Fallback JSON (sérialisé en flux)
+    return json_download(d.json_content or {}, f"{d.kind}-{d.id}.json")
+
+@router.post("/deliverables/{deliverable_id}/rerender", dependencies=[Depends(rate_limit("premium"))])
+async def rerender_deliverable_endpoint(deliverable_id: int, user=Depends(get_current_user)) -> dict:
+    """Reconstruit HTML + PDF avec les templates actuels depuis le JSON stocké (pas de nouvel appel GPT)."""
+    try:
+        out = await rerender_deliverable(deliverable_id, user_id=user.id)
+    except LookupError:
+        raise HTTPException(404, "Livrable introuvable")
+    except RerenderError as e:
+        raise HTTPException(400, str(e))
+    return {"ok": True, "id": out["id"], "kind": out["kind"], "has_file": True}
 
-@router.get("/{deliverable_id}/pdf")
-async def download_pdf(deliverable_id: int, user=Depends(require_startnow)):
+def _owned_deliverable(deliverable_id: int, user_id: int) -> Deliverable:
     with get_session() as s:
         d = s.get(Deliverable, deliverable_id)
-        if not d or d.user_id != user.id:
+        if not d or d.user_id != user_id:
             raise HTTPException(404, "Livrable introuvable")
+        return d
+
+@router.get("/{deliverable_id}/pdf", dependencies=[Depends(rate_limit("download"))])
+async def download_pdf(deliverable_id: int, request: Request, user=Depends(require_startnow)):
+    # route async : accès DB et stockage (HEAD / GET S3 à froid) dans le threadpool, jamais sur la boucle
+    d = await asyncio.to_thread(_owned_deliverable, deliverable_id, user.id)
+    j = d.json_content or {}
+    filename = f"{d.kind}-{d.id}.pdf"
 
-        j = d.json_content or {}
-
-        # 1) Même flux pour MARKETING **et PLAN** : PDF Playwright depuis l’HTML
-        if d.kind in ("marketing", "plan"):
-            pdf_path = (j or {}).get("pdf_path")
-            if pdf_path and os.path.exists(pdf_path):
-                return FileResponse(pdf_path, media_type="application/pdf",
-                                    filename=Path(pdf_path).name)
-
-            if d.file_path and os.path.exists(d.file_path):
-                new_pdf = await export_pdf_from_html(d.file_path)
-                j["pdf_path"] = new_pdf
-                d.json_content = j
-                s.add(d); s.commit()
-                return FileResponse(new_pdf, media_type="application/pdf",
-                                    filename=Path(new_pdf).name)
-
-        # 2) Fallback générique ReportLab (si jamais pas d’HTML)
-        pdf_bytes = make_pdf_from_deliverable(d)
-        filename = f'{(d.title or d.kind).replace("/", "-")}.pdf'
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
-        )
\ No newline at end of file
+    # 1) PDF Playwright déjà stocké (tous les kinds) : servi en flux (Range, ETag / 304)
+    pdf_path = j.get("pdf_path")
+    if pdf_path and await asyncio.to_thread(storage_service.exists, pdf_path):
+        return await asyncio.to_thread(file_download, request, pdf_path, filename, "application/pdf")
+
+    # 2) MARKETING et PLAN : PDF Playwright généré depuis l’HTML, puis mémorisé
+    if d.kind in ("marketing", "plan") and d.file_path and await asyncio.to_thread(storage_service.exists, d.file_path):
+        new_pdf = await export_pdf_from_html(d.file_path)
+        await asyncio.to_thread(export_service._attach_pdf, d.id, new_pdf)  # + quota (storage_bytes, usage)
+        return await asyncio.to_thread(file_download, request, new_pdf, filename, "application/pdf")
+
+    # 3) Fallback ReportLab (livrables sans PDF stocké ni HTML)
+    pdf_bytes = await asyncio.to_thread(make_pdf_from_deliverable, d)
+    filename = f'{(d.title or d.kind).replace("/", "-")}.pdf'
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
\ No newline at end of file
@@ -1,6 +1,6 @@
 # backend/routers/premium.py
-import base64, mimetypes, os
-import time
+import asyncio
+import os
 from datetime import datetime
 from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
@@ -15,7 +15,7 @@ from backend.services.premium_service import (
     generate_landing, generate_marketing, generate_plan, check_domains_availability as check_domains_namecheap,
     generate_acquisition_structured_for_marketing, generate_business_plan_structured,
 )
-from backend.dependencies import require_startnow, get_current_user
+from backend.dependencies import rate_limit, require_startnow, get_current_user
 from backend.services.deliverable_service import (save_deliverable, write_landing_file, render_offer_report_html,
                                                   render_brand_report_html, render_acquisition_report_html,
                                                   render_business_plan_html,
@@ -23,10 +23,11 @@ from backend.services.deliverable_service import (save_deliverable, write_landin
 from backend.db import get_session
 from backend.models import Project, User, Deliverable
 from backend.services.deliverable_service import STORAGE_DIR
+from backend.services import analytics, asset_store, compression, llm_usage, storage_service
 from backend.services.domain_service import suggest_domains, check_domains_availability as check_domains_domainr
 import json
 
-router = APIRouter(prefix="/premium", tags=["premium"])
+router = APIRouter(prefix="/premium", tags=["premium"], dependencies=[Depends(rate_limit("premium"))])
 
 def _get_project_and_unlock_if_needed(user_id: int, project_id: int) -> Project:
     """
@@ -47,25 +48,18 @@ def _get_project_and_unlock_if_needed(user_id: int, project_id: int) -> Project:
             me.startnow_credits -= 1
             proj.premium_unlocked = True
             s.add_all([me, proj])
+            analytics.incr(s, "credits_consumed")
             s.commit()
             s.refresh(proj)
 
         # ⚠️ On renvoie toujours le projet, qu’il soit déjà débloqué ou non
         return proj
 
-def _data_uri_from_file(path: str | None) -> str | None:
-    if not path or not os.path.exists(path):
-        return None
-    mime, _ = mimetypes.guess_type(path)
-    mime = mime or "application/octet-stream"
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    return f"data:{mime};base64,{b64}"
-
 def _extract_brand_for_project(project_id: int):
     """
-    Retourne (brand_dict, logo_data_uri) à partir du dernier deliverable 'brand'.
+    Retourne (brand_dict, logo_url) à partir du dernier deliverable 'brand'.
     Tente plusieurs clés possibles: logo_svg, logo_png, logo_files, logos, assets.
+    Le logo est déposé dans le store d'assets (dédupliqué par hash) → URL /assets/..., plus de base64 dans l'HTML.
     """
     with get_session() as s:
         d = (
@@ -80,24 +74,22 @@ def _extract_brand_for_project(project_id: int):
         # 1/ SVG inline
         svg = j.get("logo_svg")
         if isinstance(svg, str) and svg.strip().startswith("<svg"):
-            # encodage inline
-            payload = base64.b64encode(svg.encode("utf-8")).decode("utf-8")
-            return j, f"data:image/svg+xml;base64,{payload}"
+            return j, asset_store.put_svg(svg).url
 
         # 2/ Fichiers
         for key in ("logo_png", "logo_file", "logo", "logo_path"):
-            uri = _data_uri_from_file(j.get(key))
-            if uri:
-                return j, uri
+            asset = asset_store.put_file(j.get(key))
+            if asset:
+                return j, asset.url
 
         # 3/ Listes
         for key in ("logo_files", "logos", "assets"):
             val = j.get(key)
             if isinstance(val, list):
                 for candidate in val:
-                    uri = _data_uri_from_file(candidate)
-                    if uri:
-                        return j, uri
+                    asset = asset_store.put_file(candidate) if isinstance(candidate, str) else None
+                    if asset:
+                        return j, asset.url
         return j, None
 
 @router.post("/offer", response_model=OfferResponse)
@@ -107,6 +99,7 @@ async def offer_endpoint(
     user=Depends(require_startnow),
 ):
     proj = _get_project_and_unlock_if_needed(user.id, project_id)
+    llm_usage.tag(user_id=user.id, project_id=project_id, kind="offer")
 
     # 1) Génère l'offre (data.offer est une STRING JSON)
     data = await generate_offer(profil, idea_snapshot=proj.idea_snapshot)
@@ -131,7 +124,7 @@ async def offer_endpoint(
     )
 
     # 4) Écriture HTML + 5) Export PDF identique au HTML
-    fp_html = write_landing_file(user.id, html)
+    fp_html = await asyncio.to_thread(write_landing_file, user.id, html)
     pdf_path = await export_pdf_from_html(fp_html, format_="A4")
 
     # 6) Sauvegarde livrable complet (JSON + chemins)
@@ -158,6 +151,7 @@ async def model_endpoint(
     user=Depends(require_startnow),
 ):
     proj = _get_project_and_unlock_if_needed(user.id, project_id)
+    llm_usage.tag(user_id=user.id, project_id=project_id, kind="model")
 
     # 1) Génère un BP structuré (data lourde)
     bp = await generate_business_plan_structured(profil, idea_snapshot=proj.idea_snapshot)
@@ -166,7 +160,7 @@ async def model_endpoint(
     idea_text = proj.idea_snapshot.get("idee") if isinstance(proj.idea_snapshot, dict) else None
     html = render_business_plan_html(bp, project_title=f"Business Plan — {proj.title}", idea_text=idea_text)
 
-    fp_html = write_landing_file(user.id, html)
+    fp_html = await asyncio.to_thread(write_landing_file, user.id, html)
     pdf_path = await export_pdf_from_html(fp_html, format_="A4")
 
     # 3) Sauvegarde livrable (JSON complet + chemins)
@@ -188,6 +182,7 @@ async def brand_endpoint(
     user=Depends(require_startnow),
 ):
     proj = _get_project_and_unlock_if_needed(user.id, project_id)
+    llm_usage.tag(user_id=user.id, project_id=project_id, kind="brand")
     data = await generate_brand(profil, idea_snapshot=proj.idea_snapshot)
 
     # Récupérer le bloc structuré (même logique que generate_brand) pour le stocker
@@ -222,7 +217,7 @@ async def brand_endpoint(
         domain_checks=domain_checks,
     )
     # HTML + PDF
-    fp_html = write_landing_file(user.id, html)
+    fp_html = await asyncio.to_thread(write_landing_file, user.id, html)
     pdf_path = await export_pdf_from_html(fp_html, format_="A4")
 
     json_obj = {
@@ -247,9 +242,10 @@ async def landing_endpoint(
     user=Depends(require_startnow),
 ):
     proj = _get_project_and_unlock_if_needed(user.id, project_id)
+    llm_usage.tag(user_id=user.id, project_id=project_id, kind="landing")
 
     # Brand + logo (si existants)
-    brand, logo_data_uri = _extract_brand_for_project(project_id)
+    brand, logo_url = await asyncio.to_thread(_extract_brand_for_project, project_id)  # logo → store d'assets (PUT S3)
 
     # Injecter project_id dans idea_snapshot (pour le champ hidden du form)
     idea_snapshot = dict(proj.idea_snapshot or {})
@@ -259,11 +255,11 @@ async def landing_endpoint(
         profil,
         idea_snapshot=idea_snapshot,
         brand=brand,
-        logo_data_uri=logo_data_uri,
+        logo_url=logo_url,
     )
 
     html = data.html
-    fp = write_landing_file(user.id, html)
+    fp = await asyncio.to_thread(write_landing_file, user.id, html)
 
     # URL publique: /public/... (voir section 3 pour le montage)
     rel = os.path.relpath(fp, os.path.abspath(STORAGE_DIR))
@@ -300,16 +296,17 @@ async def publish_landing_endpoint(
     if not d or not d.file_path:
         raise HTTPException(status_code=404, detail="Aucune landing HTML trouvée pour ce projet.")
 
-    src = Path(d.file_path)
-    if not src.exists():
+    if not await asyncio.to_thread(storage_service.exists, d.file_path):
         raise HTTPException(status_code=404, detail="Fichier HTML introuvable.")
 
-    html = src.read_text(encoding="utf-8")
+    html = (await asyncio.to_thread(storage_service.read_bytes, d.file_path)).decode("utf-8")
 
     # Écrire dans /public/landings/<id>/index.html
     out_dir = Path(STORAGE_DIR) / "landings" / str(project_id)
     out_dir.mkdir(parents=True, exist_ok=True)
     (out_dir / "index.html").write_text(html, encoding="utf-8")
+    # 🗜️ variantes index.html.br / .gz compressées une fois pour toutes (brotli q11 : hors boucle d'événements)
+    await asyncio.to_thread(compression.write_precompressed, out_dir / "index.html", html.encode("utf-8"))
 
     # URL absolue backend (évite le relatif côté Netlify)
     base = str(request.base_url).rstrip("/")
@@ -334,6 +331,7 @@ async def marketing_endpoint(
     user=Depends(require_startnow),
 ):
     proj = _get_project_and_unlock_if_needed(user.id, project_id)
+    llm_usage.tag(user_id=user.id, project_id=project_id, kind="marketing")
 
     # 1) Retour texte (compatibilité API existante)
     data = await generate_marketing(profil, idea_snapshot=proj.idea_snapshot)
@@ -354,7 +352,7 @@ async def marketing_endpoint(
     )
 
     # 3) On sauvegarde d'abord l'HTML (bouton existant)
-    fp_html = write_landing_file(user.id, html)
+    fp_html = await asyncio.to_thread(write_landing_file, user.id, html)
 
     # 4) Export PDF identique au HTML
     pdf_path = await export_pdf_from_html(fp_html, format_="A4")
@@ -377,6 +375,7 @@ async def plan_endpoint(
     user=Depends(require_startnow),
 ):
     proj = _get_project_and_unlock_if_needed(user.id, project_id)
+    llm_usage.tag(user_id=user.id, project_id=project_id, kind="plan")
 
     # 1) Génération du plan (weeks + schedule)
     data = await generate_plan(profil, idea_snapshot=proj.idea_snapshot, project_id=project_id)
@@ -384,7 +383,7 @@ async def plan_endpoint(
 
     # 2) Rendu HTML identique aux autres
     html = render_action_plan_html(plan_dict, project_title=f"Plan d'action — {proj.title}")
-    fp_html = write_landing_file(user.id, html)  # ✅ comme “marketing”
+    fp_html = await asyncio.to_thread(write_landing_file, user.id, html)  # ✅ comme “marketing”
 
     # 3) PDF depuis l’HTML (identique visuellement)
     pdf_path = await export_pdf_from_html(fp_html, format_="A4")
@@ -393,10 +392,9 @@ async def plan_endpoint(
     schedule_raw = plan_dict.get("schedule") or []
     ics_str = ics_from_events(f"Plan d'action — {proj.title}", schedule_raw)
 
-    base = Path(STORAGE_DIR) / f"user_{user.id}" / f"project_{project_id}" / "plan"
-    base.mkdir(parents=True, exist_ok=True)
-    ics_fp = base / f"plan_{int(time.time())}.ics"
-    ics_fp.write_text(ics_str, encoding="utf-8")
+    ics_fp = await asyncio.to_thread(
+        storage_service.put_content, ics_str.encode("utf-8"), "ics", "text/calendar; charset=utf-8"
+    )
 
     # 5) Sauvegarde livrable complet (HTML principal + JSON + PDF + ICS)
     payload = {**plan_dict, "pdf_path": pdf_path, "ics_path": str(ics_fp)}
@@ -1,11 +1,15 @@
 # backend/routers/projects.py
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlmodel import select
 from backend.db import get_session
-from backend.dependencies import get_current_user
+from backend.dependencies import get_current_user, rate_limit
 from backend.models import Project, Deliverable, BusinessIdea
 from sqlalchemy import delete
+from backend.services import export_service, storage_gc
+from fastapi.responses import StreamingResponse
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -83,10 +87,43 @@ def delete_project(project_id: int, user=Depends(get_current_user)):
         proj = session.get(Project, project_id)
         if not proj or proj.user_id != user.id:
             raise HTTPException(status_code=404, detail="Projet introuvable ou non autorisé")
-        # supprime d’abord les deliverables liés
+        # supprime d’abord les deliverables liés (usage disque décrémenté ; fichiers → GC stockage)
+        storage_gc.release_deliverables(session, Deliverable.project_id == project_id)
         session.exec(
             delete(Deliverable).where(Deliverable.project_id == project_id)
         )
         session.delete(proj)
         session.commit()
-    return
\ No newline at end of file
+    return
+
+
+def _export_items(project_id: int, user_id: int) -> tuple[str, list[Deliverable]]:
+    with get_session() as s:
+        proj = s.get(Project, project_id)
+        if not proj or proj.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Projet introuvable ou non autorisé")
+        items = s.exec(
+            select(Deliverable)
+            .where(Deliverable.project_id == project_id, Deliverable.user_id == user_id)
+            .order_by(Deliverable.created_at)
+        ).all()
+        return proj.title, list(items)
+
+
+@router.get("/{project_id}/export.zip", dependencies=[Depends(rate_limit("download"))])
+async def export_project_zip(project_id: int, user=Depends(get_current_user)):
+    """
+    ZIP de tous les livrables du projet (PDF + HTML + ICS), streamé à la volée.
+    Les PDF manquants sont générés avant le début du flux.
+    """
+    title, items = await asyncio.to_thread(_export_items, project_id, user.id)
+    if not items:
+        raise HTTPException(status_code=404, detail="Aucun livrable à exporter pour ce projet")
+
+    entries = await export_service.project_zip_entries(items)
+    filename = export_service.zip_filename(title)
+    return StreamingResponse(
+        export_service.stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
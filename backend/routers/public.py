@@ -9,9 +9,11 @@ from backend.schemas import ProfilRequest, BusinessResponse
 from backend.models import BusinessIdea, User
 from backend.db import get_session
 from backend.services.openai_service import generate_business_idea
+from backend.services import analytics, llm_usage
 from backend.dependencies import (
     get_current_user,
     get_current_user_optional,
+    rate_limit,
     require_infinity_or_startnow,
 )
 
@@ -23,13 +25,14 @@ def _enforce_free_quota(user: User):
     if user.plan == "free" and (user.idea_used or 0) >= 1:
         # 402 = Payment Required -> le front sait rediriger vers /premium
         raise HTTPException(status_code=402, detail="FREE_LIMIT_REACHED")
-@router.post("/generate", response_model=BusinessResponse)
+@router.post("/generate", response_model=BusinessResponse, dependencies=[Depends(rate_limit("idea"))])
 async def generate(
     profil: ProfilRequest,
     user: User = Depends(get_current_user),   # ✅ auth obligatoire
 ):
     # ✅ blocage avant tout traitement
     _enforce_free_quota(user)
+    llm_usage.tag(user_id=user.id, kind="idea")
 
     max_attempts = 3
     raw = None
@@ -63,6 +66,7 @@ async def generate(
             potential_rating=data.get("potential_rating"),
         )
         session.add(idea)
+        analytics.incr(session, "ideas", user.plan)  # 📊 rollup idées / plan
         session.commit()
         session.refresh(idea)
 
@@ -119,7 +123,7 @@ def delete_idea(idea_id: int, user=Depends(get_current_user)):
         session.commit()
     return
 
-@router.post("/landing/lead")
+@router.post("/landing/lead", dependencies=[Depends(rate_limit("lead"))])
 async def landing_lead(
     project_id: int = Form(...),
     name: str = Form(...),
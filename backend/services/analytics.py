@@ -0,0 +1,100 @@
+# backend/services/analytics.py
+"""
+Analytics admin par rollups journaliers (table daily_rollups : jour × métrique × dimension).
+
+Chaque événement métier incrémente sa ligne de rollup dans SA transaction (upsert atomique) :
+  deliverables/<kind>      save_deliverable
+  ideas/<plan>             /api/generate
+  signups                  /register
+  conversions/<pack>       passage free → payant (verify_checkout_session ou webhook, le premier gagne)
+  credits_purchased/<pack> crédit StartNow ajouté (une fois par Checkout Session)
+  credits_consumed         déblocage premium d'un projet
+Les dashboards ne lisent que les rollups : coût proportionnel à la période, jamais à la taille des tables.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+
+from backend.db import get_session
+from backend.models import DailyRollup
+
+PAID_PLANS = ("infinity", "startnow")
+
+
+def incr(session, metric: str, dim: str = "", n: int = 1, day: Optional[date] = None) -> None:
+    """Upsert value += n ; à appeler dans la transaction qui enregistre l'événement."""
+    if not n:
+        return
+    stmt = pg_insert(DailyRollup).values(
+        day=day or datetime.utcnow().date(), metric=metric, dim=dim or "", value=n,
+    ).on_conflict_do_update(
+        index_elements=[DailyRollup.day, DailyRollup.metric, DailyRollup.dim],
+        set_={"value": DailyRollup.value + n},
+    )
+    session.execute(stmt)
+
+
+def record_plan_change(session, old_plan: Optional[str], new_plan: Optional[str]) -> None:
+    if (old_plan or "free") == "free" and new_plan in PAID_PLANS:
+        incr(session, "conversions", new_plan)
+
+
+def get_stats(days: int = 30, end: Optional[date] = None) -> dict:
+    """Séries par métrique / dimension sur [end - days + 1, end] + totaux + taux de conversion."""
+    end = end or datetime.utcnow().date()
+    start = end - timedelta(days=max(days, 1) - 1)
+    with get_session() as s:
+        rows = s.exec(
+            select(DailyRollup.day, DailyRollup.metric, DailyRollup.dim, DailyRollup.value)
+            .where(DailyRollup.day >= start, DailyRollup.day <= end)
+        ).all()
+
+    series: dict[str, dict[str, dict[str, int]]] = {}
+    totals: dict[str, dict[str, int]] = {}
+    for day, metric, dim, value in rows:
+        series.setdefault(metric, {}).setdefault(dim, {})[day.isoformat()] = value
+        t = totals.setdefault(metric, {})
+        t[dim] = t.get(dim, 0) + value
+
+    signups = sum(totals.get("signups", {}).values())
+    conversions = sum(totals.get("conversions", {}).values())
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "series": series,
+        "totals": totals,
+        "conversion_rate": round(conversions / signups, 4) if signups else None,
+    }
+
+
+def backfill(since: Optional[date] = None) -> dict:
+    """
+    Reconstruit les rollups reconstructibles depuis les tables (deliverables, idées, inscriptions)
+    — à lancer une fois après déploiement. Les idées sont rangées sous le plan ACTUEL de l'utilisateur ;
+    conversions et crédits ne sont pas historisés en base → comptés à partir du déploiement seulement.
+    """
+    since = since or date(1970, 1, 1)
+    queries = {
+        "deliverables": "SELECT created_at::date, kind, count(*) FROM deliverables WHERE created_at >= :since GROUP BY 1, 2",
+        "ideas": """SELECT i.created_at::date, COALESCE(u.plan, 'free'), count(*)
+                    FROM business_ideas i LEFT JOIN users u ON u.id = i.user_id
+                    WHERE i.created_at >= :since GROUP BY 1, 2""",
+        "signups": "SELECT created_at::date, '', count(*) FROM users WHERE created_at >= :since GROUP BY 1, 2",
+    }
+    out: dict[str, int] = {}
+    with get_session() as s:
+        for metric, sql in queries.items():
+            s.execute(text("DELETE FROM daily_rollups WHERE metric = :m AND day >= :since"), {"m": metric, "since": since})
+            res = s.execute(text(f"""
+                INSERT INTO daily_rollups (day, metric, dim, value)
+                SELECT d, :m, COALESCE(dim, ''), n FROM ({sql}) AS t(d, dim, n)
+            """), {"m": metric, "since": since})
+            out[metric] = res.rowcount
+        s.commit()
+    return out
+
@@ -0,0 +1,200 @@
+# backend/services/asset_store.py
+"""
+Store d'assets (logos, images) adressé par contenu.
+
+Chaque fichier est rangé (via storage_service) sous la clé assets/<2 premiers hex>/<sha256>.<ext> :
+deux logos identiques ne sont stockés qu'une fois, et une URL d'asset ne change jamais de contenu
+→ servie avec un Cache-Control "immutable" (ImmutableStaticFiles monté sur /assets en stockage local ;
+avec S3, ASSETS_URL_PREFIX pointe vers le bucket / CDN).
+
+Les HTML (landing, rapports) référencent les assets par URL. L'inlining en data URI n'est
+plus qu'un repli explicite pour l'export PDF (localize_for_pdf(..., inline=True)) et pour les
+copies qui quittent le site (téléchargement HTML, export.zip) : une URL "/assets/..." relative à
+la racine n'y résout plus rien (standalone_html).
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from starlette.staticfiles import StaticFiles
+
+from backend.services import storage_service
+
+ASSETS_DIR = os.path.join(storage_service.STORAGE_DIR, "assets")
+# Préfixe des URLs publiques : "/assets" (même origine que l'API) ou une URL absolue (CDN)
+ASSETS_URL_PREFIX = os.getenv("ASSETS_URL_PREFIX", "/assets").rstrip("/")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_EXT_BY_MIME = {
+    "image/svg+xml": "svg",
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "image/x-icon": "ico",
+}
+_ASSET_URL_RE = re.compile(re.escape(ASSETS_URL_PREFIX) + r"/([0-9a-f]{2})/([0-9a-f]{64})\.([a-z0-9]{1,5})")
+_DATA_URI_RE = re.compile(r"^data:([\w.+-]+/[\w.+-]+)?(;base64)?,(.*)$", re.S)
+
+
+@dataclass(frozen=True)
+class Asset:
+    digest: str
+    ext: str
+    mime: str
+    size: int
+
+    @property
+    def rel(self) -> str:
+        return f"{self.digest[:2]}/{self.digest}.{self.ext}"
+
+    @property
+    def key(self) -> str:
+        return f"assets/{self.rel}"
+
+    @property
+    def ref(self) -> str:
+        return storage_service.get_storage().ref(self.key)
+
+    @property
+    def url(self) -> str:
+        return f"{ASSETS_URL_PREFIX}/{self.rel}"
+
+
+def _ext_for(mime: str) -> str:
+    if mime in _EXT_BY_MIME:
+        return _EXT_BY_MIME[mime]
+    guessed = mimetypes.guess_extension(mime) or ".bin"
+    return guessed.lstrip(".")
+
+
+def put_bytes(data: bytes, mime: str = "application/octet-stream") -> Asset:
+    """Stocke `data` (dédupliqué par sha256 ; écriture atomique côté backend local)."""
+    digest = hashlib.sha256(data).hexdigest()
+    asset = Asset(digest=digest, ext=_ext_for(mime), mime=mime, size=len(data))
+    if not storage_service.exists(asset.ref):  # ✅ déjà présent : contenu identique garanti par le hash
+        storage_service.put_key(asset.key, data, mime, IMMUTABLE_CACHE_CONTROL)
+    return asset
+
+
+def put_file(path: str | None) -> Optional[Asset]:
+    if not path or not os.path.isfile(path):
+        return None
+    mime, _ = mimetypes.guess_type(path)
+    with open(path, "rb") as f:
+        return put_bytes(f.read(), mime or "application/octet-stream")
+
+
+def put_svg(svg: str) -> Asset:
+    return put_bytes(svg.encode("utf-8"), "image/svg+xml")
+
+
+def put_data_uri(uri: str | None) -> Optional[Asset]:
+    """Convertit une data URI héritée (logos base64) en asset."""
+    m = _DATA_URI_RE.match(uri or "")
+    if not m:
+        return None
+    mime = m.group(1) or "text/plain"
+    try:
+        if m.group(2):
+            data = base64.b64decode(m.group(3), validate=False)
+        else:
+            from urllib.parse import unquote_to_bytes
+            data = unquote_to_bytes(m.group(3))
+    except (binascii.Error, ValueError):
+        return None
+    return put_bytes(data, mime)
+
+
+def to_asset_url(src: str | None) -> Optional[str]:
+    """
+    Normalise une source d'image en URL d'asset :
+    chemin de fichier local → asset, data URI → asset, URL http(s)/asset → inchangée.
+    """
+    if not src:
+        return None
+    if src.startswith("data:"):
+        a = put_data_uri(src)
+        return a.url if a else None
+    if src.startswith(("http://", "https://")) or _ASSET_URL_RE.match(src):
+        return src
+    a = put_file(src)
+    return a.url if a else None
+
+
+def data_uri(asset: Asset) -> str:
+    b64 = base64.b64encode(storage_service.read_bytes(asset.ref)).decode("ascii")
+    return f"data:{asset.mime};base64,{b64}"
+
+
+def _asset_from_match(m: re.Match) -> Asset:
+    ext = m.group(3)
+    mime = mimetypes.guess_type(f"x.{ext}")[0] or "application/octet-stream"
+    return Asset(digest=m.group(2), ext=ext, mime=mime, size=0)
+
+
+def localize_for_pdf(html_path: str, inline: bool = False) -> str:
+    """
+    Chromium imprime le HTML depuis file:// : les URLs /assets/... n'y sont pas résolues.
+    Écrit une copie temporaire où chaque asset pointe vers son fichier local (ou, si
+    inline=True, vers une data URI — repli explicite). Retourne le chemin à imprimer
+    (le fichier d'origine s'il ne référence aucun asset) ; l'appelant supprime la copie.
+    """
+    src = Path(html_path)
+    html_str = src.read_text(encoding="utf-8")
+    if not _ASSET_URL_RE.search(html_str):
+        return str(src)
+
+    def sub(m: re.Match) -> str:
+        a = _asset_from_match(m)
+        if not storage_service.exists(a.ref):
+            return m.group(0)
+        return data_uri(a) if inline else Path(storage_service.local_path(a.ref)).resolve().as_uri()
+
+    fd, out = tempfile.mkstemp(suffix=".print.html", dir=storage_service.temp_dir())
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(_ASSET_URL_RE.sub(sub, html_str))
+    return out
+
+
+def standalone_html(ref: str) -> Optional[str]:
+    """
+    HTML autonome pour un téléchargement / l'export ZIP : assets "/assets/..." inlinés en data URI.
+    Retourne le chemin local d'une copie sur disque (.tmp/standalone/<sha256 du source>.html, réutilisée
+    tant que le source ne change pas → ETag stable, jamais chargée entière en mémoire par l'appelant).
+    None si le fichier peut partir tel quel (aucun asset, ou préfixe absolu type CDN).
+    """
+    if ASSETS_URL_PREFIX.startswith(("http://", "https://")):
+        return None
+    src = Path(storage_service.local_path(ref))
+    data = src.read_bytes()
+    if not _ASSET_URL_RE.search(data.decode("utf-8", errors="replace")):
+        return None
+    spool_dir = Path(storage_service.temp_dir()) / "standalone"
+    spool_dir.mkdir(exist_ok=True)
+    target = spool_dir / f"{hashlib.sha256(data).hexdigest()}.html"
+    if target.exists():
+        os.utime(target)  # encore servie : le GC (objets récents épargnés) ne la reprend pas
+        return str(target)
+    out = localize_for_pdf(str(src), inline=True)
+    os.replace(out, target)
+    return str(target)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles + Cache-Control immutable (les noms sont des hash de contenu)."""
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -1,9 +1,22 @@
+import os
 from datetime import datetime, timedelta
+from typing import Optional
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from backend.config import settings
+from backend.services import hash_pool
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# coût bcrypt ; min = max = coût courant → needs_update() vrai pour tout hash à un autre coût,
+# ré-écrit de façon transparente à la prochaine connexion réussie
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -11,6 +24,17 @@ def hash_password(password: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
+# ⚡ variantes async : exécutées dans le pool de hachage dédié (borné, délestage 503)
+async def hash_password_async(password: str) -> str:
+    return await hash_pool.run("hash", pwd_context.hash, password)
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await hash_pool.run("verify", pwd_context.verify, plain, hashed)
+
+async def verify_and_update_async(plain: str, hashed: str) -> tuple[bool, Optional[str]]:
+    """(mot de passe valide ?, nouveau hash si les paramètres ont changé sinon None)."""
+    return await hash_pool.run("verify", pwd_context.verify_and_update, plain, hashed)
+
 def create_access_token(sub: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"exp": expire, "sub": str(sub)}
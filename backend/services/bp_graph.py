@@ -0,0 +1,129 @@
+# backend/services/bp_graph.py
+"""
+Petit moteur de graphe de calcul (DAG) mémoïsé pour les étapes chiffrées du business plan.
+
+Chaque étape déclare ses entrées et ses sorties. Au run suivant (même projet), seules les
+étapes en aval d'une entrée modifiée sont recalculées ; les autres sont reprises telles quelles.
+Les durées par étape sont mesurées à chaque exécution.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+
+
+@dataclass
+class GraphState:
+    """Mémoire d'un run précédent : empreinte des entrées externes + valeurs produites."""
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+    values: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class GraphRun:
+    values: Dict[str, Any]
+    timings_ms: Dict[str, float]
+    recomputed: list[str]
+    reused: list[str]
+
+
+def _fingerprint(value: Any) -> str:
+    raw = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class StageGraph:
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages: list[Stage] = list(stages)
+        produced: Dict[str, str] = {}
+        for st in self.stages:
+            for out in st.outputs:
+                if out in produced:
+                    raise ValueError(f"Sortie '{out}' produite par '{produced[out]}' et '{st.name}'")
+                produced[out] = st.name
+        self.produced_by = produced
+        # entrées externes = tout ce qui n'est produit par aucune étape
+        self.external_inputs = sorted({i for st in self.stages for i in st.inputs if i not in produced})
+        self._check_order()
+
+    def _check_order(self) -> None:
+        # les étapes sont déclarées dans un ordre topologique : on le vérifie une fois
+        seen = set(self.external_inputs)
+        for st in self.stages:
+            missing = [i for i in st.inputs if i not in seen]
+            if missing:
+                raise ValueError(f"Étape '{st.name}' : entrées non disponibles {missing}")
+            seen.update(st.outputs)
+
+    def run(self, inputs: Dict[str, Any], state: Optional[GraphState] = None) -> GraphRun:
+        missing = [k for k in self.external_inputs if k not in inputs]
+        if missing:
+            raise KeyError(f"Entrées manquantes: {missing}")
+
+        state = state if state is not None else GraphState()
+        dirty: set[str] = set()
+        fingerprints: Dict[str, str] = {}
+        for k in self.external_inputs:
+            fingerprints[k] = _fingerprint(inputs[k])
+            if state.fingerprints.get(k) != fingerprints[k]:
+                dirty.add(k)
+
+        env: Dict[str, Any] = {k: inputs[k] for k in self.external_inputs}
+        timings: Dict[str, float] = {}
+        recomputed: list[str] = []
+        reused: list[str] = []
+        for st in self.stages:
+            cached = all(o in state.values for o in st.outputs)
+            if cached and not any(i in dirty for i in st.inputs):
+                for o in st.outputs:
+                    env[o] = state.values[o]
+                reused.append(st.name)
+                continue
+
+            t0 = time.perf_counter()
+            result = st.fn(**{i: env[i] for i in st.inputs})
+            timings[st.name] = round((time.perf_counter() - t0) * 1000.0, 3)
+            if len(st.outputs) == 1:
+                result = (result,)
+            for o, v in zip(st.outputs, result):
+                env[o] = v
+                dirty.add(o)
+            recomputed.append(st.name)
+
+        state.fingerprints = fingerprints
+        state.values = {k: v for k, v in env.items() if k in self.produced_by}
+        return GraphRun(values=env, timings_ms=timings, recomputed=recomputed, reused=reused)
+
+
+class StateCache:
+    """LRU des états de graphe par clé (ex: (user_id, project_id))."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Any, GraphState]" = OrderedDict()
+
+    def get(self, key: Any) -> GraphState:
+        st = self._items.get(key)
+        if st is None:
+            st = GraphState()
+            self._items[key] = st
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        else:
+            self._items.move_to_end(key)
+        return st
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,244 @@
+# backend/services/compression.py
+"""
+Compression des réponses (gzip / brotli) et variantes précompressées des pages statiques.
+
+- CompressionMiddleware : middleware ASGI pur. Compresse si le client l'accepte (Accept-Encoding,
+  br préféré à gzip à q égal), si le type est textuel (COMPRESSIBLE_TYPES) et si le corps dépasse
+  COMPRESSION_MIN_BYTES. Réponses en flux (StreamingResponse, FileResponse) compressées au fil des
+  morceaux. Jamais : réponse déjà encodée, 204 / 206 / 304, Cache-Control no-transform, requête Range.
+- write_precompressed : écrit <fichier>.br et <fichier>.gz (qualité maximale, une seule fois) à la publication.
+- PrecompressedStaticFiles : StaticFiles qui sert la variante .br / .gz négociée si elle est à jour
+  → un hit statique ne paie plus le CPU de compression.
+brotli est optionnel : absent → gzip seulement.
+"""
+from __future__ import annotations
+
+import gzip
+import os
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépend du déploiement
+    brotli = None
+
+MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))  # à la volée : rapide ; précompressé : 11
+COMPRESSIBLE_TYPES = tuple(
+    t.strip() for t in os.getenv(
+        "COMPRESSION_TYPES",
+        "text/,application/json,application/javascript,application/xml,application/manifest+json,image/svg+xml",
+    ).split(",") if t.strip()
+)
+_EXCLUDED_TYPES = ("text/event-stream",)
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+_SUFFIX = {"br": ".br", "gzip": ".gz"}
+
+
+def negotiate(accept_encoding: Optional[str], offered: tuple[str, ...] | list[str] = ENCODINGS) -> Optional[str]:
+    """Meilleur encodage accepté parmi `offered` (q-values, "*" géré) ; None → identité."""
+    if not accept_encoding:
+        return None
+    q: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        q[name.strip().lower()] = weight
+    best, best_q = None, 0.0
+    for enc in offered:  # ordre de préférence serveur
+        w = q.get(enc, q.get("*", 0.0))
+        if w > best_q:
+            best, best_q = enc, w
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    ct = content_type.split(";", 1)[0].strip().lower()
+    return ct.startswith(COMPRESSIBLE_TYPES) and not ct.startswith(_EXCLUDED_TYPES)
+
+
+class _Encoder:
+    def __init__(self, encoding: str, quality: Optional[int] = None):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY if quality is None else quality)
+        else:
+            self._c = zlib.compressobj(GZIP_LEVEL if quality is None else quality, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # flush à chaque morceau : un flux (JSON, fichier) reste lisible au fil de l'eau
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.flush()
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.finish()
+        return self._c.compress(data) + self._c.flush()
+
+
+def _weak_etag(etag: Optional[str]) -> Optional[str]:
+    # ETag fort = octets identiques : la représentation compressée ne l'est plus
+    if not etag or etag.startswith("W/"):
+        return etag
+    return f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """Middleware ASGI : compression gzip / brotli selon Accept-Encoding, type et taille."""
+
+    def __init__(self, app, min_bytes: int = MIN_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        req = Headers(scope=scope)
+        encoding = negotiate(req.get("accept-encoding"))
+        if encoding is None or "range" in req:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[dict] = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, passthrough
+            mtype = message["type"]
+            if mtype == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (message["status"] < 200 or message["status"] in (204, 206, 304)
+                        or "content-encoding" in headers
+                        or "no-transform" in headers.get("cache-control", "")
+                        or not is_compressible(headers.get("content-type"))
+                        or int(headers.get("content-length") or self.min_bytes) < self.min_bytes):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = {**message, "headers": list(message["headers"])}  # en attente du premier morceau (taille connue ou flux ?)
+                return
+            if passthrough or mtype != "http.response.body":
+                if start is not None:  # ex. http.response.pathsend : on sert tel quel
+                    await send(start)
+                    start = None
+                    passthrough = True
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not more and len(body) < self.min_bytes:
+                    await send(start)
+                    start = None
+                    passthrough = True
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["etag"] = _weak_etag(headers["etag"])
+                if "accept-ranges" in headers:
+                    del headers["accept-ranges"]
+                if more:
+                    if "content-length" in headers:
+                        del headers["content-length"]
+                    await send(start)
+                    start = None
+                    await send({"type": "http.response.body", "body": encoder.chunk(body), "more_body": True})
+                    return
+                out = encoder.finish(body)
+                headers["content-length"] = str(len(out))
+                await send(start)
+                start = None
+                await send({"type": "http.response.body", "body": out, "more_body": False})
+                return
+            await send({"type": "http.response.body",
+                        "body": encoder.chunk(body) if more else encoder.finish(body), "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Variantes précompressées
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def write_precompressed(path: str | os.PathLike, data: Optional[bytes] = None) -> list[str]:
+    """Écrit <path>.br / <path>.gz (qualité max) à côté du fichier ; supprime une variante qui ne gagne rien."""
+    path = Path(path)
+    if data is None:
+        data = path.read_bytes()
+    written = []
+    for enc in ("br", "gzip"):
+        variant = path.with_name(path.name + _SUFFIX[enc])
+        if enc == "br" and brotli is None:
+            variant.unlink(missing_ok=True)  # ancienne variante devenue périmée
+            continue
+        out = brotli.compress(data, quality=11) if enc == "br" else gzip.compress(data, compresslevel=9, mtime=0)
+        if len(data) < MIN_BYTES or len(out) >= len(data):
+            variant.unlink(missing_ok=True)
+            continue
+        _write_atomic(variant, out)
+        written.append(str(variant))
+    return written
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles + variantes .br / .gz négociées (si plus récentes que l'original)."""
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if not isinstance(response, FileResponse) or response.status_code != 200:
+            return response
+        if not is_compressible(response.media_type):
+            return response
+        req = Headers(scope=scope)
+        original = Path(response.path)
+        st = response.stat_result or os.stat(original)
+        available = [enc for enc in ENCODINGS if self._fresh(original.with_name(original.name + _SUFFIX[enc]), st)]
+        if not available:
+            return response
+        response.headers.add_vary_header("Accept-Encoding")
+        encoding = negotiate(req.get("accept-encoding"), available)
+        if encoding is None or "range" in req:
+            return response
+        variant = original.with_name(original.name + _SUFFIX[encoding])
+        out = FileResponse(variant, media_type=response.media_type, stat_result=os.stat(variant),
+                           headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+        if self.is_not_modified(out.headers, req):
+            return NotModifiedResponse(out.headers)
+        return out
+
+    @staticmethod
+    def _fresh(variant: Path, original_stat: os.stat_result) -> bool:
+        try:
+            return os.stat(variant).st_mtime >= original_stat.st_mtime
+        except OSError:
+            return False
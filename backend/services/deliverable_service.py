@@ -1,13 +1,22 @@
 # backend/services/deliverable_service.py
+import asyncio
 import os
 from datetime import datetime
 from backend.db import get_session
-from backend.models import Deliverable
+from backend.models import Deliverable, Project
 import html, re
-from typing import Any
+from typing import Any, Callable, Iterable, Optional
 from pathlib import Path
 import shutil
+import tempfile
+import time
 import unicodedata
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from backend.services import analytics, asset_store, metrics, storage_gc, storage_service, templating, tracing
+from backend.services.templating import esc
 
 STORAGE_DIR = os.path.join(os.path.dirname(__file__), "..", "storage")
 # --- Publication "1 clic" ---
@@ -33,6 +42,7 @@ def _sanitize_for_json(obj: Any) -> Any:
     # nombres, booléens, etc. inchangés
     return obj
 
+@tracing.traced("db.save_deliverable")
 def save_deliverable(
     user_id: int,
     kind: str,
@@ -42,9 +52,12 @@ def save_deliverable(
     project_id: int | None = None,
 ):
     # ✅ supprime \x00, \x01.. etc. et normalise les retours à la ligne
-    clean_data = _sanitize_for_json(data or {})
-    clean_title = _sanitize_for_json(title) if isinstance(title, str) else title
-    clean_path = _sanitize_for_json(file_path) if isinstance(file_path, str) else file_path
+    with tracing.span("json.sanitize"):  # récursif : un seul span pour tout l'arbre
+        clean_data = _sanitize_for_json(data or {})
+        clean_title = _sanitize_for_json(title) if isinstance(title, str) else title
+        clean_path = _sanitize_for_json(file_path) if isinstance(file_path, str) else file_path
+    refs = storage_gc.deliverable_refs(clean_path, clean_data)
+    nbytes = storage_gc.measure_refs(refs)
 
     with get_session() as s:
         d = Deliverable(
@@ -54,23 +67,25 @@ def save_deliverable(
             title=clean_title,
             json_content=clean_data,     # ✅ on enregistre l’objet nettoyé (dict)
             file_path=clean_path,
+            storage_bytes=nbytes,
         )
         s.add(d)
+        storage_gc.add_usage(s, user_id, nbytes, len(refs))  # même transaction que le livrable
+        analytics.incr(s, "deliverables", kind)
         s.commit()
         s.refresh(d)
         return d.id
 
 
+@tracing.traced("storage.write_html")
 def write_landing_file(user_id: int, html_str: str) -> str:
+    """
+    Stocke un HTML généré (landing, offre, BP, acquisition, plan) via storage_service.
+    Clé adressée par contenu (deliverables/ab/cd/<sha256>.html) : rendus identiques dédupliqués,
+    aucun écrasement entre deux rendus de la même seconde. Retourne la ref (chemin local ou s3://).
+    """
     safe_html = _CONTROL_CHARS_RE.sub("", (html_str or "").replace("\r\n", "\n").replace("\r", "\n"))
-    # Ex: backend/storage/landings/<user_id>/landing-<timestamp>.html
-    folder = os.path.join(STORAGE_DIR, "landings", str(user_id))
-    os.makedirs(folder, exist_ok=True)
-    ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-    path = os.path.join(folder, f"landing-{ts}.html")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(safe_html)
-    return path
+    return storage_service.put_content(safe_html.encode("utf-8"), "html", "text/html; charset=utf-8")
 
 def _slugify(s: str) -> str:
     s = (s or "").strip().lower()
@@ -153,62 +168,9 @@ def _pct_from_label(label: str, mapping: dict[str, int], default: int = 50) -> i
     return mapping.get(key, default)
 
 
-def render_offer_report_html(
-    offer: dict,
-    persona: str,
-    pain_points: list[str],
-    project_title: str = "Offre",
-    idea_text: str | None = None,
-) -> str:
-    # Sécurise les champs
-    mo = offer.get("market_overview", {}) or {}
-    dm = offer.get("demand_analysis", {}) or {}
-    ca = offer.get("competitor_analysis", {}) or {}
-    er = offer.get("environment_regulation", {}) or {}
-    synthesis = offer.get("synthesis") or ""
-
-    # Mappings pour barres “graphiques”
-    pace_pct = _pct_from_label(
-        er.get("tech_evolution_pace", ""),
-        {"lent": 33, "modéré": 66, "modere": 66, "rapide": 100},
-        50,
-    )
-    budget_pct = _pct_from_label(
-        dm.get("budget", ""),
-        {"faible": 30, "moyen": 60, "élevé": 90, "eleve": 90},
-        50,
-    )
-    trend_pct = _pct_from_label(
-        dm.get("customer_count_trend", ""),
-        {"en baisse": 33, "stable": 50, "en hausse": 85},
-        50,
-    )
-    state_pct = _pct_from_label(
-        mo.get("current_state", ""),
-        {"régression": 25, "regression": 25, "stagnation": 50, "progression": 80},
-        50,
-    )
-
-    def li(items):
-        if not items:
-            return "<li>-</li>"
-        return "".join(f"<li>{str(x)}</li>" for x in items)
-
-    def competitor_li(items):
-        out = []
-        for c in items or []:
-            if isinstance(c, dict):
-                out.append(
-                    f"<li><strong>{c.get('name','(inconnu)')}</strong> — "
-                    f"Positionnement : {c.get('positioning','-')}. "
-                    f"Forces : {c.get('strengths','-')}. "
-                    f"Faiblesses : {c.get('weaknesses','-')}.</li>"
-                )
-            else:
-                out.append(f"<li>{str(c)}</li>")
-        return "".join(out) or "<li>-</li>"
+# ---------------------- OFFRE : rapport HTML ---------------------------------
 
-    style = """
+templating.register_partial("offer_css", """
     <style>
       :root{--bg:#0f172a;--panel:#111827;--card:#1f2937;--muted:#9ca3af;--ink:#e5e7eb;--accent:#10b981;--blue:#2563eb;--yellow:#d97706;}
       *{box-sizing:border-box} body{margin:0;font-family:Inter,system-ui,-apple-system,Segoe UI,Roboto,Arial,Helvetica,sans-serif;background:var(--bg);color:var(--ink);}
@@ -233,19 +195,19 @@ def render_offer_report_html(
       .idea{white-space:pre-wrap}
       .foot{margin-top:12px;font-size:12px;color:#9ca3af}
     </style>
-    """
+""")
 
-    html_out = f"""<!doctype html>
+templating.register_template("offer_report", """<!doctype html>
 <html lang="fr">
 <meta charset="utf-8"/>
-<title>{project_title}</title>
-{style}
+<title>{{ project_title }}</title>
+{{> offer_css }}
 <body>
   <div class="wrap">
     <div class="card">
       <div class="header">
         <div>
-          <h1>{project_title}</h1>
+          <h1>{{ project_title }}</h1>
           <p class="muted">Rapport d'opportunité — généré automatiquement</p>
         </div>
         <div>
@@ -254,24 +216,24 @@ def render_offer_report_html(
           <span class="tag">Synthèse exéc.</span>
         </div>
       </div>
-      {"<h3>Idée (verbatim)</h3><p class='idea'>"+idea_text+"</p>" if idea_text else ""}
+      {{ idea_block|raw }}
       <div class="divider"></div>
       <div class="kpis">
         <div class="kpi">
           <div class="muted small">État du marché</div>
-          <div class="bar"><span style="width:{state_pct}%"></span></div>
+          <div class="bar"><span style="width:{{ state_pct }}%"></span></div>
         </div>
         <div class="kpi">
           <div class="muted small">Évolution du nombre de clients</div>
-          <div class="bar"><span style="width:{trend_pct}%"></span></div>
+          <div class="bar"><span style="width:{{ trend_pct }}%"></span></div>
         </div>
         <div class="kpi">
           <div class="muted small">Budget client moyen</div>
-          <div class="bar"><span style="width:{budget_pct}%"></span></div>
+          <div class="bar"><span style="width:{{ budget_pct }}%"></span></div>
         </div>
         <div class="kpi">
           <div class="muted small">Rythme d'innovation</div>
-          <div class="bar"><span style="width:{pace_pct}%"></span></div>
+          <div class="bar"><span style="width:{{ pace_pct }}%"></span></div>
         </div>
       </div>
     </div>
@@ -279,79 +241,169 @@ def render_offer_report_html(
     <div class="grid">
       <div class="card">
         <h2>🎯 Persona cible</h2>
-        <p>{persona or "-"}</p>
+        <p>{{ persona }}</p>
       </div>
       <div class="card">
         <h2>😖 Points de douleur</h2>
-        <ul>{li(pain_points)}</ul>
+        <ul>{{ pain_points|raw }}</ul>
       </div>
     </div>
 
     <div class="card">
       <h2>📈 Étude du marché</h2>
       <h3>Volume</h3>
-      <p>{mo.get("volume","-")}</p>
+      <p>{{ mo_volume }}</p>
       <h3>Situation actuelle</h3>
-      <p>{mo.get("current_state","-")}</p>
+      <p>{{ mo_current_state }}</p>
       <h3>Tendances</h3>
-      <ul>{li(mo.get("trends"))}</ul>
+      <ul>{{ mo_trends|raw }}</ul>
       <h3>Produits / Services</h3>
-      <ul>{li(mo.get("products_services"))}</ul>
+      <ul>{{ mo_products_services|raw }}</ul>
       <h3>Principaux acteurs</h3>
-      <ul>{li(mo.get("main_players"))}</ul>
+      <ul>{{ mo_main_players|raw }}</ul>
     </div>
 
     <div class="card">
       <h2>🧭 Étude de la demande</h2>
       <h3>Segments</h3>
-      <ul>{li(dm.get("segments"))}</ul>
+      <ul>{{ dm_segments|raw }}</ul>
       <h3>Évolution du nombre de clients</h3>
-      <p>{dm.get("customer_count_trend","-")}</p>
+      <p>{{ dm_customer_count_trend }}</p>
       <h3>Localisations</h3>
-      <ul>{li(dm.get("locations"))}</ul>
+      <ul>{{ dm_locations|raw }}</ul>
       <h3>Comportements</h3>
-      <ul>{li(dm.get("behaviors"))}</ul>
+      <ul>{{ dm_behaviors|raw }}</ul>
       <h3>Critères de choix</h3>
-      <ul>{li(dm.get("choice_criteria"))}</ul>
+      <ul>{{ dm_choice_criteria|raw }}</ul>
       <h3>Budget</h3>
-      <p>{dm.get("budget","-")}</p>
+      <p>{{ dm_budget }}</p>
     </div>
 
     <div class="card">
       <h2>🏁 Analyse de l'offre (concurrence)</h2>
       <h3>Concurrents directs</h3>
-      <ul>{competitor_li(ca.get("direct"))}</ul>
+      <ul>{{ ca_direct|raw }}</ul>
       <h3>Concurrents indirects</h3>
-      <ul>{li(ca.get("indirect"))}</ul>
+      <ul>{{ ca_indirect|raw }}</ul>
       <h3>Points de différenciation</h3>
-      <ul>{li(ca.get("differentiation_points"))}</ul>
+      <ul>{{ ca_differentiation_points|raw }}</ul>
       <h3>Facteurs de succès</h3>
-      <ul>{li(ca.get("success_factors"))}</ul>
+      <ul>{{ ca_success_factors|raw }}</ul>
       <h3>Échecs & leçons</h3>
-      <ul>{li(ca.get("failures_lessons"))}</ul>
+      <ul>{{ ca_failures_lessons|raw }}</ul>
     </div>
 
     <div class="card">
       <h2>🌐 Environnement & réglementation</h2>
       <h3>Innovations</h3>
-      <ul>{li(er.get("innovations"))}</ul>
+      <ul>{{ er_innovations|raw }}</ul>
       <h3>Cadre réglementaire</h3>
-      <ul>{li(er.get("regulatory_framework"))}</ul>
+      <ul>{{ er_regulatory_framework|raw }}</ul>
       <h3>Associations / acteurs</h3>
-      <ul>{li(er.get("associations"))}</ul>
+      <ul>{{ er_associations|raw }}</ul>
       <h3>Barrières à l'entrée</h3>
-      <ul>{li(er.get("entry_barriers"))}</ul>
+      <ul>{{ er_entry_barriers|raw }}</ul>
     </div>
 
     <div class="card">
       <h2>🧩 Synthèse exécutive</h2>
-      <p>{synthesis or "-"}</p>
+      <p>{{ synthesis }}</p>
       <p class="foot">Ce rapport est une base d'aide à la décision, à compléter par des données de terrain.</p>
     </div>
   </div>
 </body>
-</html>"""
-    return html_out
+</html>""")
+
+
+def _offer_li(items) -> str:
+    if not items:
+        return "<li>-</li>"
+    if isinstance(items, str):
+        items = [items]
+    return "".join(f"<li>{esc(x)}</li>" for x in items)
+
+
+def _offer_competitor_li(items) -> str:
+    out = []
+    for c in items or []:
+        if isinstance(c, dict):
+            out.append(
+                f"<li><strong>{esc(c.get('name','(inconnu)'))}</strong> — "
+                f"Positionnement : {esc(c.get('positioning','-'))}. "
+                f"Forces : {esc(c.get('strengths','-'))}. "
+                f"Faiblesses : {esc(c.get('weaknesses','-'))}.</li>"
+            )
+        else:
+            out.append(f"<li>{esc(c)}</li>")
+    return "".join(out) or "<li>-</li>"
+
+
+@tracing.traced("render.offer")
+def render_offer_report_html(
+    offer: dict,
+    persona: str,
+    pain_points: list[str],
+    project_title: str = "Offre",
+    idea_text: str | None = None,
+) -> str:
+    # Sécurise les champs
+    mo = offer.get("market_overview", {}) or {}
+    dm = offer.get("demand_analysis", {}) or {}
+    ca = offer.get("competitor_analysis", {}) or {}
+    er = offer.get("environment_regulation", {}) or {}
+    synthesis = offer.get("synthesis") or ""
+
+    # Mappings pour barres “graphiques”
+    pace_pct = _pct_from_label(
+        er.get("tech_evolution_pace", ""),
+        {"lent": 33, "modéré": 66, "modere": 66, "rapide": 100},
+        50,
+    )
+    budget_pct = _pct_from_label(
+        dm.get("budget", ""),
+        {"faible": 30, "moyen": 60, "élevé": 90, "eleve": 90},
+        50,
+    )
+    trend_pct = _pct_from_label(
+        dm.get("customer_count_trend", ""),
+        {"en baisse": 33, "stable": 50, "en hausse": 85},
+        50,
+    )
+    state_pct = _pct_from_label(
+        mo.get("current_state", ""),
+        {"régression": 25, "regression": 25, "stagnation": 50, "progression": 80},
+        50,
+    )
+
+    return templating.render(
+        "offer_report",
+        project_title=project_title,
+        idea_block=("<h3>Idée (verbatim)</h3><p class='idea'>" + esc(idea_text) + "</p>") if idea_text else "",
+        state_pct=state_pct, trend_pct=trend_pct, budget_pct=budget_pct, pace_pct=pace_pct,
+        persona=persona or "-",
+        pain_points=_offer_li(pain_points),
+        mo_volume=mo.get("volume", "-"),
+        mo_current_state=mo.get("current_state", "-"),
+        mo_trends=_offer_li(mo.get("trends")),
+        mo_products_services=_offer_li(mo.get("products_services")),
+        mo_main_players=_offer_li(mo.get("main_players")),
+        dm_segments=_offer_li(dm.get("segments")),
+        dm_customer_count_trend=dm.get("customer_count_trend", "-"),
+        dm_locations=_offer_li(dm.get("locations")),
+        dm_behaviors=_offer_li(dm.get("behaviors")),
+        dm_choice_criteria=_offer_li(dm.get("choice_criteria")),
+        dm_budget=dm.get("budget", "-"),
+        ca_direct=_offer_competitor_li(ca.get("direct")),
+        ca_indirect=_offer_li(ca.get("indirect")),
+        ca_differentiation_points=_offer_li(ca.get("differentiation_points")),
+        ca_success_factors=_offer_li(ca.get("success_factors")),
+        ca_failures_lessons=_offer_li(ca.get("failures_lessons")),
+        er_innovations=_offer_li(er.get("innovations")),
+        er_regulatory_framework=_offer_li(er.get("regulatory_framework")),
+        er_associations=_offer_li(er.get("associations")),
+        er_entry_barriers=_offer_li(er.get("entry_barriers")),
+        synthesis=synthesis or "-",
+    )
 
 
 # ---------------------- BRAND : helpers & rendu HTML (brand book) ------------
@@ -477,6 +529,179 @@ def _logo_concept_symbol_wordmark(motif: str, brand_name: str, primary: str, sec
 </svg>""".strip()
 
 
+templating.register_partial("brand_css", """<style>
+  :root { color-scheme: dark; }
+  body { margin:0; background:#0f172a; color:#e5e7eb; font-family: Inter, system-ui, -apple-system, Segoe UI, Roboto, Ubuntu, Cantarell, Noto Sans, Helvetica Neue, Arial; }
+  .container { max-width: 980px; margin: 0 auto; padding: 24px; }
+  .card { background:#111827; border-radius:12px; padding:20px; box-shadow: 0 10px 25px rgba(0,0,0,.35); }
+  .h1 { font-size:28px; font-weight:700; margin:0 0 8px; }
+  .h2 { font-size:18px; font-weight:700; color:#818cf8; margin:22px 0 8px; }
+  .h3 { font-size:16px; font-weight:700; color:#e5e7eb; margin:0 0 4px; }
+  .muted { color:#9ca3af; font-size:12px; }
+  .grid { display:grid; gap:14px; }
+  .grid-2 { grid-template-columns: repeat(2,minmax(0,1fr)); }
+  .grid-3 { grid-template-columns: repeat(3,minmax(0,1fr)); }
+  .pill { display:inline-block; background:#1f2937; border-radius:999px; padding:4px 10px; font-size:12px; }
+  .row { display:flex; gap:12px; align-items:center; flex-wrap:wrap; }
+  .logo svg { width: 180px; height: 180px; display:block; }
+
+  /* Domain availability list */
+  .domain-grid { display:grid; gap:8px; }
+  .domrow { display:flex; justify-content:space-between; align-items:center;
+             padding:6px 10px; background:#0f172a; border:1px solid #1f2937; border-radius:8px; }
+  .badge { border-radius:999px; padding:2px 8px; font-size:12px; }
+  .badge.ok { background:#065f46; color:#ecfdf5; }
+  .badge.ko { background:#7f1d1d; color:#fee2e2; }
+  .badge.na { background:#374151; color:#e5e7eb; }
+</style>""")
+
+templating.register_template("brand_report", """<!doctype html>
+<html lang="fr">
+<head>
+<meta charset="utf-8" />
+<meta name="viewport" content="width=device-width, initial-scale=1" />
+<title>{{ project_title }}</title>
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap" rel="stylesheet">
+{{> brand_css }}
+</head>
+<body>
+  <div class="container">
+    <div class="card">
+      <div class="h1">{{ project_title }}</div>
+      <div class="muted">Brand Book — service clé en main</div>
+
+      <div style="height:14px"></div>
+      <div class="grid" style="gap:10px">
+        <div class="row">
+          <span class="pill">Nom</span><strong>{{ brand_name }}</strong>
+        </div>
+        <div class="row">
+          <span class="pill">Slogan</span><span>{{ slogan }}</span>
+        </div>
+        <div class="row">
+          <span class="pill">Domaine</span><span>{{ domain }} ({{ avail_txt }})</span>
+        </div>
+      </div>
+
+      {{ domain_list|raw }}
+
+      {{ idea_block|raw }}
+
+      <div class="h2">Mission</div>
+      <p>{{ mission }}</p>
+
+      <div class="h2">Vision</div>
+      <p>{{ vision }}</p>
+
+      <div class="h2">Valeurs</div>
+      {{ values|raw }}
+
+      <div class="h2">Propositions de logos</div>
+      <div class="grid grid-3">
+        {{ logos|raw }}
+      </div>
+
+      <div class="h2">Charte graphique — Couleurs</div>
+      <div class="grid grid-3">
+        {{ colors|raw }}
+      </div>
+
+      <div class="h2">Charte graphique — Typographies</div>
+      <div class="grid grid-2">
+        <div class="card" style="background:#0b1220">
+          <div class="h3">Primaire</div>
+          <div class="muted">{{ typo_primary_font }}</div>
+          <div>{{ typo_primary_usage }}</div>
+        </div>
+        <div class="card" style="background:#0b1220">
+          <div class="h3">Secondaire</div>
+          <div class="muted">{{ typo_secondary_font }}</div>
+          <div>{{ typo_secondary_usage }}</div>
+        </div>
+      </div>
+
+      <div class="h2">Logo — Guidelines</div>
+      <p><strong>Concept</strong> — {{ logo_concept }}</p>
+      <p><strong>Variations</strong></p>
+      {{ logo_variations|raw }}
+      <p><strong>Espaces de sécurité</strong><br>{{ logo_clear_space }}</p>
+      <p><strong>Taille minimale</strong><br>{{ logo_min_size }}</p>
+      <div class="grid grid-2">
+        <div>
+          <div class="h3">À faire</div>
+          {{ logo_dos|raw }}
+        </div>
+        <div>
+          <div class="h3">À éviter</div>
+          {{ logo_donts|raw }}
+        </div>
+      </div>
+
+      <div class="h2">Storytelling</div>
+      <div class="h3">Origines</div>
+      <p>{{ story_origins }}</p>
+      <div class="h3">Valeurs & engagement</div>
+      <p>{{ story_values_engagement }}</p>
+      <div class="h3">Preuves / Cas</div>
+      {{ story_proof_points|raw }}
+
+      <div class="h2">Cohérence multi-supports</div>
+      <div class="h3">Réseaux sociaux</div>
+      <p>{{ cons_social }}</p>
+      <div class="h3">Emails & newsletters</div>
+      <p>{{ cons_emails }}</p>
+      <div class="h3">Documents marketing</div>
+      <p>{{ cons_documents }}</p>
+    </div>
+  </div>
+</body>
+</html>
+""")
+
+
+def _brand_logo_card(name: str, rationale: str, svg: str) -> str:
+    return f"""
+          <div class="card" style="padding:16px">
+            <div class="h3">{esc(name)}</div>
+            <div class="muted" style="margin-bottom:8px">{esc(rationale)}</div>
+            <div class="logo">{svg}</div>
+          </div>
+        """
+
+
+def _brand_badge(av) -> str:
+    if av is True:
+        return '<span class="badge ok">Disponible</span>'
+    if av is False:
+        return '<span class="badge ko">Pris</span>'
+    return '<span class="badge na">Non vérifié</span>'
+
+
+def _brand_color_item(c: dict) -> str:
+    name = esc(c.get("name"))
+    hx = esc(c.get("hex"))
+    use = esc(c.get("usage"))
+    return f"""
+          <div class="flex items-center gap-3 p-3 rounded bg-gray-800/50">
+            <div class="w-10 h-10 rounded" style="background:{hx}"></div>
+            <div class="text-sm">
+              <div class="font-semibold">{name} — {hx}</div>
+              <div class="text-gray-300">{use}</div>
+            </div>
+          </div>
+        """
+
+
+def _brand_list(items) -> str:
+    if not items:
+        return "<p class='text-gray-300'>—</p>"
+    if isinstance(items, str):
+        items = [items]
+    return "<ul class='list-disc pl-6 space-y-1'>" + "".join(f"<li>{esc(it)}</li>" for it in items) + "</ul>"
+
+
+@tracing.traced("render.brand")
 def render_brand_report_html(
     brand_name: str,
     slogan: str,
@@ -487,7 +712,6 @@ def render_brand_report_html(
     idea_text: str | None = None,
     domain_checks: dict[str, bool | None] | None = None,   # <-- NOUVEAU
 ) -> str:
-    def esc(x): return html.escape(str(x or ""))
     structured = structured or {}
     avail_txt = "disponible" if domain_available is True else "pris" if domain_available is False else "non vérifié"
 
@@ -568,17 +792,7 @@ def render_brand_report_html(
         if isinstance(c, dict) and isinstance(c.get("sketch_svg"), str) and "<svg" in c["sketch_svg"]
     ]
     for c in provided[:3]:
-        name = c.get("name") or "Concept"
-        rationale = c.get("rationale") or "Croquis IA."
-        rendered_logos.append(
-            f"""
-          <div class="card" style="padding:16px">
-            <div class="h3">{esc(name)}</div>
-            <div class="muted" style="margin-bottom:8px">{esc(rationale)}</div>
-            <div class="logo">{c["sketch_svg"]}</div>
-          </div>
-        """
-        )
+        rendered_logos.append(_brand_logo_card(c.get("name") or "Concept", c.get("rationale") or "Croquis IA.", c["sketch_svg"]))
 
     # 2) Complète pour atteindre exactement 3 concepts
     while len(rendered_logos) < 3:
@@ -592,207 +806,74 @@ def render_brand_report_html(
         else:
             svg = _logo_concept_symbol_wordmark(motif, brand_name, primary_hex, secondary_hex)
             name, rationale = "Concept C — Symbole + wordmark", "Symbole moderniste + logotype équilibré."
-        rendered_logos.append(
-            f"""
-          <div class="card" style="padding:16px">
-            <div class="h3">{esc(name)}</div>
-            <div class="muted" style="margin-bottom:8px">{esc(rationale)}</div>
-            <div class="logo">{svg}</div>
-          </div>
-        """
-        )
+        rendered_logos.append(_brand_logo_card(name, rationale, svg))
 
     # --- Domain availability (multi-TLD) : badges + liste ---
-    def _badge(av):
-        if av is True:
-            return '<span class="badge ok">Disponible</span>'
-        if av is False:
-            return '<span class="badge ko">Pris</span>'
-        return '<span class="badge na">Non vérifié</span>'
-
     domain_list_html = ""
     if domain_checks:
-        items = []
-        for dom, av in domain_checks.items():
-            items.append(
-                f"<div class='domrow'><span>{esc(dom)}</span>{_badge(av)}</div>"
-            )
+        items = "".join(
+            f"<div class='domrow'><span>{esc(dom)}</span>{_brand_badge(av)}</div>"
+            for dom, av in domain_checks.items()
+        )
         domain_list_html = (
             "<div class='h2'>Disponibilité des domaines (suggestions)</div>"
             "<div class='card' style='background:#0b1220'>"
-            "<div class='domain-grid'>" + "".join(items) + "</div>"
+            "<div class='domain-grid'>" + items + "</div>"
             "</div>"
         )
 
-    # --- Helpers HTML pour listes & couleurs ---
-    def color_item(c):
-        name = esc(c.get("name"))
-        hx = esc(c.get("hex"))
-        use = esc(c.get("usage"))
-        return f"""
-          <div class="flex items-center gap-3 p-3 rounded bg-gray-800/50">
-            <div class="w-10 h-10 rounded" style="background:{hx}"></div>
-            <div class="text-sm">
-              <div class="font-semibold">{name} — {hx}</div>
-              <div class="text-gray-300">{use}</div>
-            </div>
-          </div>
-        """
-
-    def li(items):
-        if not items:
-            return "<p class='text-gray-300'>—</p>"
-        if isinstance(items, str):
-            items = [items]
-        return "<ul class='list-disc pl-6 space-y-1'>" + "".join(f"<li>{esc(it)}</li>" for it in items) + "</ul>"
-
     # --- HTML final ---
-    return f"""<!doctype html>
-<html lang="fr">
-<head>
-<meta charset="utf-8" />
-<meta name="viewport" content="width=device-width, initial-scale=1" />
-<title>{esc(project_title)}</title>
-<link rel="preconnect" href="https://fonts.googleapis.com">
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap" rel="stylesheet">
-<style>
-  :root {{ color-scheme: dark; }}
-  body {{ margin:0; background:#0f172a; color:#e5e7eb; font-family: Inter, system-ui, -apple-system, Segoe UI, Roboto, Ubuntu, Cantarell, Noto Sans, Helvetica Neue, Arial; }}
-  .container {{ max-width: 980px; margin: 0 auto; padding: 24px; }}
-  .card {{ background:#111827; border-radius:12px; padding:20px; box-shadow: 0 10px 25px rgba(0,0,0,.35); }}
-  .h1 {{ font-size:28px; font-weight:700; margin:0 0 8px; }}
-  .h2 {{ font-size:18px; font-weight:700; color:#818cf8; margin:22px 0 8px; }}
-  .h3 {{ font-size:16px; font-weight:700; color:#e5e7eb; margin:0 0 4px; }}
-  .muted {{ color:#9ca3af; font-size:12px; }}
-  .grid {{ display:grid; gap:14px; }}
-  .grid-2 {{ grid-template-columns: repeat(2,minmax(0,1fr)); }}
-  .grid-3 {{ grid-template-columns: repeat(3,minmax(0,1fr)); }}
-  .pill {{ display:inline-block; background:#1f2937; border-radius:999px; padding:4px 10px; font-size:12px; }}
-  .row {{ display:flex; gap:12px; align-items:center; flex-wrap:wrap; }}
-  .logo svg {{ width: 180px; height: 180px; display:block; }}
-
-  /* Domain availability list */
-  .domain-grid {{ display:grid; gap:8px; }}
-  .domrow {{ display:flex; justify-content:space-between; align-items:center;
-             padding:6px 10px; background:#0f172a; border:1px solid #1f2937; border-radius:8px; }}
-  .badge {{ border-radius:999px; padding:2px 8px; font-size:12px; }}
-  .badge.ok {{ background:#065f46; color:#ecfdf5; }}
-  .badge.ko {{ background:#7f1d1d; color:#fee2e2; }}
-  .badge.na {{ background:#374151; color:#e5e7eb; }}
-</style>
-</head>
-<body>
-  <div class="container">
-    <div class="card">
-      <div class="h1">{esc(project_title)}</div>
-      <div class="muted">Brand Book — service clé en main</div>
-
-      <div style="height:14px"></div>
-      <div class="grid" style="gap:10px">
-        <div class="row">
-          <span class="pill">Nom</span><strong>{esc(brand_name)}</strong>
-        </div>
-        <div class="row">
-          <span class="pill">Slogan</span><span>{esc(slogan)}</span>
-        </div>
-        <div class="row">
-          <span class="pill">Domaine</span><span>{esc(domain or '—')} ({esc(avail_txt)})</span>
-        </div>
-      </div>
+    return templating.render(
+        "brand_report",
+        project_title=project_title,
+        brand_name=brand_name,
+        slogan=slogan,
+        domain=domain or "—",
+        avail_txt=avail_txt,
+        domain_list=domain_list_html,
+        idea_block=("<div class='h2'>Concept (verbatim)</div><p>" + esc(idea_text) + "</p>") if idea_text else "",
+        mission=m,
+        vision=v,
+        values=_brand_list(vals),
+        logos="".join(rendered_logos),
+        colors="".join(_brand_color_item(c) for c in pal),
+        typo_primary_font=typo["primary"]["font"],
+        typo_primary_usage=typo["primary"]["usage"],
+        typo_secondary_font=typo["secondary"]["font"],
+        typo_secondary_usage=typo["secondary"]["usage"],
+        logo_concept=logo.get("concept", ""),
+        logo_variations=_brand_list(logo.get("variations", [])),
+        logo_clear_space=logo.get("clear_space", ""),
+        logo_min_size=logo.get("min_size", ""),
+        logo_dos=_brand_list(logo.get("dos", [])),
+        logo_donts=_brand_list(logo.get("donts", [])),
+        story_origins=story.get("origins", ""),
+        story_values_engagement=story.get("values_engagement", ""),
+        story_proof_points=_brand_list(story.get("proof_points", [])),
+        cons_social=cons.get("social", ""),
+        cons_emails=cons.get("emails", ""),
+        cons_documents=cons.get("documents", ""),
+    )
 
-      {domain_list_html}
 
-      {"<div class='h2'>Concept (verbatim)</div><p>"+esc(idea_text)+"</p>" if idea_text else ""}
+# ─────────────────────────────────────────────────────────────────────────────
+# SVG helpers (barres, lignes multi-séries, mini-funnel)
+# ─────────────────────────────────────────────────────────────────────────────
 
-      <div class="h2">Mission</div>
-      <p>{esc(m)}</p>
-
-      <div class="h2">Vision</div>
-      <p>{esc(v)}</p>
-
-      <div class="h2">Valeurs</div>
-      {li(vals)}
-
-      <div class="h2">Propositions de logos</div>
-      <div class="grid grid-3">
-        {''.join(rendered_logos)}
-      </div>
-
-      <div class="h2">Charte graphique — Couleurs</div>
-      <div class="grid grid-3">
-        {''.join(color_item(c) for c in pal)}
-      </div>
-
-      <div class="h2">Charte graphique — Typographies</div>
-      <div class="grid grid-2">
-        <div class="card" style="background:#0b1220">
-          <div class="h3">Primaire</div>
-          <div class="muted">{esc(typo['primary']['font'])}</div>
-          <div>{esc(typo['primary']['usage'])}</div>
-        </div>
-        <div class="card" style="background:#0b1220">
-          <div class="h3">Secondaire</div>
-          <div class="muted">{esc(typo['secondary']['font'])}</div>
-          <div>{esc(typo['secondary']['usage'])}</div>
-        </div>
-      </div>
-
-      <div class="h2">Logo — Guidelines</div>
-      <p><strong>Concept</strong> — {esc(logo.get('concept',''))}</p>
-      <p><strong>Variations</strong></p>
-      {li(logo.get('variations', []))}
-      <p><strong>Espaces de sécurité</strong><br>{esc(logo.get('clear_space',''))}</p>
-      <p><strong>Taille minimale</strong><br>{esc(logo.get('min_size',''))}</p>
-      <div class="grid grid-2">
-        <div>
-          <div class="h3">À faire</div>
-          {li(logo.get('dos', []))}
-        </div>
-        <div>
-          <div class="h3">À éviter</div>
-          {li(logo.get('donts', []))}
-        </div>
-      </div>
-
-      <div class="h2">Storytelling</div>
-      <div class="h3">Origines</div>
-      <p>{esc(story.get('origins',''))}</p>
-      <div class="h3">Valeurs & engagement</div>
-      <p>{esc(story.get('values_engagement',''))}</p>
-      <div class="h3">Preuves / Cas</div>
-      {li(story.get('proof_points', []))}
-
-      <div class="h2">Cohérence multi-supports</div>
-      <div class="h3">Réseaux sociaux</div>
-      <p>{esc(cons.get('social',''))}</p>
-      <div class="h3">Emails & newsletters</div>
-      <p>{esc(cons.get('emails',''))}</p>
-      <div class="h3">Documents marketing</div>
-      <p>{esc(cons.get('documents',''))}</p>
-    </div>
-  </div>
-</body>
-</html>
-"""
-
-# ─────────────────────────────────────────────────────────────────────────────
-# SVG helpers (barres, lignes multi-séries, mini-funnel)
-# ─────────────────────────────────────────────────────────────────────────────
-
-def _svg_bar_chart(title: str, pairs: list[tuple[str, float]]) -> str:
-    if not pairs:
-        return ""
-    w, h, pad = 640, 240, 40
-    maxv = max(v for _, v in pairs) or 1
-    bw = (w - pad*2) / max(1, len(pairs))
-    bars = []
-    for i, (label, val) in enumerate(pairs):
-        x = pad + i * bw
-        bh = (h - pad*2) * (val / maxv)
-        y = h - pad - bh
-        bars.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{bw*0.7:.1f}" height="{bh:.1f}" rx="6" fill="#8b93ff"/>'
-                    f'<text x="{x + bw*0.35:.1f}" y="{h - pad + 14}" text-anchor="middle" font-size="10" fill="#cbd5e1">{html.escape(label[:10])}</text>')
-    return f'<svg viewBox="0 0 {w} {h}" role="img" aria-label="{html.escape(title)}"><text x="{pad}" y="18" fill="#e5e7eb" font-size="14">{html.escape(title)}</text>' + "".join(bars) + '</svg>'
+def _svg_bar_chart(title: str, pairs: list[tuple[str, float]]) -> str:
+    if not pairs:
+        return ""
+    w, h, pad = 640, 240, 40
+    maxv = max(v for _, v in pairs) or 1
+    bw = (w - pad*2) / max(1, len(pairs))
+    bars = []
+    for i, (label, val) in enumerate(pairs):
+        x = pad + i * bw
+        bh = (h - pad*2) * (val / maxv)
+        y = h - pad - bh
+        bars.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{bw*0.7:.1f}" height="{bh:.1f}" rx="6" fill="#8b93ff"/>'
+                    f'<text x="{x + bw*0.35:.1f}" y="{h - pad + 14}" text-anchor="middle" font-size="10" fill="#cbd5e1">{html.escape(label[:10])}</text>')
+    return f'<svg viewBox="0 0 {w} {h}" role="img" aria-label="{html.escape(title)}"><text x="{pad}" y="18" fill="#e5e7eb" font-size="14">{html.escape(title)}</text>' + "".join(bars) + '</svg>'
 
 def _svg_line_chart_multi(title: str, series: dict[str, list[float]], labels: list[str]) -> str:
     w, h, pad = 640, 260, 40
@@ -875,133 +956,67 @@ def _svg_line_with_y_axis(title: str, labels: list[str], values: list[float], y_
   {xt}
 </svg>'''.strip()
 
-def render_acquisition_report_html(acq: dict, project_title: str, idea_text: str | None = None) -> str:
-    def esc(x): return html.escape(str(x or ""))
-    obj = acq.get("objectives", {})
-    icp = acq.get("icp", "")
-    funnel = acq.get("funnel", {})
-    mix = acq.get("channel_mix", [])
-    kpis = acq.get("kpis", [])
-    agenda = acq.get("agenda", [])
-    assumptions = acq.get("assumptions", {})
-    mb = acq.get("monthly_budget", 0)
-    scenarios = acq.get("forecast_scenarios") or {}
-    labels = [r["month"] for r in next(iter(scenarios.values()), [])] or [f"M{i}" for i in range(1,7)]
-    annexes = acq.get("annexes") or {}
-
-    # Graphiques (SVG inline, compatibles PDF)
-    budget_pairs = [(m["name"], round(m.get("budget_share",0)*mb, 2)) for m in mix]
-    chart_budget = _svg_bar_chart("Répartition du budget / mois (€)", budget_pairs)
-    series_leads = {name: [row["leads"] for row in rows] for name, rows in scenarios.items()}
-    chart_leads = _svg_line_chart_multi("Leads par mois — 3 trajectoires", series_leads, labels)
-    base_rows = scenarios.get("Vitesse de croisière") or []
-    funnel_html = _svg_funnel("M6 (indicatif)", base_rows[-1] if base_rows else {})
-
-    # Styles screen = styles PDF (on imprime en media=screen côté Playwright)
-    styles = """
+# Styles screen = styles PDF (on imprime en media=screen côté Playwright)
+templating.register_partial("acquisition_css", """
     <style>
-      :root { color-scheme: dark; }
-      @page { size: A4; margin: 16mm 12mm; }
-      body { margin:0; background:#0f172a; color:#e5e7eb; font-family: Inter, system-ui, -apple-system, Segoe UI, Roboto, Arial; }
-      .wrap { max-width: 1000px; margin: 0 auto; padding: 24px; }
-      .card { background:#111827; border-radius:14px; padding:18px; box-shadow:0 10px 28px rgba(0,0,0,.35); margin-bottom:14px; }
-      h1 { font-size:28px; margin:0 0 8px; font-weight:800 }
-      h2 { font-size:18px; margin:16px 0 8px; color:#8b93ff }
-      h3 { font-size:14px; margin:10px 0 6px; color:#e5e7eb }
-      .muted { color:#9ca3af; font-size:12px }
-      .grid { display:grid; gap:14px }
-      .grid-2 { grid-template-columns:repeat(2,minmax(0,1fr)) }
-      .grid-3 { grid-template-columns:repeat(3,minmax(0,1fr)) }
+      @page { size: A4; margin: 16mm 12mm; }{{> report_css_base }}
       .pill { display:inline-block; background:#1f2937; padding:4px 10px; border-radius:999px; font-size:12px }
-      .kpi { background:#0b1220; padding:10px 12px; border-radius:10px; border:1px solid #1f2937 }
-      .toc a { color:#e5e7eb; text-decoration:none }
       .toc li { margin:4px 0 }
-      .pagebreak { page-break-before: always; }
-      ul { margin:8px 0 0 18px }
-      table { width:100%; border-collapse:separate; border-spacing:0 6px }
       td { vertical-align:top }
     </style>
-    """
-
-    # Sommaire (liens ancrés)
-    toc = """
-      <div class="card">
-        <h2>Sommaire</h2>
-        <ul class="toc">
-          <li><a href="#exec">1. Synthèse exécutive</a></li>
-          <li><a href="#mix">2. Mix de canaux & budget</a></li>
-          <li><a href="#funnel">3. Parcours & projection 6 mois</a></li>
-          <li><a href="#agenda">4. Agenda 12 semaines</a></li>
-          <li><a href="#kpis">5. Indicateurs clés</a></li>
-          <li><a href="#methodo">6. Méthodologie & hypothèses</a></li>
-          <li><a href="#annexes">7. Annexes — Plans détaillés (Ads / SEO / Social)</a></li>
-          <li><a href="#glossaire">8. Glossaire</a></li>
-        </ul>
-      </div>
-    """
-
-    # Glossaire simple
-    glossaire = """
-      <div class="card" id="glossaire">
-        <h2>Glossaire</h2>
-        <ul>
-          <li><strong>CPC</strong> : coût par clic.</li>
-          <li><strong>CTR</strong> : taux de clics (clics / impressions).</li>
-          <li><strong>Landing page</strong> : page d’atterrissage conçue pour convertir.</li>
-          <li><strong>MQL / SQL</strong> : lead marketing qualifié / lead commercial qualifié.</li>
-          <li><strong>Close rate</strong> : taux de transformation opportunité → vente.</li>
-          <li><strong>ROAS</strong> : chiffre d’affaires / dépenses publicitaires.</li>
-        </ul>
-      </div>
-    """
+""")
 
-    # HTML final (multi-pages)
-    return f"""<!doctype html>
+templating.register_template("acquisition_report", """<!doctype html>
 <html lang="fr"><head>
 <meta charset="utf-8"/>
 <meta name="viewport" content="width=device-width, initial-scale=1"/>
-<title>{esc(project_title)}</title>
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;800&display=swap" rel="stylesheet">
-{styles}
+<title>{{ project_title }}</title>
+{{> inter_font_link }}
+{{> acquisition_css }}
 </head>
 <body>
 
 <div class="wrap">
   <!-- Page de garde -->
   <div class="card">
-    <h1>Stratégie d’acquisition — {esc(project_title)}</h1>
+    <h1>Stratégie d’acquisition — {{ project_title }}</h1>
     <div class="muted">Livret agence • Export PDF identique au HTML</div>
-    {f'<p class="muted" style="margin-top:6px"><span class="pill">Concept</span> {esc(idea_text)}</p>' if idea_text else ''}
+    {{ idea_block|raw }}
   </div>
 
-  {toc}
+  <div class="card">
+    <h2>Sommaire</h2>
+    <ul class="toc">
+      <li><a href="#exec">1. Synthèse exécutive</a></li>
+      <li><a href="#mix">2. Mix de canaux & budget</a></li>
+      <li><a href="#funnel">3. Parcours & projection 6 mois</a></li>
+      <li><a href="#agenda">4. Agenda 12 semaines</a></li>
+      <li><a href="#kpis">5. Indicateurs clés</a></li>
+      <li><a href="#methodo">6. Méthodologie & hypothèses</a></li>
+      <li><a href="#annexes">7. Annexes — Plans détaillés (Ads / SEO / Social)</a></li>
+      <li><a href="#glossaire">8. Glossaire</a></li>
+    </ul>
+  </div>
 
   <div class="pagebreak"></div>
 
   <!-- 1. Synthèse -->
   <div class="card" id="exec">
     <h2>1. Synthèse exécutive</h2>
-    <p><strong>Cap principal :</strong> {esc(obj.get('north_star',''))}</p>
-    <ul>{"".join(f"<li>{esc(x)}</li>" for x in obj.get('targets',[]))}</ul>
+    <p><strong>Cap principal :</strong> {{ north_star }}</p>
+    <ul>{{ targets|raw }}</ul>
     <div class="grid grid-2" style="margin-top:8px">
-      <div class="kpi"><strong>Client idéal</strong><br>{esc(icp)}</div>
-      <div class="kpi"><strong>Budget mensuel</strong><br>{esc(mb)} €</div>
+      <div class="kpi"><strong>Client idéal</strong><br>{{ icp }}</div>
+      <div class="kpi"><strong>Budget mensuel</strong><br>{{ monthly_budget }} €</div>
     </div>
   </div>
 
   <!-- 2. Mix -->
   <div class="card" id="mix">
     <h2>2. Mix de canaux & budget</h2>
-    <div style="margin-top:10px">{chart_budget}</div>
+    <div style="margin-top:10px">{{ chart_budget|raw }}</div>
     <table style="margin-top:12px"><tbody>
-      {"".join(
-        f'<tr>'
-        f'<td class="kpi" style="width:20%"><strong>{esc(m["name"])}</strong><br/><span class="muted">{round(m.get("budget_share",0)*100)}% du budget</span></td>'
-        f'<td class="kpi" style="width:25%">{esc(m.get("goal",""))}</td>'
-        f'<td class="kpi" style="width:55%"><div><strong>Ce que tu fais concrètement :</strong><ul>{"".join(f"<li>{esc(s)}</li>" for s in m.get("beginner_steps",[]))}</ul></div>'
-        f'<div style="margin-top:6px" class="muted">KPIs : {esc(", ".join(m.get("kpis",[])))}</div></td>'
-        f'</tr>' for m in mix
-      )}
+      {{ mix_rows|raw }}
     </tbody></table>
   </div>
 
@@ -1011,15 +1026,15 @@ def render_acquisition_report_html(acq: dict, project_title: str, idea_text: str
     <div class="grid grid-2">
       <div>
         <h3>Parcours</h3>
-        <p><strong>Se faire connaître</strong></p><ul>{"".join(f"<li>{esc(x)}</li>" for x in funnel.get("awareness",[]))}</ul>
-        <p><strong>S’intéresser</strong></p><ul>{"".join(f"<li>{esc(x)}</li>" for x in funnel.get("consideration",[]))}</ul>
-        <p><strong>Passer à l’action</strong></p><ul>{"".join(f"<li>{esc(x)}</li>" for x in funnel.get("conversion",[]))}</ul>
-        <p><strong>Fidéliser</strong></p><ul>{"".join(f"<li>{esc(x)}</li>" for x in funnel.get("retention",[]))}</ul>
+        <p><strong>Se faire connaître</strong></p><ul>{{ funnel_awareness|raw }}</ul>
+        <p><strong>S’intéresser</strong></p><ul>{{ funnel_consideration|raw }}</ul>
+        <p><strong>Passer à l’action</strong></p><ul>{{ funnel_conversion|raw }}</ul>
+        <p><strong>Fidéliser</strong></p><ul>{{ funnel_retention|raw }}</ul>
       </div>
       <div>
         <h3>Projection</h3>
-        <div>{chart_leads}</div>
-        <div style="margin-top:10px">{funnel_html}</div>
+        <div>{{ chart_leads|raw }}</div>
+        <div style="margin-top:10px">{{ chart_funnel|raw }}</div>
         <p class="muted" style="margin-top:8px">Trajectoires : <em>Départ prudent</em>, <em>Vitesse de croisière</em>, <em>Accélération</em>.</p>
       </div>
     </div>
@@ -1031,26 +1046,26 @@ def render_acquisition_report_html(acq: dict, project_title: str, idea_text: str
   <div class="card" id="agenda">
     <h2>4. Agenda 12 semaines (tous niveaux)</h2>
     <div class="grid grid-2">
-      {"".join(f'<div class="kpi"><strong>S{a.get("week")}</strong> — {esc(a.get("theme",""))} • {esc(a.get("time",""))} • {esc(a.get("owner",""))}<ul>{"".join(f"<li>{esc(t)}</li>" for t in a.get("tasks",[]))}</ul></div>' for a in agenda)}
+      {{ agenda|raw }}
     </div>
   </div>
 
   <!-- 5. KPIs -->
   <div class="card" id="kpis">
     <h2>5. Indicateurs clés</h2>
-    <p>{esc(", ".join(kpis))}</p>
+    <p>{{ kpis }}</p>
   </div>
 
   <!-- 6. Méthodo -->
   <div class="card" id="methodo">
     <h2>6. Méthodologie & hypothèses</h2>
     <div class="grid grid-3">
-      <div class="kpi">CPC: {assumptions.get('cpc','?')} €</div>
-      <div class="kpi">CTR: {round(assumptions.get('ctr',0)*100,1)}%</div>
-      <div class="kpi">Conv. page: {round(assumptions.get('lp_cvr',0)*100,1)}%</div>
-      <div class="kpi">MQL: {round(assumptions.get('mql_rate',0)*100,1)}%</div>
-      <div class="kpi">SQL: {round(assumptions.get('sql_rate',0)*100,1)}%</div>
-      <div class="kpi">Closing: {round(assumptions.get('close_rate',0)*100,1)}%</div>
+      <div class="kpi">CPC: {{ a_cpc }} €</div>
+      <div class="kpi">CTR: {{ a_ctr }}%</div>
+      <div class="kpi">Conv. page: {{ a_lp_cvr }}%</div>
+      <div class="kpi">MQL: {{ a_mql_rate }}%</div>
+      <div class="kpi">SQL: {{ a_sql_rate }}%</div>
+      <div class="kpi">Closing: {{ a_close_rate }}%</div>
     </div>
     <p class="muted" style="margin-top:8px">Ces valeurs sont des médianes sectorielles. Ajuste après 2–3 semaines avec tes données réelles.</p>
   </div>
@@ -1060,21 +1075,114 @@ def render_acquisition_report_html(acq: dict, project_title: str, idea_text: str
   <!-- 7. Annexes -->
   <div class="card" id="annexes">
     <h2>7. Annexes — Plans détaillés</h2>
-    {"".join(
-      f'<div class="kpi" style="margin-bottom:8px"><h3>{esc(title)}</h3><div style="white-space:pre-wrap">{esc(text)}</div></div>'
-      for title, text in [
-        ("Ads (Search / Social)", annexes.get("ads_strategy")),
-        ("SEO (structure & contenu)", annexes.get("seo_plan")),
-        ("Réseaux sociaux (orga & créas)", annexes.get("social_plan")),
-      ] if text
-    ) or '<p class="muted">—</p>'}
+    {{ annexes|raw }}
   </div>
 
-  {glossaire}
+  <div class="card" id="glossaire">
+    <h2>Glossaire</h2>
+    <ul>
+      <li><strong>CPC</strong> : coût par clic.</li>
+      <li><strong>CTR</strong> : taux de clics (clics / impressions).</li>
+      <li><strong>Landing page</strong> : page d’atterrissage conçue pour convertir.</li>
+      <li><strong>MQL / SQL</strong> : lead marketing qualifié / lead commercial qualifié.</li>
+      <li><strong>Close rate</strong> : taux de transformation opportunité → vente.</li>
+      <li><strong>ROAS</strong> : chiffre d’affaires / dépenses publicitaires.</li>
+    </ul>
+  </div>
 
   <div class="card muted">Conseil : garde ce livret comme base. Mets à jour la projection avec tes metrics (CPC, CTR, conv.) chaque mois.</div>
 </div>
-</body></html>"""
+</body></html>""")
+
+
+def _li_items(items) -> str:
+    """<li> échappés, sans <ul> (le conteneur est dans le template)."""
+    return "".join(f"<li>{esc(x)}</li>" for x in items or [])
+
+
+def _acq_mix_row(m: dict) -> str:
+    return (
+        f'<tr>'
+        f'<td class="kpi" style="width:20%"><strong>{esc(m["name"])}</strong><br/><span class="muted">{round(m.get("budget_share",0)*100)}% du budget</span></td>'
+        f'<td class="kpi" style="width:25%">{esc(m.get("goal",""))}</td>'
+        f'<td class="kpi" style="width:55%"><div><strong>Ce que tu fais concrètement :</strong><ul>{_li_items(m.get("beginner_steps",[]))}</ul></div>'
+        f'<div style="margin-top:6px" class="muted">KPIs : {esc(", ".join(m.get("kpis",[])))}</div></td>'
+        f'</tr>'
+    )
+
+
+def _acq_agenda_item(a: dict) -> str:
+    return (
+        f'<div class="kpi"><strong>S{esc(a.get("week"))}</strong> — {esc(a.get("theme",""))} • {esc(a.get("time",""))} • {esc(a.get("owner",""))}'
+        f'<ul>{_li_items(a.get("tasks",[]))}</ul></div>'
+    )
+
+
+def _annex_blocks(pairs) -> str:
+    return "".join(
+        f'<div class="kpi" style="margin-bottom:8px"><h3>{esc(title)}</h3><div style="white-space:pre-wrap">{esc(text)}</div></div>'
+        for title, text in pairs
+    ) or '<p class="muted">—</p>'
+
+
+@tracing.traced("render.acquisition")
+def render_acquisition_report_html(acq: dict, project_title: str, idea_text: str | None = None) -> str:
+    obj = acq.get("objectives", {})
+    icp = acq.get("icp", "")
+    funnel = acq.get("funnel", {})
+    mix = acq.get("channel_mix", [])
+    kpis = acq.get("kpis", [])
+    agenda = acq.get("agenda", [])
+    assumptions = acq.get("assumptions", {})
+    mb = acq.get("monthly_budget", 0)
+    scenarios = acq.get("forecast_scenarios") or {}
+    labels = [r["month"] for r in next(iter(scenarios.values()), [])] or [f"M{i}" for i in range(1,7)]
+    annexes = acq.get("annexes") or {}
+
+    # Graphiques (SVG inline, compatibles PDF)
+    budget_pairs = [(m["name"], round(m.get("budget_share",0)*mb, 2)) for m in mix]
+    chart_budget = _svg_bar_chart("Répartition du budget / mois (€)", budget_pairs)
+    series_leads = {name: [row["leads"] for row in rows] for name, rows in scenarios.items()}
+    chart_leads = _svg_line_chart_multi("Leads par mois — 3 trajectoires", series_leads, labels)
+    base_rows = scenarios.get("Vitesse de croisière") or []
+    funnel_html = _svg_funnel("M6 (indicatif)", base_rows[-1] if base_rows else {})
+
+    pct = lambda k: round(assumptions.get(k, 0) * 100, 1)
+
+    # HTML final (multi-pages)
+    return templating.render(
+        "acquisition_report",
+        project_title=project_title,
+        idea_block=f'<p class="muted" style="margin-top:6px"><span class="pill">Concept</span> {esc(idea_text)}</p>' if idea_text else "",
+        north_star=obj.get("north_star", ""),
+        targets=_li_items(obj.get("targets", [])),
+        icp=icp,
+        monthly_budget=mb,
+        chart_budget=chart_budget,
+        mix_rows="".join(_acq_mix_row(m) for m in mix),
+        funnel_awareness=_li_items(funnel.get("awareness", [])),
+        funnel_consideration=_li_items(funnel.get("consideration", [])),
+        funnel_conversion=_li_items(funnel.get("conversion", [])),
+        funnel_retention=_li_items(funnel.get("retention", [])),
+        chart_leads=chart_leads,
+        chart_funnel=funnel_html,
+        agenda="".join(_acq_agenda_item(a) for a in agenda),
+        kpis=", ".join(kpis),
+        a_cpc=assumptions.get("cpc", "?"),
+        a_ctr=pct("ctr"),
+        a_lp_cvr=pct("lp_cvr"),
+        a_mql_rate=pct("mql_rate"),
+        a_sql_rate=pct("sql_rate"),
+        a_close_rate=pct("close_rate"),
+        annexes=_annex_blocks(
+            (title, text) for title, text in [
+                ("Ads (Search / Social)", annexes.get("ads_strategy")),
+                ("SEO (structure & contenu)", annexes.get("seo_plan")),
+                ("Réseaux sociaux (orga & créas)", annexes.get("social_plan")),
+            ] if text
+        ),
+    )
+
 
 def _get_legal_block(bp: dict) -> dict:
     # accepte les deux emplacements: narrative.legal (nouveau) ou top-level legal (ancien)
@@ -1088,367 +1196,68 @@ def _get_legal_block(bp: dict) -> dict:
         "tax_social": list(legal.get("tax_social") or ["IS/TVA", "Régime social du dirigeant"]),
     }
 
-def render_business_plan_html(bp: dict, project_title: str, idea_text: str | None = None) -> str:
-    def esc(x):
-        try:
-            import html as _html
-            return _html.escape(str(x if x is not None else ""))
-        except Exception:
-            return str(x)
-
-    styles = """
+templating.register_partial("business_plan_css", """
     <style>
-      :root { color-scheme: dark; }
-      @page { size: A4; margin: 14mm 12mm; }
-      body { margin:0; background:#0f172a; color:#e5e7eb; font-family: Inter, system-ui, -apple-system, Segoe UI, Roboto, Arial; }
-      .wrap { max-width: 1000px; margin: 0 auto; padding: 24px; }
-      .card { background:#111827; border-radius:14px; padding:18px; box-shadow:0 10px 28px rgba(0,0,0,.35); margin-bottom:14px; }
-      h1 { font-size:28px; margin:0 0 8px; font-weight:800 }
-      h2 { font-size:18px; margin:16px 0 8px; color:#8b93ff }
-      h3 { font-size:14px; margin:10px 0 6px; color:#e5e7eb }
-      .muted { color:#9ca3af; font-size:12px }
-      .grid { display:grid; gap:14px }
-      .grid-2 { grid-template-columns:repeat(2,minmax(0,1fr)) }
-      .grid-3 { grid-template-columns:repeat(3,minmax(0,1fr)) }
-      .kpi { background:#0b1220; padding:10px 12px; border-radius:10px; border:1px solid #1f2937 }
-      table { width:100%; border-collapse:separate; border-spacing:0 6px }
+      @page { size: A4; margin: 14mm 12mm; }{{> report_css_base }}
       th, td { padding:6px 10px; }
       th { text-align:left; color:#cbd5e1; border-bottom:1px solid #1f2937 }
       td { background:#0b1220; border:1px solid #1f2937; }
-      .pagebreak { page-break-before: always; }
-      ul { margin:8px 0 0 18px }
-      .toc a { color:#e5e7eb; text-decoration:none }
     </style>
-    """
-
-
-    meta = bp.get("meta", {})
-    nar  = bp.get("narrative", {})
-    ass  = bp.get("assumptions", {})
-    inv  = bp.get("investments", {})
-    fin  = bp.get("financing", {})
-    pnl  = bp.get("pnl_3y", {})
-    cash = bp.get("cash_12m", {})
-    bre  = bp.get("breakeven", {})
-    s36  = bp.get("series_36m", {})
-    glossary = bp.get("glossary", {})
-    annexes  = bp.get("annexes", {})
-
-    # --- HOTFIX: normalise les blobs narratifs pour éviter AttributeError quand GPT renvoie une string ---
-    # Sécurise nar au cas où ce serait une simple chaîne
-    if not isinstance(nar, dict):
-        nar = {"executive_summary": str(nar or "")}
-
-    def _as_list(x):
-        if isinstance(x, list):
-            return x
-        if isinstance(x, str) and x.strip():
-            return [x.strip()]
-        return []
-
-    market = nar.get("market") or {}
-    if not isinstance(market, dict):
-        market = {
-            "size_drivers": str(market or ""),
-            "segments": [],
-            "competition": [],
-            "regulation": [],
-        }
-
-    gtm = nar.get("go_to_market") or {}
-    if not isinstance(gtm, dict):
-        gtm = {
-            "segmentation": [],
-            "positioning": str(gtm or ""),
-            "mix": [],
-            "sales_process": [],
-        }
-
-    ops = nar.get("operations") or {}
-    if not isinstance(ops, dict):
-        ops = {
-            "organization": str(ops or ""),
-            "people": [],
-            "resources": [],
-            "roadmap": [],
-        }
-
-    # Funding & risks (obj/list robustes)
-    fund = nar.get("funding") or {}
-    if not isinstance(fund, dict):
-        fund = {"ask": str(fund or ""), "use_of_funds": [], "milestones": []}
-    risks = nar.get("risks") or []
-    if isinstance(risks, str):
-        risks = [risks]
-
-    proj_detail = nar.get("project_detail")
-    proj_text = None
-    if isinstance(proj_detail, dict):
-        pass
-    else:
-        proj_detail = None
-        proj_text = str(nar.get("project") or "")
-
-    # si tu as déplacé 'legal' et 'glossary' dans bp["legal"]/bp["glossary"], on les récupère prudemment
-    legal = bp.get("legal") or nar.get("legal") or {}
-    if not isinstance(legal, dict):
-        legal = {
-            "form": str(legal or ""),
-            "rationale": "",
-            "cap_table": [],
-            "governance": [],
-            "tax_social": [],
-        }
-
-    glossary = bp.get("glossary") or nar.get("glossary") or {}
-    if not isinstance(glossary, dict):
-        glossary = {}
-    # --- /HOTFIX ---
-
-    legal_block = _get_legal_block(bp)
-
-    # ▼▼▼ Fallbacks sectoriels pour éviter les "—" quand GPT renvoie des listes vides
-    sector_cat = (meta.get("sector_category") or "").lower()
-
-    def _pick(cat, key):
-        defaults = {
-            "saas_b2b": {
-                "segments": [
-                    "PME françaises (10–200 salariés) — décideurs: DG/COO/Head of Ops",
-                    "ETI ciblées — directions métiers avec budget outillage"
-                ],
-                "competition": [
-                    "SaaS US établis (HubSpot, Monday…) — riche mais coûteux",
-                    "Outils internes (Excel/scripts) — faible scalabilité",
-                    "Intégrateurs locaux — sur-mesure onéreux"
-                ],
-                "regulation": [
-                    "RGPD/CNIL (DPA, registre traitements, minimisation)",
-                    "Hébergement UE, chiffrement au repos/en transit",
-                    "Clauses contractuelles: SLA, DPA, réversibilité"
-                ],
-                "mix": [
-                    "Produit: plans Starter/Pro/Entreprise, SSO & SLA",
-                    "Prix: abonnement mensuel/annuel, remises 10–20% à l’année",
-                    "Distribution: site + démos, partenaires intégrateurs",
-                    "Communication: SEO technique + contenu, SEA B2B, webinars, LinkedIn"
-                ],
-                "sales_process": [
-                    "Lead → qualification (BANT/ICP) → démo → essai 14j → closing → onboarding",
-                    "KPI: CAC, taux de conv., cycle de vente, churn, LTV"
-                ],
-                "people": [
-                    "CEO/COO (direction & partenariats)",
-                    "Sales (SDR + AE) — chasse/farming",
-                    "Marketing (content/paid/ops)",
-                    "Customer Success & Support",
-                    "Tech/Produit (selon externalisation)"
-                ],
-                "resources": [
-                    "CRM (HubSpot/Pipedrive), facturation (Stripe)",
-                    "Analytics (Matomo/GA4), emailing (Brevo)",
-                    "Stack cloud (Scaleway/OVH), monitoring",
-                    "Outils doc & projet (Notion/Jira)"
-                ],
-            },
-            "ecommerce_b2c": {
-                "segments": [
-                    "18–35 ans urbains — achats en ligne, sensibles au prix",
-                    "35–55 ans CSP+ — recherche qualité/rapidité/livraison"
-                ],
-                "competition": [
-                    "Marketplaces (Amazon, Cdiscount) — choix/rapidité",
-                    "Boutiques spécialisées — conseil de niche",
-                    "DNVB concurrentes — image de marque forte"
-                ],
-                "regulation": [
-                    "Droit conso (rétractation, garanties), TVA",
-                    "RGPD (cookies, consentement)",
-                    "Éco-contributions (emballages) selon produit"
-                ],
-                "mix": [
-                    "Produit: gammes claires, bundles, éditions limitées",
-                    "Prix: ancrage, codes promo maîtrisés, AOV",
-                    "Distribution: site + marketplaces sélectionnées",
-                    "Communication: SEO long tail, ads Meta/Google, influence"
-                ],
-                "sales_process": [
-                    "Acquisition → ajout panier → checkout → relance abandons → fidélisation",
-                    "KPI: CTR, CR, AOV, CAC, ROAS, réachat"
-                ],
-                "people": [
-                    "CMO/e-commerce manager",
-                    "Acquisition paid + CRM/e-mailing",
-                    "Service client & logistique (3PL si besoin)"
-                ],
-                "resources": [
-                    "CMS (Shopify/Woo), paiement (Stripe), anti-fraude",
-                    "WMS/3PL, PIM si catalogue large",
-                    "Outils CRO (A/B test), heatmaps"
-                ],
-            },
-            "services_locaux": {
-                "segments": [
-                    "Particuliers zone de chalandise (rayon 20 km)",
-                    "Professionnels locaux (restauration, commerces, TPE)"
-                ],
-                "competition": [
-                    "Artisans locaux historiques",
-                    "Plateformes d’intermédiation",
-                    "Do-it-yourself selon service"
-                ],
-                "regulation": [
-                    "Réglementations métier & assurances pro",
-                    "Devis/facturation, TVA",
-                    "Hygiène/sécurité le cas échéant"
-                ],
-                "mix": [
-                    "Produit: forfaits clairs + options",
-                    "Prix: grille transparente, pack récurrence",
-                    "Distribution: référencement local, partenariats",
-                    "Communication: Google Business, flyers, réseaux sociaux"
-                ],
-                "sales_process": [
-                    "Demande → devis → intervention → satisfaction → récurrence/parrainage",
-                    "KPI: taux d’acceptation devis, récurrence, NPS"
-                ],
-                "people": [
-                    "Gérant(e), 1–2 techniciens/ouvriers selon charge",
-                    "Assist. admin/commerciale (part-time)"
-                ],
-                "resources": [
-                    "Véhicule/outil métier",
-                    "Logiciel devis/facturation, agenda, CRM simple"
-                ],
-            },
-        }
-        # générique par défaut
-        defaults["generic_b2b"] = defaults["saas_b2b"]
-        return defaults.get(cat or "generic_b2b", {}).get(key, [])
+""")
 
-    # Remplissage des trous
-    market["segments"]    = market.get("segments")    or _pick(sector_cat, "segments")
-    market["competition"] = market.get("competition") or _pick(sector_cat, "competition")
-    market["regulation"]  = market.get("regulation")  or _pick(sector_cat, "regulation")
-
-    strat = gtm  # alias déjà utilisé plus bas
-    strat["mix"]           = strat.get("mix")           or _pick(sector_cat, "mix")
-    strat["sales_process"] = strat.get("sales_process") or _pick(sector_cat, "sales_process")
-    if not strat.get("positioning"):
-        strat["positioning"] = "Promesse claire (valeur + preuve), différenciation par expérience & ROI."
-
-    ops["people"]    = ops.get("people")    or _pick(sector_cat, "people")
-    ops["resources"] = ops.get("resources") or _pick(sector_cat, "resources")
-    # ▲▲▲ fin des fallbacks
-
-    # Graphiques (CA avec axe Y demandé)
-    rev_labels = [f"M{i}" for i in range(1, 13)]
-    rev_values = [ (s36.get("revenue") or [0]*37)[i] for i in range(1,13) ]
-    chart_rev  = _svg_line_with_y_axis("CA mensuel prévisionnel (M1–M12)", rev_labels, rev_values, y_label="CA prévisionnel (€)")
-
-    # EBITDA : tu peux conserver ton helper multi-lignes existant si tu l'as,
-    # sinon commente la ligne suivante.
-    try:
-        ebd_values = [ (s36.get("ebitda") or [0]*37)[i] for i in range(1,13) ]
-        chart_ebd  = _svg_line_chart_multi("EBITDA mensuel (M1–M12)", {"EBITDA": ebd_values}, rev_labels)
-    except Exception:
-        chart_ebd = ""
-
-    # Tableaux
-    inv_rows = "".join(
-        f"<tr><td>{esc(x['label'])}</td><td>{x['month']}</td><td>{x['life_years']} ans</td><td>{round(x['amount'],2)} €</td><td>{round(x['amort_month'],2)} €/mois</td></tr>"
-        for x in inv.get("items", [])
-    )
-    pnl_row = lambda key: "".join(f"<td>{round(v,2)} €</td>" for v in pnl.get(key, [0,0,0]))
-
-    loan_sched = fin.get("loan", {}).get("schedule") or []
-    loan_rows = "".join(
-        f"<tr><td>M{it['month']}</td><td>{it['payment']} €</td><td>{it['interest']} €</td><td>{it['principal']} €</td><td>{it['balance']} €</td></tr>"
-        for it in loan_sched[:12]
-    )
-
-    # Sommaire avec Juridique + Glossaire (glossaire avant annexes)
-    toc = """
-          <div class="card">
-            <h2>Sommaire</h2>
-            <ul class="toc">
-              <li><a href="#exec">1. Executive summary</a></li>
-              <li><a href="#team">2. Équipe fondatrice</a></li>
-              <li><a href="#project">3. Présentation du projet</a></li>
-              <li><a href="#eco">4. Partie économique</a></li>
-              <li><a href="#fin">5. Partie financière</a></li>
-              <li><a href="#funding">6. Besoin de financement</a></li>
-              <li><a href="#risks">7. Risques & parades</a></li>
-              <li><a href="#legal">8. Partie juridique</a></li>
-              <li><a href="#gloss">9. Glossaire</a></li>
-              <li><a href="#annex">10. Annexes</a></li>
-            </ul>
-          </div>
-        """
-
-
-    def ul(items):
-        if not items: return "<p class='muted'>—</p>"
-        if isinstance(items, dict):
-            return "<ul>" + "".join(f"<li><strong>{esc(k)}:</strong> {esc(v)}</li>" for k,v in items.items()) + "</ul>"
-        if isinstance(items, str):
-            items = [items]
-        return "<ul>" + "".join(f"<li>{esc(x)}</li>" for x in items) + "</ul>"
-
-    def dl(dct):
-        if not isinstance(dct, dict) or not dct: return "<p class='muted'>—</p>"
-        return "<ul>" + "".join(f"<li><strong>{esc(k)}</strong> — {esc(v)}</li>" for k,v in dct.items()) + "</ul>"
-
-    bre_rev = bre.get("revenue") or bre.get("revenue_annual_needed")
-    bre_hint = bre.get("month_hint") or (f"vers M{bre['month']}" if bre.get("month") else "non atteint sur 36 mois")
-    bre_m_ca = bre.get("revenue_month")
-
-    return f"""<!doctype html>
+templating.register_template("business_plan", """<!doctype html>
 <html lang="fr"><head>
 <meta charset="utf-8"/>
 <meta name="viewport" content="width=device-width, initial-scale=1"/>
-<title>{esc(project_title)}</title>
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;800&display=swap" rel="stylesheet">
-{styles}
+<title>{{ project_title }}</title>
+{{> inter_font_link }}
+{{> business_plan_css }}
 </head>
 <body>
 <div class="wrap">
 
   <div class="card">
-    <h1>Business Plan — {esc(project_title)}</h1>
+    <h1>Business Plan — {{ project_title }}</h1>
     <div class="muted">Version automatique — base solide à compléter</div>
-    {f'<p class="muted" style="margin-top:6px">Concept: {esc(idea_text)}</p>' if idea_text else ''}
+    {{ idea_block|raw }}
   </div>
 
-  {toc}
+  <div class="card">
+    <h2>Sommaire</h2>
+    <ul class="toc">
+      <li><a href="#exec">1. Executive summary</a></li>
+      <li><a href="#team">2. Équipe fondatrice</a></li>
+      <li><a href="#project">3. Présentation du projet</a></li>
+      <li><a href="#eco">4. Partie économique</a></li>
+      <li><a href="#fin">5. Partie financière</a></li>
+      <li><a href="#funding">6. Besoin de financement</a></li>
+      <li><a href="#risks">7. Risques & parades</a></li>
+      <li><a href="#legal">8. Partie juridique</a></li>
+      <li><a href="#gloss">9. Glossaire</a></li>
+      <li><a href="#annex">10. Annexes</a></li>
+    </ul>
+  </div>
 
   <div class="pagebreak"></div>
 
   <div class="card" id="exec">
     <h2>1. Executive summary</h2>
-    <p>{esc(nar.get("executive_summary"))}</p>
+    <p>{{ executive_summary }}</p>
     <div class="grid grid-3" style="margin-top:8px">
-      <div class="kpi">Secteur: {esc(meta.get("sector"))} ({esc(meta.get("sector_category"))})</div>
-      <div class="kpi">Objectifs 24 mois: {esc(", ".join((nar.get("objectives") or [])))}</div>
-      <div class="kpi">Proposition de valeur: {esc((nar.get("value_prop") or ""))}</div>
+      <div class="kpi">Secteur: {{ sector }} ({{ sector_category }})</div>
+      <div class="kpi">Objectifs 24 mois: {{ objectives }}</div>
+      <div class="kpi">Proposition de valeur: {{ value_prop }}</div>
     </div>
   </div>
 
   <div class="card" id="team">
     <h2>2. Équipe fondatrice</h2>
-    <p>{esc(nar.get("team"))}</p>
+    <p>{{ team }}</p>
   </div>
 
   <div class="card" id="project">
     <h2>3. Présentation du projet</h2>
-    {(
-      f"<h3>Problème & opportunité</h3><p>{esc((proj_detail or {}).get('problem',''))}</p>"
-      f"<h3>Solution & différenciation</h3><p>{esc((proj_detail or {}).get('solution',''))}</p>"
-      f"<h3>Clients cibles</h3>" + ul((proj_detail or {}).get('targets')) +
-      f"<h3>Fonctionnalités clés</h3>" + ul((proj_detail or {}).get('product_features')) +
-      f"<h3>Proposition de valeur</h3><p>{esc((proj_detail or {}).get('value_prop',''))}</p>" +
-      f"<h3>Jalons</h3>" + ul((proj_detail or {}).get('milestones'))
-    ) if proj_detail else f"<p>{esc(proj_text or '')}</p>"}
+    {{ project_block|raw }}
   </div>
 
   <div class="pagebreak"></div>
@@ -1457,26 +1266,26 @@ def render_business_plan_html(bp: dict, project_title: str, idea_text: str | Non
     <h2>4. Partie économique</h2>
 
     <h3>Marché & environnement (France)</h3>
-    <p><strong>Taille & moteurs de croissance :</strong> {esc(market.get("size_drivers",""))}</p>
-    <p><strong>Segments de clientèle :</strong></p>{ul(market.get("segments"))}
-    <p><strong>Concurrence & alternatives :</strong></p>{ul(market.get("competition"))}
-    <p><strong>Réglementation / normes :</strong></p>{ul(market.get("regulation"))}
+    <p><strong>Taille & moteurs de croissance :</strong> {{ market_size_drivers }}</p>
+    <p><strong>Segments de clientèle :</strong></p>{{ market_segments|raw }}
+    <p><strong>Concurrence & alternatives :</strong></p>{{ market_competition|raw }}
+    <p><strong>Réglementation / normes :</strong></p>{{ market_regulation|raw }}
 
     <h3>Stratégie commerciale</h3>
-    <p><strong>Segmentation & ciblage :</strong></p>{ul(gtm.get("segmentation"))}
-    <p><strong>Positionnement :</strong> {esc(gtm.get("positioning",""))}</p>
-    <p><strong>Mix marketing :</strong></p>{ul(gtm.get("mix"))}
-    <p><strong>Processus de vente :</strong></p>{ul(gtm.get("sales_process"))}
+    <p><strong>Segmentation & ciblage :</strong></p>{{ gtm_segmentation|raw }}
+    <p><strong>Positionnement :</strong> {{ gtm_positioning }}</p>
+    <p><strong>Mix marketing :</strong></p>{{ gtm_mix|raw }}
+    <p><strong>Processus de vente :</strong></p>{{ gtm_sales_process|raw }}
 
     <h3>Organisation & moyens</h3>
-    <p><strong>Organisation :</strong> {esc(ops.get("organization",""))}</p>
-    <p><strong>Moyens humains :</strong></p>{ul(ops.get("people"))}
-    <p><strong>Moyens matériels & logiciels :</strong></p>{ul(ops.get("resources"))}
-    <p><strong>Feuille de route :</strong></p>{ul(ops.get("roadmap"))}
+    <p><strong>Organisation :</strong> {{ ops_organization }}</p>
+    <p><strong>Moyens humains :</strong></p>{{ ops_people|raw }}
+    <p><strong>Moyens matériels & logiciels :</strong></p>{{ ops_resources|raw }}
+    <p><strong>Feuille de route :</strong></p>{{ ops_roadmap|raw }}
 
     <h3>Prévisions de CA (12 mois)</h3>
-    <div style="margin-top:10px">{chart_rev}</div>
-    {f'<div style="margin-top:10px">{chart_ebd}</div>' if chart_ebd else ''}
+    <div style="margin-top:10px">{{ chart_rev|raw }}</div>
+    {{ chart_ebd_block|raw }}
   </div>
 
   <div class="pagebreak"></div>
@@ -1487,23 +1296,23 @@ def render_business_plan_html(bp: dict, project_title: str, idea_text: str | Non
     <h3>Investissements & amortissements</h3>
     <table>
       <thead><tr><th>Élément</th><th>Mois</th><th>Durée</th><th>Montant</th><th>Dotation/mois</th></tr></thead>
-      <tbody>{inv_rows or '<tr><td colspan="5">—</td></tr>'}</tbody>
+      <tbody>{{ inv_rows|raw }}</tbody>
     </table>
 
     <h3>Plan de financement initial</h3>
     <div class="grid grid-2">
       <div class="kpi"><strong>Besoins</strong>
         <ul>
-          <li>Investissements: {inv.get("total")} €</li>
-          <li>BFR (est.): {fin.get("initial_uses",{}).get("working_capital","0")} €</li>
-          <li><strong>Total: {fin.get("initial_uses",{}).get("total","0")} €</strong></li>
+          <li>Investissements: {{ inv_total }} €</li>
+          <li>BFR (est.): {{ uses_working_capital }} €</li>
+          <li><strong>Total: {{ uses_total }} €</strong></li>
         </ul>
       </div>
       <div class="kpi"><strong>Ressources</strong>
         <ul>
-          <li>Fonds propres: {fin.get("initial_sources",{}).get("equity","0")} €</li>
-          <li>Emprunt: {fin.get("initial_sources",{}).get("loan","0")} €</li>
-          <li><strong>Total: {fin.get("initial_sources",{}).get("total","0")} €</strong></li>
+          <li>Fonds propres: {{ sources_equity }} €</li>
+          <li>Emprunt: {{ sources_loan }} €</li>
+          <li><strong>Total: {{ sources_total }} €</strong></li>
         </ul>
       </div>
     </div>
@@ -1512,18 +1321,7 @@ def render_business_plan_html(bp: dict, project_title: str, idea_text: str | Non
     <table>
       <thead><tr><th></th><th>Année 1</th><th>Année 2</th><th>Année 3</th></tr></thead>
       <tbody>
-        <tr><td>Chiffre d'affaires</td>{pnl_row('revenue')}</tr>
-        <tr><td>Coût des ventes</td>{pnl_row('cogs')}</tr>
-        <tr><td>Marge brute</td>{pnl_row('gross')}</tr>
-        <tr><td>Marketing</td>{pnl_row('marketing')}</tr>
-        <tr><td>Charges fixes</td>{pnl_row('fixed')}</tr>
-        <tr><td>EBITDA</td>{pnl_row('ebitda')}</tr>
-        <tr><td>Amortissements</td>{pnl_row('depreciation')}</tr>
-        <tr><td>EBIT</td>{pnl_row('ebit')}</tr>
-        <tr><td>Intérêts</td>{pnl_row('interest')}</tr>
-        <tr><td>Résultat avant impôt</td>{pnl_row('ebt')}</tr>
-        <tr><td>IS (théorique)</td>{pnl_row('tax')}</tr>
-        <tr><td>Résultat net</td>{pnl_row('net')}</tr>
+        {{ pnl_rows|raw }}
       </tbody>
     </table>
 
@@ -1533,98 +1331,416 @@ def render_business_plan_html(bp: dict, project_title: str, idea_text: str | Non
     <table>
       <thead><tr><th>Mois</th><th>Encaissements</th><th>Décaissements</th><th>Trésorerie fin de mois</th></tr></thead>
       <tbody>
-        {''.join(f"<tr><td>M{m['month']}</td><td>{m['in']} €</td><td>{m['out']} €</td><td>{m['end']} €</td></tr>" for m in cash.get("months",[]))}
+        {{ cash_rows|raw }}
       </tbody>
     </table>
 
     <h3>Échéancier d'emprunt (12 premiers mois)</h3>
     <table>
       <thead><tr><th>Mois</th><th>Échéance</th><th>Intérêts</th><th>Capital</th><th>Reste dû</th></tr></thead>
-      <tbody>{loan_rows or '<tr><td colspan="5">—</td></tr>'}</tbody>
+      <tbody>{{ loan_rows|raw }}</tbody>
     </table>
 
     <h3>Plan de financement à 3 ans</h3>
     <div class="grid grid-3">
-      <div class="kpi">Dette fin A1: {round(fin.get('three_year_view',{}).get('loan_outstanding_end_y1',0),2)} €</div>
-      <div class="kpi">Dette fin A2: {round(fin.get('three_year_view',{}).get('loan_outstanding_end_y2',0),2)} €</div>
-      <div class="kpi">Dette fin A3: {round(fin.get('three_year_view',{}).get('loan_outstanding_end_y3',0),2)} €</div>
+      <div class="kpi">Dette fin A1: {{ debt_y1 }} €</div>
+      <div class="kpi">Dette fin A2: {{ debt_y2 }} €</div>
+      <div class="kpi">Dette fin A3: {{ debt_y3 }} €</div>
     </div>
 
-   <h3>Seuil de rentabilité</h3>
-<p>
-  CA annuel à atteindre : <strong>{bre_rev or "—"} €</strong> — indication : {esc(bre_hint)}
-  {f"(mois charnière: M{bre.get('month')}, CA: {bre_m_ca} €)" if bre.get("month") else ""}.
-</p>
+    <h3>Seuil de rentabilité</h3>
+    <p>
+      CA annuel à atteindre : <strong>{{ bre_rev }} €</strong> — indication : {{ bre_hint }}
+      {{ bre_month_block }}.
+    </p>
   </div>
 
   <div class="pagebreak"></div>
-  
+
   <div class="card" id="funding">
-  <h2>6. Besoin de financement</h2>
-  <p><strong>Demande (copy) :</strong> {esc(fund.get("ask",""))}</p>
-  <p class="muted">Recommandation (runway + BFR) : <strong>{round((fund.get("recommended_ask_eur") or 0),2)} €</strong></p>
-
-  <h3>Plan initial — Sources</h3>
-  <ul>
-    <li>Fonds propres : {((fund.get("initial_plan") or {}).get("sources") or {}).get("equity","—")} €</li>
-    <li>Emprunt : {((fund.get("initial_plan") or {}).get("sources") or {}).get("loan","—")} €</li>
-    <li><strong>Total</strong> : {((fund.get("initial_plan") or {}).get("sources") or {}).get("total","—")} €</li>
-  </ul>
-
-  <h3>Plan initial — Besoins</h3>
-  <ul>
-    <li>Investissements : {((fund.get("initial_plan") or {}).get("uses") or {}).get("investments","—")} €</li>
-    <li>BFR : {((fund.get("initial_plan") or {}).get("uses") or {}).get("working_capital","—")} €</li>
-    <li><strong>Total</strong> : {((fund.get("initial_plan") or {}).get("uses") or {}).get("total","—")} €</li>
-  </ul>
-
-  <h3>Utilisation des fonds</h3>{ul(fund.get("use_of_funds"))}
-  <h3>Jalons associés</h3>{ul(fund.get("milestones"))}
-</div>
+    <h2>6. Besoin de financement</h2>
+    <p><strong>Demande (copy) :</strong> {{ fund_ask }}</p>
+    <p class="muted">Recommandation (runway + BFR) : <strong>{{ fund_recommended }} €</strong></p>
+
+    <h3>Plan initial — Sources</h3>
+    <ul>
+      <li>Fonds propres : {{ plan_sources_equity }} €</li>
+      <li>Emprunt : {{ plan_sources_loan }} €</li>
+      <li><strong>Total</strong> : {{ plan_sources_total }} €</li>
+    </ul>
+
+    <h3>Plan initial — Besoins</h3>
+    <ul>
+      <li>Investissements : {{ plan_uses_investments }} €</li>
+      <li>BFR : {{ plan_uses_working_capital }} €</li>
+      <li><strong>Total</strong> : {{ plan_uses_total }} €</li>
+    </ul>
+
+    <h3>Utilisation des fonds</h3>{{ fund_use_of_funds|raw }}
+    <h3>Jalons associés</h3>{{ fund_milestones|raw }}
+  </div>
 
   <div class="card" id="risks">
     <h2>7. Principaux risques & parades</h2>
-    {ul(risks)}
+    {{ risks|raw }}
   </div>
 
   <div class="card" id="legal">
-  <h2>8. Partie juridique</h2>
-  <p><strong>Forme retenue :</strong> {esc(legal_block['form'])}</p>
-  <p><strong>Justification :</strong> {esc(legal_block['rationale'])}</p>
-  <h3>Répartition du capital (cap table)</h3>{ul(legal_block['cap_table'])}
-  <h3>Gouvernance & pouvoirs</h3>{ul(legal_block['governance'])}
-  <h3>Régime fiscal & social</h3>{ul(legal_block['tax_social'])}
-</div>
+    <h2>8. Partie juridique</h2>
+    <p><strong>Forme retenue :</strong> {{ legal_form }}</p>
+    <p><strong>Justification :</strong> {{ legal_rationale }}</p>
+    <h3>Répartition du capital (cap table)</h3>{{ legal_cap_table|raw }}
+    <h3>Gouvernance & pouvoirs</h3>{{ legal_governance|raw }}
+    <h3>Régime fiscal & social</h3>{{ legal_tax_social|raw }}
+  </div>
 
   <div class="card" id="gloss">
     <h2>9. Glossaire</h2>
-    {dl(glossary)}
+    {{ glossary|raw }}
   </div>
 
   <div class="card" id="annex">
     <h2>10. Annexes</h2>
-    {"".join(
-      f'<div class="kpi" style="margin-bottom:8px"><h3>{esc(k)}</h3><div style="white-space:pre-wrap">{esc(v)}</div></div>'
-      for k, v in (annexes or {}).items()
-    ) or '<p class="muted">—</p>'}
+    {{ annexes|raw }}
   </div>
 
 </div>
-</body></html>"""
+</body></html>""")
+
+# ▼▼▼ Fallbacks sectoriels pour éviter les "—" quand GPT renvoie des listes vides
+_BP_SECTOR_FALLBACKS: dict[str, dict[str, tuple[str, ...]]] = {
+    "saas_b2b": {
+        "segments": (
+            "PME françaises (10–200 salariés) — décideurs: DG/COO/Head of Ops",
+            "ETI ciblées — directions métiers avec budget outillage",
+        ),
+        "competition": (
+            "SaaS US établis (HubSpot, Monday…) — riche mais coûteux",
+            "Outils internes (Excel/scripts) — faible scalabilité",
+            "Intégrateurs locaux — sur-mesure onéreux",
+        ),
+        "regulation": (
+            "RGPD/CNIL (DPA, registre traitements, minimisation)",
+            "Hébergement UE, chiffrement au repos/en transit",
+            "Clauses contractuelles: SLA, DPA, réversibilité",
+        ),
+        "mix": (
+            "Produit: plans Starter/Pro/Entreprise, SSO & SLA",
+            "Prix: abonnement mensuel/annuel, remises 10–20% à l’année",
+            "Distribution: site + démos, partenaires intégrateurs",
+            "Communication: SEO technique + contenu, SEA B2B, webinars, LinkedIn",
+        ),
+        "sales_process": (
+            "Lead → qualification (BANT/ICP) → démo → essai 14j → closing → onboarding",
+            "KPI: CAC, taux de conv., cycle de vente, churn, LTV",
+        ),
+        "people": (
+            "CEO/COO (direction & partenariats)",
+            "Sales (SDR + AE) — chasse/farming",
+            "Marketing (content/paid/ops)",
+            "Customer Success & Support",
+            "Tech/Produit (selon externalisation)",
+        ),
+        "resources": (
+            "CRM (HubSpot/Pipedrive), facturation (Stripe)",
+            "Analytics (Matomo/GA4), emailing (Brevo)",
+            "Stack cloud (Scaleway/OVH), monitoring",
+            "Outils doc & projet (Notion/Jira)",
+        ),
+    },
+    "ecommerce_b2c": {
+        "segments": (
+            "18–35 ans urbains — achats en ligne, sensibles au prix",
+            "35–55 ans CSP+ — recherche qualité/rapidité/livraison",
+        ),
+        "competition": (
+            "Marketplaces (Amazon, Cdiscount) — choix/rapidité",
+            "Boutiques spécialisées — conseil de niche",
+            "DNVB concurrentes — image de marque forte",
+        ),
+        "regulation": (
+            "Droit conso (rétractation, garanties), TVA",
+            "RGPD (cookies, consentement)",
+            "Éco-contributions (emballages) selon produit",
+        ),
+        "mix": (
+            "Produit: gammes claires, bundles, éditions limitées",
+            "Prix: ancrage, codes promo maîtrisés, AOV",
+            "Distribution: site + marketplaces sélectionnées",
+            "Communication: SEO long tail, ads Meta/Google, influence",
+        ),
+        "sales_process": (
+            "Acquisition → ajout panier → checkout → relance abandons → fidélisation",
+            "KPI: CTR, CR, AOV, CAC, ROAS, réachat",
+        ),
+        "people": (
+            "CMO/e-commerce manager",
+            "Acquisition paid + CRM/e-mailing",
+            "Service client & logistique (3PL si besoin)",
+        ),
+        "resources": (
+            "CMS (Shopify/Woo), paiement (Stripe), anti-fraude",
+            "WMS/3PL, PIM si catalogue large",
+            "Outils CRO (A/B test), heatmaps",
+        ),
+    },
+    "services_locaux": {
+        "segments": (
+            "Particuliers zone de chalandise (rayon 20 km)",
+            "Professionnels locaux (restauration, commerces, TPE)",
+        ),
+        "competition": (
+            "Artisans locaux historiques",
+            "Plateformes d’intermédiation",
+            "Do-it-yourself selon service",
+        ),
+        "regulation": (
+            "Réglementations métier & assurances pro",
+            "Devis/facturation, TVA",
+            "Hygiène/sécurité le cas échéant",
+        ),
+        "mix": (
+            "Produit: forfaits clairs + options",
+            "Prix: grille transparente, pack récurrence",
+            "Distribution: référencement local, partenariats",
+            "Communication: Google Business, flyers, réseaux sociaux",
+        ),
+        "sales_process": (
+            "Demande → devis → intervention → satisfaction → récurrence/parrainage",
+            "KPI: taux d’acceptation devis, récurrence, NPS",
+        ),
+        "people": (
+            "Gérant(e), 1–2 techniciens/ouvriers selon charge",
+            "Assist. admin/commerciale (part-time)",
+        ),
+        "resources": (
+            "Véhicule/outil métier",
+            "Logiciel devis/facturation, agenda, CRM simple",
+        ),
+    },
+}
+# générique par défaut
+_BP_SECTOR_FALLBACKS["generic_b2b"] = _BP_SECTOR_FALLBACKS["saas_b2b"]
+
+
+def _bp_fallback(cat: str, key: str) -> list[str]:
+    return list(_BP_SECTOR_FALLBACKS.get(cat or "generic_b2b", {}).get(key, ()))
+
+
+def _bp_ul(items) -> str:
+    if not items: return "<p class='muted'>—</p>"
+    if isinstance(items, dict):
+        return "<ul>" + "".join(f"<li><strong>{esc(k)}:</strong> {esc(v)}</li>" for k,v in items.items()) + "</ul>"
+    if isinstance(items, str):
+        items = [items]
+    return "<ul>" + "".join(f"<li>{esc(x)}</li>" for x in items) + "</ul>"
+
+
+def _bp_dl(dct) -> str:
+    if not isinstance(dct, dict) or not dct: return "<p class='muted'>—</p>"
+    return "<ul>" + "".join(f"<li><strong>{esc(k)}</strong> — {esc(v)}</li>" for k,v in dct.items()) + "</ul>"
+
+
+_BP_PNL_LINES = (
+    ("Chiffre d'affaires", "revenue"), ("Coût des ventes", "cogs"), ("Marge brute", "gross"),
+    ("Marketing", "marketing"), ("Charges fixes", "fixed"), ("EBITDA", "ebitda"),
+    ("Amortissements", "depreciation"), ("EBIT", "ebit"), ("Intérêts", "interest"),
+    ("Résultat avant impôt", "ebt"), ("IS (théorique)", "tax"), ("Résultat net", "net"),
+)
+
+
+@tracing.traced("render.business_plan")
+def render_business_plan_html(bp: dict, project_title: str, idea_text: str | None = None) -> str:
+    meta = bp.get("meta", {})
+    nar  = bp.get("narrative", {})
+    inv  = bp.get("investments", {})
+    fin  = bp.get("financing", {})
+    pnl  = bp.get("pnl_3y", {})
+    cash = bp.get("cash_12m", {})
+    bre  = bp.get("breakeven", {})
+    s36  = bp.get("series_36m", {})
+    annexes  = bp.get("annexes", {})
 
+    # --- HOTFIX: normalise les blobs narratifs pour éviter AttributeError quand GPT renvoie une string ---
+    # Sécurise nar au cas où ce serait une simple chaîne
+    if not isinstance(nar, dict):
+        nar = {"executive_summary": str(nar or "")}
 
-# --- PLAN HTML RENDERER ------------------------------------------------------
-def render_action_plan_html(plan: dict, project_title: str) -> str:
-    import html as _html
-    def esc(x): return _html.escape(str(x or ""))
+    market = nar.get("market") or {}
+    if not isinstance(market, dict):
+        market = {
+            "size_drivers": str(market or ""),
+            "segments": [],
+            "competition": [],
+            "regulation": [],
+        }
 
-    weeks = plan.get("weeks")
-    if not isinstance(weeks, list) or not weeks:
-        weeks = []
-        for i, line in enumerate(plan.get("plan") or [], start=1):
-            weeks.append({"week": i, "theme": "", "goals": [], "kpis": [], "tasks": [{"title": str(line)}]})
+    gtm = nar.get("go_to_market") or {}
+    if not isinstance(gtm, dict):
+        gtm = {
+            "segmentation": [],
+            "positioning": str(gtm or ""),
+            "mix": [],
+            "sales_process": [],
+        }
 
-    styles = """
+    ops = nar.get("operations") or {}
+    if not isinstance(ops, dict):
+        ops = {
+            "organization": str(ops or ""),
+            "people": [],
+            "resources": [],
+            "roadmap": [],
+        }
+
+    # Funding & risks (obj/list robustes)
+    fund = nar.get("funding") or {}
+    if not isinstance(fund, dict):
+        fund = {"ask": str(fund or ""), "use_of_funds": [], "milestones": []}
+    risks = nar.get("risks") or []
+    if isinstance(risks, str):
+        risks = [risks]
+
+    proj_detail = nar.get("project_detail")
+    proj_text = None
+    if not isinstance(proj_detail, dict):
+        proj_detail = None
+        proj_text = str(nar.get("project") or "")
+
+    glossary = bp.get("glossary") or nar.get("glossary") or {}
+    if not isinstance(glossary, dict):
+        glossary = {}
+    # --- /HOTFIX ---
+
+    legal_block = _get_legal_block(bp)
+
+    # Remplissage des trous (fallbacks sectoriels)
+    sector_cat = (meta.get("sector_category") or "").lower()
+    market["segments"]    = market.get("segments")    or _bp_fallback(sector_cat, "segments")
+    market["competition"] = market.get("competition") or _bp_fallback(sector_cat, "competition")
+    market["regulation"]  = market.get("regulation")  or _bp_fallback(sector_cat, "regulation")
+
+    gtm["mix"]           = gtm.get("mix")           or _bp_fallback(sector_cat, "mix")
+    gtm["sales_process"] = gtm.get("sales_process") or _bp_fallback(sector_cat, "sales_process")
+    if not gtm.get("positioning"):
+        gtm["positioning"] = "Promesse claire (valeur + preuve), différenciation par expérience & ROI."
+
+    ops["people"]    = ops.get("people")    or _bp_fallback(sector_cat, "people")
+    ops["resources"] = ops.get("resources") or _bp_fallback(sector_cat, "resources")
+
+    # Graphiques (CA avec axe Y demandé)
+    rev_labels = [f"M{i}" for i in range(1, 13)]
+    rev_values = [ (s36.get("revenue") or [0]*37)[i] for i in range(1,13) ]
+    chart_rev  = _svg_line_with_y_axis("CA mensuel prévisionnel (M1–M12)", rev_labels, rev_values, y_label="CA prévisionnel (€)")
+
+    try:
+        ebd_values = [ (s36.get("ebitda") or [0]*37)[i] for i in range(1,13) ]
+        chart_ebd  = _svg_line_chart_multi("EBITDA mensuel (M1–M12)", {"EBITDA": ebd_values}, rev_labels)
+    except Exception:
+        chart_ebd = ""
+
+    # Tableaux
+    inv_rows = "".join(
+        f"<tr><td>{esc(x['label'])}</td><td>{x['month']}</td><td>{x['life_years']} ans</td><td>{round(x['amount'],2)} €</td><td>{round(x['amort_month'],2)} €/mois</td></tr>"
+        for x in inv.get("items", [])
+    )
+    pnl_rows = "\n        ".join(
+        f"<tr><td>{label}</td>" + "".join(f"<td>{round(v,2)} €</td>" for v in pnl.get(key, [0,0,0])) + "</tr>"
+        for label, key in _BP_PNL_LINES
+    )
+    loan_rows = "".join(
+        f"<tr><td>M{it['month']}</td><td>{it['payment']} €</td><td>{it['interest']} €</td><td>{it['principal']} €</td><td>{it['balance']} €</td></tr>"
+        for it in (fin.get("loan", {}).get("schedule") or [])[:12]
+    )
+    cash_rows = "".join(
+        f"<tr><td>M{m['month']}</td><td>{m['in']} €</td><td>{m['out']} €</td><td>{m['end']} €</td></tr>"
+        for m in cash.get("months", [])
+    )
+
+    if proj_detail:
+        project_block = (
+            f"<h3>Problème & opportunité</h3><p>{esc(proj_detail.get('problem',''))}</p>"
+            f"<h3>Solution & différenciation</h3><p>{esc(proj_detail.get('solution',''))}</p>"
+            f"<h3>Clients cibles</h3>" + _bp_ul(proj_detail.get('targets')) +
+            f"<h3>Fonctionnalités clés</h3>" + _bp_ul(proj_detail.get('product_features')) +
+            f"<h3>Proposition de valeur</h3><p>{esc(proj_detail.get('value_prop',''))}</p>" +
+            f"<h3>Jalons</h3>" + _bp_ul(proj_detail.get('milestones'))
+        )
+    else:
+        project_block = f"<p>{esc(proj_text or '')}</p>"
+
+    bre_rev = bre.get("revenue") or bre.get("revenue_annual_needed")
+    bre_hint = bre.get("month_hint") or (f"vers M{bre['month']}" if bre.get("month") else "non atteint sur 36 mois")
+    uses = fin.get("initial_uses", {})
+    sources = fin.get("initial_sources", {})
+    three_y = fin.get("three_year_view", {})
+    plan_sources = (fund.get("initial_plan") or {}).get("sources") or {}
+    plan_uses = (fund.get("initial_plan") or {}).get("uses") or {}
+
+    return templating.render(
+        "business_plan",
+        project_title=project_title,
+        idea_block=f'<p class="muted" style="margin-top:6px">Concept: {esc(idea_text)}</p>' if idea_text else "",
+        executive_summary=nar.get("executive_summary"),
+        sector=meta.get("sector"),
+        sector_category=meta.get("sector_category"),
+        objectives=", ".join(nar.get("objectives") or []),
+        value_prop=nar.get("value_prop") or "",
+        team=nar.get("team"),
+        project_block=project_block,
+        market_size_drivers=market.get("size_drivers", ""),
+        market_segments=_bp_ul(market.get("segments")),
+        market_competition=_bp_ul(market.get("competition")),
+        market_regulation=_bp_ul(market.get("regulation")),
+        gtm_segmentation=_bp_ul(gtm.get("segmentation")),
+        gtm_positioning=gtm.get("positioning", ""),
+        gtm_mix=_bp_ul(gtm.get("mix")),
+        gtm_sales_process=_bp_ul(gtm.get("sales_process")),
+        ops_organization=ops.get("organization", ""),
+        ops_people=_bp_ul(ops.get("people")),
+        ops_resources=_bp_ul(ops.get("resources")),
+        ops_roadmap=_bp_ul(ops.get("roadmap")),
+        chart_rev=chart_rev,
+        chart_ebd_block=f'<div style="margin-top:10px">{chart_ebd}</div>' if chart_ebd else "",
+        inv_rows=inv_rows or '<tr><td colspan="5">—</td></tr>',
+        inv_total=inv.get("total"),
+        uses_working_capital=uses.get("working_capital", "0"),
+        uses_total=uses.get("total", "0"),
+        sources_equity=sources.get("equity", "0"),
+        sources_loan=sources.get("loan", "0"),
+        sources_total=sources.get("total", "0"),
+        pnl_rows=pnl_rows,
+        cash_rows=cash_rows,
+        loan_rows=loan_rows or '<tr><td colspan="5">—</td></tr>',
+        debt_y1=round(three_y.get("loan_outstanding_end_y1", 0), 2),
+        debt_y2=round(three_y.get("loan_outstanding_end_y2", 0), 2),
+        debt_y3=round(three_y.get("loan_outstanding_end_y3", 0), 2),
+        bre_rev=bre_rev or "—",
+        bre_hint=bre_hint,
+        bre_month_block=f"(mois charnière: M{bre.get('month')}, CA: {bre.get('revenue_month')} €)" if bre.get("month") else "",
+        fund_ask=fund.get("ask", ""),
+        fund_recommended=round((fund.get("recommended_ask_eur") or 0), 2),
+        plan_sources_equity=plan_sources.get("equity", "—"),
+        plan_sources_loan=plan_sources.get("loan", "—"),
+        plan_sources_total=plan_sources.get("total", "—"),
+        plan_uses_investments=plan_uses.get("investments", "—"),
+        plan_uses_working_capital=plan_uses.get("working_capital", "—"),
+        plan_uses_total=plan_uses.get("total", "—"),
+        fund_use_of_funds=_bp_ul(fund.get("use_of_funds")),
+        fund_milestones=_bp_ul(fund.get("milestones")),
+        risks=_bp_ul(risks),
+        legal_form=legal_block["form"],
+        legal_rationale=legal_block["rationale"],
+        legal_cap_table=_bp_ul(legal_block["cap_table"]),
+        legal_governance=_bp_ul(legal_block["governance"]),
+        legal_tax_social=_bp_ul(legal_block["tax_social"]),
+        glossary=_bp_dl(glossary),
+        annexes=_annex_blocks((annexes or {}).items()),
+    )
+
+
+# --- PLAN HTML RENDERER ------------------------------------------------------
+templating.register_partial("action_plan_css", """
     <style>
       :root { color-scheme: dark; }
       body { margin:0; background:#0f172a; color:#e5e7eb; font-family: Inter, system-ui, -apple-system, Segoe UI, Roboto, Arial; }
@@ -1636,67 +1752,81 @@ def render_action_plan_html(plan: dict, project_title: str) -> str:
       ul { margin:8px 0 0 18px }
       .badge { display:inline-block; background:#0b1220; border:1px solid #1f2937; padding:6px 10px; border-radius:999px; font-size:12px; color:#cbd5e1 }
     </style>
-    """
+""")
 
-    def _as_list(x):
-        if isinstance(x, list): return x
-        if x is None: return []
-        return [x]
-
-    def _task_li(t):
-        if isinstance(t, str):  # compat
-            return esc(t)
-        d = t if isinstance(t, dict) else getattr(t, "dict")() if hasattr(t, "dict") else {}
-        title = d.get("title")
-        owner = d.get("owner")
-        est   = d.get("estimate_h")
-        due   = d.get("due_offset_days")
-        desc  = d.get("desc")
-        parts = [title or ""]
-        if owner: parts.append(f"— {owner}")
-        meta = []
-        if est: meta.append(f"{est} h")
-        if due is not None: meta.append(f"J+{due}")
-        if meta: parts.append(f"({' • '.join(str(m) for m in meta)})")
-        if desc: parts.append(f" — {desc}")
-        return esc(" ".join(str(p) for p in parts if p))
-
-    def ul(items, is_tasks=False):
-        items = _as_list(items)
-        if not items: return "<p class='badge'>—</p>"
-        if is_tasks:
-            return "<ul>" + "".join(f"<li>{_task_li(x)}</li>" for x in items) + "</ul>"
-        return "<ul>" + "".join(f"<li>{esc(x)}</li>" for x in items) + "</ul>"
-
-    blocks = []
-    for w in weeks:
-        d = w if isinstance(w, dict) else (w.dict() if hasattr(w, "dict") else {})
-        title = d.get("title")
-        if not title:
-            wk = d.get("week")
-            th = d.get("theme") or ""
-            title = f"Semaine {wk}{': ' + th if th else ''}"
-        blocks.append(f"""
-          <div class="card">
-            <h2>{esc(title)}</h2>
-            <h3>Objectifs</h3>{ul(d.get('goals'))}
-            <h3>Tâches</h3>{ul(d.get('tasks'), is_tasks=True)}
-            <h3>KPIs</h3>{ul(d.get('kpis'))}
-          </div>
-        """)
-
-    return f"""<!doctype html>
+templating.register_template("action_plan", """<!doctype html>
 <html lang="fr"><head>
 <meta charset="utf-8"/><meta name="viewport" content="width=device-width, initial-scale=1"/>
-<title>{esc(project_title)}</title>
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;800&display=swap" rel="stylesheet">
-{styles}
+<title>{{ project_title }}</title>
+{{> inter_font_link }}
+{{> action_plan_css }}
 </head><body><div class="wrap">
-  <div class="card"><h1>{esc(project_title)}</h1>
+  <div class="card"><h1>{{ project_title }}</h1>
     <p class="badge">Plan d'action (export HTML · PDF · Agenda)</p>
   </div>
-  {''.join(blocks)}
-</div></body></html>"""
+  {{ blocks|raw }}
+</div></body></html>""")
+
+
+def _plan_task_li(t) -> str:
+    if isinstance(t, str):  # compat
+        return esc(t)
+    d = t if isinstance(t, dict) else getattr(t, "dict")() if hasattr(t, "dict") else {}
+    title = d.get("title")
+    owner = d.get("owner")
+    est   = d.get("estimate_h")
+    due   = d.get("due_offset_days")
+    desc  = d.get("desc")
+    parts = [title or ""]
+    if owner: parts.append(f"— {owner}")
+    meta = []
+    if est: meta.append(f"{est} h")
+    if due is not None: meta.append(f"J+{due}")
+    if meta: parts.append(f"({' • '.join(str(m) for m in meta)})")
+    if desc: parts.append(f" — {desc}")
+    return esc(" ".join(str(p) for p in parts if p))
+
+
+def _plan_ul(items, is_tasks: bool = False) -> str:
+    if items is None:
+        items = []
+    elif not isinstance(items, list):
+        items = [items]
+    if not items: return "<p class='badge'>—</p>"
+    fmt = _plan_task_li if is_tasks else esc
+    return "<ul>" + "".join(f"<li>{fmt(x)}</li>" for x in items) + "</ul>"
+
+
+def _plan_week_block(w) -> str:
+    d = w if isinstance(w, dict) else (w.dict() if hasattr(w, "dict") else {})
+    title = d.get("title")
+    if not title:
+        wk = d.get("week")
+        th = d.get("theme") or ""
+        title = f"Semaine {wk}{': ' + th if th else ''}"
+    return f"""
+          <div class="card">
+            <h2>{esc(title)}</h2>
+            <h3>Objectifs</h3>{_plan_ul(d.get('goals'))}
+            <h3>Tâches</h3>{_plan_ul(d.get('tasks'), is_tasks=True)}
+            <h3>KPIs</h3>{_plan_ul(d.get('kpis'))}
+          </div>
+        """
+
+
+@tracing.traced("render.action_plan")
+def render_action_plan_html(plan: dict, project_title: str) -> str:
+    weeks = plan.get("weeks")
+    if not isinstance(weeks, list) or not weeks:
+        weeks = []
+        for i, line in enumerate(plan.get("plan") or [], start=1):
+            weeks.append({"week": i, "theme": "", "goals": [], "kpis": [], "tasks": [{"title": str(line)}]})
+
+    return templating.render(
+        "action_plan",
+        project_title=project_title,
+        blocks="".join(_plan_week_block(w) for w in weeks),
+    )
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Export PDF identique au HTML via Chromium headless (Playwright)
@@ -1710,19 +1840,85 @@ async def export_pdf_from_html(
     margin_right: str = "12mm",
     margin_bottom: str = "16mm",
     margin_left: str = "12mm",
+    browser=None,
+    inline_assets: bool = False,
 ) -> str:
-    from playwright.async_api import async_playwright
-    in_path = Path(html_path).resolve()
-    if out_path is None:
-        out_path = str(in_path.with_suffix(".pdf"))
-    out_file = Path(out_path).resolve()
+    """
+    Imprime l'HTML (ref de stockage) en PDF et stocke le PDF via storage_service → retourne sa ref.
+    `out_path` : écrit plutôt le PDF à ce chemin local (et le retourne).
+    `browser` : Chromium Playwright déjà lancé (re-rendu en masse) ; sinon un navigateur est lancé pour cet export.
+    `inline_assets` : repli explicite → assets (/assets/...) inlinés en data URI au lieu de file://.
+    """
+    # S3 : local_path = GET + écriture du cache → hors de la boucle d'événements
+    in_path = Path(await asyncio.to_thread(storage_service.local_path, html_path)).resolve()
+    if out_path is not None:
+        out_file = Path(out_path).resolve()
+    else:
+        fd, tmp = tempfile.mkstemp(suffix=".pdf", dir=storage_service.temp_dir())
+        os.close(fd)
+        out_file = Path(tmp)
+    margin = {"top": margin_top, "right": margin_right, "bottom": margin_bottom, "left": margin_left}
 
+    print_path = Path(await asyncio.to_thread(asset_store.localize_for_pdf, str(in_path), inline_assets))
+    metrics.PDF_IN_FLIGHT.inc()
+    try:
+        with tracing.span("pdf.export", shared_browser=browser is not None):
+            if browser is not None:
+                with metrics.timed(metrics.PDF_RENDER, browser="shared"):
+                    await _print_pdf(browser, print_path, out_file, format_, margin)
+            else:
+                async with launch_pdf_browser() as browser:
+                    with metrics.timed(metrics.PDF_RENDER, browser="dedicated"):
+                        await _print_pdf(browser, print_path, out_file, format_, margin)
+            if out_path is not None:
+                return str(out_file)
+            with tracing.span("storage.put_pdf"):
+                return await asyncio.to_thread(storage_service.put_file, str(out_file), "pdf", "application/pdf")
+    finally:
+        metrics.PDF_IN_FLIGHT.dec()
+        if print_path != in_path:
+            print_path.unlink(missing_ok=True)
+        if out_path is None:
+            out_file.unlink(missing_ok=True)
+
+
+_open_browsers: set = set()  # navigateurs lancés et pas encore fermés (diagnostics mémoire)
+
+
+@asynccontextmanager
+async def launch_pdf_browser():
+    from playwright.async_api import async_playwright
     async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=["--no-sandbox", "--disable-dev-shm-usage"]
-        )
-        context = await browser.new_context()
+        with metrics.timed(metrics.PDF_BROWSER_LAUNCH), tracing.span("pdf.launch_browser"):
+            browser = await p.chromium.launch(
+                headless=True,
+                args=["--no-sandbox", "--disable-dev-shm-usage"]
+            )
+        metrics.PDF_BROWSERS_OPEN.inc()
+        _open_browsers.add(browser)
+        try:
+            yield browser
+        finally:
+            _open_browsers.discard(browser)
+            metrics.PDF_BROWSERS_OPEN.dec()
+            await browser.close()
+
+
+def open_browser_stats() -> dict:
+    """Navigateurs / contextes / pages Playwright vivants (une page qui fuit = un process renderer)."""
+    browsers = list(_open_browsers)
+    contexts = [c for b in browsers for c in b.contexts]
+    return {
+        "browsers": len(browsers),
+        "contexts": len(contexts),
+        "pages": sum(len(c.pages) for c in contexts),
+    }
+
+
+@tracing.traced("pdf.print")
+async def _print_pdf(browser, in_path: Path, out_file: Path, format_: str, margin: dict) -> None:
+    context = await browser.new_context()
+    try:
         page = await context.new_page()
         await page.goto(in_path.as_uri(), wait_until="networkidle")
         await page.emulate_media(media="screen")
@@ -1731,7 +1927,217 @@ async def export_pdf_from_html(
             format=format_,
             print_background=True,
             prefer_css_page_size=True,  # 👈 respecte @page du HTML
-            margin={"top": margin_top, "right": margin_right, "bottom": margin_bottom, "left": margin_left},
+            margin=margin,
         )
-        await browser.close()
-    return str(out_file)
\ No newline at end of file
+    finally:
+        await context.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Re-rendu HTML/PDF depuis le json_content stocké (aucun appel LLM)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class RerenderError(Exception):
+    """Livrable non re-rendable (type sans renderer, JSON incomplet…)."""
+
+
+def _rerender_offer(j: dict, title: str, idea_text: str | None) -> str:
+    if not isinstance(j.get("structured_offer"), dict):
+        raise RerenderError("offre structurée absente du livrable")
+    return render_offer_report_html(
+        offer=j["structured_offer"],
+        persona=j.get("persona") or "",
+        pain_points=j.get("pain_points") or [],
+        project_title=f"Offre — {title}",
+        idea_text=idea_text,
+    )
+
+
+def _rerender_business_plan(j: dict, title: str, idea_text: str | None) -> str:
+    if not isinstance(j.get("business_plan"), dict):
+        raise RerenderError("business plan absent du livrable")
+    return render_business_plan_html(j["business_plan"], project_title=f"Business Plan — {title}", idea_text=idea_text)
+
+
+def _rerender_brand(j: dict, title: str, idea_text: str | None) -> str:
+    if not j.get("brand_name"):
+        raise RerenderError("branding incomplet (brand_name manquant)")
+    return render_brand_report_html(
+        brand_name=j["brand_name"],
+        slogan=j.get("slogan") or "",
+        domain=j.get("domain"),
+        domain_available=j.get("domain_available"),
+        structured=j.get("brand_structured") or {},
+        project_title=f"Brand Book — {title}",
+        idea_text=idea_text,
+        domain_checks=j.get("domain_checks"),
+    )
+
+
+def _rerender_acquisition(j: dict, title: str, idea_text: str | None) -> str:
+    if not isinstance(j.get("acquisition_structured"), dict):
+        raise RerenderError("plan d'acquisition structuré absent du livrable")
+    return render_acquisition_report_html(j["acquisition_structured"], project_title=f"Acquisition — {title}", idea_text=idea_text)
+
+
+def _rerender_action_plan(j: dict, title: str, idea_text: str | None) -> str:
+    if not (j.get("weeks") or j.get("plan")):
+        raise RerenderError("plan d'action vide")
+    return render_action_plan_html(j, project_title=f"Plan d'action — {title}")
+
+
+# kind (Deliverable.kind) -> renderer(json_content, titre projet, idée verbatim)
+RERENDERERS: dict[str, Callable[[dict, str, Optional[str]], str]] = {
+    "offer": _rerender_offer,
+    "model": _rerender_business_plan,
+    "brand": _rerender_brand,
+    "marketing": _rerender_acquisition,
+    "plan": _rerender_action_plan,
+}
+
+
+def _load_for_rerender(deliverable_id: int, user_id: int | None) -> dict:
+    with get_session() as s:
+        d = s.get(Deliverable, deliverable_id)
+        if not d or (user_id is not None and d.user_id != user_id):
+            raise LookupError("Livrable introuvable")
+        if d.kind not in RERENDERERS:
+            raise RerenderError(f"Le type '{d.kind}' ne peut pas être re-généré sans l'IA")
+        proj = s.get(Project, d.project_id) if d.project_id else None
+        snap = proj.idea_snapshot if proj and isinstance(proj.idea_snapshot, dict) else {}
+        return {
+            "id": d.id,
+            "user_id": d.user_id,
+            "kind": d.kind,
+            "json": dict(d.json_content or {}),
+            "title": proj.title if proj else (d.title or d.kind),
+            "idea_text": snap.get("idee"),
+        }
+
+
+def _save_rerender(deliverable_id: int, fp_html: str, pdf_path: str) -> bool:
+    with get_session() as s:
+        d = s.get(Deliverable, deliverable_id)
+        if not d:
+            return False  # supprimé pendant le rendu
+        old_refs = storage_gc.deliverable_refs(d.file_path, d.json_content)
+        payload = dict(d.json_content or {})
+        payload["pdf_path"] = pdf_path
+        payload["rerendered_at"] = datetime.utcnow().isoformat()
+        new_refs = storage_gc.deliverable_refs(fp_html, payload)
+        nbytes = storage_gc.measure_refs(new_refs)
+        storage_gc.add_usage(s, d.user_id, nbytes - (d.storage_bytes or 0), len(new_refs) - len(old_refs))
+        d.json_content = payload
+        d.file_path = fp_html
+        d.storage_bytes = nbytes
+        s.add(d)
+        s.commit()
+        return True
+
+
+@tracing.traced("deliverable.rerender")
+async def rerender_deliverable(deliverable_id: int, user_id: int | None = None, browser=None) -> dict:
+    """
+    Reconstruit l'HTML + le PDF d'un livrable depuis son json_content (templates courants),
+    puis met à jour file_path / pdf_path. Les anciens fichiers ne sont pas supprimés ici :
+    adressés par contenu, ils peuvent être partagés avec un autre livrable.
+    `user_id` : contrôle de propriété (None = admin). `browser` : Chromium partagé (bulk).
+    """
+    info = await asyncio.to_thread(_load_for_rerender, deliverable_id, user_id)
+    html_str = RERENDERERS[info["kind"]](info["json"], info["title"], info["idea_text"])
+    fp_html = await asyncio.to_thread(write_landing_file, info["user_id"], html_str)
+    pdf_path = await export_pdf_from_html(fp_html, format_="A4", browser=browser)
+
+    if not await asyncio.to_thread(_save_rerender, deliverable_id, fp_html, pdf_path):
+        raise LookupError("Livrable introuvable")
+    return {"id": info["id"], "kind": info["kind"], "file_path": fp_html, "pdf_path": pdf_path}
+
+
+# --- Re-rendu en masse (admin, après une release de templates) ---------------
+RERENDER_CONCURRENCY = int(os.getenv("RERENDER_CONCURRENCY", "4"))
+RERENDER_MAX_CONCURRENCY = 16
+RERENDER_JOBS_MAX = int(os.getenv("RERENDER_JOBS_MAX", "50"))            # jobs terminés gardés au plus
+RERENDER_JOB_TTL_S = float(os.getenv("RERENDER_JOB_TTL_S", "86400"))    # consultables 24 h après la fin
+
+# job_id → job, du plus ancien au plus récent ; les jobs terminés expirent (TTL) ou sont évincés (taille)
+_rerender_jobs: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def _prune_rerender_jobs() -> None:
+    now = time.monotonic()
+    finished = [jid for jid, j in _rerender_jobs.items() if "_expires" in j]
+    for jid in finished:
+        if _rerender_jobs[jid]["_expires"] < now:
+            del _rerender_jobs[jid]
+    finished = [jid for jid in finished if jid in _rerender_jobs]
+    for jid in finished[: max(0, len(finished) - RERENDER_JOBS_MAX)]:  # les plus anciens d'abord
+        del _rerender_jobs[jid]
+
+
+def rerenderable_ids(kinds: Iterable[str] | None = None, created_before: datetime | None = None,
+                     ids: Iterable[int] | None = None) -> list[int]:
+    from sqlmodel import select
+    wanted = [k for k in (kinds or RERENDERERS) if k in RERENDERERS]
+    with get_session() as s:
+        q = select(Deliverable.id).where(Deliverable.kind.in_(wanted))
+        if created_before:
+            q = q.where(Deliverable.created_at < created_before)
+        if ids:
+            q = q.where(Deliverable.id.in_(list(ids)))
+        return list(s.exec(q.order_by(Deliverable.id)).all())
+
+
+def start_rerender_job(deliverable_ids: list[int], concurrency: int | None = None) -> dict:
+    job_id = uuid.uuid4().hex[:12]
+    job = {
+        "id": job_id,
+        "status": "running",
+        "total": len(deliverable_ids),
+        "done": 0,
+        "failed": 0,
+        "errors": [],
+        "concurrency": max(1, min(concurrency or RERENDER_CONCURRENCY, RERENDER_MAX_CONCURRENCY)),
+        "started_at": datetime.utcnow().isoformat(),
+        "finished_at": None,
+    }
+    _prune_rerender_jobs()
+    _rerender_jobs[job_id] = job
+    # la référence à la tâche est gardée dans le job (sinon elle peut être collectée)
+    job["_task"] = asyncio.get_running_loop().create_task(_run_rerender_job(job, deliverable_ids))
+    return get_rerender_job(job_id)
+
+
+def get_rerender_job(job_id: str) -> dict | None:
+    _prune_rerender_jobs()
+    job = _rerender_jobs.get(job_id)
+    return {k: v for k, v in job.items() if not k.startswith("_")} if job else None
+
+
+async def _run_rerender_job(job: dict, deliverable_ids: list[int]) -> None:
+    pending = iter(deliverable_ids)
+
+    async def worker(browser) -> None:
+        # itérateur partagé : chaque worker prend le prochain id libre (parallélisme borné)
+        for did in pending:
+            try:
+                await rerender_deliverable(did, browser=browser)
+                job["done"] += 1
+            except Exception as e:
+                job["failed"] += 1
+                if len(job["errors"]) < 100:
+                    job["errors"].append({"id": did, "error": f"{type(e).__name__}: {e}"})
+
+    try:
+        # un seul Chromium pour tout le job ; un contexte par PDF
+        with tracing.start_trace("job.rerender", job_id=job["id"], total=len(deliverable_ids)):
+            async with launch_pdf_browser() as browser:
+                await asyncio.gather(*(worker(browser) for _ in range(job["concurrency"])))
+        job["status"] = "finished"
+    except Exception as e:
+        print("[rerender] job", job["id"], "interrompu:", e)
+        job["status"] = "error"
+        job["errors"].append({"id": None, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        job["finished_at"] = datetime.utcnow().isoformat()
+        job.pop("_task", None)  # tâche terminée : plus besoin de la retenir
+        job["_expires"] = time.monotonic() + RERENDER_JOB_TTL_S
@@ -3,6 +3,8 @@ import os
 from typing import List, Dict, Optional
 import httpx
 
+from backend.services import metrics
+
 # ---------- Public API ----------
 
 def suggest_domains(brand_name: str, tlds: List[str] | None = None) -> List[str]:
@@ -23,17 +25,20 @@ async def check_domains_availability(domains: List[str]) -> Dict[str, Optional[b
         return {}
 
     # 1) Domainr natif (clé OU client_id/secret)
-    out = await _check_domainr_native(domains)
+    with metrics.timed(metrics.DOMAIN_LATENCY, provider="domainr"):
+        out = await _check_domainr_native(domains)
     if out:  # on a une réponse exploitable
         return out
 
     # 2) Domainr via RapidAPI
-    out = await _check_domainr_rapidapi(domains)
+    with metrics.timed(metrics.DOMAIN_LATENCY, provider="domainr_rapidapi"):
+        out = await _check_domainr_rapidapi(domains)
     if out:
         return out
 
     # 3) Fallback RDAP (lent, partiel)
-    return await _check_rdap(domains)
+    with metrics.timed(metrics.DOMAIN_LATENCY, provider="rdap"):
+        return await _check_rdap(domains)
 
 # ---------- Implémentations ----------
 
@@ -0,0 +1,81 @@
+# backend/services/download_service.py
+"""
+Réponses de téléchargement des livrables (HTML, PDF, ICS, JSON).
+
+- Fichiers : servis depuis le disque par FileResponse (lecture par blocs, ou envoi zéro-copie
+  quand le serveur ASGI expose l'extension "pathsend"), avec Range / If-Range (reprise,
+  lecteurs PDF qui chargent par plages) et ETag / If-None-Match → 304 sans relire le fichier.
+- ETag fort = sha256 pour les objets adressés par contenu (identique d'un re-rendu à l'autre si le
+  contenu n'a pas changé) ; ETag faible taille + mtime pour les anciens chemins.
+- JSON : sérialisé par morceaux (iterencode) et envoyé en flux, sans construire le document entier.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import Any, Iterator, Optional
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+from backend.services import storage_service
+
+CHUNK_SIZE = 64 * 1024
+# livrables privés (authentifiés) : le navigateur garde sa copie mais revalide à chaque fois
+CACHE_CONTROL = "private, no-cache"
+
+_DIGEST_RE = re.compile(r"/([0-9a-f]{64})\.[a-z0-9]{1,5}$")
+
+
+def etag_for(ref: str, path: str) -> str:
+    m = _DIGEST_RE.search(storage_service.get_storage().key_of(ref) or "")
+    if m:
+        return f'"{m.group(1)}"'
+    st = os.stat(path)
+    return f'W/"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # comparaison faible (RFC 9110 §13.1.2) : W/ ignoré
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == target for tag in if_none_match.split(","))
+
+
+def file_download(request: Request, ref: str, filename: str, media_type: str) -> Response:
+    """Téléchargement d'un fichier du stockage : 304 si le client a déjà cette version, sinon flux (Range géré)."""
+    path = storage_service.local_path(ref)
+    etag = etag_for(ref, path)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    # FileResponse : Accept-Ranges, 206 / 416, multipart/byteranges, If-Range (compare à notre ETag)
+    return FileResponse(path, filename=filename, media_type=media_type, headers=headers)
+
+
+def _iter_json(obj: Any, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    # mêmes options que JSONResponse
+    encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    buf: list[str] = []
+    n = 0
+    for piece in encoder.iterencode(obj):
+        buf.append(piece)
+        n += len(piece)
+        if n >= chunk_size:
+            yield "".join(buf).encode("utf-8")
+            buf.clear()
+            n = 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def json_download(obj: Any, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        _iter_json(obj),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": CACHE_CONTROL},
+    )
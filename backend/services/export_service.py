@@ -0,0 +1,174 @@
+# backend/services/export_service.py
+"""
+Export ZIP d'un projet (PDF + HTML + ICS de tous ses livrables), construit à la volée.
+
+Le ZIP est produit en streaming : zipfile écrit dans un puits non seekable (descripteurs de
+données après chaque membre), les fichiers sont copiés par blocs de 64 Kio et chaque bloc
+compressé est rendu au client aussitôt → mémoire constante quelle que soit la taille du projet.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+import unicodedata
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, Optional
+
+from backend.db import get_session
+from backend.models import Deliverable
+from backend.services import asset_store, storage_gc, storage_service
+from backend.services.deliverable_service import export_pdf_from_html, launch_pdf_browser
+from backend.services.pdf_service import make_pdf_from_deliverable
+
+CHUNK_SIZE = 64 * 1024
+
+KIND_LABELS = {
+    "offer": "offre",
+    "model": "business-plan",
+    "brand": "branding",
+    "marketing": "acquisition",
+    "plan": "plan-action",
+    "landing": "landing",
+}
+# les landings n'ont pas de version PDF
+_PDF_KINDS = ("offer", "model", "brand", "marketing", "plan")
+
+
+@dataclass
+class ZipEntry:
+    name: str
+    ref: Optional[str] = None      # fichier du stockage (copié par blocs)
+    data: Optional[bytes] = None   # petit contenu déjà en mémoire (PDF ReportLab de secours)
+    inline_assets: bool = False    # HTML : copie autonome (assets inlinés) préparée au moment d'écrire le membre
+    mtime: Optional[float] = None
+
+
+def _slug(s: str) -> str:
+    s = unicodedata.normalize("NFKD", (s or "").strip().lower())
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return re.sub(r"[^a-z0-9]+", "-", s).strip("-") or "projet"
+
+
+def zip_filename(project_title: str) -> str:
+    return f"{_slug(project_title)}-export.zip"
+
+
+def _attach_pdf(deliverable_id: int, pdf_ref: str) -> None:
+    with get_session() as s:
+        d = s.get(Deliverable, deliverable_id)
+        if not d:
+            return
+        payload = dict(d.json_content or {})
+        payload["pdf_path"] = pdf_ref
+        nbytes = storage_service.size(pdf_ref)
+        d.json_content = payload
+        d.storage_bytes = (d.storage_bytes or 0) + nbytes
+        storage_gc.add_usage(s, d.user_id, nbytes, 1)
+        s.add(d)
+        s.commit()
+
+
+def _missing_pdfs(deliverables: list[Deliverable]) -> list[Deliverable]:
+    return [
+        d for d in deliverables
+        if d.kind in _PDF_KINDS and d.file_path and storage_service.exists(d.file_path)
+        and not storage_service.exists((d.json_content or {}).get("pdf_path"))
+    ]
+
+
+async def project_zip_entries(deliverables: list[Deliverable]) -> list[ZipEntry]:
+    """
+    Liste les membres du ZIP. Les PDF manquants sont d'abord générés par le pipeline
+    d'export habituel (un seul Chromium partagé) et rattachés à leur livrable.
+    Accès stockage (HEAD / GET S3) et DB dans le threadpool.
+    """
+    missing = await asyncio.to_thread(_missing_pdfs, deliverables)
+    if missing:
+        async with launch_pdf_browser() as browser:
+            for d in missing:
+                pdf_ref = await export_pdf_from_html(d.file_path, format_="A4", browser=browser)
+                await asyncio.to_thread(_attach_pdf, d.id, pdf_ref)
+                d.json_content = {**(d.json_content or {}), "pdf_path": pdf_ref}
+
+    return await asyncio.to_thread(_zip_entries, deliverables)
+
+
+def _zip_entries(deliverables: list[Deliverable]) -> list[ZipEntry]:
+    entries: list[ZipEntry] = []
+    for d in deliverables:
+        j = d.json_content or {}
+        base = f"{KIND_LABELS.get(d.kind, d.kind)}-{d.id}"
+        mtime = d.created_at.timestamp() if isinstance(d.created_at, datetime) else None
+        pdf_ref = j.get("pdf_path")
+        if storage_service.exists(pdf_ref):
+            entries.append(ZipEntry(f"{base}.pdf", ref=pdf_ref, mtime=mtime))
+        elif d.kind in _PDF_KINDS and not d.file_path:
+            # anciens livrables sans HTML : PDF ReportLab (quelques Ko)
+            entries.append(ZipEntry(f"{base}.pdf", data=make_pdf_from_deliverable(d), mtime=mtime))
+        if storage_service.exists(d.file_path):
+            # copie hors site : assets "/assets/..." inlinés (sinon images cassées à l'ouverture)
+            entries.append(ZipEntry(f"{base}.html", ref=d.file_path, mtime=mtime, inline_assets=True))
+        if storage_service.exists(j.get("ics_path")):
+            entries.append(ZipEntry(f"{base}.ics", ref=j["ics_path"], mtime=mtime))
+    return entries
+
+
+class _ChunkSink:
+    """Puits non seekable : zipfile y écrit, le générateur vide les octets produits."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def _zipinfo(e: ZipEntry, size: int) -> zipfile.ZipInfo:
+    ts = time.localtime(e.mtime or time.time())
+    zi = zipfile.ZipInfo(e.name, date_time=ts[:6])
+    # PDF déjà compressés → STORED ; HTML / ICS → DEFLATE
+    zi.compress_type = zipfile.ZIP_STORED if e.name.endswith(".pdf") else zipfile.ZIP_DEFLATED
+    zi.file_size = size
+    return zi
+
+
+def stream_zip(entries: list[ZipEntry], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Générateur synchrone (lectures disque bloquantes → exécuté dans le threadpool par Starlette)."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w") as zf:
+        for e in entries:
+            if e.data is not None:
+                zf.writestr(_zipinfo(e, len(e.data)), e.data)
+            else:
+                # un membre à la fois : la copie inlinée est préparée sur disque puis copiée par blocs
+                ref = (asset_store.standalone_html(e.ref) or e.ref) if e.inline_assets else e.ref
+                path = storage_service.local_path(ref)
+                with open(path, "rb") as src, zf.open(_zipinfo(e, os.path.getsize(path)), mode="w") as dst:
+                    while True:
+                        chunk = src.read(chunk_size)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        out = sink.drain()
+                        if out:
+                            yield out
+            out = sink.drain()
+            if out:
+                yield out
+    # répertoire central écrit à la fermeture
+    out = sink.drain()
+    if out:
+        yield out
@@ -0,0 +1,95 @@
+# backend/services/hash_pool.py
+"""
+Pool dédié au hachage des mots de passe (bcrypt ≈ 250 ms de CPU par opération).
+
+- Avant : chaque hash occupait un thread du pool partagé de Starlette (routes sync) ou bloquait la boucle
+  d'événements (routes async) → une rafale de connexions affamait toute l'API.
+- HASH_WORKERS threads (bcrypt libère le GIL : vrai parallélisme, à borner au nombre de cœurs dédiés).
+- File bornée (HASH_QUEUE_MAX) : pleine → 503 + Retry-After immédiat (délestage) plutôt qu'une attente
+  sans fin. Un travail resté plus de HASH_QUEUE_TIMEOUT_S en file n'est pas exécuté (le client a sans
+  doute abandonné) → 503 aussi. Le 429 reste réservé aux limites par client.
+- Métriques : durée par opération, attente en file, profondeur de file, hachages en cours, délestages.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+
+from backend.services import metrics
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE_MAX = int(os.getenv("HASH_QUEUE_MAX", str(HASH_WORKERS * 16)))
+HASH_QUEUE_TIMEOUT_S = float(os.getenv("HASH_QUEUE_TIMEOUT_S", "5"))
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="pwhash")
+_lock = threading.Lock()
+_queued = 0
+_running = 0
+_avg_s = 0.25  # moyenne glissante d'une opération (estimation du Retry-After)
+
+metrics.PASSWORD_HASH_QUEUE_DEPTH.set_function(lambda: _queued)
+metrics.PASSWORD_HASH_IN_PROGRESS.set_function(lambda: _running)
+
+
+class _Expired(Exception):
+    pass
+
+
+def _overloaded(reason: str) -> HTTPException:
+    metrics.PASSWORD_HASH_SHED.labels(reason).inc()
+    retry_after = max(1, math.ceil((_queued + _running) / HASH_WORKERS * _avg_s))
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Service momentanément saturé, réessayez dans quelques secondes.",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def _job(op: str, enqueued: float, fn: Callable[..., Any], args: tuple) -> Any:
+    global _queued, _running, _avg_s
+    wait = time.perf_counter() - enqueued
+    with _lock:
+        _queued -= 1
+        _running += 1
+    try:
+        metrics.PASSWORD_HASH_QUEUE_WAIT.observe(wait)
+        if wait > HASH_QUEUE_TIMEOUT_S:
+            raise _Expired()
+        t0 = time.perf_counter()
+        out = fn(*args)
+        elapsed = time.perf_counter() - t0
+        metrics.PASSWORD_HASH_LATENCY.labels(op).observe(elapsed)
+        _avg_s = 0.9 * _avg_s + 0.1 * elapsed
+        return out
+    finally:
+        with _lock:
+            _running -= 1
+
+
+async def run(op: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """Exécute fn(*args) dans le pool dédié ; HTTPException 503 (Retry-After) si saturé."""
+    global _queued
+    with _lock:
+        full = _queued >= HASH_QUEUE_MAX
+        if not full:
+            _queued += 1
+    if full:
+        raise _overloaded("queue_full")
+    fut = _executor.submit(_job, op, time.perf_counter(), fn, args)
+    try:
+        return await asyncio.wrap_future(fut)
+    except _Expired:
+        raise _overloaded("timeout") from None
+    except asyncio.CancelledError:
+        if fut.cancelled():  # jamais démarré : _job ne décrémentera pas la file
+            with _lock:
+                _queued -= 1
+        raise
+
@@ -0,0 +1,78 @@
+# backend/services/json_codec.py
+"""
+Sérialisation JSON rapide (orjson) : réponses HTTP et colonnes JSONB.
+
+- ORJSONResponse : classe de réponse par défaut de l'app (FastAPI(default_response_class=...)).
+  Les routes qui renvoient de gros json_content peuvent la retourner directement : on saute alors
+  jsonable_encoder / la validation du response_model, qui parcourent tout l'arbre en Python.
+- dumps_str / loads : hooks json_serializer / json_deserializer de l'engine (backend/db.py).
+- Compatibilité avec l'encodeur standard de FastAPI :
+  datetime / date / time / UUID / Enum / dataclass → natifs orjson (ISO 8601, comme .isoformat()) ;
+  modèles Pydantic / SQLModel → model_dump(mode="json") ; Decimal → int / float ; set → list ;
+  bytes → str UTF-8 ; timedelta → secondes ; clés non str (int, UUID…) → str.
+- Entiers hors 64 bits (refusés par orjson) → repli sur json de la stdlib.
+  ⚠️ Écart assumé : NaN / ±Infinity sortent en null (la stdlib produisait un JSON invalide).
+"""
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import PurePath
+from typing import Any
+from uuid import UUID
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, PurePath):
+        return str(obj)
+    raise TypeError(f"Type non sérialisable en JSON : {type(obj).__name__}")
+
+
+def _stdlib_default(obj: Any) -> Any:
+    iso = getattr(obj, "isoformat", None)
+    if iso is not None:
+        return iso()
+    if isinstance(obj, UUID):
+        return str(obj)
+    return _default(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj, default=_default, option=OPTIONS)
+    except orjson.JSONEncodeError as e:
+        if "64-bit" not in str(e):
+            raise
+        return json.dumps(obj, default=_stdlib_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    return orjson.loads(data)
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
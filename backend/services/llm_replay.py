@@ -0,0 +1,131 @@
+# backend/services/llm_replay.py
+"""
+Enregistrement / rejeu des complétions LLM (tests de perf reproductibles, travail sur les templates hors ligne).
+
+    LLM_MODE=record  → appels réels, chaque complétion est écrite dans LLM_FIXTURES_DIR/<étape>/<hash>.json
+    LLM_MODE=replay  → aucune requête OpenAI : la complétion enregistrée est rejouée
+    LLM_MODE=live    → défaut, rien ne change
+
+- Clé = sha256 de la requête canonique (model, messages, temperature, response_format…) : même prompt → même
+  fixture. Les paramètres de transport (timeout, extra_headers…) sont exclus du hash.
+- LLM_REPLAY_LATENCY=zero (défaut) | recorded : rejeu instantané, ou avec la latence mesurée à l'enregistrement.
+- LLM_REPLAY_MISS=error (défaut) | stage | live : prompt inconnu → erreur, ou n'importe quelle fixture de la
+  même étape (ordre stable ; utile quand le prompt embarque des ids / dates qui changent d'un run à l'autre),
+  ou appel réel.
+- Branché dans llm_usage.chat_completion : premium_service et openai_service en profitent sans changement.
+  ⚠️ Les clients OpenAI sont construits à l'import : en rejeu, OPENAI_API_KEY doit exister (valeur quelconque).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from openai.types.chat import ChatCompletion
+
+from backend.services import metrics
+
+MODE = os.getenv("LLM_MODE", "live").lower()  # live | record | replay
+FIXTURES_DIR = Path(os.getenv("LLM_FIXTURES_DIR", os.path.join(os.path.dirname(__file__), "..", "..", ".llm_fixtures")))
+REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "zero").lower()  # zero | recorded
+REPLAY_MISS = os.getenv("LLM_REPLAY_MISS", "error").lower()  # error | stage | live
+
+_UNHASHED = frozenset({"timeout", "extra_headers", "extra_query", "extra_body", "user", "metadata", "store"})
+
+_lock = threading.Lock()
+_index: Optional[dict[str, dict[str, Path]]] = None  # étape → {clé: fichier}
+
+
+class ReplayMiss(LookupError):
+    """Aucune complétion enregistrée pour ce prompt (LLM_MODE=replay, LLM_REPLAY_MISS=error)."""
+
+
+def request_key(kwargs: dict[str, Any]) -> str:
+    canon = {k: v for k, v in kwargs.items() if k not in _UNHASHED}
+    raw = json.dumps(canon, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _load_index() -> dict[str, dict[str, Path]]:
+    global _index
+    with _lock:
+        if _index is None:
+            idx: dict[str, dict[str, Path]] = {}
+            if FIXTURES_DIR.is_dir():
+                for path in sorted(FIXTURES_DIR.glob("*/*.json")):
+                    idx.setdefault(path.parent.name, {})[path.stem] = path
+            _index = idx
+        return _index
+
+
+def _read(path: Path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(stage: str, kwargs: dict[str, Any], resp: Any, latency_s: float) -> Path:
+    """Écrit la complétion (requête + réponse brute + latence) ; écriture atomique, dernier enregistrement gagnant."""
+    key = request_key(kwargs)
+    path = FIXTURES_DIR / stage / f"{key}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {
+        "stage": stage,
+        "key": key,
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "latency_ms": round(latency_s * 1000.0, 1),
+        "request": {k: v for k, v in kwargs.items() if k not in _UNHASHED},
+        "response": resp.model_dump(mode="json") if hasattr(resp, "model_dump") else resp,
+    }
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=1, default=str)
+    os.replace(tmp, path)
+    metrics.LLM_REPLAY.labels(stage, "recorded").inc()
+    with _lock:
+        if _index is not None:
+            _index.setdefault(stage, {})[key] = path
+    return path
+
+
+def lookup(stage: str, kwargs: dict[str, Any]) -> Optional[tuple[ChatCompletion, float, str]]:
+    """(complétion, latence enregistrée en s, "exact" | "stage") ou None si rien ne correspond."""
+    by_key = _load_index().get(stage, {})
+    match = "exact"
+    path = by_key.get(request_key(kwargs))
+    if path is None and REPLAY_MISS == "stage" and by_key:
+        path, match = by_key[min(by_key)], "stage"
+    if path is None:
+        return None
+    record = _read(path)
+    return ChatCompletion.model_validate(record["response"]), float(record.get("latency_ms") or 0) / 1000.0, match
+
+
+def replay(stage: str, kwargs: dict[str, Any]) -> Optional[ChatCompletion]:
+    """Complétion rejouée (avec la latence d'origine si LLM_REPLAY_LATENCY=recorded) ; None → appel réel."""
+    hit = lookup(stage, kwargs)
+    metrics.LLM_REPLAY.labels(stage, hit[2] if hit else "miss").inc()
+    if hit is None:
+        if REPLAY_MISS == "live":
+            return None
+        raise ReplayMiss(f"aucune complétion enregistrée pour l'étape '{stage}' (clé {request_key(kwargs)[:12]}) "
+                         f"dans {FIXTURES_DIR}")
+    resp, latency_s, _ = hit
+    if REPLAY_LATENCY == "recorded" and latency_s > 0:
+        time.sleep(latency_s)
+    return resp
+
+
+def stats() -> dict[str, Any]:
+    idx = _load_index()
+    return {
+        "mode": MODE,
+        "dir": str(FIXTURES_DIR.resolve()),
+        "latency": REPLAY_LATENCY,
+        "miss": REPLAY_MISS,
+        "fixtures": {stage: len(keys) for stage, keys in sorted(idx.items())},
+    }
@@ -0,0 +1,209 @@
+# backend/services/llm_usage.py
+"""
+Instrumentation des appels LLM : tokens (resp.usage), latence, retries, modèle et coût estimé.
+
+- chat_completion(client, stage, **kwargs) remplace client.chat.completions.create aux sites d'appel ;
+  les retries (rate limit, timeout, 5xx) sont faits ici (SDK en max_retries=0) pour être comptés.
+- Les tags user / projet / kind viennent d'un contextvar posé par la route (tag(...)) :
+  rien à faire passer à travers les générateurs.
+- Les enregistrements vont dans une file mémoire, écrite en base par lots (INSERT multi-lignes)
+  par une tâche de fond → aucun aller-retour DB sur le chemin de l'appel.
+- LLM_MODE=record | replay : complétions enregistrées / rejouées (llm_replay) ; un rejeu ne coûte rien,
+  il n'est donc pas compté dans l'usage.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import os
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import openai
+from sqlalchemy import func, insert
+from sqlmodel import select
+
+from backend.db import get_session
+from backend.models import LLMCall
+from backend.services import llm_replay, metrics, tracing
+
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+FLUSH_INTERVAL_S = float(os.getenv("LLM_USAGE_FLUSH_S", "5"))
+BATCH_SIZE = int(os.getenv("LLM_USAGE_BATCH_SIZE", "200"))
+MAX_PENDING = 50_000  # garde-fou mémoire si la base est indisponible
+
+# $ / 1M tokens (entrée, sortie) — surcharge possible : LLM_PRICES_JSON='{"gpt-4o": [2.5, 10]}'
+PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+PRICES.update({k: tuple(v) for k, v in json.loads(os.getenv("LLM_PRICES_JSON", "{}")).items()})
+
+_RETRYABLE = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+_ctx: contextvars.ContextVar[dict] = contextvars.ContextVar("llm_usage_ctx", default={})
+_pending: deque[dict] = deque()
+
+
+def tag(**tags: Any) -> None:
+    """Pose les tags (user_id, project_id, kind) pour les appels LLM de la requête en cours."""
+    _ctx.set({**_ctx.get(), **{k: v for k, v in tags.items() if v is not None}})
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    # "gpt-4o-2024-08-06" → tarif "gpt-4o" (plus long préfixe connu)
+    key = max((k for k in PRICES if model.startswith(k)), key=len, default=None)
+    if not key:
+        return 0.0
+    p_in, p_out = PRICES[key]
+    return round((prompt_tokens * p_in + completion_tokens * p_out) / 1_000_000, 6)
+
+
+def _record(stage: str, model: str, t0: float, retries: int, resp: Any = None, error: Optional[Exception] = None) -> None:
+    usage = getattr(resp, "usage", None)
+    pt = getattr(usage, "prompt_tokens", 0) or 0
+    ct = getattr(usage, "completion_tokens", 0) or 0
+    model = getattr(resp, "model", None) or model
+    elapsed = time.perf_counter() - t0
+    metrics.LLM_LATENCY.labels(stage, "ok" if error is None else "error").observe(elapsed)
+    metrics.LLM_TOKENS.labels(stage, "prompt").inc(pt)
+    metrics.LLM_TOKENS.labels(stage, "completion").inc(ct)
+    if retries:
+        metrics.LLM_RETRIES.labels(stage).inc(retries)
+    if len(_pending) >= MAX_PENDING:
+        _pending.popleft()
+    _pending.append({
+        **_ctx.get(),
+        "created_at": datetime.utcnow(),
+        "stage": stage,
+        "model": model,
+        "prompt_tokens": pt,
+        "completion_tokens": ct,
+        "latency_ms": round(elapsed * 1000.0, 1),
+        "retries": retries,
+        "cost_usd": estimate_cost(model, pt, ct),
+        "ok": error is None,
+        "error": f"{type(error).__name__}: {error}"[:500] if error else None,
+    })
+
+
+def chat_completion(client, stage: str, **kwargs: Any):
+    """client.chat.completions.create instrumenté (même signature, même valeur de retour)."""
+    api = client.with_options(max_retries=0).chat.completions
+    model = kwargs.get("model", "")
+    t0 = time.perf_counter()
+    with tracing.span(f"llm.{stage}", model=model) as sp:
+        if llm_replay.MODE == "replay":
+            resp = llm_replay.replay(stage, kwargs)
+            if resp is not None:
+                if sp is not None:
+                    sp.set(replay=True)
+                return resp
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                resp = api.create(**kwargs)
+            except _RETRYABLE as e:
+                if attempt == MAX_RETRIES:
+                    _record(stage, model, t0, attempt, error=e)
+                    raise
+                time.sleep(min(0.5 * (2 ** attempt), 8.0) * (0.75 + random.random() / 2))
+            except Exception as e:
+                _record(stage, model, t0, attempt, error=e)
+                raise
+            else:
+                _record(stage, model, t0, attempt, resp=resp)
+                if llm_replay.MODE == "record":
+                    try:
+                        llm_replay.save(stage, kwargs, resp, time.perf_counter() - t0)
+                    except Exception as e:
+                        print("[llm-replay] enregistrement échoué:", e)
+                if sp is not None:
+                    usage = getattr(resp, "usage", None)
+                    sp.set(retries=attempt, prompt_tokens=getattr(usage, "prompt_tokens", 0),
+                           completion_tokens=getattr(usage, "completion_tokens", 0))
+                return resp
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Écriture par lots
+# ─────────────────────────────────────────────────────────────────────────────
+
+_COLUMNS = ("created_at", "user_id", "project_id", "kind", "stage", "model", "prompt_tokens",
+            "completion_tokens", "latency_ms", "retries", "cost_usd", "ok", "error")
+
+
+def flush(max_rows: Optional[int] = None) -> int:
+    """Écrit les enregistrements en attente (un INSERT multi-lignes par lot). Retourne le nombre écrit."""
+    written = 0
+    while _pending and (max_rows is None or written < max_rows):
+        batch = []
+        while _pending and len(batch) < BATCH_SIZE:
+            rec = _pending.popleft()
+            batch.append({c: rec.get(c) for c in _COLUMNS})
+        try:
+            with get_session() as s:
+                s.execute(insert(LLMCall), batch)
+                s.commit()
+        except Exception as e:
+            _pending.extendleft(reversed(batch))  # on réessaiera au prochain tick
+            print("[llm-usage] écriture échouée:", e)
+            break
+        written += len(batch)
+    return written
+
+
+async def flush_loop() -> None:
+    """Tâche de fond lancée au démarrage de l'API."""
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_S)
+        if _pending:
+            await asyncio.to_thread(flush)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Requêtes (admin)
+# ─────────────────────────────────────────────────────────────────────────────
+
+_GROUPS = {"kind": LLMCall.kind, "stage": LLMCall.stage, "user": LLMCall.user_id, "model": LLMCall.model}
+
+
+def usage_summary(group_by: str = "kind", days: int = 30, user_id: Optional[int] = None,
+                  kind: Optional[str] = None) -> list[dict]:
+    col = _GROUPS.get(group_by)
+    if col is None:
+        raise ValueError(f"group_by inconnu: {group_by}")
+    since = datetime.utcnow() - timedelta(days=days)
+    q = select(
+        col,
+        func.count(),
+        func.sum(LLMCall.prompt_tokens),
+        func.sum(LLMCall.completion_tokens),
+        func.sum(LLMCall.cost_usd),
+        func.avg(LLMCall.latency_ms),
+        func.percentile_cont(0.95).within_group(LLMCall.latency_ms),
+        func.sum(LLMCall.retries),
+        func.count().filter(LLMCall.ok.is_(False)),
+    ).where(LLMCall.created_at >= since)
+    if user_id is not None:
+        q = q.where(LLMCall.user_id == user_id)
+    if kind:
+        q = q.where(LLMCall.kind == kind)
+    with get_session() as s:
+        rows = s.exec(q.group_by(col).order_by(func.sum(LLMCall.cost_usd).desc()).limit(500)).all()
+    return [{
+        group_by: key,
+        "calls": n,
+        "prompt_tokens": int(pt or 0),
+        "completion_tokens": int(ct or 0),
+        "cost_usd": round(float(cost or 0), 4),
+        "avg_latency_ms": round(float(avg or 0), 1),
+        "p95_latency_ms": round(float(p95 or 0), 1),
+        "retries": int(retries or 0),
+        "errors": errors,
+    } for key, n, pt, ct, cost, avg, p95, retries, errors in rows]
@@ -0,0 +1,196 @@
+# backend/services/memory_diag.py
+"""
+Diagnostics mémoire des workers (admin) + plafond mémoire "soft" avec recyclage gracieux.
+
+- RSS courant (/proc/self/statm) et pic (getrusage), compteurs du GC.
+- tracemalloc à la demande (coûteux : ~x1.3-2 sur les allocations, désactivé par défaut ;
+  MEMORY_TRACEMALLOC_FRAMES=N le démarre au boot) : top des sites d'allocation, snapshot de
+  référence puis diff (ce qui a grossi depuis), pour repérer json_content géants, data URIs base64,
+  chaînes HTML des renderers…
+- Navigateurs Chromium / pages Playwright encore ouverts, tailles des caches en mémoire.
+- MEMORY_SOFT_LIMIT_MB : au-delà (après un gc.collect()), le worker attend la fin des rendus PDF
+  en cours puis s'envoie SIGTERM → uvicorn/gunicorn termine les requêtes en vol et le superviseur
+  relance un worker neuf. MEMORY_RECYCLE=log pour seulement journaliser.
+"""
+from __future__ import annotations
+
+import asyncio
+import gc
+import os
+import resource
+import signal
+import time
+import tracemalloc
+from typing import Optional
+
+MEMORY_SOFT_LIMIT_MB = float(os.getenv("MEMORY_SOFT_LIMIT_MB", "0"))   # 0 = pas de plafond
+MEMORY_CHECK_INTERVAL_S = float(os.getenv("MEMORY_CHECK_INTERVAL_S", "30"))
+MEMORY_RECYCLE = os.getenv("MEMORY_RECYCLE", "sigterm")                # sigterm | log
+MEMORY_DRAIN_TIMEOUT_S = float(os.getenv("MEMORY_DRAIN_TIMEOUT_S", "120"))
+MEMORY_TRACEMALLOC_FRAMES = int(os.getenv("MEMORY_TRACEMALLOC_FRAMES", "0"))
+
+_baseline: Optional[tracemalloc.Snapshot] = None
+_baseline_at: Optional[float] = None
+_recycling = False
+
+# bruit de l'outillage lui-même
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Linux : Kio
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# tracemalloc
+# ─────────────────────────────────────────────────────────────────────────────
+
+def start_tracing(frames: int = 10) -> dict:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, min(frames, 50)))
+    return tracing_status()
+
+
+def stop_tracing() -> dict:
+    global _baseline, _baseline_at
+    tracemalloc.stop()
+    _baseline = _baseline_at = None
+    return tracing_status()
+
+
+def tracing_status() -> dict:
+    if not tracemalloc.is_tracing():
+        return {"tracing": False}
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": True,
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": current,
+        "traced_peak_bytes": peak,
+        "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+        "baseline_age_s": round(time.time() - _baseline_at, 1) if _baseline_at else None,
+    }
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc inactif (POST /api/admin/memory/tracemalloc?enable=true)")
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def _site(stat) -> dict:
+    tb = stat.traceback
+    return {
+        "site": f"{tb[-1].filename}:{tb[-1].lineno}",        # frame le plus récent = allocation
+        "traceback": [f"{fr.filename}:{fr.lineno}" for fr in tb] if len(tb) > 1 else None,  # du plus ancien au plus récent
+    }
+
+
+def take_baseline() -> dict:
+    global _baseline, _baseline_at
+    _baseline = _snapshot()
+    _baseline_at = time.time()
+    return {"ok": True, "traces": len(_baseline.traces)}
+
+
+def top_allocations(limit: int = 25, key: str = "lineno") -> list[dict]:
+    stats = _snapshot().statistics(key)
+    return [{**_site(st), "size_bytes": st.size, "count": st.count} for st in stats[:limit]]
+
+
+def diff_allocations(limit: int = 25, key: str = "lineno") -> list[dict]:
+    """Sites dont la mémoire a le plus augmenté depuis le snapshot de référence."""
+    if _baseline is None:
+        raise RuntimeError("pas de snapshot de référence (POST /api/admin/memory/snapshot)")
+    stats = _snapshot().compare_to(_baseline, key)
+    return [{
+        **_site(st), "size_bytes": st.size, "size_diff_bytes": st.size_diff,
+        "count": st.count, "count_diff": st.count_diff,
+    } for st in stats[:limit]]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Vue d'ensemble
+# ─────────────────────────────────────────────────────────────────────────────
+
+def cache_sizes() -> dict:
+    # lecture seule des structures internes des services (pas de copie)
+    from backend.services import deliverable_service, llm_usage, premium_service, sector_kb, stripe_client, tracing
+
+    kb = sector_kb._classify_cached.cache_info()
+    return {
+        "stripe_sessions": len(stripe_client._session_cache),
+        "bp_graph_states": len(premium_service._BP_STATES),
+        "sector_kb_classify": {"size": kb.currsize, "max": kb.maxsize, "hits": kb.hits, "misses": kb.misses},
+        "rerender_jobs": len(deliverable_service._rerender_jobs),
+        "llm_usage_pending": len(llm_usage._pending),
+        "trace_queue": tracing._queue.qsize(),
+    }
+
+
+def overview() -> dict:
+    from backend.services import deliverable_service
+
+    rss = rss_bytes()
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": rss,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "soft_limit_bytes": int(MEMORY_SOFT_LIMIT_MB * 1024 * 1024) or None,
+        "recycling": _recycling,
+        "gc": {"counts": gc.get_count(), "objects": len(gc.get_objects()), "garbage": len(gc.garbage)},
+        "playwright": deliverable_service.open_browser_stats(),
+        "caches": cache_sizes(),
+        "tracemalloc": tracing_status(),
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Plafond soft → recyclage gracieux
+# ─────────────────────────────────────────────────────────────────────────────
+
+async def _drain_pdf_renders() -> None:
+    from backend.services import deliverable_service
+
+    deadline = time.monotonic() + MEMORY_DRAIN_TIMEOUT_S
+    while deliverable_service.open_browser_stats()["browsers"] and time.monotonic() < deadline:
+        await asyncio.sleep(1)
+
+
+async def memory_watchdog_loop() -> None:
+    """Tâche de fond lancée au démarrage si MEMORY_SOFT_LIMIT_MB > 0."""
+    global _recycling
+    limit = MEMORY_SOFT_LIMIT_MB * 1024 * 1024
+    while not _recycling:
+        await asyncio.sleep(MEMORY_CHECK_INTERVAL_S)
+        rss = rss_bytes()
+        if rss is None or rss < limit:
+            continue
+        gc.collect()
+        rss = rss_bytes() or 0
+        if rss < limit:
+            continue
+        print(f"[memory] RSS {rss / 2**20:.0f} Mo > plafond {MEMORY_SOFT_LIMIT_MB:.0f} Mo (pid {os.getpid()})")
+        if MEMORY_RECYCLE != "sigterm":
+            continue
+        _recycling = True
+        await _drain_pdf_renders()
+        print(f"[memory] recyclage du worker {os.getpid()} (SIGTERM)")
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+if MEMORY_TRACEMALLOC_FRAMES:
+    start_tracing(MEMORY_TRACEMALLOC_FRAMES)
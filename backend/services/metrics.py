@@ -0,0 +1,166 @@
+# backend/services/metrics.py
+"""
+Métriques Prometheus de l'API (exposées sur GET /metrics).
+
+- HTTP : middleware ASGI pur (pas de BaseHTTPMiddleware) → latence par route (template FastAPI,
+  pas l'URL brute : cardinalité bornée) + requêtes en cours.
+- Services : hooks dans les couches concernées (LLM, Chromium, Stripe, fournisseurs de domaines).
+- Pool DB : état lu seulement au scrape (set_function), attente de checkout mesurée autour de pool.connect().
+Coût sur le chemin chaud : un perf_counter + une observation d'histogramme (lock + addition).
+
+⚠️ Registre par process : avec plusieurs workers uvicorn, scraper chaque worker
+(ou PROMETHEUS_MULTIPROC_DIR, non géré ici).
+"""
+from __future__ import annotations
+
+import os
+import re
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+METRICS_PATH = "/metrics"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # si défini : Authorization: Bearer <token> requis
+
+_SLOW_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+# ── HTTP ─────────────────────────────────────────────────────────────────────
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latence des requêtes HTTP par route",
+    ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requêtes HTTP en cours de traitement")
+
+# ── LLM ──────────────────────────────────────────────────────────────────────
+LLM_LATENCY = Histogram(
+    "llm_call_duration_seconds", "Durée des appels LLM (retries inclus) par étape",
+    ["stage", "outcome"], buckets=_SLOW_BUCKETS,
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens consommés par étape", ["stage", "type"])
+LLM_RETRIES = Counter("llm_retries_total", "Retries d'appels LLM par étape", ["stage"])
+LLM_REPLAY = Counter("llm_replay_total", "Complétions enregistrées / rejouées (LLM_MODE)", ["stage", "result"])
+
+# ── PDF (Chromium) ───────────────────────────────────────────────────────────
+PDF_RENDER = Histogram(
+    "pdf_render_duration_seconds", "Impression PDF Chromium (page → PDF)",
+    ["browser"], buckets=_SLOW_BUCKETS,
+)
+PDF_BROWSER_LAUNCH = Histogram(
+    "pdf_browser_launch_seconds", "Lancement d'un Chromium headless", buckets=_SLOW_BUCKETS,
+)
+PDF_IN_FLIGHT = Gauge("pdf_renders_in_flight", "Rendus PDF en cours (saturation)")
+PDF_BROWSERS_OPEN = Gauge("pdf_browsers_open", "Navigateurs Chromium ouverts")
+
+# ── DB ───────────────────────────────────────────────────────────────────────
+DB_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_seconds", "Attente d'une connexion du pool SQLAlchemy",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connexions du pool en cours d'utilisation")
+DB_POOL_SIZE = Gauge("db_pool_size", "Taille configurée du pool")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Connexions en overflow")
+
+# ── Hachage des mots de passe (pool dédié) ───────────────────────────────────
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds", "Durée d'un hash / d'une vérification bcrypt (hors file d'attente)",
+    ["op"], buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1, 2),
+)
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds", "Attente dans la file du pool de hachage",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge("password_hash_queue_depth", "Hachages en attente d'un worker")
+PASSWORD_HASH_IN_PROGRESS = Gauge("password_hash_in_progress", "Hachages en cours")
+PASSWORD_HASH_SHED = Counter("password_hash_shed_total", "Hachages refusés (délestage)", ["reason"])
+PASSWORD_REHASH = Counter("password_rehash_total", "Hash ré-écrits aux paramètres courants à la connexion")
+
+# ── Limitation de débit ──────────────────────────────────────────────────────
+RATE_LIMITED = Counter("rate_limited_total", "Requêtes refusées (429) par classe de route et portée", ["route_class", "scope"])
+RATE_LIMIT_BACKEND_ERRORS = Counter("rate_limit_backend_errors_total", "Backend de limitation indisponible (fail-open)", ["backend"])
+
+# ── Fournisseurs externes ────────────────────────────────────────────────────
+DOMAIN_LATENCY = Histogram(
+    "domain_provider_duration_seconds", "Vérification de disponibilité de domaines par fournisseur",
+    ["provider"], buckets=_SLOW_BUCKETS,
+)
+STRIPE_LATENCY = Histogram(
+    "stripe_request_duration_seconds", "Appels API Stripe",
+    ["method", "endpoint", "status"],
+)
+
+_STRIPE_ID_RE = re.compile(r"/[a-z]+_[A-Za-z0-9]+")
+
+
+def stripe_endpoint(path: str) -> str:
+    # /v1/checkout/sessions/cs_test_123 → /v1/checkout/sessions/{id}
+    return _STRIPE_ID_RE.sub("/{id}", path)
+
+
+@contextmanager
+def timed(hist, **labels):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        (hist.labels(**labels) if labels else hist).observe(time.perf_counter() - t0)
+
+
+def instrument_engine(engine) -> None:
+    """Gauges du pool (lues au scrape) + mesure de l'attente de checkout."""
+    pool = engine.pool
+    for gauge, attr in ((DB_POOL_CHECKED_OUT, "checkedout"), (DB_POOL_SIZE, "size"), (DB_POOL_OVERFLOW, "overflow")):
+        if hasattr(pool, attr):
+            gauge.set_function(lambda a=attr: getattr(engine.pool, a)())
+
+    connect = pool.connect
+
+    def timed_connect():
+        t0 = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            DB_CHECKOUT_WAIT.observe(time.perf_counter() - t0)
+
+    pool.connect = timed_connect  # Engine.raw_connection() → self.pool.connect()
+
+
+def render(authorization: str | None) -> tuple[bytes, str] | None:
+    """Corps + content-type de l'exposition texte ; None si le token est requis et invalide."""
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        return None
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : latence par route + requêtes en cours."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # le routeur FastAPI pose scope["route"] (template "/api/me/deliverables/{deliverable_id}")
+            route = scope.get("route")
+            path = getattr(route, "path_format", None) or getattr(route, "path", None)
+            if path is None:
+                # Mount (StaticFiles /assets, /public) : pas de route FastAPI, root_path = préfixe monté
+                path = f"{scope['root_path']}/*" if scope.get("root_path") else "unmatched"
+            HTTP_LATENCY.labels(scope["method"], path, str(status_code)).observe(time.perf_counter() - t0)
@@ -4,10 +4,11 @@ import logging
 import re
 from textwrap import dedent
 
-import openai
+from openai import OpenAI
 from backend.config import settings
+from backend.services import llm_usage
 
-openai.api_key = settings.OPENAI_API_KEY
+client = OpenAI(api_key=settings.OPENAI_API_KEY)
 log = logging.getLogger(__name__)
 
 _ALLOWED_KEYS = {"idee", "persona", "nom", "slogan", "potential_rating"}
@@ -97,7 +98,8 @@ def generate_business_idea(profil: dict) -> str:
     # Jusqu’à 3 tentatives pour garantir un JSON propre
     for attempt in range(1, 3 + 1):
         try:
-            resp = openai.chat.completions.create(
+            resp = llm_usage.chat_completion(
+                client, "idea",
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": system_msg},
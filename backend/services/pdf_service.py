@@ -2,7 +2,7 @@
 from io import BytesIO
 from datetime import datetime
 from typing import List, Any, Dict
-import os
+
 
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
@@ -343,21 +343,13 @@ def _as_text(block: Any) -> str:
 def make_pdf_from_deliverable(d) -> bytes:
     """
     d: instance de backend.models.Deliverable
-    Retourne les bytes PDF.
+    Retourne les bytes PDF ReportLab (livrables sans PDF Playwright stocké : les appelants servent
+    json_content["pdf_path"] depuis le stockage avant d'arriver ici).
     """
     title = d.title or d.kind.capitalize()
     j = d.json_content or {}
 
-    # 1) Si on a déjà un PDF Playwright, on le renvoie tel quel
-    try:
-        pdf_path = j.get("pdf_path") if isinstance(j, dict) else None
-    except Exception:
-        pdf_path = None
-    if isinstance(pdf_path, str) and os.path.exists(pdf_path):
-        with open(pdf_path, "rb") as f:
-            return f.read()
-
-    # 2) Sinon : fallback ReportLab (anciens livrables)
+    # fallback ReportLab (anciens livrables)
     story: List[Any] = []
     if d.kind == "offer":
         story = _story_for_offer(title, j)
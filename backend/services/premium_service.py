@@ -4,6 +4,9 @@ import re
 import hashlib
 import random
 import json, datetime, uuid
+import logging
+from copy import deepcopy
+from types import SimpleNamespace
 from textwrap import dedent
 from backend.db import get_session
 from backend.models import Deliverable
@@ -25,9 +28,12 @@ from backend.schemas import (
     PlanResponse,
 )
 from backend.services.market_calibrator import calibrate_market
+from backend.services.bp_graph import Stage, StageGraph, StateCache
+from backend.services import asset_store, llm_usage, metrics, sector_kb, templating, tracing
 
 # Initialise le client OpenAI
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+log = logging.getLogger(__name__)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Helpers JSON & VERBATIM
@@ -140,6 +146,7 @@ def _to_str(x: Any) -> str:
 # OFFRE
 # ─────────────────────────────────────────────────────────────────────────────
 
+@tracing.traced("generate.offer")
 async def generate_offer(profil: ProfilRequest, idea_snapshot: Optional[Dict[str, Any]] = None) -> OfferResponse:
     """
     Retour JSON STRICT avec exactement:
@@ -220,7 +227,7 @@ async def generate_offer(profil: ProfilRequest, idea_snapshot: Optional[Dict[str
         }}
     """)
 
-    resp = client.chat.completions.create(
+    resp = llm_usage.chat_completion(client, "offer",
         model="gpt-4o",
         messages=[
             {"role": "system", "content": system_msg},
@@ -273,6 +280,7 @@ async def generate_offer(profil: ProfilRequest, idea_snapshot: Optional[Dict[str
 # BUSINESS MODEL
 # ─────────────────────────────────────────────────────────────────────────────
 
+@tracing.traced("generate.model")
 async def generate_business_model(profil: ProfilRequest, idea_snapshot: Optional[Dict[str, Any]] = None) -> BusinessModelResponse:
     """
     Retour JSON STRICT avec exactement:
@@ -288,7 +296,7 @@ async def generate_business_model(profil: ProfilRequest, idea_snapshot: Optional
         f"\n[PROFIL] secteur={p.get('secteur')} • objectif={p.get('objectif')}"
     )
 
-    resp = client.chat.completions.create(
+    resp = llm_usage.chat_completion(client, "business_model",
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.5,
@@ -386,7 +394,7 @@ async def _ask_brand_structured(profil: ProfilRequest, idea_snapshot: Optional[D
         + _verbatim_block(idea_snapshot) +
         f"\nContexte: secteur={p.get('secteur')} • objectif={p.get('objectif')} • compétences={_competences_str(profil)}"
     )
-    resp = client.chat.completions.create(
+    resp = llm_usage.chat_completion(client, "brand_structured",
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.55,
@@ -417,8 +425,9 @@ async def check_domains_availability(domains: List[str]) -> Dict[str, Optional[b
         f"&ClientIp={client_ip}&Command=namecheap.domains.check&DomainList={domain_list}"
     )
     out: Dict[str, Optional[bool]] = {d: None for d in domains}
-    async with httpx.AsyncClient(timeout=20) as http:
-        r = await http.get(url)
+    with metrics.timed(metrics.DOMAIN_LATENCY, provider="namecheap"):
+        async with httpx.AsyncClient(timeout=20) as http:
+            r = await http.get(url)
     try:
         tree = ET.fromstring(r.text)
         for node in tree.findall(".//DomainCheckResult"):
@@ -431,6 +440,7 @@ async def check_domains_availability(domains: List[str]) -> Dict[str, Optional[b
         pass
     return out
 
+@tracing.traced("generate.brand")
 async def generate_brand(profil: ProfilRequest, idea_snapshot: Optional[Dict[str, Any]] = None) -> BrandResponse:
     # 1) Nom/slogan (VERBATIM prioritaire, sinon génération)
     brand_name = (idea_snapshot or {}).get("nom")
@@ -443,7 +453,7 @@ async def generate_brand(profil: ProfilRequest, idea_snapshot: Optional[Dict[str
             + _verbatim_block(idea_snapshot) +
             f"\n[PROFIL] secteur={p.get('secteur')} • objectif={p.get('objectif')}"
         )
-        resp = client.chat.completions.create(
+        resp = llm_usage.chat_completion(client, "brand",
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt_min}],
             temperature=0.5,
@@ -477,8 +487,9 @@ async def generate_brand(profil: ProfilRequest, idea_snapshot: Optional[Dict[str
             f"?ApiUser={api_user}&ApiKey={api_key}&UserName={api_user}"
             f"&ClientIp={client_ip}&Command=namecheap.domains.check&DomainList={domain}"
         )
-        async with httpx.AsyncClient() as http:
-            r = await http.get(url)
+        with metrics.timed(metrics.DOMAIN_LATENCY, provider="namecheap"):
+            async with httpx.AsyncClient() as http:
+                r = await http.get(url)
         try:
             tree = ET.fromstring(r.text)
             available = tree.find(".//DomainCheckResult").get("Available") == "true"
@@ -497,7 +508,7 @@ async def generate_brand(profil: ProfilRequest, idea_snapshot: Optional[Dict[str
 # ─────────────────────────────────────────────────────────────────────────────
 
 from typing import Optional
-import base64, mimetypes, os
+import os
 from pydantic import BaseModel, Field
 
 
@@ -505,15 +516,6 @@ from pydantic import BaseModel, Field
 class LandingResponse(BaseModel):
     html: str
 
-def _as_data_uri_from_path(path: str | None) -> str | None:
-    if not path or not os.path.exists(path):
-        return None
-    mime, _ = mimetypes.guess_type(path)
-    mime = mime or "application/octet-stream"
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    return f"data:{mime};base64,{b64}"
-
 def _esc(x):
     try:
         return html.escape(str(x if x is not None else ""))
@@ -699,41 +701,8 @@ def _saas_segment(sector: str, idea: Optional[dict] = None) -> str:
             " ".join(idea.get("products_services") or []),
             " ".join(idea.get("differentiation_points") or []),
         )).lower()
-    m = {
-        "crm": "crm", "vente": "crm", "sales": "crm",
-        "project": "pm", "gestion de projet": "pm", "kanban": "pm",
-        "helpdesk": "helpdesk", "support": "helpdesk", "service client": "helpdesk", "ticket": "helpdesk",
-        "analytics": "analytics", "bi": "analytics", "reporting": "analytics",
-        "hr": "hr", "rh": "hr", "paie": "hr", "congés": "hr", "planning": "hr",
-        "recrut": "ats", "ats": "ats",
-        "sécur": "security", "cyber": "security", "iam": "security",
-        "dev": "devtools", "developer": "devtools", "ci/cd": "devtools", "monitor": "devtools",
-        "ecom": "ecom_tools", "e-commerce": "ecom_tools", "shopify": "ecom_tools",
-        "finance": "finops", "compta": "finops", "facturation": "finops", "invoic": "finops",
-        "data": "data_platform", "etl": "data_platform", "warehouse": "data_platform",
-        "santé": "health", "medical": "health", "clinique": "health",
-    }
-    for k, v in m.items():
-        if k in s:
-            return v
-    return "generic"
-
-_SAAS_BENCH = {
-    # fourchettes indicatives mensuelles / utilisateur ou compte selon segment
-    "crm":            {"starter": (9, 29),   "pro": (29, 79),   "ent_mul": 2.5},
-    "pm":             {"starter": (6, 19),   "pro": (20, 49),   "ent_mul": 2.2},
-    "helpdesk":       {"starter": (12, 29),  "pro": (29, 79),   "ent_mul": 2.4},
-    "analytics":      {"starter": (15, 39),  "pro": (39, 99),   "ent_mul": 2.5},
-    "hr":             {"starter": (39, 99),  "pro": (99, 199),  "ent_mul": 2.0},
-    "ats":            {"starter": (49, 129), "pro": (129, 249), "ent_mul": 2.0},
-    "security":       {"starter": (99, 199), "pro": (199, 399), "ent_mul": 2.0},  # souvent par compte/site
-    "devtools":       {"starter": (5, 19),   "pro": (19, 49),   "ent_mul": 2.2},
-    "ecom_tools":     {"starter": (9, 29),   "pro": (29, 79),   "ent_mul": 2.0},
-    "finops":         {"starter": (19, 59),  "pro": (59, 149),  "ent_mul": 2.2},
-    "data_platform":  {"starter": (49, 149), "pro": (149, 299), "ent_mul": 2.0},
-    "health":         {"starter": (49, 149), "pro": (149, 299), "ent_mul": 2.2},
-    "generic":        {"starter": (9, 39),   "pro": (39, 99),   "ent_mul": 2.2},
-}
+    return sector_kb.classify("saas_segment", s)
+
 
 def _price_charm_9(x: float) -> int:
     v = int(round(float(x)))
@@ -794,7 +763,7 @@ def _compute_pricing_from_bp(
     idea_snapshot: Optional[dict] = None,   # ← optionnel, si dispo on lit les prix concurrents
 ) -> dict:
     seg = _saas_segment(sector, idea_snapshot)
-    bench = _SAAS_BENCH.get(seg, _SAAS_BENCH["generic"])
+    bench = sector_kb.benchmark("saas_pricing", seg, "generic")
 
     # corridor bench (starter/pro)
     s_lo, s_hi = bench["starter"]
@@ -864,34 +833,12 @@ def _compute_pricing_from_bp(
     }
     return pricing
 
-def _as_data_uri_from_path(path: str | None) -> str | None:
-    if not path or not os.path.exists(path):
-        return None
-    mime, _ = mimetypes.guess_type(path)
-    mime = mime or "application/octet-stream"
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    return f"data:{mime};base64,{b64}"
-
 def _landing_sector_category_long(secteur: str | None) -> str:
-    s = (secteur or "").lower()
-    if any(k in s for k in ["e-com","ecommerce","boutique","retail","shop"]): return "ecommerce_b2c"
-    if any(k in s for k in ["saas","logiciel","b2b","crm","erp","data"]):     return "saas_b2b"
-    if any(k in s for k in ["industrie","iot","manufact","usine"]):           return "industry_b2b"
-    if any(k in s for k in ["mobile","app","application"]):                   return "mobile_app"
-    if any(k in s for k in ["service","artisan","local"]):                    return "services_locaux"
-    return "generic_b2b"
+    return sector_kb.classify("landing_pricing", secteur)
 
 def _pricing_benchmarks(cat: str) -> dict:
-    # bornes FR réalistes par catégorie (fourchettes indicatives)
-    return {
-        "saas_b2b":       {"base_min": 29, "base_max": 199, "starter_mul": 0.6, "pro_mul": 1.0, "ent_mul": 2.2},
-        "ecommerce_b2c":  {"base_min": 19, "base_max": 99,  "starter_mul": 0.6, "pro_mul": 1.0, "ent_mul": 2.0},
-        "industry_b2b":   {"base_min": 99, "base_max": 399, "starter_mul": 0.6, "pro_mul": 1.0, "ent_mul": 2.5},
-        "mobile_app":     {"base_min": 5,  "base_max": 19,  "starter_mul": 0.6, "pro_mul": 1.0, "ent_mul": 2.2},
-        "services_locaux":{"base_min": 39, "base_max": 149, "starter_mul": 0.6, "pro_mul": 1.0, "ent_mul": 2.0},
-        "generic_b2b":    {"base_min": 39, "base_max": 199, "starter_mul": 0.6, "pro_mul": 1.0, "ent_mul": 2.2},
-    }.get(cat or "generic_b2b")
+    # bornes FR réalistes par catégorie (fourchettes indicatives) → data/sector_kb.json
+    return sector_kb.benchmark("landing_pricing", cat or "generic_b2b")
 
 def _pricing_charm(x: float) -> int:
     # arrondi psychologique → termine en 9 ou 5
@@ -1106,8 +1053,8 @@ def _brand_theme(brand: Optional[dict]) -> dict:
     }
 
 def _sector_presets_for_feature_details(sector: str) -> dict:
-    s = (sector or "").lower()
-    if any(k in s for k in ["saas","logiciel","b2b","crm","erp","plateforme","app"]):
+    cat = sector_kb.classify("landing_features", sector)
+    if cat == "saas":
         return {
             "bullets": [
                 "Connexion en < 30 min (SSO / OAuth)",
@@ -1117,7 +1064,7 @@ def _sector_presets_for_feature_details(sector: str) -> dict:
             ],
             "kpi": "~20–40% de temps gagné / équipe"
         }
-    if any(k in s for k in ["ecom","e-commerce","ecommerce","boutique","retail","dnvb"]):
+    if cat == "ecom":
         return {
             "bullets": [
                 "Catalogues & variantes illimités",
@@ -1189,14 +1136,14 @@ def _top3_differentiators(copy: dict, idea_snapshot: dict, sector: str, project_
     if not diffs:
         diffs = [d for d in (idea_snapshot.get("differentiation_points") or []) if d]
     if not diffs:
-        s = (sector or "").lower()
-        if any(k in s for k in ["saas","logiciel","b2b"]):
+        cat = sector_kb.classify("landing_differentiators", sector)
+        if cat == "saas":
             diffs = [
                 "Mise en place rapide — Onboarding guidé & intégrations natives",
                 "RGPD & hébergement UE — DPA, chiffrement, bonnes pratiques",
                 "Support réactif — Réponse 24–48h, spécialistes du secteur",
             ]
-        elif any(k in s for k in ["ecom","e-commerce","boutique"]):
+        elif cat == "ecom":
             diffs = [
                 "Pensé pour le e-commerce — Outils conversion & retargeting",
                 "Intégrations logistiques — Suivi, retours, rapports marge",
@@ -1265,7 +1212,7 @@ async def _generate_landing_copy(
         bp = None
 
     try:
-        resp = client.chat.completions.create(
+        resp = llm_usage.chat_completion(client, "landing_copy",
             model="gpt-4o",
             messages=[{"role":"user","content":prompt}],
             temperature=0.5,
@@ -1316,21 +1263,9 @@ def _esc(x: Any) -> str:
     except Exception:
         return str(x)
 
-def _render_landing_html(
-    copy: LandingCopy,
-    brand_name: str, slogan: str, sector: str,
-    project_id: int,
-    logo_data_uri: Optional[str] = None,
-    theme: Optional[dict] = None,
-) -> str:
-    t = theme or {
-        "primary":"#8b93ff","accent":"#14b8a6","bg":"#0f172a",
-        "text":"#e5e7eb","panel":"#111827","border":"#1f2937","muted":"#9ca3af"
-    }
-
-    hero_svg = """<svg viewBox="0 0 600 360" width="100%" height="100%" preserveAspectRatio="xMidYMid slice" role="img" aria-label="Product">
+templating.register_partial("landing_hero_svg", """<svg viewBox="0 0 600 360" width="100%" height="100%" preserveAspectRatio="xMidYMid slice" role="img" aria-label="Product">
       <defs><linearGradient id="g" x1="0" x2="1" y1="0" y2="1">
-        <stop offset="0%" stop-color="{}"/><stop offset="100%" stop-color="{}"/>
+        <stop offset="0%" stop-color="{{ t_primary }}"/><stop offset="100%" stop-color="{{ t_accent }}"/>
       </linearGradient></defs>
       <rect x="0" y="0" width="600" height="360" fill="#0b1220"/>
       <rect x="24" y="24" width="552" height="312" rx="14" fill="url(#g)" opacity="0.18"/>
@@ -1341,123 +1276,69 @@ def _render_landing_html(
         <rect x="60" y="194" width="300" height="24" rx="6" fill="#0b1220" />
         <rect x="60" y="238" width="160" height="44" rx="10" fill="#111827" stroke="#1f2937"/>
       </g>
-    </svg>""".format(_esc(t["primary"]), _esc(t["accent"]))
-
-    def bullets(items: list[str]) -> str:
-        items = [i for i in (items or []) if i]
-        return "<ul class='list'>" + "".join(f"<li>{_esc(i)}</li>" for i in items) + "</ul>" if items else ""
-
-    def features_grid(features: list[dict]) -> str:
-        items = (features or [])[:3]
-        cells = []
-        for f in items:
-            title  = _esc(f.get("title",""))
-            desc   = _esc(f.get("desc",""))
-            bts    = [b for b in (f.get("bullets") or []) if b][:4]
-            kpi    = _esc(f.get("kpi",""))
-            li     = "".join(f"<li>{_esc(b)}</li>" for b in bts)
-            cells.append(
-                "<div class='panel'>"
-                f"<div class='card-title'>{title}</div>"
-                f"<div class='muted'>{desc}</div>"
-                f"<ul class='list'>{li}</ul>"
-                + (f"<div class='kpi'>{kpi}</div>" if kpi else "")
-                + "</div>"
-            )
-        return "<div class='grid grid-3'>" + "".join(cells) + "</div>"
-
-    def why_us_cards(diffs: list[str]) -> str:
-        items = (diffs or [])[:3]
-        cells = []
-        for s in items:
-            raw = s or ""
-            if "—" in raw:
-                ttitle, tdesc = raw.split("—", 1)
-            elif ":" in raw:
-                ttitle, tdesc = raw.split(":", 1)
-            else:
-                ttitle, tdesc = raw, ""
-            cells.append(
-                "<div class='panel'>"
-                f"<div class='card-title'>{_esc(ttitle.strip())}</div>"
-                f"<div class='muted'>{_esc(tdesc.strip())}</div>"
-                "</div>"
-            )
-        return "<div class='grid grid-3'>" + "".join(cells) + "</div>"
-
-    badges = "".join(f"<span class='badge'>{_esc(b)}</span> " for b in (copy.segments_badges or [])[:4])
+    </svg>""")
 
-    styles = f"""
+templating.register_partial("landing_css", """
     <style>
-      :root {{
-        --primary:{_esc(t["primary"])};
-        --accent:{_esc(t["accent"])};
-        --bg:{_esc(t["bg"])};
-        --text:{_esc(t["text"])};
-        --panel:{_esc(t["panel"])};
-        --border:{_esc(t["border"])};
-        --muted:{_esc(t["muted"])};
+      :root {
+        --primary:{{ t_primary }};
+        --accent:{{ t_accent }};
+        --bg:{{ t_bg }};
+        --text:{{ t_text }};
+        --panel:{{ t_panel }};
+        --border:{{ t_border }};
+        --muted:{{ t_muted }};
         color-scheme: dark;
-      }}
-      body {{ margin:0; background:var(--bg); color:var(--text); font-family: Inter, system-ui, -apple-system, Segoe UI, Roboto, Arial; }}
-      .wrap {{ max-width:1100px; margin:0 auto; padding:24px; }}
-      header {{ display:flex; align-items:center; justify-content:space-between; gap:16px; padding:14px 0; }}
-      .brand {{ display:flex; align-items:center; gap:12px; }}
-      .brand img {{ height:42px; width:auto; border-radius:8px; background:#0b1220; border:1px solid var(--border); }}
-      .brand .t {{ display:flex; flex-direction:column; line-height:1.1 }}
-      .brand .n {{ font-weight:800; font-size:20px }}
-      .brand .s {{ color:var(--muted); font-size:12px }}
-      .cta {{ display:flex; gap:10px }}
-      .cta a, .cta button, .cta-btn {{ background:var(--primary); color:white; border:none; padding:10px 14px; border-radius:10px; font-weight:600; cursor:pointer; text-decoration:none }}
-      .cta a:hover, .cta button:hover, .cta-btn:hover {{ filter:brightness(1.05) }}
-      .hero {{ display:grid; grid-template-columns:1.1fr .9fr; gap:18px; align-items:center; padding:16px 0 26px; }}
-      .hero h1 {{ font-size:36px; margin:6px 0 10px; }}
-      .hero p {{ color:var(--muted) }}
-      .panel {{ background:var(--panel); border:1px solid var(--border); border-radius:16px; padding:18px; }}
-      .grid {{ display:grid; gap:14px }}
-      .grid-2 {{ grid-template-columns:repeat(2,minmax(0,1fr)) }}
-      .grid-3 {{ grid-template-columns:repeat(3,minmax(0,1fr)) }}
-      .list li {{ margin:6px 0 }}
-      section h2 {{ font-size:22px; margin:18px 0 10px; color:var(--primary) }}
-      .badge {{ display:inline-block; background:#0b1220; border:1px solid var(--border); padding:6px 10px; border-radius:999px; font-size:12px; color:var(--muted); margin-right:6px }}
-      .price {{ font-size:28px; font-weight:800 }}
-      .card-title {{ font-weight:700; font-size:16px; margin-bottom:6px }}
-      .kpi {{ margin-top:8px; font-weight:800; color:var(--accent) }}
-      .muted {{ color:var(--muted) }}
-      form input, form textarea {{ width:100%; background:#0b1220; color:var(--text); border:1px solid var(--border); border-radius:10px; padding:10px 12px; }}
-      form button {{ background:var(--accent); color:#052e2b; border:none; padding:10px 14px; border-radius:10px; font-weight:700; cursor:pointer }}
-      footer {{ margin:24px 0 10px; color:var(--muted); font-size:12px; text-align:center }}
-      @media (max-width: 900px) {{ .hero {{ grid-template-columns:1fr; }} .grid-3 {{ grid-template-columns:1fr; }} }}
+      }
+      body { margin:0; background:var(--bg); color:var(--text); font-family: Inter, system-ui, -apple-system, Segoe UI, Roboto, Arial; }
+      .wrap { max-width:1100px; margin:0 auto; padding:24px; }
+      header { display:flex; align-items:center; justify-content:space-between; gap:16px; padding:14px 0; }
+      .brand { display:flex; align-items:center; gap:12px; }
+      .brand img { height:42px; width:auto; border-radius:8px; background:#0b1220; border:1px solid var(--border); }
+      .brand .t { display:flex; flex-direction:column; line-height:1.1 }
+      .brand .n { font-weight:800; font-size:20px }
+      .brand .s { color:var(--muted); font-size:12px }
+      .cta { display:flex; gap:10px }
+      .cta a, .cta button, .cta-btn { background:var(--primary); color:white; border:none; padding:10px 14px; border-radius:10px; font-weight:600; cursor:pointer; text-decoration:none }
+      .cta a:hover, .cta button:hover, .cta-btn:hover { filter:brightness(1.05) }
+      .hero { display:grid; grid-template-columns:1.1fr .9fr; gap:18px; align-items:center; padding:16px 0 26px; }
+      .hero h1 { font-size:36px; margin:6px 0 10px; }
+      .hero p { color:var(--muted) }
+      .panel { background:var(--panel); border:1px solid var(--border); border-radius:16px; padding:18px; }
+      .grid { display:grid; gap:14px }
+      .grid-2 { grid-template-columns:repeat(2,minmax(0,1fr)) }
+      .grid-3 { grid-template-columns:repeat(3,minmax(0,1fr)) }
+      .list li { margin:6px 0 }
+      section h2 { font-size:22px; margin:18px 0 10px; color:var(--primary) }
+      .badge { display:inline-block; background:#0b1220; border:1px solid var(--border); padding:6px 10px; border-radius:999px; font-size:12px; color:var(--muted); margin-right:6px }
+      .price { font-size:28px; font-weight:800 }
+      .card-title { font-weight:700; font-size:16px; margin-bottom:6px }
+      .kpi { margin-top:8px; font-weight:800; color:var(--accent) }
+      .muted { color:var(--muted) }
+      form input, form textarea { width:100%; background:#0b1220; color:var(--text); border:1px solid var(--border); border-radius:10px; padding:10px 12px; }
+      form button { background:var(--accent); color:#052e2b; border:none; padding:10px 14px; border-radius:10px; font-weight:700; cursor:pointer }
+      footer { margin:24px 0 10px; color:var(--muted); font-size:12px; text-align:center }
+      @media (max-width: 900px) { .hero { grid-template-columns:1fr; } .grid-3 { grid-template-columns:1fr; } }
     </style>
-    """
+""")
 
-    def pricing_block(pr: dict) -> str:
-        def tier_html(t: dict) -> str:
-            name = _esc(t.get("name",""))
-            price = t.get("price_per_month_eur")
-            price_html = f"<div class='price'>{int(price)} € / mois</div>" if price is not None else "<div class='price'>Sur devis</div>"
-            bl = bullets(t.get("bullets") or [])
-            cta = _esc(t.get("cta") or "Choisir")
-            return f"<div class='panel'><div><strong>{name}</strong></div>{price_html}{bl}<div style='margin-top:8px'><a class='cta-btn' href='#contact'>{cta}</a></div></div>"
-        return "<div class='grid grid-3'>" + tier_html(pr.get("starter", {})) + tier_html(pr.get("pro", {})) + tier_html(pr.get("enterprise", {})) + "</div>"
-
-    html = f"""<!doctype html>
+templating.register_template("landing", """<!doctype html>
 <html lang="fr">
 <head>
 <meta charset="utf-8"/>
 <meta name="viewport" content="width=device-width, initial-scale=1"/>
-<title>{_esc(brand_name)} — Landing</title>
-<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;800&display=swap" rel="stylesheet">
-{styles}
+<title>{{ brand_name }} — Landing</title>
+{{> inter_font_link }}
+{{> landing_css }}
 </head>
 <body>
 <div class="wrap">
   <header>
     <div class="brand">
-      {("<img alt='logo' src='" + _esc(logo_data_uri) + "'/>") if logo_data_uri else ""}
+      {{ logo_img|raw }}
       <div class="t">
-        <div class="n">{_esc(brand_name)}</div>
-        <div class="s">{_esc(slogan)}</div>
+        <div class="n">{{ brand_name }}</div>
+        <div class="s">{{ slogan }}</div>
       </div>
     </div>
     <div class="cta">
@@ -1468,56 +1349,56 @@ def _render_landing_html(
 
   <div class="hero">
     <div class="panel">
-      <span class="badge">Secteur : {_esc(sector)}</span> {badges}
-      <h1>{_esc(copy.hero_title or (brand_name + " — " + slogan))}</h1>
-      <p>{_esc(copy.hero_subtitle)}</p>
-      {bullets(copy.hero_bullets)}
+      <span class="badge">Secteur : {{ sector }}</span> {{ badges|raw }}
+      <h1>{{ hero_title }}</h1>
+      <p>{{ hero_subtitle }}</p>
+      {{ hero_bullets|raw }}
       <div class="cta" style="margin-top:10px">
         <a href="#contact">Demander une démo</a>
         <a href="#pricing" style="background:#0b1220; border:1px solid var(--border); color:var(--text)">Voir les tarifs</a>
       </div>
     </div>
-    <div class="panel">{hero_svg}</div>
+    <div class="panel">{{> landing_hero_svg }}</div>
   </div>
 
   <section id="features" class="panel">
     <h2>Fonctionnalités clés</h2>
-    {features_grid(copy.features)}
+    {{ features|raw }}
   </section>
 
   <section class="panel">
     <h2>Pourquoi nous</h2>
-    {why_us_cards(copy.differentiators)}
+    {{ why_us|raw }}
   </section>
 
   <section id="pricing" class="panel">
     <h2>Tarification</h2>
-    {pricing_block(copy.pricing)}
+    {{ pricing|raw }}
   </section>
 
   <section class="panel">
     <h2>Confiance & conformité</h2>
-    {bullets(copy.trust_points)}
+    {{ trust_points|raw }}
   </section>
 
   <section class="panel">
     <h2>Témoignages</h2>
     <div class="grid grid-2">
-      {''.join(f"<div class='panel'>“{_esc(t.get('quote',''))}” — {_esc(t.get('name',''))}, {_esc(t.get('role',''))}</div>" for t in (copy.testimonials or [])[:2])}
+      {{ testimonials|raw }}
     </div>
   </section>
 
   <section id="faq" class="panel">
     <h2>FAQ</h2>
     <div class="grid grid-2">
-      {''.join(f"<div class='panel'><strong>{_esc(qa.get('q',''))}</strong><br/>{_esc(qa.get('a',''))}</div>" for qa in (copy.faq or [])[:6])}
+      {{ faq|raw }}
     </div>
   </section>
 
   <section id="contact" class="panel">
     <h2>Contact</h2>
     <form action="/api/landing/lead" method="POST">
-      <input type="hidden" name="project_id" value="{project_id}" />
+      <input type="hidden" name="project_id" value="{{ project_id }}" />
       <div class="grid grid-2">
         <div><label>Nom</label><br/><input name="name" required placeholder="Votre nom"/></div>
         <div><label>Email</label><br/><input name="email" type="email" required placeholder="vous@exemple.com"/></div>
@@ -1531,19 +1412,117 @@ def _render_landing_html(
     </form>
   </section>
 
-  <footer>© {_esc(brand_name)} — Tous droits réservés</footer>
+  <footer>© {{ brand_name }} — Tous droits réservés</footer>
 </div>
 </body>
-</html>"""
-    return html
+</html>""")
+
+_LANDING_DEFAULT_THEME = {
+    "primary":"#8b93ff","accent":"#14b8a6","bg":"#0f172a",
+    "text":"#e5e7eb","panel":"#111827","border":"#1f2937","muted":"#9ca3af"
+}
+
+
+def _landing_bullets(items: list[str]) -> str:
+    items = [i for i in (items or []) if i]
+    return "<ul class='list'>" + "".join(f"<li>{_esc(i)}</li>" for i in items) + "</ul>" if items else ""
+
+
+def _landing_features_grid(features: list[dict]) -> str:
+    cells = []
+    for f in (features or [])[:3]:
+        title  = _esc(f.get("title",""))
+        desc   = _esc(f.get("desc",""))
+        bts    = [b for b in (f.get("bullets") or []) if b][:4]
+        kpi    = _esc(f.get("kpi",""))
+        li     = "".join(f"<li>{_esc(b)}</li>" for b in bts)
+        cells.append(
+            "<div class='panel'>"
+            f"<div class='card-title'>{title}</div>"
+            f"<div class='muted'>{desc}</div>"
+            f"<ul class='list'>{li}</ul>"
+            + (f"<div class='kpi'>{kpi}</div>" if kpi else "")
+            + "</div>"
+        )
+    return "<div class='grid grid-3'>" + "".join(cells) + "</div>"
+
+
+def _landing_why_us_cards(diffs: list[str]) -> str:
+    cells = []
+    for s in (diffs or [])[:3]:
+        raw = s or ""
+        if "—" in raw:
+            ttitle, tdesc = raw.split("—", 1)
+        elif ":" in raw:
+            ttitle, tdesc = raw.split(":", 1)
+        else:
+            ttitle, tdesc = raw, ""
+        cells.append(
+            "<div class='panel'>"
+            f"<div class='card-title'>{_esc(ttitle.strip())}</div>"
+            f"<div class='muted'>{_esc(tdesc.strip())}</div>"
+            "</div>"
+        )
+    return "<div class='grid grid-3'>" + "".join(cells) + "</div>"
+
+
+def _landing_tier_html(t: dict) -> str:
+    name = _esc(t.get("name",""))
+    price = t.get("price_per_month_eur")
+    price_html = f"<div class='price'>{int(price)} € / mois</div>" if price is not None else "<div class='price'>Sur devis</div>"
+    bl = _landing_bullets(t.get("bullets") or [])
+    cta = _esc(t.get("cta") or "Choisir")
+    return f"<div class='panel'><div><strong>{name}</strong></div>{price_html}{bl}<div style='margin-top:8px'><a class='cta-btn' href='#contact'>{cta}</a></div></div>"
+
+
+def _landing_pricing_block(pr: dict) -> str:
+    return "<div class='grid grid-3'>" + _landing_tier_html(pr.get("starter", {})) + _landing_tier_html(pr.get("pro", {})) + _landing_tier_html(pr.get("enterprise", {})) + "</div>"
+
+
+def _render_landing_html(
+    copy: LandingCopy,
+    brand_name: str, slogan: str, sector: str,
+    project_id: int,
+    logo_url: Optional[str] = None,
+    theme: Optional[dict] = None,
+) -> str:
+    t = theme or _LANDING_DEFAULT_THEME
+
+    return templating.render(
+        "landing",
+        t_primary=t["primary"], t_accent=t["accent"], t_bg=t["bg"], t_text=t["text"],
+        t_panel=t["panel"], t_border=t["border"], t_muted=t["muted"],
+        brand_name=brand_name,
+        slogan=slogan,
+        logo_img=("<img alt='logo' src='" + _esc(logo_url) + "'/>") if logo_url else "",
+        sector=sector,
+        badges="".join(f"<span class='badge'>{_esc(b)}</span> " for b in (copy.segments_badges or [])[:4]),
+        hero_title=copy.hero_title or (brand_name + " — " + slogan),
+        hero_subtitle=copy.hero_subtitle,
+        hero_bullets=_landing_bullets(copy.hero_bullets),
+        features=_landing_features_grid(copy.features),
+        why_us=_landing_why_us_cards(copy.differentiators),
+        pricing=_landing_pricing_block(copy.pricing),
+        trust_points=_landing_bullets(copy.trust_points),
+        testimonials="".join(
+            f"<div class='panel'>“{_esc(q.get('quote',''))}” — {_esc(q.get('name',''))}, {_esc(q.get('role',''))}</div>"
+            for q in (copy.testimonials or [])[:2]
+        ),
+        faq="".join(
+            f"<div class='panel'><strong>{_esc(qa.get('q',''))}</strong><br/>{_esc(qa.get('a',''))}</div>"
+            for qa in (copy.faq or [])[:6]
+        ),
+        project_id=project_id,
+    )
 
 # --- REMPLACE ta generate_landing par celle-ci -------------------------------
 
+@tracing.traced("generate.landing")
 async def generate_landing(
     profil: "ProfilRequest",
     idea_snapshot: Optional[dict] = None,
     brand: Optional[dict] = None,
-    logo_data_uri: Optional[str] = None,
+    logo_url: Optional[str] = None,
 ) -> LandingResponse:
     """
     On garde le STYLE/MARKUP de ta landing. GPT ne génère QUE les textes (copy).
@@ -1555,9 +1534,8 @@ async def generate_landing(
     slogan     = (brand or {}).get("slogan")     or (idea_snapshot or {}).get("slogan") or "Votre slogan ici"
     project_id = (idea_snapshot or {}).get("project_id") or 0
 
-    # 2) Sécuriser logo (si chemin) → data URI
-    if logo_data_uri and logo_data_uri.startswith("/"):
-        logo_data_uri = _as_data_uri_from_path(logo_data_uri)
+    # 2) Logo → URL d'asset (chemin local ou data URI héritée déposés dans le store, dédupliqués)
+    logo_url = asset_store.to_asset_url(logo_url)
 
     # 3) Générer la COPY (JSON) via GPT (ou fallback)
     copy = await _generate_landing_copy(profil, idea_snapshot, brand)
@@ -1565,12 +1543,13 @@ async def generate_landing(
     theme = _brand_theme(brand)
 
     # 4) Rendre le HTML final en réinjectant la copy dans TON template
-    html = _render_landing_html(copy, brand_name, slogan, sector, int(project_id or 0), logo_data_uri, theme)
+    html = _render_landing_html(copy, brand_name, slogan, sector, int(project_id or 0), logo_url, theme)
 
     return LandingResponse(html=html)
 # MARKETING
 # ─────────────────────────────────────────────────────────────────────────────
 
+@tracing.traced("generate.marketing")
 async def generate_marketing(profil: ProfilRequest, idea_snapshot: Optional[Dict[str, Any]] = None) -> MarketingResponse:
     """
     Retour JSON STRICT avec exactement:
@@ -1589,7 +1568,7 @@ async def generate_marketing(profil: ProfilRequest, idea_snapshot: Optional[Dict
         + _verbatim_block(idea_snapshot) +
         f"\n[PROFIL] secteur={p.get('secteur')} • objectif={p.get('objectif')}"
     )
-    resp = client.chat.completions.create(
+    resp = llm_usage.chat_completion(client, "marketing",
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.5,
@@ -1650,68 +1629,12 @@ def _build_forecast(monthly_budget: float, assumptions: Dict[str, float], months
 # Benchmarks secteur + forecast
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _map_industry(secteur: str | None) -> str:
-    s = (secteur or "").lower()
-    if any(k in s for k in ["e-com", "boutique", "retail", "shop"]):
-        return "ecommerce_b2c"
-    if any(k in s for k in ["saas", "logiciel", "b2b", "crm", "erp", "data"]):
-        return "saas_b2b"
-    if any(k in s for k in ["industrie", "robot", "iot", "manufact", "usine"]):
-        return "industry_b2b"
-    if any(k in s for k in ["mobile", "app", "application"]):
-        return "mobile_app"
-    if any(k in s for k in ["formation", "coaching", "infoproduit"]):
-        return "info_b2c"
-    if any(k in s for k in ["service", "artisan", "local"]):
-        return "services_locaux"
-    return "generic_b2b"
-
-def _industry_benchmarks() -> Dict[str, Dict[str, Any]]:
-    # Médianes réalistes à ajuster avec tes données terrain (proportions en décimal).
-    return {
-        "saas_b2b": {
-            "assumptions": {"cpc": 3.2, "ctr": 0.02, "lp_cvr": 0.045, "mql_rate": 0.55, "sql_rate": 0.45, "close_rate": 0.22, "aov": 0.0},
-            "monthly_budget": 4000,
-            "mix": [("LinkedIn Ads", 0.30), ("Google Search", 0.30), ("SEO/Contenu", 0.20), ("Emailing", 0.10), ("Retargeting", 0.10)],
-        },
-        "ecommerce_b2c": {
-            "assumptions": {"cpc": 0.9, "ctr": 0.018, "lp_cvr": 0.025, "mql_rate": 1.0, "sql_rate": 1.0, "close_rate": 0.035, "aov": 65},
-            "monthly_budget": 3000,
-            "mix": [("Meta Ads", 0.40), ("Google Shopping", 0.30), ("SEO/Contenu", 0.15), ("Influence/UGC", 0.10), ("Emailing", 0.05)],
-        },
-        "industry_b2b": {
-            "assumptions": {"cpc": 2.4, "ctr": 0.016, "lp_cvr": 0.06, "mql_rate": 0.6, "sql_rate": 0.5, "close_rate": 0.25, "aov": 0.0},
-            "monthly_budget": 3500,
-            "mix": [("Google Search", 0.35), ("LinkedIn Ads", 0.25), ("SEO/Contenu", 0.20), ("Salons/Partenariats", 0.10), ("Emailing", 0.10)],
-        },
-        "mobile_app": {
-            "assumptions": {"cpc": 0.7, "ctr": 0.03, "lp_cvr": 0.07, "mql_rate": 1.0, "sql_rate": 1.0, "close_rate": 0.04, "aov": 12},
-            "monthly_budget": 2500,
-            "mix": [("ASA/UAC", 0.45), ("Meta/TikTok", 0.35), ("SEO/ASO", 0.10), ("Emailing/CRM", 0.10)],
-        },
-        "services_locaux": {
-            "assumptions": {"cpc": 1.6, "ctr": 0.025, "lp_cvr": 0.09, "mql_rate": 0.7, "sql_rate": 0.6, "close_rate": 0.35, "aov": 180},
-            "monthly_budget": 1500,
-            "mix": [("Google Search", 0.50), ("SEO Local", 0.25), ("Avis clients", 0.15), ("Emailing", 0.10)],
-        },
-        "info_b2c": {
-            "assumptions": {"cpc": 0.8, "ctr": 0.02, "lp_cvr": 0.18, "mql_rate": 0.6, "sql_rate": 0.35, "close_rate": 0.12, "aov": 79},
-            "monthly_budget": 2000,
-            "mix": [("Meta Ads", 0.45), ("Webinars/Lead magnet", 0.25), ("SEO/Contenu", 0.20), ("Emailing", 0.10)],
-        },
-        "generic_b2b": {
-            "assumptions": {"cpc": 2.2, "ctr": 0.02, "lp_cvr": 0.05, "mql_rate": 0.55, "sql_rate": 0.45, "close_rate": 0.20, "aov": 0.0},
-            "monthly_budget": 3000,
-            "mix": [("Google Search", 0.35), ("LinkedIn Ads", 0.25), ("SEO/Contenu", 0.20), ("Emailing", 0.10), ("Retargeting", 0.10)],
-        },
-    }
-
 def _choose_bench(secteur: str | None, objectif: str | None) -> Tuple[Dict[str, float], float, list[tuple[str, float]]]:
-    cat = _map_industry(secteur)
-    cfg = _industry_benchmarks()[cat]
-    assumptions = cfg["assumptions"]
+    cat = sector_kb.classify("industry", secteur)
+    cfg = sector_kb.benchmark("acquisition", cat)
+    assumptions = dict(cfg["assumptions"])
     budget = cfg["monthly_budget"]
-    mix = cfg["mix"]
+    mix = [tuple(m) for m in cfg["mix"]]
     if objectif and any(k in (objectif or "").lower() for k in ["agress", "x2", "scale", "hyper"]):
         budget *= 1.4  # boost budget si objectif agressif
     return assumptions, budget, mix
@@ -1773,6 +1696,7 @@ def _build_forecast_6m(ass: Dict[str, float], monthly_budget: float) -> Dict[str
         out[name] = rows
     return out
 
+@tracing.traced("generate.acquisition")
 async def generate_acquisition_structured_for_marketing(
     profil: ProfilRequest, idea_snapshot: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
@@ -1938,39 +1862,9 @@ def _jitter(val: float, pct: float, rnd: random.Random) -> float:
     return val * (1.0 + rnd.uniform(-pct, pct))
 
 def _sector_profile(secteur: str) -> dict:
-    s = _norm(secteur)
-    # Profils FR “par défaut” (bornes conservatrices, pas des vérités absolues)
-    if any(k in s for k in ["saas", "logiciel", "app", "plateforme"]):
-        return {
-            "model": "saas",
-            "arpu_month_range": (30, 180),
-            "churn_m_range": (0.8, 5.0),      # %/mois
-            "gm_pct_range": (75, 92),
-            "cac_blended_range": (20, 160),
-            "seasonality": [0.98, 0.99, 1.00, 1.01, 1.03, 1.05, 1.05, 1.03, 1.01, 1.00, 0.99, 0.98],
-            "dso_days": 15, "dpo_days": 30, "inv_days": 0,
-        }
-    if any(k in s for k in ["ecommerce", "e-commerce", "boutique", "retail", "q-commerce"]):
-        return {
-            "model": "ecom",
-            "aov_range": (25, 120),           # panier moyen
-            "conv_site_range": (0.6, 3.0),    # %
-            "return_rate_range": (2, 12),     # %
-            "gm_pct_range": (35, 65),
-            "cac_blended_range": (8, 60),
-            "seasonality": [0.90, 0.92, 0.98, 1.00, 1.04, 1.08, 1.12, 1.06, 1.00, 1.02, 1.10, 1.20],
-            "dso_days": 2, "dpo_days": 30, "inv_days": 40,
-        }
-    # Services/Agence/Conseil (par défaut)
-    return {
-        "model": "services",
-        "tj_range": (350, 950),
-        "util_rate_range": (45, 75),       # % facturable
-        "gm_pct_range": (40, 70),
-        "cac_blended_range": (15, 120),
-        "seasonality": [0.95, 0.97, 1.00, 1.02, 1.05, 1.06, 1.04, 1.01, 0.98, 0.97, 0.96, 0.95],
-        "dso_days": 35, "dpo_days": 30, "inv_days": 0,
-    }
+    # Profils FR “par défaut” (bornes conservatrices, pas des vérités absolues) → data/sector_kb.json
+    model = sector_kb.classify("calibration_profile", _norm(secteur))
+    return sector_kb.thaw(sector_kb.benchmark("calibration_profile", model))
 
 def build_calibration_snapshot(
     user_id: int | None,
@@ -2036,42 +1930,11 @@ def build_calibration_snapshot(
         **base,
     }
 
-def _bp_map_industry(secteur: str | None) -> str:
-    s = (secteur or "").lower()
-    if any(k in s for k in ["e-com", "boutique", "retail", "shop"]): return "ecommerce_b2c"
-    if any(k in s for k in ["saas", "logiciel", "b2b", "crm", "erp", "data"]): return "saas_b2b"
-    if any(k in s for k in ["industrie", "robot", "iot", "manufact", "usine"]): return "industry_b2b"
-    if any(k in s for k in ["mobile", "app", "application"]): return "mobile_app"
-    if any(k in s for k in ["formation", "coaching", "infoproduit"]): return "info_b2c"
-    if any(k in s for k in ["service", "artisan", "local"]): return "services_locaux"
-    return "generic_b2b"
-
 def _bp_defaults(secteur: str | None, objectif: str | None) -> dict:
-    cat = _bp_map_industry(secteur)
-    # valeurs de base par secteur (réalistes mais génériques)
-    base = {
-        "saas_b2b":     dict(price=190.0, units_m1=22,  mom_growth=0.09, gm=0.82, var_rate=0.18, opex=12000, payroll=16000, mkt_ratio=0.22,
-                             investments=[("Dév. produit", 12000, 1, 3), ("Site & outils", 6000, 1, 3)],
-                             tax_rate=0.25, loan_rate=0.055, loan_years=4),
-        "ecommerce_b2c":dict(price=64.0,  units_m1=380, mom_growth=0.07, gm=0.45, var_rate=0.55, opex=8000,  payroll=9000,  mkt_ratio=0.15,
-                             investments=[("Stock initial", 15000, 1, 3), ("Site & shooting", 5000, 1, 3)],
-                             tax_rate=0.25, loan_rate=0.06,  loan_years=3),
-        "industry_b2b": dict(price=1400.0,units_m1=6,   mom_growth=0.06, gm=0.35, var_rate=0.65, opex=14000, payroll=18000, mkt_ratio=0.08,
-                             investments=[("Machines/Outillage", 30000, 1, 5), ("Logiciels/ERP", 10000, 1, 4)],
-                             tax_rate=0.25, loan_rate=0.052, loan_years=5),
-        "mobile_app":   dict(price=10.0,  units_m1=2200,mom_growth=0.08, gm=0.85, var_rate=0.15, opex=6000,  payroll=14000, mkt_ratio=0.20,
-                             investments=[("App & assets", 10000, 1, 3)],
-                             tax_rate=0.25, loan_rate=0.055, loan_years=3),
-        "info_b2c":     dict(price=79.0,  units_m1=90,  mom_growth=0.08, gm=0.75, var_rate=0.25, opex=5000,  payroll=9000,  mkt_ratio=0.18,
-                             investments=[("Plateforme & studio", 7000, 1, 3)],
-                             tax_rate=0.25, loan_rate=0.055, loan_years=3),
-        "services_locaux": dict(price=180.0, units_m1=35,mom_growth=0.07, gm=0.70, var_rate=0.30, opex=7000, payroll=9000,  mkt_ratio=0.10,
-                             investments=[("Véhicule/Matériel", 12000, 1, 4)],
-                             tax_rate=0.25, loan_rate=0.055, loan_years=4),
-        "generic_b2b":  dict(price=600.0, units_m1=10,  mom_growth=0.07, gm=0.60, var_rate=0.40, opex=10000, payroll=14000, mkt_ratio=0.15,
-                             investments=[("Site & outils", 6000, 1, 3)],
-                             tax_rate=0.25, loan_rate=0.055, loan_years=4),
-    }[cat]
+    cat = sector_kb.classify("industry", secteur)
+    # valeurs de base par secteur (réalistes mais génériques) → data/sector_kb.json
+    base = sector_kb.thaw(sector_kb.benchmark("bp_defaults", cat))
+    base["investments"] = [tuple(i) for i in base["investments"]]
 
     # objectif agressif → un peu plus d’opex & de croissance
     if objectif and any(k in objectif.lower() for k in ["agress", "scale", "hyper", "x2"]):
@@ -2306,58 +2169,6 @@ def _invest_outflow_monthly(investments: list[tuple[str, float, int, int]], hori
             out[m] += float(amount or 0.0)
     return out
 
-def _pnl_3y_from_forecast(fore: dict, dep_m: list[float], loan_int_m: list[float], tax_rate: float) -> dict:
-    """Agrège un P&L 3 ans depuis les séries mensuelles calibrées."""
-    revenue   = fore["revenue"]
-    cogs      = fore["cogs"]
-    marketing = fore["marketing"]
-    fixed     = fore["fixed"]
-    payroll   = fore["payroll"]
-    ebitda_m  = [revenue[i] - cogs[i] - marketing[i] - fixed[i] - payroll[i] for i in range(len(revenue))]
-
-    def _sum_year(slice_):
-        return round(sum(slice_), 2)
-
-    y1 = slice(0, 12); y2 = slice(12, 24); y3 = slice(24, 36)
-
-    rev_y   = [_sum_year(revenue[y1]), _sum_year(revenue[y2]), _sum_year(revenue[y3])]
-    cogs_y  = [_sum_year(cogs[y1]),    _sum_year(cogs[y2]),    _sum_year(cogs[y3])]
-    gross_y = [round(rev_y[i] - cogs_y[i], 2) for i in range(3)]
-    mkt_y   = [_sum_year(marketing[y1]), _sum_year(marketing[y2]), _sum_year(marketing[y3])]
-    fix_y   = [_sum_year(fixed[y1]),     _sum_year(fixed[y2]),     _sum_year(fixed[y3])]
-    pay_y   = [_sum_year(payroll[y1]),   _sum_year(payroll[y2]),   _sum_year(payroll[y3])]
-    ebd_y   = [_sum_year(ebitda_m[y1]),  _sum_year(ebitda_m[y2]),  _sum_year(ebitda_m[y3])]
-    dep_y   = [_sum_year(dep_m[1:13]),   _sum_year(dep_m[13:25]),  _sum_year(dep_m[25:37])]
-    int_y   = [_sum_year(loan_int_m[1:13]), _sum_year(loan_int_m[13:25]), _sum_year(loan_int_m[25:37])]
-
-    ebit_y = [round(ebd_y[i] - dep_y[i], 2) for i in range(3)]
-    ebt_y  = [round(ebit_y[i] - int_y[i], 2) for i in range(3)]
-    tax_y  = [round(max(0.0, ebt_y[i]) * tax_rate, 2) for i in range(3)]
-    net_y  = [round(ebt_y[i] - tax_y[i], 2) for i in range(3)]
-
-    return {
-        "revenue": rev_y, "cogs": cogs_y, "gross": gross_y,
-        "marketing": mkt_y, "fixed": [round(fix_y[i] + pay_y[i], 2) for i in range(3)],
-        "ebitda": ebd_y, "depreciation": dep_y, "interest": int_y,
-        "ebit": ebit_y, "ebt": ebt_y, "tax": tax_y, "net": net_y
-    }
-
-def _cash_12m_from_forecast(fore: dict, loan_int_m: list[float], loan_prin_m: list[float], start_cash: float) -> tuple[float, list[dict]]:
-    """
-    Trésorerie 12 mois (simple & lisible) :
-    - Encaissements = CA mensuel (hypothèse conservative).
-    - Décaissements = COGS + Marketing + Fixed + Payroll + Intérêts + Principal.
-    - start_cash = capitaux propres + emprunt - investissements (capex).
-    """
-    cash = []
-    bal = float(round(start_cash, 2))
-    for m in range(1, 13):
-        inflow  = fore["revenue"][m-1]
-        outflow = fore["cogs"][m-1] + fore["marketing"][m-1] + fore["fixed"][m-1] + fore["payroll"][m-1] + loan_int_m[m] + loan_prin_m[m]
-        bal = round(bal + inflow - outflow, 2)
-        cash.append({"month": m, "in": round(inflow, 2), "out": round(outflow, 2), "end": bal})
-    return start_cash, cash
-
 def _pnl_3y_from_series(fore: dict, dep_m: list[float], loan_int_m: list[float], tax_rate: float) -> dict:
     """Construit un P&L annuel (Y1..Y3) à partir des séries mensuelles calibrées."""
     # séries mensuelles 0..35 ; dep_m et loan_int_m sont 1-indexés
@@ -2611,8 +2422,7 @@ def _ensure_list(x):
     return []
 
 def _defaults_lists_for_sector(sector: str | None) -> dict:
-    s = (sector or "").lower()
-    if any(k in s for k in ["industrie", "iot", "usine", "manufact"]):
+    if sector_kb.classify("bp_copy_defaults", sector) == "industry":
         return {
             "market.segments": [
                 "PME industrielles — Responsable Qualité",
@@ -2711,7 +2521,7 @@ async def _generate_bp_copy(
     prompt = _prompt_bp_copy(context)
 
     try:
-        resp = client.chat.completions.create(
+        resp = llm_usage.chat_completion(client, "bp_copy",
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
@@ -2830,56 +2640,48 @@ async def _generate_bp_copy(
         "glossary": glossary,
     }
 
-async def generate_business_plan_structured(profil: ProfilRequest, idea_snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    p = _profil_dump(profil)
-    params = _bp_defaults(p.get("secteur"), p.get("objectif"))
+# --- Graphe de calcul BP (étapes chiffrées, mémoïsées par projet) -----------
 
-    # Calibration unique par projet
-    user_id = getattr(profil, "user_id", None)
-    project_title = (idea_snapshot or {}).get("titre") or (idea_snapshot or {}).get("idee") or ""
-    cal = build_calibration_snapshot(user_id, (idea_snapshot or {}).get("project_id"), project_title, profil, idea_snapshot or {})
+# kb_gen : non lu, mais entrée du graphe → un reload de la KB sectorielle invalide ces étapes
+def _stage_params(secteur, objectif, kb_gen):
+    return _bp_defaults(secteur, objectif)
 
-    # Forecast calibré (36 mois)
-    fore = _forecast_36m_calibrated(cal, params)
+def _stage_calibration(user_id, project_id, project_title, secteur, objectif, idea_snapshot, kb_gen):
+    profil_ns = SimpleNamespace(secteur=secteur, objectif=objectif)
+    return build_calibration_snapshot(user_id, project_id, project_title, profil_ns, idea_snapshot)
 
-    # Investissements + amortissements (adaptés par projet)
-    seed = _seed_from_context(user_id, (idea_snapshot or {}).get("project_id"), project_title)
-    adapted_investments = _adapt_investments(params, cal, seed)
-    inv_items, dep_m, invest_total = _build_invest_depreciation(adapted_investments, 36)
-    invest_out_m = _invest_outflow_monthly(adapted_investments, 36)
+def _stage_seed(user_id, project_id, project_title):
+    return _seed_from_context(user_id, project_id, project_title)
 
-    # BFR spécifique + levée recommandée
-    bfr = _compute_bfr(cal, fore)
-    recommended_ask = _recommended_funding(fore, bfr, cal["runway_target_m"])
+def _stage_investments(params, cal, seed):
+    adapted = _adapt_investments(params, cal, seed)
+    inv_items, dep_m, invest_total = _build_invest_depreciation(adapted, 36)
+    return inv_items, dep_m, invest_total, _invest_outflow_monthly(adapted, 36)
 
+def _stage_financing(invest_total, bfr):
     # Montage de financement : equity = ask ; prêt si besoin pour couvrir les uses
     uses_total = float(round(invest_total + bfr, 2))
     equity_rule = max(10000.0, 0.30 * uses_total)
     equity = float(round(min(uses_total, equity_rule), 2))
-    loan_needed = float(round(max(0.0, uses_total - equity), 2))    # on complète par dette si nécessaire
+    loan_needed = float(round(max(0.0, uses_total - equity), 2))  # on complète par dette si nécessaire
+    return uses_total, equity, loan_needed
 
-    loan_rate  = float(params.get("loan_rate", 0.055))
+def _stage_loan(params, loan_needed):
+    loan_rate = float(params.get("loan_rate", 0.055))
     loan_years = int(params.get("loan_years", 3))
     loan_sched, loan_int_m, loan_prin_m = _build_loan_schedule(
         principal=loan_needed, rate_year=loan_rate, years=loan_years, start_month=1, horizon_months=36
     )
+    return loan_rate, loan_years, loan_sched, loan_int_m, loan_prin_m
 
-    # 4) P&L 3 ans (agrégé depuis forecast)
-    pnl = _pnl_3y_from_forecast(fore, dep_m, loan_int_m, params.get("tax_rate", 0.25))
-
-    # 5) Trésorerie 12 mois (point de départ = fonds propres + emprunt - capex)
-    start_cash, cash12 = _cash_12m_from_forecast(
-        fore, loan_int_m, loan_prin_m, start_cash=(equity + loan_needed - invest_total)
+def _stage_cash(fore, invest_out_m, loan_int_m, loan_prin_m, equity, loan_needed):
+    return _cash_12m_from_series(
+        fore, invest_out_m, loan_int_m, loan_prin_m, equity_inflow=equity, loan_inflow=loan_needed
     )
 
-    # Seuil de rentabilité (depuis les séries)
-    breakeven = _breakeven(cal, params, fore)
-
-    # 7) Besoin de financement equity (annonce lisible côté "funding")
-    recommended_ask = _recommended_funding(fore, bfr, cal["runway_target_m"])
-
+def _stage_metrics(invest_total, bfr, equity, loan_needed, breakeven, fore, cal):
     # Métriques pour la COPY (avec calibration incluse)
-    metrics = {
+    return {
         "invest_total_eur": float(invest_total),
         "bfr_eur": float(bfr),
         "initial_equity_eur": float(equity),
@@ -2895,13 +2697,70 @@ async def generate_business_plan_structured(profil: ProfilRequest, idea_snapshot
         "calibration": cal,
     }
 
-    copy = await _generate_bp_copy(profil, idea_snapshot, params, metrics)
-
-    # P&L 3 ans (agrégé) et Cash 12 mois (détaillé)
-    pnl_3y = _pnl_3y_from_series(fore, dep_m, loan_int_m, float(params.get("tax_rate", 0.25)))
-    start_cash, cash12 = _cash_12m_from_series(
-        fore, invest_out_m, loan_int_m, loan_prin_m, equity_inflow=equity, loan_inflow=loan_needed
+_BP_GRAPH = StageGraph([
+    Stage("params", _stage_params, ("secteur", "objectif", "kb_gen"), ("params",)),
+    Stage("calibration", _stage_calibration,
+          ("user_id", "project_id", "project_title", "secteur", "objectif", "idea_snapshot", "kb_gen"), ("cal",)),
+    Stage("seed", _stage_seed, ("user_id", "project_id", "project_title"), ("seed",)),
+    Stage("forecast", _forecast_36m_calibrated, ("cal", "params"), ("fore",)),
+    Stage("investments", _stage_investments, ("params", "cal", "seed"),
+          ("inv_items", "dep_m", "invest_total", "invest_out_m")),
+    Stage("bfr", lambda cal, fore: _compute_bfr(cal, fore), ("cal", "fore"), ("bfr",)),
+    Stage("recommended_ask", lambda fore, bfr, cal: _recommended_funding(fore, bfr, cal["runway_target_m"]),
+          ("fore", "bfr", "cal"), ("recommended_ask",)),
+    Stage("financing", _stage_financing, ("invest_total", "bfr"), ("uses_total", "equity", "loan_needed")),
+    Stage("loan", _stage_loan, ("params", "loan_needed"),
+          ("loan_rate", "loan_years", "loan_sched", "loan_int_m", "loan_prin_m")),
+    Stage("pnl", lambda fore, dep_m, loan_int_m, params: _pnl_3y_from_series(
+              fore, dep_m, loan_int_m, float(params.get("tax_rate", 0.25))),
+          ("fore", "dep_m", "loan_int_m", "params"), ("pnl_3y",)),
+    Stage("cash", _stage_cash, ("fore", "invest_out_m", "loan_int_m", "loan_prin_m", "equity", "loan_needed"),
+          ("start_cash", "cash12")),
+    Stage("breakeven", _breakeven, ("cal", "params", "fore"), ("breakeven",)),
+    Stage("metrics", _stage_metrics, ("invest_total", "bfr", "equity", "loan_needed", "breakeven", "fore", "cal"),
+          ("metrics",)),
+])
+
+# états précédents par projet → seules les étapes en aval d'une entrée modifiée sont recalculées
+_BP_STATES = StateCache(maxsize=256)
+
+def compute_business_plan_figures(
+    profil: ProfilRequest, idea_snapshot: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Exécute le graphe chiffré du BP (sans LLM) et retourne toutes les valeurs des étapes."""
+    p = _profil_dump(profil)
+    snap = idea_snapshot or {}
+    inputs = {
+        "secteur": p.get("secteur"),
+        "objectif": p.get("objectif"),
+        "user_id": getattr(profil, "user_id", None),
+        "project_id": snap.get("project_id"),
+        "project_title": snap.get("titre") or snap.get("idee") or "",
+        "idea_snapshot": snap,
+        "kb_gen": sector_kb.generation(),
+    }
+    state = _BP_STATES.get((inputs["user_id"], inputs["project_id"], inputs["project_title"]))
+    run = _BP_GRAPH.run(inputs, state)
+    log.info(
+        "[bp] étapes recalculées=%s réutilisées=%s timings_ms=%s",
+        run.recomputed, run.reused, run.timings_ms,
     )
+    # les valeurs mémoïsées sont partagées entre runs : on rend une copie à l’appelant
+    return deepcopy(run.values)
+
+@tracing.traced("generate.business_plan")
+async def generate_business_plan_structured(profil: ProfilRequest, idea_snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    p = _profil_dump(profil)
+    v = compute_business_plan_figures(profil, idea_snapshot)
+    params, cal, fore = v["params"], v["cal"], v["fore"]
+    inv_items, dep_m, invest_total = v["inv_items"], v["dep_m"], v["invest_total"]
+    bfr, recommended_ask = v["bfr"], v["recommended_ask"]
+    uses_total, equity, loan_needed = v["uses_total"], v["equity"], v["loan_needed"]
+    loan_rate, loan_years, loan_sched = v["loan_rate"], v["loan_years"], v["loan_sched"]
+    pnl_3y, start_cash, cash12 = v["pnl_3y"], v["start_cash"], v["cash12"]
+    breakeven = v["breakeven"]
+
+    copy = await _generate_bp_copy(profil, idea_snapshot, params, v["metrics"])
 
     # Assemblage final
     return {
@@ -3348,7 +3207,7 @@ async def _translate_weeks_to_french(weeks: list) -> list:
         "Réponds EXCLUSIVEMENT par un JSON brut avec EXACTEMENT la clé 'weeks'. Pas d’autres clés. Pas de ```.\n\n"
         + json.dumps({"weeks": raw}, ensure_ascii=False)
     )
-    resp = client.chat.completions.create(
+    resp = llm_usage.chat_completion(client, "plan_translate",
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.0,
@@ -3359,6 +3218,7 @@ async def _translate_weeks_to_french(weeks: list) -> list:
     # Reparse via Pydantic pour sécuriser le schéma
     return [WeekPlan(**w) for w in weeks_json]
 
+@tracing.traced("generate.plan")
 async def generate_plan(
     profil: "ProfilRequest",
     idea_snapshot: Optional[Dict[str, Any]] = None,
@@ -3373,7 +3233,7 @@ async def generate_plan(
         ctx["deliverables"] = _load_plan_context_from_deliverables(project_id)
 
     prompt = _prompt_action_plan(ctx)
-    resp = client.chat.completions.create(
+    resp = llm_usage.chat_completion(client, "plan",
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.3,
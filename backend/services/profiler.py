@@ -0,0 +1,248 @@
+# backend/services/profiler.py
+"""
+Profilage à la demande d'UNE requête réelle (admin), par échantillonnage de piles.
+
+- Déclenchement : en-tête `X-Profile: 1` ou `?__profile=1`, avec un token admin (require_admin).
+  Sans admin valide, la requête passe normalement, sans profil.
+- Un thread échantillonne sys._current_frames() toutes les PROFILE_INTERVAL_MS pendant la requête :
+  boucle asyncio (attente I/O comprise → profil "wall") + threads du pool (endpoints sync,
+  asyncio.to_thread) qui ne sont pas au repos. Le profil "cpu" pondère chaque pile par le temps
+  CPU consommé par son thread depuis l'échantillon précédent (horloge CPU par thread, Linux).
+- Artefacts : piles repliées ("folded", une ligne `frame;frame;… poids`) lisibles par
+  flamegraph.pl, speedscope.app ou inferno, + métadonnées JSON dans PROFILE_DIR.
+- PROFILING_ENABLED=0 (défaut) : le middleware n'est pas monté → coût nul.
+⚠️ L'échantillonnage est par process : d'autres requêtes concurrentes peuvent apparaître dans la pile
+de la boucle asyncio ; profiler de préférence sur un worker peu chargé.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_S = float(os.getenv("PROFILE_MAX_S", "120"))      # garde-fou : requêtes longues (LLM)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))            # nb de profils conservés
+# hors de backend/storage (servi publiquement sous /public)
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(__file__), "..", "..", ".profiles")))
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "__profile"
+KINDS = ("wall", "cpu")
+
+_BACKEND_ROOT = str(Path(__file__).resolve().parent.parent.parent) + os.sep
+# Fonctions "au repos" en tête de pile : threads du pool qui attendent du travail
+_IDLE_FUNCS = {"wait", "_wait_for_tstate_lock", "get", "select", "poll", "_worker", "worker"}
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py", "_threads.py")
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_BACKEND_ROOT):
+        path = path[len(_BACKEND_ROOT):]
+    else:
+        path = os.path.basename(path)
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({path}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return code.co_name in _IDLE_FUNCS and code.co_filename.endswith(_IDLE_FILES)
+
+
+def _fold(frame, thread_name: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+def _thread_cpu_ns(ident: int) -> Optional[int]:
+    try:
+        return time.clock_gettime_ns(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError, ProcessLookupError):
+        return None
+
+
+class Sampler:
+    """Échantillonneur de piles (thread dédié) ; `loop_ident` = thread de la boucle asyncio."""
+
+    def __init__(self, loop_ident: int, interval_s: float = PROFILE_INTERVAL_MS / 1000.0):
+        self.loop_ident = loop_ident
+        self.interval_s = interval_s
+        self.wall: Counter[str] = Counter()
+        self.cpu: Counter[str] = Counter()   # µs CPU
+        self.samples = 0
+        self._cpu_last: dict[int, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        deadline = time.monotonic() + PROFILE_MAX_S
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval_s) and time.monotonic() < deadline:
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                is_loop = ident == self.loop_ident
+                if not is_loop and _is_idle(frame):
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = _fold(frame, "event-loop" if is_loop else names.get(ident, f"thread-{ident}"))
+                self.wall[stack] += 1
+                now = _thread_cpu_ns(ident)
+                if now is not None:
+                    prev = self._cpu_last.get(ident, now)
+                    self._cpu_last[ident] = now
+                    if now > prev:
+                        self.cpu[stack] += (now - prev) // 1000
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Stockage des profils
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _write_folded(path: Path, counts: Counter) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, n in counts.most_common():
+            if n:
+                f.write(f"{stack} {n}\n")
+
+
+def new_profile_id() -> str:
+    return f"{datetime.utcnow():%Y%m%dT%H%M%S}-{secrets.token_hex(4)}"
+
+
+def save_profile(pid: str, sampler: Sampler, meta: dict) -> str:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    _write_folded(PROFILE_DIR / f"{pid}.wall.folded", sampler.wall)
+    _write_folded(PROFILE_DIR / f"{pid}.cpu.folded", sampler.cpu)
+    meta = {**meta, "id": pid, "samples": sampler.samples, "interval_ms": sampler.interval_s * 1000,
+            "cpu_ms": round(sum(sampler.cpu.values()) / 1000, 1)}
+    (PROFILE_DIR / f"{pid}.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    _prune()
+    return pid
+
+
+def _prune() -> None:
+    metas = sorted(PROFILE_DIR.glob("*.json"), reverse=True)
+    for old in metas[PROFILE_KEEP:]:
+        pid = old.name[:-len(".json")]
+        for p in (old, *(PROFILE_DIR / f"{pid}.{k}.folded" for k in KINDS)):
+            p.unlink(missing_ok=True)
+
+
+def list_profiles(limit: int = 50) -> list[dict]:
+    if not PROFILE_DIR.is_dir():
+        return []
+    out = []
+    for p in sorted(PROFILE_DIR.glob("*.json"), reverse=True)[:limit]:
+        try:
+            out.append(json.loads(p.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def profile_path(profile_id: str, kind: str = "wall") -> Optional[Path]:
+    if kind not in KINDS or not profile_id.replace("-", "").isalnum():
+        return None
+    p = PROFILE_DIR / f"{profile_id}.{kind}.folded"
+    return p if p.is_file() else None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Middleware
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _admin_from_headers(headers: dict[bytes, bytes]):
+    """Même contrôle que la dépendance require_admin ; None si absent / invalide / pas admin."""
+    from backend.dependencies import require_admin
+    from backend.services.user_service import get_user_from_token
+
+    auth = headers.get(b"authorization", b"").decode("latin-1")
+    if not auth.lower().startswith("bearer "):
+        return None
+    try:
+        return require_admin(get_user_from_token(auth[7:].strip()))
+    except Exception:
+        return None
+
+
+def _requested(scope, headers: dict[bytes, bytes]) -> bool:
+    if headers.get(PROFILE_HEADER, b"") in (b"1", b"true"):
+        return True
+    qs = scope.get("query_string") or b""
+    return PROFILE_QUERY.encode() in qs and parse_qs(qs.decode("latin-1")).get(PROFILE_QUERY, [""])[0] in ("1", "true")
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI : profile la requête si demandé par un admin, renvoie l'id en `X-Profile-Id`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or ())
+        if not _requested(scope, headers):
+            await self.app(scope, receive, send)
+            return
+        admin = await asyncio.to_thread(_admin_from_headers, headers)
+        if admin is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        pid = new_profile_id()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", pid.encode())]}
+            await send(message)
+
+        sampler = Sampler(threading.get_ident()).start()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            route = scope.get("route")
+            meta = {
+                "created_at": datetime.utcnow().isoformat(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path_format", None),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+                "admin_id": admin.id,
+            }
+            await asyncio.to_thread(save_profile, pid, sampler, meta)
+            print(f"[profiler] {meta['method']} {meta['path']} → profil {pid}")
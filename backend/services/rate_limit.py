@@ -0,0 +1,193 @@
+# backend/services/rate_limit.py
+"""
+Limitation de débit par seau à jetons (token bucket), par utilisateur et par IP, selon la classe de route.
+
+- Classes : idea (/api/generate), premium (/api/premium/*, rerender), download (téléchargements, export.zip),
+  lead (formulaire des landings publiques), auth (register, token, mot de passe, suppression de compte).
+- Chaque classe a un seau "user" (clé = sub du JWT) et/ou "ip" : capacité (rafale) + recharge par minute.
+  Surcharge : RATE_LIMITS_JSON='{"premium": {"user": [3, 4], "ip": [10, 20]}}' ([capacité, jetons/min] ;
+  null désactive un seau).
+- Aucun accès DB : l'utilisateur est identifié par le JWT décodé localement (signature vérifiée) ;
+  un token invalide ne donne qu'une clé IP (get_current_user refusera la requête ensuite).
+- Backends : memory (défaut, par process) ou redis (RATE_LIMIT_BACKEND=redis, RATE_LIMIT_REDIS_URL) partagé
+  entre workers : script Lua atomique, horloge du serveur Redis. Redis indisponible → requête laissée
+  passer (fail-open) et comptée dans rate_limit_backend_errors_total.
+- IP client : derrière RATE_LIMIT_TRUSTED_PROXIES proxies (Railway = 1), l'entrée de X-Forwarded-For
+  ajoutée par le proxy le plus proche de nous, en partant de la droite ; les entrées plus à gauche viennent
+  du client et peuvent être forgées. 0 (défaut) → pair TCP (request.client), en-tête ignoré.
+- Refus → HTTP 429 + Retry-After (secondes avant qu'un jeton soit disponible).
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+import jwt
+from fastapi import HTTPException, Request, status
+
+from backend.config import settings
+from backend.services import metrics
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()  # memory | redis
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))  # nb de proxies devant l'API
+MEMORY_MAX_KEYS = int(os.getenv("RATE_LIMIT_MEMORY_MAX_KEYS", "100000"))
+
+# classe → portée → (capacité, jetons par minute)
+LIMITS: dict[str, dict[str, Optional[tuple[float, float]]]] = {
+    "idea": {"user": (3, 6), "ip": (10, 30)},
+    "premium": {"user": (8, 4), "ip": (20, 20)},  # rafale = une suite premium complète
+    "download": {"user": (30, 120), "ip": (60, 240)},
+    "lead": {"user": None, "ip": (5, 10)},
+    "auth": {"user": (5, 10), "ip": (10, 20)},
+}
+for _cls, _scopes in json.loads(os.getenv("RATE_LIMITS_JSON", "{}")).items():
+    LIMITS.setdefault(_cls, {}).update({k: tuple(v) if v else None for k, v in _scopes.items()})
+
+
+class MemoryBackend:
+    """Seaux en mémoire du process (un jeu par worker uvicorn)."""
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = MEMORY_MAX_KEYS):
+        # clé → (jetons, dernière mise à jour, instant où le seau sera de nouveau plein)
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+        self.max_keys = max_keys
+
+    def _prune(self, now: float) -> None:
+        # un seau redevenu plein équivaut à un seau absent ; à défaut, on évince les plus anciens
+        for k in [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[k]
+        if len(self._buckets) >= self.max_keys:
+            for k, _ in sorted(self._buckets.items(), key=lambda kv: kv[1][1])[: len(self._buckets) // 10 + 1]:
+                del self._buckets[k]
+
+    async def take(self, key: str, capacity: float, per_s: float, cost: float = 1.0) -> float:
+        """0 si autorisé, sinon secondes d'attente avant d'avoir `cost` jetons."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - ts) * per_s)
+            if tokens >= cost:
+                wait = 0.0
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / per_s
+            if key not in self._buckets and len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / per_s)
+        return wait
+
+
+_REDIS_TAKE = """
+local cap = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or cap
+local ts = tonumber(b[2]) or now
+tokens = math.min(cap, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+  tokens = tokens - cost
+else
+  wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(cap / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Seaux partagés entre workers / instances (script Lua atomique)."""
+
+    name = "redis"
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL, prefix: str = "rl:"):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:  # pragma: no cover - dépend du déploiement
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis nécessite redis (pip install redis)") from e
+        self.client = aioredis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self.prefix = prefix
+        self._script = self.client.register_script(_REDIS_TAKE)
+
+    async def take(self, key: str, capacity: float, per_s: float, cost: float = 1.0) -> float:
+        return float(await self._script(keys=[self.prefix + key], args=[capacity, per_s, cost]))
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = RedisBackend() if RATE_LIMIT_BACKEND == "redis" else MemoryBackend()
+    return _backend
+
+
+async def aclose() -> None:
+    if _backend is not None and hasattr(_backend, "aclose"):
+        await _backend.aclose()
+
+
+def client_ip(request: Request, trusted_proxies: int = RATE_LIMIT_TRUSTED_PROXIES) -> str:
+    """Première IP non fiable de X-Forwarded-For en partant de la droite (chaque proxy ajoute son pair)."""
+    if trusted_proxies > 0:
+        hops = [h.strip() for h in ",".join(request.headers.getlist("x-forwarded-for")).split(",") if h.strip()]
+        if len(hops) >= trusted_proxies:
+            return hops[-trusted_proxies]
+    return request.client.host if request.client else "unknown"
+
+
+def user_key(request: Request) -> Optional[str]:
+    """sub du JWT Bearer (signature et expiration vérifiées, sans DB) ; None si absent / invalide."""
+    auth = request.headers.get("authorization") or ""
+    if auth[:7].lower() != "bearer ":
+        return None
+    try:
+        payload = jwt.decode(auth[7:].strip(), settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    sub = payload.get("sub")
+    return str(sub) if sub is not None else None
+
+
+async def check(route_class: str, request: Request) -> None:
+    """Consomme un jeton de chaque seau de la classe ; HTTPException 429 + Retry-After si l'un est vide."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    limits = LIMITS.get(route_class) or {}
+    keys = {"user": user_key(request) if limits.get("user") else None,
+            "ip": client_ip(request) if limits.get("ip") else None}
+    backend = get_backend()
+    for scope, ident in keys.items():
+        if ident is None:
+            continue
+        capacity, per_min = limits[scope]
+        try:
+            wait = await backend.take(f"{route_class}:{scope}:{ident}", capacity, per_min / 60.0)
+        except Exception as e:
+            metrics.RATE_LIMIT_BACKEND_ERRORS.labels(backend.name).inc()
+            print(f"[rate-limit] backend {backend.name} indisponible (requête autorisée):", e)
+            return
+        if wait > 0:
+            metrics.RATE_LIMITED.labels(route_class, scope).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Trop de requêtes, réessayez plus tard.",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
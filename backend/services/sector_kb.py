@@ -0,0 +1,177 @@
+# backend/services/sector_kb.py
+"""
+Base de connaissances secteur : taxonomies de classification + tables de benchmarks.
+
+- chargée une seule fois depuis un fichier JSON (data/sector_kb.json ou SECTOR_KB_PATH)
+- structures figées (MappingProxyType / tuples) → partagées sans copie entre requêtes
+- chaque taxonomie est compilée en UNE regex multi-motifs (lookahead) ordonnée par priorité
+  → même sémantique que les anciens `if any(k in s for k in [...])` en cascade (1ʳᵉ règle gagnante)
+- classify() est mémoïsé ; reload_kb() recharge le fichier à chaud et vide les caches
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+_DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "sector_kb.json")
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Copie mutable (dict/list) d'une valeur de la KB — à utiliser avant de la modifier ou de la sérialiser."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True)
+class Taxonomy:
+    name: str
+    default: str
+    categories: Tuple[str, ...]            # ordre de priorité des règles
+    keyword_rank: Mapping[str, int]        # mot-clé → index de la règle
+    pattern: Optional[re.Pattern]
+
+    @classmethod
+    def build(cls, name: str, spec: Mapping[str, Any]) -> "Taxonomy":
+        categories: list[str] = []
+        rank: Dict[str, int] = {}
+        for rule in spec.get("rules") or []:
+            idx = len(categories)
+            categories.append(rule["category"])
+            for kw in rule.get("keywords") or []:
+                kw = str(kw).lower()
+                if kw and kw not in rank:  # un mot-clé déjà pris par une règle prioritaire reste à elle
+                    rank[kw] = idx
+        pattern = None
+        if rank:
+            # alternatives triées par priorité : à une position donnée, la règle la plus prioritaire l'emporte
+            alts = sorted(rank, key=lambda k: (rank[k], -len(k)))
+            pattern = re.compile("(?=(" + "|".join(re.escape(k) for k in alts) + "))")
+        return cls(
+            name=name,
+            default=str(spec.get("default") or ""),
+            categories=tuple(categories),
+            keyword_rank=MappingProxyType(rank),
+            pattern=pattern,
+        )
+
+    def classify(self, text: str) -> str:
+        if not text or self.pattern is None:
+            return self.default
+        best: Optional[int] = None
+        for m in self.pattern.finditer(text):
+            r = self.keyword_rank[m.group(1)]
+            if best is None or r < best:
+                best = r
+                if r == 0:
+                    break
+        return self.categories[best] if best is not None else self.default
+
+
+class SectorKB:
+    def __init__(self, data: Mapping[str, Any], source: str = ""):
+        self.source = source
+        self.version = data.get("version")
+        self.taxonomies: Mapping[str, Taxonomy] = MappingProxyType({
+            name: Taxonomy.build(name, spec) for name, spec in (data.get("taxonomies") or {}).items()
+        })
+        self.tables: Mapping[str, Any] = _freeze(data.get("tables") or {})
+
+    @classmethod
+    def load(cls, path: str) -> "SectorKB":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), source=path)
+
+    def classify(self, taxonomy: str, text: Optional[str]) -> str:
+        return self.taxonomies[taxonomy].classify((text or "").lower())
+
+    def table(self, name: str) -> Mapping[str, Any]:
+        return self.tables[name]
+
+    def benchmark(self, table: str, key: str, default: Optional[str] = None) -> Any:
+        t = self.tables[table]
+        if key in t:
+            return t[key]
+        return t.get(default) if default is not None else None
+
+    def describe(self) -> dict:
+        return {
+            "source": self.source,
+            "version": self.version,
+            "taxonomies": {n: list(t.categories) + [t.default] for n, t in self.taxonomies.items()},
+            "tables": {n: len(t) for n, t in self.tables.items()},
+        }
+
+
+_lock = threading.Lock()
+_KB: Optional[SectorKB] = None
+_GEN = 0  # incrémenté à chaque reload → clé du cache de classify() et entrée du graphe BP
+
+
+def _kb_path() -> str:
+    return os.getenv("SECTOR_KB_PATH") or _DEFAULT_PATH
+
+
+def get_kb() -> SectorKB:
+    global _KB
+    kb = _KB
+    if kb is None:
+        with _lock:
+            if _KB is None:
+                _KB = SectorKB.load(_kb_path())
+            kb = _KB
+    return kb
+
+
+def generation() -> int:
+    """Numéro de version de la KB en mémoire (change à chaque reload_kb) : à passer aux caches dérivés."""
+    return _GEN
+
+
+def reload_kb(path: Optional[str] = None) -> dict:
+    """Recharge la KB depuis le fichier (sans redémarrage). En cas d'erreur, l'ancienne reste active."""
+    global _KB, _GEN
+    kb = SectorKB.load(path or _kb_path())
+    with _lock:
+        _KB = kb
+        _GEN += 1
+        _classify_cached.cache_clear()
+    log.info("sector_kb rechargée depuis %s (version=%s)", kb.source, kb.version)
+    return kb.describe()
+
+
+@lru_cache(maxsize=4096)
+def _classify_cached(gen: int, taxonomy: str, text: str) -> str:
+    return get_kb().classify(taxonomy, text)
+
+
+def classify(taxonomy: str, text: Optional[str]) -> str:
+    """Catégorie de `text` dans la taxonomie donnée (ex: "industry", "saas_segment")."""
+    return _classify_cached(_GEN, taxonomy, text or "")
+
+
+def benchmark(table: str, key: str, default: Optional[str] = None) -> Any:
+    return get_kb().benchmark(table, key, default)
+
+
+def table(name: str) -> Mapping[str, Any]:
+    return get_kb().table(name)
@@ -0,0 +1,264 @@
+# backend/services/storage_gc.py
+"""
+Comptabilité d'usage disque par utilisateur + garbage collector du stockage.
+
+- Usage : chaque Deliverable porte `storage_bytes` (HTML + PDF + ICS référencés) ; la table
+  storage_usage est incrémentée / décrémentée dans la même transaction que le livrable
+  (création, re-rendu, suppression projet / compte) → jamais de `du` complet.
+- GC : réconcilie les objets du stockage (local ou S3) avec les références en base et supprime
+  les orphelins par lots (anciens rendus, fichiers de projets/comptes supprimés, landings publiées
+  de projets disparus, fichiers temporaires). Les objets récents (< STORAGE_GC_MIN_AGE_S) sont
+  épargnés : un fichier est écrit avant que son livrable soit commité. Juste avant chaque lot de
+  suppressions, références et date de chaque objet sont relues (réutilisation pendant le passage).
+  Les assets (logos, adressés par contenu et référencés depuis l'HTML) ne sont pas collectés.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+
+from backend.db import get_session
+from backend.models import Deliverable, Project, StorageUsage
+from backend.services import storage_service, tracing
+
+GC_INTERVAL_S = int(os.getenv("STORAGE_GC_INTERVAL_S", "21600"))   # 6 h ; 0 = GC périodique désactivé
+GC_MIN_AGE_S = int(os.getenv("STORAGE_GC_MIN_AGE_S", "3600"))
+GC_BATCH_SIZE = int(os.getenv("STORAGE_GC_BATCH_SIZE", "500"))
+GC_PREFIXES = (storage_service.CONTENT_PREFIX + "/", "landings/", "user_", ".tmp/")
+
+_PUBLISHED_LANDING_RE = re.compile(r"^landings/(\d+)/index\.html(?:\.br|\.gz)?$")  # + variantes précompressées
+
+# Métriques exposées (admin) : cumul depuis le démarrage du process + dernier run
+GC_METRICS: dict[str, Any] = {
+    "runs": 0,
+    "files_deleted_total": 0,
+    "bytes_reclaimed_total": 0,
+    "last_run": None,
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Usage par utilisateur
+# ─────────────────────────────────────────────────────────────────────────────
+
+def deliverable_refs(file_path: Optional[str], json_content: Any) -> list[str]:
+    j = json_content if isinstance(json_content, dict) else {}
+    return [r for r in (file_path, j.get("pdf_path"), j.get("ics_path")) if isinstance(r, str) and r]
+
+
+def measure_refs(refs: Iterable[str]) -> int:
+    return sum(storage_service.size(r) for r in refs)
+
+
+def add_usage(session, user_id: int, delta_bytes: int, delta_files: int) -> None:
+    """Incrément atomique (upsert) ; à appeler dans la transaction qui modifie les livrables."""
+    if not delta_bytes and not delta_files:
+        return
+    now = datetime.utcnow()
+    stmt = pg_insert(StorageUsage).values(
+        user_id=user_id, bytes_used=max(delta_bytes, 0), files=max(delta_files, 0), updated_at=now,
+    ).on_conflict_do_update(
+        index_elements=[StorageUsage.user_id],
+        set_={
+            "bytes_used": StorageUsage.bytes_used + delta_bytes,
+            "files": StorageUsage.files + delta_files,
+            "updated_at": now,
+        },
+    )
+    session.execute(stmt)
+
+
+def _ref_columns():
+    return (
+        Deliverable.file_path,
+        Deliverable.json_content["pdf_path"].astext,
+        Deliverable.json_content["ics_path"].astext,
+    )
+
+
+def release_deliverables(session, *where) -> None:
+    """Décrémente l'usage des livrables qui vont être supprimés (même transaction que le DELETE)."""
+    rows = session.exec(select(Deliverable.user_id, Deliverable.storage_bytes, *_ref_columns()).where(*where)).all()
+    per_user: dict[int, list[int]] = {}
+    for user_id, nbytes, *refs in rows:
+        acc = per_user.setdefault(user_id, [0, 0])
+        acc[0] += nbytes or 0
+        acc[1] += sum(1 for r in refs if r)
+    for user_id, (nbytes, nfiles) in per_user.items():
+        add_usage(session, user_id, -nbytes, -nfiles)
+
+
+def get_usage(user_id: int) -> dict:
+    with get_session() as s:
+        u = s.get(StorageUsage, user_id)
+    return {"user_id": user_id, "bytes_used": u.bytes_used if u else 0, "files": u.files if u else 0}
+
+
+def reconcile_usage(sizes: dict[str, int] | None = None) -> int:
+    """
+    Recalcule storage_usage depuis deliverables.storage_bytes (une requête SQL agrégée).
+    `sizes` (ref normalisée → octets, issu du listing GC) sert à renseigner les anciens livrables
+    dont storage_bytes vaut encore 0. Retourne le nombre de livrables complétés.
+    """
+    filled = 0
+    with get_session() as s:
+        if sizes:
+            rows = s.exec(select(Deliverable.id, *_ref_columns()).where(Deliverable.storage_bytes == 0)).all()
+            for did, *refs in rows:
+                nbytes = sum(sizes.get(storage_service.normalize(r), 0) for r in refs if r)
+                if nbytes:
+                    s.execute(text("UPDATE deliverables SET storage_bytes = :b WHERE id = :id"), {"b": nbytes, "id": did})
+                    filled += 1
+        s.execute(text("""
+            INSERT INTO storage_usage (user_id, bytes_used, files, updated_at)
+            SELECT user_id,
+                   COALESCE(SUM(storage_bytes), 0),
+                   COALESCE(SUM((file_path IS NOT NULL)::int
+                              + (json_content->>'pdf_path' IS NOT NULL)::int
+                              + (json_content->>'ics_path' IS NOT NULL)::int), 0),
+                   now() AT TIME ZONE 'utc'
+            FROM deliverables GROUP BY user_id
+            ON CONFLICT (user_id) DO UPDATE
+              SET bytes_used = EXCLUDED.bytes_used, files = EXCLUDED.files, updated_at = EXCLUDED.updated_at
+        """))
+        s.execute(text("""
+            UPDATE storage_usage SET bytes_used = 0, files = 0
+            WHERE user_id NOT IN (SELECT DISTINCT user_id FROM deliverables)
+        """))
+        s.commit()
+    return filled
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Garbage collector
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _referenced_refs(session) -> set[str]:
+    refs: set[str] = set()
+    for row in session.exec(select(*_ref_columns()).execution_options(yield_per=2000)):
+        for r in row:
+            if r:
+                refs.add(storage_service.normalize(r))
+    return refs
+
+
+def _live_project_ids(session) -> set[int]:
+    return set(session.exec(select(Project.id)).all())
+
+
+def _rereferenced(session, refs: list[str]) -> set[str]:
+    """Parmi `refs` (forme du listing), celles qu'un livrable référence désormais (commité depuis le listing)."""
+    file_path, pdf_path, ics_path = _ref_columns()
+    rows = session.exec(
+        select(file_path, pdf_path, ics_path)
+        .where(file_path.in_(refs) | pdf_path.in_(refs) | ics_path.in_(refs))
+    ).all()
+    return {storage_service.normalize(r) for row in rows for r in row if r}
+
+
+def run_gc(dry_run: bool = False, batch_size: int | None = None, min_age_s: int | None = None) -> dict:
+    """Un passage complet : listing du stockage, diff avec les références, suppression par lots."""
+    with tracing.start_trace("storage.gc", dry_run=dry_run):
+        return _run_gc(dry_run, batch_size, min_age_s)
+
+
+def _run_gc(dry_run: bool, batch_size: int | None, min_age_s: int | None) -> dict:
+    storage = storage_service.get_storage()
+    batch_size = max(1, batch_size or GC_BATCH_SIZE)
+    min_age_s = GC_MIN_AGE_S if min_age_s is None else min_age_s
+    t0 = time.perf_counter()
+    now = time.time()
+
+    # ⚠️ références lues AVANT le listing : un fichier écrit après est forcément "récent" → épargné
+    with get_session() as s:
+        referenced = _referenced_refs(s)
+        live_projects = _live_project_ids(s)
+
+    stats = {"scanned": 0, "scanned_bytes": 0, "orphans": 0, "deleted": 0, "bytes_reclaimed": 0,
+             "skipped_recent": 0, "dry_run": dry_run}
+    sizes: dict[str, int] = {}
+    batch: list[tuple[str, int]] = []
+
+    def flush() -> None:
+        if not batch:
+            return
+        # l'orphelinat a été décidé au listing : un objet adressé par contenu a pu être réutilisé depuis
+        # (put → mtime / LastModified rafraîchi, puis livrable commité). Références relues AVANT les dates :
+        # un put qui précède son commit est alors vu par l'une ou l'autre.
+        with get_session() as s:
+            revived = _rereferenced(s, [r for r, _ in batch])
+        fresh = [(r, sz) for r, sz in batch
+                 if storage.normalize(r) not in revived and now - (storage.mtime(r) or 0) >= min_age_s]
+        stats["skipped_recent"] += len(batch) - len(fresh)
+        stats["orphans"] -= len(batch) - len(fresh)
+        batch[:] = fresh
+        if not batch:
+            return
+        if not dry_run:
+            n = storage.delete_many([r for r, _ in batch])
+            if n == len(batch):
+                stats["bytes_reclaimed"] += sum(sz for _, sz in batch)
+            else:  # échecs partiels : on recompte ce qui a vraiment disparu
+                stats["bytes_reclaimed"] += sum(sz for r, sz in batch if not storage.exists(r))
+            stats["deleted"] += n
+        batch.clear()
+
+    for ref, size, mtime in storage.iter_objects(GC_PREFIXES):
+        stats["scanned"] += 1
+        stats["scanned_bytes"] += size
+        norm = storage.normalize(ref)
+        if norm in referenced:
+            sizes[norm] = size
+            continue
+        m = _PUBLISHED_LANDING_RE.match(storage.key_of(ref) or "")
+        if m and int(m.group(1)) in live_projects:
+            continue  # landing publiée d'un projet existant
+        if now - mtime < min_age_s:
+            stats["skipped_recent"] += 1
+            continue
+        stats["orphans"] += 1
+        batch.append((ref, size))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    if not dry_run:
+        stats["usage_backfilled"] = reconcile_usage(sizes)
+    stats["duration_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+    stats["finished_at"] = datetime.utcnow().isoformat()
+
+    GC_METRICS["runs"] += 1
+    GC_METRICS["files_deleted_total"] += stats["deleted"]
+    GC_METRICS["bytes_reclaimed_total"] += stats["bytes_reclaimed"]
+    GC_METRICS["last_run"] = stats
+    print(f"[storage-gc] {stats}")
+    return stats
+
+
+_gc_lock = asyncio.Lock()
+
+
+async def run_gc_async(**kwargs) -> dict:
+    # un seul passage à la fois (boucle périodique + déclenchement admin)
+    async with _gc_lock:
+        return await asyncio.to_thread(run_gc, **kwargs)
+
+
+async def gc_loop() -> None:
+    """Tâche de fond lancée au démarrage de l'API."""
+    if GC_INTERVAL_S <= 0:
+        return
+    while True:
+        await asyncio.sleep(GC_INTERVAL_S)
+        try:
+            await run_gc_async()
+        except Exception as e:
+            print("[storage-gc] échec:", e)
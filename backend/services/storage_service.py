@@ -0,0 +1,366 @@
+# backend/services/storage_service.py
+"""
+Stockage des fichiers livrables (HTML, PDF, ICS, assets) derrière un backend interchangeable.
+
+- STORAGE_BACKEND=local (défaut) : disque, sous backend/storage (servi en /public)
+- STORAGE_BACKEND=s3             : bucket S3 compatible (AWS, MinIO, R2…) via boto3
+      S3_BUCKET, S3_PREFIX, S3_ENDPOINT_URL (MinIO local : http://localhost:9000),
+      S3_REGION, AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY
+
+Les contenus générés sont adressés par hash : clé "deliverables/ab/cd/<sha256>.<ext>".
+Deux rendus identiques → un seul objet ; deux rendus différents ne peuvent plus s'écraser.
+
+Une "ref" est ce qu'on enregistre en base (Deliverable.file_path, json_content.pdf_path) :
+  - local : chemin absolu du fichier (compatible avec les anciens chemins storage/landings/...)
+  - s3    : "s3://<bucket>/<clé>"
+`local_path(ref)` donne toujours un fichier lisible localement (téléchargé en cache pour S3),
+pour FileResponse et Chromium.
+"""
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+STORAGE_DIR = os.path.join(os.path.dirname(__file__), "..", "storage")
+CONTENT_PREFIX = "deliverables"
+
+
+def content_key(digest: str, ext: str, prefix: str = CONTENT_PREFIX) -> str:
+    # 2 niveaux de sharding (256 x 256 dossiers) : aucun répertoire ne grossit sans borne
+    return f"{prefix}/{digest[:2]}/{digest[2:4]}/{digest}.{ext.lstrip('.')}"
+
+
+def _is_content_key(key: str) -> bool:
+    # clés dérivées du hash du contenu : si l'objet existe, il est identique → pas de réécriture
+    return key.startswith((CONTENT_PREFIX + "/", "assets/"))
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    try:
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+    except FileNotFoundError:  # dossier vide retiré par le GC entre-temps
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)  # rename atomique : un lecteur voit l'ancien ou le nouveau fichier, jamais un fichier partiel
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self, root: str = STORAGE_DIR):
+        self.root = os.path.abspath(root)
+
+    def ref(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def key_of(self, ref: str) -> Optional[str]:
+        p = os.path.abspath(ref)
+        if not p.startswith(self.root + os.sep):
+            return None
+        return os.path.relpath(p, self.root).replace(os.sep, "/")
+
+    def normalize(self, ref: str) -> str:
+        # les anciens chemins contiennent "services/../storage" : on compare des chemins absolus normalisés
+        return os.path.abspath(ref)
+
+    def exists(self, ref: str) -> bool:
+        return os.path.isfile(ref)
+
+    def size(self, ref: str) -> int:
+        try:
+            return os.path.getsize(ref)
+        except OSError:
+            return 0
+
+    def mtime(self, ref: str) -> Optional[float]:
+        """Dernière écriture / réutilisation (put rafraîchit le mtime) ; None si absent."""
+        try:
+            return os.path.getmtime(ref)
+        except OSError:
+            return None
+
+    def iter_objects(self, prefixes: tuple[str, ...]):
+        """Itère (ref, taille, mtime) des fichiers dont la clé commence par un des préfixes (dossiers cachés exclus)."""
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".") or d == ".tmp"]
+            for fn in filenames:
+                path = os.path.join(dirpath, fn)
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if not key.startswith(prefixes):
+                    continue
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def delete_many(self, refs: list[str]) -> int:
+        return sum(1 for r in refs if self.delete(r))
+
+    def put(self, key: str, data: bytes, content_type: str | None = None, cache_control: str | None = None) -> str:
+        path = self.ref(key)
+        if _is_content_key(key) and os.path.exists(path):
+            os.utime(path)  # rafraîchit le mtime : un objet réutilisé n'est plus vu comme un vieil orphelin par le GC
+            return path
+        _atomic_write(path, data)
+        return path
+
+    def get(self, ref: str) -> bytes:
+        with open(ref, "rb") as f:
+            return f.read()
+
+    def local_path(self, ref: str) -> str:
+        return ref
+
+    def delete(self, ref: str) -> bool:
+        # on ne supprime que ce qui vit sous la racine de stockage
+        if self.key_of(ref) is None:
+            return False
+        try:
+            os.unlink(ref)
+        except FileNotFoundError:
+            return False
+        # nettoie les dossiers devenus vides (landings/<id>/, shards…) sans jamais remonter au-delà de la racine
+        parent = os.path.dirname(os.path.abspath(ref))
+        while parent != self.root and parent.startswith(self.root + os.sep):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+        return True
+
+
+class S3Storage:
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str | None = None,
+                 region: str | None = None, cache_dir: str | None = None):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as e:  # pragma: no cover - dépend du déploiement
+            raise RuntimeError("STORAGE_BACKEND=s3 nécessite boto3 (pip install boto3)") from e
+        if not bucket:
+            raise RuntimeError("S3_BUCKET manquant")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        # path-style : requis par MinIO et la plupart des stand-ins S3 locaux
+        self.client = boto3.client(
+            "s3", endpoint_url=endpoint_url or None, region_name=region or None,
+            config=Config(s3={"addressing_style": "path"}, retries={"max_attempts": 3}),
+        )
+        self.cache_dir = os.path.abspath(cache_dir or os.path.join(STORAGE_DIR, ".s3cache"))
+        self._ClientError = __import__("botocore.exceptions", fromlist=["ClientError"]).ClientError
+
+    def _full_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def ref(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._full_key(key)}"
+
+    def key_of(self, ref: str) -> Optional[str]:
+        head = f"s3://{self.bucket}/"
+        if not ref.startswith(head):
+            return None
+        k = ref[len(head):]
+        if self.prefix:
+            if not k.startswith(self.prefix + "/"):
+                return None
+            k = k[len(self.prefix) + 1:]
+        return k
+
+    def _obj_key(self, ref: str) -> str:
+        return ref[len(f"s3://{self.bucket}/"):]
+
+    def normalize(self, ref: str) -> str:
+        return ref if ref.startswith("s3://") else os.path.abspath(ref)
+
+    def size(self, ref: str) -> int:
+        if not ref.startswith("s3://"):
+            return os.path.getsize(ref) if os.path.isfile(ref) else 0
+        try:
+            return int(self.client.head_object(Bucket=self.bucket, Key=self._obj_key(ref))["ContentLength"])
+        except self._ClientError:
+            return 0
+
+    def mtime(self, ref: str) -> Optional[float]:
+        if not ref.startswith("s3://"):
+            return os.path.getmtime(ref) if os.path.isfile(ref) else None
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._obj_key(ref))["LastModified"].timestamp()
+        except self._ClientError:
+            return None
+
+    def iter_objects(self, prefixes: tuple[str, ...]):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for prefix in prefixes:
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self._full_key(prefix)):
+                for o in page.get("Contents", []):
+                    yield f"s3://{self.bucket}/{o['Key']}", int(o["Size"]), o["LastModified"].timestamp()
+
+    def delete_many(self, refs: list[str]) -> int:
+        keys = [{"Key": self._obj_key(r)} for r in refs if r.startswith("s3://")]
+        deleted = 0
+        for i in range(0, len(keys), 1000):  # limite S3 DeleteObjects
+            out = self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": keys[i:i + 1000], "Quiet": True})
+            deleted += len(keys[i:i + 1000]) - len(out.get("Errors", []))
+        for r in refs:
+            cached = os.path.join(self.cache_dir, *self._obj_key(r).split("/"))
+            if os.path.exists(cached):
+                os.unlink(cached)
+        return deleted
+
+    def exists(self, ref: str) -> bool:
+        if not ref.startswith("s3://"):
+            return os.path.isfile(ref)  # anciens chemins locaux
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._obj_key(ref))
+            return True
+        except self._ClientError:
+            return False
+
+    def put(self, key: str, data: bytes, content_type: str | None = None, cache_control: str | None = None) -> str:
+        ref = self.ref(key)
+        if _is_content_key(key) and self.exists(ref):
+            # adressé par contenu : déjà présent = identique ; copie sur lui-même pour rafraîchir LastModified (GC)
+            self.client.copy_object(Bucket=self.bucket, Key=self._full_key(key), MetadataDirective="REPLACE",
+                                    CopySource={"Bucket": self.bucket, "Key": self._full_key(key)},
+                                    **({"ContentType": content_type} if content_type else {}),
+                                    **({"CacheControl": cache_control} if cache_control else {}))
+            return ref
+        extra = {}
+        if content_type:
+            extra["ContentType"] = content_type
+        if cache_control:
+            extra["CacheControl"] = cache_control
+        self.client.put_object(Bucket=self.bucket, Key=self._full_key(key), Body=data, **extra)
+        return ref
+
+    def get(self, ref: str) -> bytes:
+        if not ref.startswith("s3://"):
+            with open(ref, "rb") as f:
+                return f.read()
+        return self.client.get_object(Bucket=self.bucket, Key=self._obj_key(ref))["Body"].read()
+
+    def local_path(self, ref: str) -> str:
+        if not ref.startswith("s3://"):
+            return ref
+        path = os.path.join(self.cache_dir, *self._obj_key(ref).split("/"))
+        if not os.path.exists(path):
+            _atomic_write(path, self.get(ref))
+        return path
+
+    def delete(self, ref: str) -> bool:
+        if not ref.startswith("s3://"):
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=self._obj_key(ref))
+        cached = os.path.join(self.cache_dir, *self._obj_key(ref).split("/"))
+        if os.path.exists(cached):
+            os.unlink(cached)
+        return True
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _build_backend():
+    kind = os.getenv("STORAGE_BACKEND", "local").lower()
+    if kind == "s3":
+        return S3Storage(
+            bucket=os.getenv("S3_BUCKET", ""),
+            prefix=os.getenv("S3_PREFIX", ""),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            region=os.getenv("S3_REGION"),
+        )
+    return LocalStorage(STORAGE_DIR)
+
+
+def get_storage():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _build_backend()
+    return _backend
+
+
+def set_storage(backend) -> None:
+    """Remplace le backend (scripts, migration, stand-in S3 local)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API utilisée par les services
+# ─────────────────────────────────────────────────────────────────────────────
+
+def put_content(data: bytes, ext: str, content_type: str | None = None, prefix: str = CONTENT_PREFIX) -> str:
+    """Stocke `data` sous une clé dérivée de son sha256 (dédupliqué). Retourne la ref."""
+    digest = hashlib.sha256(data).hexdigest()
+    if content_type is None:
+        content_type = mimetypes.guess_type(f"x.{ext}")[0]
+    return get_storage().put(content_key(digest, ext, prefix), data, content_type)
+
+
+def put_file(path: str, ext: str | None = None, content_type: str | None = None) -> str:
+    ext = ext or Path(path).suffix.lstrip(".") or "bin"
+    with open(path, "rb") as f:
+        return put_content(f.read(), ext, content_type)
+
+
+def put_key(key: str, data: bytes, content_type: str | None = None, cache_control: str | None = None) -> str:
+    return get_storage().put(key, data, content_type, cache_control)
+
+
+def read_bytes(ref: str) -> bytes:
+    return get_storage().get(ref)
+
+
+def exists(ref: str | None) -> bool:
+    return bool(ref) and get_storage().exists(ref)
+
+
+def local_path(ref: str) -> str:
+    return get_storage().local_path(ref)
+
+
+def size(ref: str | None) -> int:
+    return get_storage().size(ref) if ref else 0
+
+
+def normalize(ref: str) -> str:
+    return get_storage().normalize(ref)
+
+
+def delete(ref: str | None) -> bool:
+    if not ref:
+        return False
+    try:
+        return get_storage().delete(ref)
+    except Exception as e:
+        print("[storage] suppression impossible:", ref, e)
+        return False
+
+
+def temp_dir() -> str:
+    """Dossier de travail local (fichiers intermédiaires : impression PDF…)."""
+    path = os.path.join(STORAGE_DIR, ".tmp")
+    os.makedirs(path, exist_ok=True)
+    return path
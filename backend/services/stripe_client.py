@@ -0,0 +1,185 @@
+# backend/services/stripe_client.py
+"""
+Client Stripe asynchrone (API REST via httpx) pour les routes de paiement.
+
+- Un seul httpx.AsyncClient partagé : connexions keep-alive réutilisées, timeouts explicites,
+  aucun appel bloquant dans la boucle d'événements (le SDK `stripe` est synchrone).
+- Retries sur erreurs réseau / 429 / 5xx avec backoff ; les POST portent une Idempotency-Key
+  (même clé à chaque retry → jamais deux sessions créées).
+- Les Checkout Sessions payées sont immuables → mises en cache (LRU + TTL) : le polling
+  de vérification côté front ne refrappe pas Stripe.
+- STRIPE_API_BASE permet de viser un serveur local (stripe-mock : http://localhost:12111).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+import httpx
+
+from backend.config import settings
+from backend.services import metrics
+
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE", "https://api.stripe.com").rstrip("/")
+STRIPE_API_VERSION = os.getenv("STRIPE_API_VERSION", "")  # vide = version du compte
+STRIPE_TIMEOUT_S = float(os.getenv("STRIPE_TIMEOUT_S", "10"))
+STRIPE_MAX_RETRIES = int(os.getenv("STRIPE_MAX_RETRIES", "2"))
+SESSION_CACHE_SIZE = int(os.getenv("STRIPE_SESSION_CACHE_SIZE", "2048"))
+SESSION_CACHE_TTL_S = float(os.getenv("STRIPE_SESSION_CACHE_TTL_S", "3600"))
+
+_RETRY_STATUSES = (409, 429, 500, 502, 503, 504)
+
+_client: Optional[httpx.AsyncClient] = None
+_session_cache: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+
+class StripeAPIError(Exception):
+    def __init__(self, status: int, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=STRIPE_API_BASE,
+            timeout=httpx.Timeout(STRIPE_TIMEOUT_S, connect=min(STRIPE_TIMEOUT_S, 5.0)),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+        )
+    return _client
+
+
+async def aclose() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _encode(params: Any, prefix: str = "") -> list[tuple[str, str]]:
+    """Encodage "form" de Stripe : metadata[user_id]=1, line_items[0][price]=price_..."""
+    out: list[tuple[str, str]] = []
+    if isinstance(params, dict):
+        for k, v in params.items():
+            out += _encode(v, f"{prefix}[{k}]" if prefix else str(k))
+    elif isinstance(params, (list, tuple)):
+        for i, v in enumerate(params):
+            out += _encode(v, f"{prefix}[{i}]")
+    elif isinstance(params, bool):
+        out.append((prefix, "true" if params else "false"))
+    elif params is not None:
+        out.append((prefix, str(params)))
+    return out
+
+
+async def _request(method: str, path: str, params: Optional[dict] = None) -> dict:
+    if not settings.STRIPE_SECRET_KEY:
+        raise StripeAPIError(500, "STRIPE_SECRET_KEY manquant")
+    headers = {"Authorization": f"Bearer {settings.STRIPE_SECRET_KEY}"}
+    if STRIPE_API_VERSION:
+        headers["Stripe-Version"] = STRIPE_API_VERSION
+    pairs = _encode(params or {})
+    kwargs: dict[str, Any] = {}
+    if method == "GET":
+        kwargs["params"] = pairs
+    else:
+        headers["Idempotency-Key"] = str(uuid.uuid4())
+        kwargs["data"] = dict(pairs)  # clés uniques après encodage
+
+    client = get_client()
+    endpoint = metrics.stripe_endpoint(path)
+    for attempt in range(STRIPE_MAX_RETRIES + 1):
+        last = attempt == STRIPE_MAX_RETRIES
+        t0 = time.perf_counter()
+        try:
+            resp = await client.request(method, path, headers=headers, **kwargs)
+        except httpx.TransportError as e:
+            metrics.STRIPE_LATENCY.labels(method, endpoint, "error").observe(time.perf_counter() - t0)
+            if last:
+                raise StripeAPIError(502, f"Stripe injoignable: {e}") from e
+        else:
+            metrics.STRIPE_LATENCY.labels(method, endpoint, str(resp.status_code)).observe(time.perf_counter() - t0)
+            if resp.status_code < 400:
+                return resp.json()
+            should_retry = resp.headers.get("Stripe-Should-Retry")
+            retryable = should_retry == "true" or (should_retry is None and resp.status_code in _RETRY_STATUSES)
+            if last or not retryable:
+                try:
+                    err = resp.json().get("error") or {}
+                except ValueError:
+                    err = {}
+                raise StripeAPIError(resp.status_code, err.get("message") or resp.text[:200], err.get("code"))
+        await asyncio.sleep(min(0.5 * (2 ** attempt), 4.0))
+    raise StripeAPIError(502, "Stripe injoignable")  # pragma: no cover
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Checkout
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _is_completed(session: dict) -> bool:
+    return session.get("payment_status") == "paid" or session.get("status") == "complete"
+
+
+def _cache_get(session_id: str) -> Optional[dict]:
+    hit = _session_cache.get(session_id)
+    if not hit:
+        return None
+    expires, session = hit
+    if expires < time.monotonic():
+        _session_cache.pop(session_id, None)
+        return None
+    _session_cache.move_to_end(session_id)
+    return session
+
+
+def _cache_put(session: dict) -> None:
+    _session_cache[session["id"]] = (time.monotonic() + SESSION_CACHE_TTL_S, session)
+    _session_cache.move_to_end(session["id"])
+    while len(_session_cache) > SESSION_CACHE_SIZE:
+        _session_cache.popitem(last=False)
+
+
+def cached_checkout_session(session_id: str) -> Optional[dict]:
+    return _cache_get(session_id)
+
+
+async def create_checkout_session(**params: Any) -> dict:
+    return await _request("POST", "/v1/checkout/sessions", params)
+
+
+async def retrieve_checkout_session(session_id: str) -> dict:
+    """Session terminée = immuable → servie depuis le cache ; sinon (en cours) toujours relue."""
+    session = _cache_get(session_id)
+    if session is not None:
+        return session
+    session = await _request("GET", f"/v1/checkout/sessions/{session_id}")
+    if _is_completed(session):
+        _cache_put(session)
+    return session
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Clients / portail / abonnements
+# ─────────────────────────────────────────────────────────────────────────────
+
+async def find_or_create_customer(email: str) -> str:
+    existing = await _request("GET", "/v1/customers", {"email": email, "limit": 1})
+    if existing.get("data"):
+        return existing["data"][0]["id"]
+    created = await _request("POST", "/v1/customers", {"email": email})
+    return created["id"]
+
+
+async def create_billing_portal_session(customer: str, return_url: str) -> dict:
+    return await _request("POST", "/v1/billing_portal/sessions", {"customer": customer, "return_url": return_url})
+
+
+async def cancel_subscription(subscription_id: str) -> dict:
+    return await _request("DELETE", f"/v1/subscriptions/{subscription_id}")
@@ -0,0 +1,253 @@
+# backend/services/stripe_events.py
+"""
+Journal des webhooks Stripe + traitement asynchrone.
+
+- Le webhook vérifie la signature, insère l'événement brut dans stripe_events
+  (INSERT ... ON CONFLICT DO NOTHING sur l'id Stripe) et répond 200 aussitôt :
+  une livraison en double ou une tempête de retries ne coûte qu'un insert.
+- Un worker de fond traite les événements "pending" dans l'ordre Stripe (created, id).
+  Chaque événement est verrouillé (FOR UPDATE SKIP LOCKED → plusieurs process possibles),
+  appliqué puis marqué "processed" dans la MÊME transaction : effet appliqué une seule fois.
+- Échec : retry avec backoff exponentiel, puis "failed" après STRIPE_EVENTS_MAX_ATTEMPTS.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+
+from backend.db import get_session
+from backend.models import StripeEvent, User
+from backend.services import analytics, tracing
+
+POLL_INTERVAL_S = float(os.getenv("STRIPE_EVENTS_POLL_S", "30"))
+MAX_ATTEMPTS = int(os.getenv("STRIPE_EVENTS_MAX_ATTEMPTS", "8"))
+RETRY_BASE_S = float(os.getenv("STRIPE_EVENTS_RETRY_BASE_S", "10"))
+RETRY_MAX_S = 3600.0
+
+_wakeup: Optional[asyncio.Event] = None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Réception (webhook)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def record_event(event: dict) -> bool:
+    """Insère l'événement s'il est nouveau. Retourne False pour un doublon (déjà reçu)."""
+    stmt = pg_insert(StripeEvent).values(
+        id=event["id"],
+        type=event.get("type") or "",
+        payload=event,
+        stripe_created=int(event.get("created") or 0),
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+        received_at=datetime.utcnow(),
+    ).on_conflict_do_nothing(index_elements=[StripeEvent.id])
+    with get_session() as s:
+        inserted = s.execute(stmt).rowcount > 0
+        s.commit()
+    return inserted
+
+
+def wake() -> None:
+    """Réveille le worker (appelé après un insert : traitement quasi immédiat, sans attendre le poll)."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Handlers (exécutés dans la transaction du worker)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _find_user(session_db, user_id: str | None, client_ref: str | None, email: str | None):
+    """
+    Une seule requête : (id) puis fallback (client_reference_id) puis (email), par priorité.
+    Lignes verrouillées (FOR UPDATE) jusqu'au commit : sérialisé avec /verify-checkout-session,
+    le test last_checkout_session_id puis crédit ne peut pas s'appliquer deux fois.
+    """
+    ids = []
+    for raw in (user_id, client_ref):
+        try:
+            ids.append(int(raw))
+        except (TypeError, ValueError):
+            ids.append(None)
+    conds = [User.id == i for i in ids if i is not None]
+    if email:
+        conds.append(User.email == email)
+    if not conds:
+        return None
+    users = session_db.exec(select(User).where(or_(*conds)).with_for_update()).all()
+    by_id = {u.id: u for u in users}
+    for i in ids:
+        if i is not None and i in by_id:
+            return by_id[i]
+    if email:
+        return next((u for u in users if u.email == email), None)
+    return None
+
+
+def _on_checkout_completed(s, session: dict) -> None:
+    session_id = session.get("id")  # 👈 utile pour idempotence
+    metadata = session.get("metadata") or {}
+    pack = (metadata.get("pack") or "").lower()              # "infinity" ou "startnow"
+    user_id = metadata.get("user_id")
+    client_ref = session.get("client_reference_id")
+    email = session.get("customer_email") or (session.get("customer_details") or {}).get("email")
+
+    # (disponibles si mode=subscription)
+    customer_id = session.get("customer")
+    subscription_id = session.get("subscription")
+
+    # Legacy : certaines anciennes sessions peuvent remonter "premium"
+    if pack == "premium":
+        pack = "startnow"
+
+    if pack not in ("infinity", "startnow"):
+        print(f"[WEBHOOK] Pack inconnu '{pack}' (session {session_id}), on ignore.")
+        return
+
+    user = _find_user(s, user_id, client_ref, email)
+    if not user:
+        print(f"[WEBHOOK] Aucun user trouvé pour la session {session_id}.")
+        return
+
+    # Mise à jour du plan
+    analytics.record_plan_change(s, user.plan, pack)  # 📊 conversion free → payant (une seule fois)
+    user.plan = pack
+    # Idempotence : ne créditer qu'une fois ce session.id
+    if pack == "startnow" and session_id and user.last_checkout_session_id != session_id:
+        user.startnow_credits = (user.startnow_credits or 0) + 1
+        user.last_checkout_session_id = session_id
+        analytics.incr(s, "credits_purchased", pack)
+
+    if customer_id:
+        user.stripe_customer_id = customer_id
+    if subscription_id:
+        user.stripe_subscription_id = subscription_id
+    user.idea_used = 0
+
+    s.add(user)
+    print(f"[WEBHOOK] User {user.email} -> {pack} ✅")
+
+
+def _on_subscription_deleted(s, subscription: dict) -> None:
+    customer_id = subscription.get("customer")
+    if not customer_id:
+        return
+    user = s.exec(select(User).where(User.stripe_customer_id == customer_id)).first()
+    if user:
+        user.plan = "free"
+        s.add(user)
+        print(f"[WEBHOOK] Abonnement résilié → {user.email} repasse en free")
+
+
+HANDLERS = {
+    "checkout.session.completed": _on_checkout_completed,
+    "checkout.session.async_payment_succeeded": _on_checkout_completed,
+    "customer.subscription.deleted": _on_subscription_deleted,
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Worker
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _retry_delay(attempts: int) -> float:
+    return min(RETRY_BASE_S * (2 ** max(attempts - 1, 0)), RETRY_MAX_S)
+
+
+def _mark_failed(event_id: str, err: Exception) -> None:
+    with get_session() as s:
+        ev = s.get(StripeEvent, event_id)
+        if not ev:
+            return
+        ev.attempts = (ev.attempts or 0) + 1
+        ev.last_error = f"{type(err).__name__}: {err}"[:2000]
+        attempts = ev.attempts
+        if attempts >= MAX_ATTEMPTS:
+            ev.status = "failed"
+        else:
+            ev.next_attempt_at = datetime.utcnow() + timedelta(seconds=_retry_delay(attempts))
+        s.add(ev)
+        s.commit()
+    print(f"[Stripe] échec {event_id} (tentative {attempts}/{MAX_ATTEMPTS}):", err)
+
+
+def process_next() -> Optional[str]:
+    """
+    Traite le plus ancien événement dû. Retourne son id, ou None s'il n'y a rien à faire.
+    Ordre Stripe : un événement en attente de retry ne bloque pas les suivants.
+    """
+    event_id = None
+    try:
+        with get_session() as s:
+            ev = s.exec(
+                select(StripeEvent)
+                .where(StripeEvent.status == "pending", StripeEvent.next_attempt_at <= datetime.utcnow())
+                .order_by(StripeEvent.stripe_created, StripeEvent.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).first()
+            if not ev:
+                return None
+            event_id = ev.id
+            handler = HANDLERS.get(ev.type)
+            if handler:
+                with tracing.start_trace("stripe.event", event_id=ev.id, type=ev.type):
+                    handler(s, (ev.payload.get("data") or {}).get("object") or {})
+            ev.status = "processed"
+            ev.processed_at = datetime.utcnow()
+            ev.last_error = None
+            s.add(ev)
+            s.commit()  # effet métier + statut : même transaction
+    except Exception as e:
+        if event_id is None:
+            raise
+        _mark_failed(event_id, e)
+    return event_id
+
+
+def process_pending(limit: int = 500) -> int:
+    n = 0
+    while n < limit and process_next():
+        n += 1
+    return n
+
+
+async def stripe_events_loop() -> None:
+    """Tâche de fond lancée au démarrage : traite au fil de l'eau (réveil par le webhook) + poll de secours."""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    while True:
+        try:
+            n = await asyncio.to_thread(process_pending)
+            if n:
+                print(f"[Stripe] {n} événement(s) traité(s)")
+        except Exception as e:
+            print("[Stripe] worker:", e)
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=POLL_INTERVAL_S)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+def requeue(event_id: str) -> bool:
+    """Remet un événement "failed" (ou en attente de retry) en file, tentatives remises à zéro."""
+    with get_session() as s:
+        ev = s.get(StripeEvent, event_id)
+        if not ev or ev.status == "processed":
+            return False
+        ev.status = "pending"
+        ev.attempts = 0
+        ev.next_attempt_at = datetime.utcnow()
+        s.add(ev)
+        s.commit()
+    wake()
+    return True
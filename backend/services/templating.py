@@ -0,0 +1,175 @@
+# backend/services/templating.py
+"""
+Mini moteur de templates HTML compilés (rapports offre / brand / acquisition / BP / plan / landing).
+
+Syntaxe (volontairement minimale) :
+  {{ name }}       → valeur échappée (autoescape HTML) ; None → ""
+  {{ name|raw }}   → fragment HTML déjà sûr (SVG, listes construites avec esc())
+  {{> partial }}   → partial (CSS partagé, en-têtes…) inliné à la compilation
+
+Chaque template est parsé et compilé UNE seule fois en une fonction Python
+(un seul "".join de littéraux + lookups), puis mis en cache par nom.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Callable, Dict, Optional
+
+_TAG_RE = re.compile(r"\{\{\s*(>)?\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?:\|\s*(raw))?\s*\}\}")
+
+
+class TemplateError(Exception):
+    pass
+
+
+def esc(x: Any) -> str:
+    """Échappement HTML partagé par tous les renderers (None → ""). Même sortie que html.escape(quote=True)."""
+    if x is None:
+        return ""
+    if x.__class__ is not str:
+        x = str(x)
+    # chemin rapide : la plupart des textes ne contiennent aucun caractère à échapper
+    if "&" in x: x = x.replace("&", "&amp;")
+    if "<" in x: x = x.replace("<", "&lt;")
+    if ">" in x: x = x.replace(">", "&gt;")
+    if '"' in x: x = x.replace('"', "&quot;")
+    if "'" in x: x = x.replace("'", "&#x27;")
+    return x
+
+
+def raw(x: Any) -> str:
+    if x is None:
+        return ""
+    return x if isinstance(x, str) else str(x)
+
+
+_partials: Dict[str, str] = {}
+_sources: Dict[str, str] = {}
+_compiled: Dict[str, "Template"] = {}
+_lock = threading.Lock()
+
+
+class Template:
+    __slots__ = ("name", "fields", "_fn")
+
+    def __init__(self, name: str, source: str, partials: Optional[Dict[str, str]] = None):
+        self.name = name
+        parts, fields = _parse(name, _expand_partials(name, source, partials if partials is not None else _partials))
+        self.fields = tuple(sorted(fields))
+        self._fn = _compile(name, parts)
+
+    def render(self, **ctx: Any) -> str:
+        try:
+            return self._fn(ctx)
+        except KeyError as e:
+            raise TemplateError(f"template '{self.name}': variable manquante {e}") from None
+
+    __call__ = render
+
+
+def _expand_partials(name: str, source: str, partials: Dict[str, str], depth: int = 0) -> str:
+    if depth > 8:
+        raise TemplateError(f"template '{name}': partials imbriqués trop profondément")
+
+    def sub(m: re.Match) -> str:
+        if not m.group(1):
+            return m.group(0)
+        pname = m.group(2)
+        if pname not in partials:
+            raise TemplateError(f"template '{name}': partial inconnu '{pname}'")
+        return _expand_partials(name, partials[pname], partials, depth + 1)
+
+    return _TAG_RE.sub(sub, source)
+
+
+def _parse(name: str, source: str):
+    parts: list[tuple[str, str]] = []   # ("lit", texte) | ("esc", var) | ("raw", var)
+    fields: set[str] = set()
+    pos = 0
+    for m in _TAG_RE.finditer(source):
+        if m.start() > pos:
+            parts.append(("lit", source[pos:m.start()]))
+        var = m.group(2)
+        parts.append(("raw" if m.group(3) else "esc", var))
+        fields.add(var)
+        pos = m.end()
+    if pos < len(source):
+        parts.append(("lit", source[pos:]))
+    return parts, fields
+
+
+def _compile(name: str, parts: list[tuple[str, str]]) -> Callable[[Dict[str, Any]], str]:
+    # génère: def _render(ctx): return "".join((L0, _esc(ctx["a"]), L1, _raw(ctx["b"]), ...))
+    consts: Dict[str, Any] = {"_esc": esc, "_raw": raw}
+    items: list[str] = []
+    for i, (kind, val) in enumerate(parts):
+        if kind == "lit":
+            key = f"_L{i}"
+            consts[key] = val
+            items.append(key)
+        elif kind == "esc":
+            items.append(f"_esc(ctx[{val!r}])")
+        else:
+            items.append(f"_raw(ctx[{val!r}])")
+    body = ", ".join(items) if items else "''"
+    code = f"def _render(ctx):\n    return ''.join(({body},))\n"
+    exec(compile(code, f"<template {name}>", "exec"), consts)
+    return consts["_render"]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Registre
+# ─────────────────────────────────────────────────────────────────────────────
+
+def register_partial(name: str, source: str) -> None:
+    with _lock:
+        _partials[name] = source
+        _compiled.clear()  # un partial modifié invalide les templates compilés
+
+
+def register_template(name: str, source: str) -> None:
+    with _lock:
+        _sources[name] = source
+        _compiled.pop(name, None)
+
+
+def get_template(name: str) -> Template:
+    tpl = _compiled.get(name)
+    if tpl is None:
+        with _lock:
+            tpl = _compiled.get(name)
+            if tpl is None:
+                if name not in _sources:
+                    raise TemplateError(f"template inconnu '{name}'")
+                tpl = Template(name, _sources[name], _partials)
+                _compiled[name] = tpl
+    return tpl
+
+
+def render(name: str, **ctx: Any) -> str:
+    return get_template(name).render(**ctx)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Partials partagés (livrets acquisition / business plan / plan d'action / landing)
+# ─────────────────────────────────────────────────────────────────────────────
+register_partial("inter_font_link", """<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;800&display=swap" rel="stylesheet">""")
+
+register_partial("report_css_base", """
+      :root { color-scheme: dark; }
+      body { margin:0; background:#0f172a; color:#e5e7eb; font-family: Inter, system-ui, -apple-system, Segoe UI, Roboto, Arial; }
+      .wrap { max-width: 1000px; margin: 0 auto; padding: 24px; }
+      .card { background:#111827; border-radius:14px; padding:18px; box-shadow:0 10px 28px rgba(0,0,0,.35); margin-bottom:14px; }
+      h1 { font-size:28px; margin:0 0 8px; font-weight:800 }
+      h2 { font-size:18px; margin:16px 0 8px; color:#8b93ff }
+      h3 { font-size:14px; margin:10px 0 6px; color:#e5e7eb }
+      .muted { color:#9ca3af; font-size:12px }
+      .grid { display:grid; gap:14px }
+      .grid-2 { grid-template-columns:repeat(2,minmax(0,1fr)) }
+      .grid-3 { grid-template-columns:repeat(3,minmax(0,1fr)) }
+      .kpi { background:#0b1220; padding:10px 12px; border-radius:10px; border:1px solid #1f2937 }
+      .toc a { color:#e5e7eb; text-decoration:none }
+      .pagebreak { page-break-before: always; }
+      ul { margin:8px 0 0 18px }
+      table { width:100%; border-collapse:separate; border-spacing:0 6px }""")
@@ -0,0 +1,303 @@
+# backend/services/tracing.py
+"""
+Tracing par spans (sans dépendance externe), pour découper une requête lente étape par étape :
+LLM, rendu HTML, export PDF, écriture stockage, requêtes SQL, save_deliverable…
+
+- Le span courant vit dans un contextvar : il suit automatiquement les `await`, les tâches
+  asyncio (create_task copie le contexte), asyncio.to_thread et donc les jobs de fond lancés
+  depuis une requête (leurs spans restent enfants de la requête, même trace_id).
+- Échantillonnage à la racine (TRACE_SAMPLE_RATE) : hors trace échantillonnée, span()/traced() ne
+  coûtent qu'une lecture de contextvar. Un `traceparent` entrant donne le trace_id ; son flag 01/00
+  n'impose la décision que si TRACE_TRUST_INBOUND=1 (amont de confiance) — sinon n'importe quel
+  client forcerait l'échantillonnage de toutes ses requêtes.
+- Chaque span terminé part dans une file ; un thread l'envoie à l'exportateur (jamais d'I/O
+  dans la requête). Exportateurs : "console", "file" (JSON lines, TRACE_FILE), "none",
+  ou "package.module:Classe" (ex. pont OTLP) via TRACE_EXPORTER.
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import importlib
+import inspect
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_TRUST_INBOUND = os.getenv("TRACE_TRUST_INBOUND", "0") == "1"
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+TRACE_FILE = os.getenv("TRACE_FILE", "storage/.traces/spans.jsonl")
+_QUEUE_MAX = 10_000
+
+
+@dataclass(slots=True)
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    start_ns: int                      # epoch (time.time_ns)
+    _t0: int                           # perf_counter_ns, pour la durée
+    duration_ns: int = 0
+    attrs: dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "start_ns": self.start_ns, "duration_ms": round(self.duration_ns / 1e6, 3),
+            "status": self.status, "attrs": self.attrs,
+        }
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trace_span", default=None)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Exportateurs
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ConsoleExporter:
+    def export(self, span: Span) -> None:
+        print(f"[trace {span.trace_id[:8]}] {span.name} {span.duration_ns / 1e6:.1f} ms {span.status}"
+              + (f" {span.attrs}" if span.attrs else ""))
+
+
+class JsonlFileExporter:
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, span: Span) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+
+def _load_exporter(spec: str):
+    if spec in ("", "none"):
+        return None
+    if spec == "console":
+        return ConsoleExporter()
+    if spec == "file":
+        return JsonlFileExporter()
+    mod, _, cls = spec.partition(":")
+    return getattr(importlib.import_module(mod), cls)()
+
+
+_exporter = None
+_queue: "queue.Queue[Span]" = queue.Queue(maxsize=_QUEUE_MAX)
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+def set_exporter(exporter) -> None:
+    """Branche un exportateur (objet avec .export(span)) ; None désactive le tracing."""
+    global _exporter
+    _exporter = exporter
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+def _drain() -> None:
+    while True:
+        s = _queue.get()
+        try:
+            if _exporter is not None:
+                _exporter.export(s)
+        except Exception as e:
+            print("[tracing] export échoué:", e)
+
+
+def _emit(span: Span) -> None:
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_drain, name="trace-exporter", daemon=True)
+                _worker.start()
+    try:
+        _queue.put_nowait(span)
+    except queue.Full:
+        pass  # sous forte charge on perd des spans plutôt que de bloquer
+
+
+set_exporter(_load_exporter(TRACE_EXPORTER))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# API
+# ─────────────────────────────────────────────────────────────────────────────
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def _new_span(name: str, trace_id: str, parent_id: Optional[str], attrs: dict) -> Span:
+    return Span(trace_id, secrets.token_hex(8), parent_id, name, time.time_ns(), time.perf_counter_ns(), attrs=attrs)
+
+
+@contextmanager
+def _activate(span: Span):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.attrs["error"] = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        span.duration_ns = time.perf_counter_ns() - span._t0
+        _current.reset(token)
+        _emit(span)
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    # W3C : 00-<trace_id 32 hex>-<parent_id 16 hex>-<flags>
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2], parts[3] == "01"
+
+
+def traceparent(span: Span) -> str:
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+
+@contextmanager
+def start_trace(name: str, traceparent_header: Optional[str] = None, sampled: Optional[bool] = None, **attrs: Any):
+    """
+    Span racine (requête HTTP, job de fond). Si un span est déjà actif (job lancé depuis une requête),
+    on reste dans sa trace. Sinon décision d'échantillonnage : `sampled` > flag du traceparent entrant
+    (si TRACE_TRUST_INBOUND) > taux.
+    """
+    parent = _current.get()
+    if parent is not None:
+        with _activate(_new_span(name, parent.trace_id, parent.span_id, attrs)) as s:
+            yield s
+        return
+    if _exporter is None:
+        yield None
+        return
+    incoming = parse_traceparent(traceparent_header)
+    if incoming:
+        trace_id, parent_id, flag = incoming
+        if sampled is None and TRACE_TRUST_INBOUND:
+            sampled = flag
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+    if sampled is None:
+        sampled = random.random() < TRACE_SAMPLE_RATE
+    if not sampled:
+        yield None
+        return
+    with _activate(_new_span(name, trace_id, parent_id, attrs)) as s:
+        yield s
+
+
+@contextmanager
+def span(name: str, **attrs: Any):
+    """Span enfant du span courant ; no-op (yield None) hors trace échantillonnée."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _activate(_new_span(name, parent.trace_id, parent.span_id, attrs)) as s:
+        yield s
+
+
+def record_span(name: str, t0_ns: int, **attrs: Any) -> None:
+    """Span a posteriori (hooks d'événements : requêtes SQL) ; t0_ns = perf_counter_ns au début."""
+    parent = _current.get()
+    if parent is None:
+        return
+    now = time.perf_counter_ns()
+    s = Span(parent.trace_id, secrets.token_hex(8), parent.span_id, name,
+             time.time_ns() - (now - t0_ns), t0_ns, duration_ns=now - t0_ns, attrs=attrs)
+    _emit(s)
+
+
+def traced(name: Optional[str] = None):
+    """Décorateur (fonctions sync ou async) : un span par appel quand la trace est échantillonnée."""
+    def deco(fn):
+        span_name = name or fn.__qualname__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def aw(*a, **kw):
+                if _current.get() is None:
+                    return await fn(*a, **kw)
+                with span(span_name):
+                    return await fn(*a, **kw)
+            return aw
+
+        @functools.wraps(fn)
+        def w(*a, **kw):
+            if _current.get() is None:
+                return fn(*a, **kw)
+            with span(span_name):
+                return fn(*a, **kw)
+        return w
+    return deco
+
+
+def instrument_engine(engine) -> None:
+    """Un span par requête SQL (statement tronqué) dans les traces échantillonnées."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("_trace_t0", []).append(time.perf_counter_ns())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("_trace_t0")
+        if stack:
+            record_span("db.query", stack.pop(), statement=" ".join(statement.split())[:200])
+
+
+class TracingMiddleware:
+    """Middleware ASGI : span racine par requête (nom = route FastAPI), traceparent renvoyé si échantillonné."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _exporter is None:
+            await self.app(scope, receive, send)
+            return
+        header = None
+        for k, v in scope.get("headers") or ():
+            if k == b"traceparent":
+                header = v.decode("latin-1")
+                break
+        with start_trace(f"HTTP {scope['method']}", traceparent_header=header, path=scope["path"]) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    root.attrs["status"] = message["status"]
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (b"traceparent", traceparent(root).encode())]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if getattr(route, "path_format", None):
+                    root.name = f"HTTP {scope['method']} {route.path_format}"
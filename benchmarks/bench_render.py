@@ -0,0 +1,137 @@
+# benchmarks/bench_render.py
+"""
+Benchmark des renderers HTML des livrables : temps et allocations par rapport.
+
+    python -m benchmarks.bench_render                      # arbre courant
+    python -m benchmarks.bench_render --baseline <git-ref> # + même mesure sur une révision git (avant/après)
+
+Pour chaque rapport : médiane / p95 du temps de rendu (ms), pic mémoire et volume
+alloué pendant un rendu (tracemalloc), taille du HTML produit.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import fixtures  # noqa: E402
+
+
+def _cases(ds, ps=None) -> dict:
+    off, br, acq = fixtures.offer_fixture(), fixtures.brand_fixture(), fixtures.acquisition_fixture()
+    bp, plan = fixtures.business_plan_fixture(), fixtures.action_plan_fixture()
+    cases = {
+        "offer": lambda: ds.render_offer_report_html(off["offer"], off["persona"], off["pain_points"], "Offre — Nova", "Idée"),
+        "brand": lambda: ds.render_brand_report_html(br["brand_name"], br["slogan"], br["domain"], br["domain_available"],
+                                                     br["structured"], "Branding — Nova", "Idée", br["domain_checks"]),
+        "acquisition": lambda: ds.render_acquisition_report_html(acq, "Nova", "Idée"),
+        "business_plan": lambda: ds.render_business_plan_html(bp, "Business Plan — Nova", "Idée"),
+        "action_plan": lambda: ds.render_action_plan_html(plan, "Plan d'action — Nova"),
+    }
+    if ps is not None:
+        lf = fixtures.landing_fixture()
+        cases["landing"] = lambda: ps._render_landing_html(lf["copy"], lf["brand_name"], lf["slogan"], lf["sector"],
+                                                           lf["project_id"], lf["logo_url"])
+    return cases
+
+
+def measure(fn, iterations: int) -> dict:
+    for _ in range(3):  # warm-up (compilation des templates, caches)
+        fn()
+    times = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    out = fn()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    allocated = sum(s.size_diff for s in stats if s.size_diff > 0)
+    blocks = sum(s.count_diff for s in stats if s.count_diff > 0)
+
+    times.sort()
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "p95_ms": round(times[int(len(times) * 0.95) - 1], 3),
+        "peak_kib": round(peak / 1024, 1),
+        "alloc_kib": round(allocated / 1024, 1),
+        "alloc_blocks": blocks,
+        "html_kib": round(len(out.encode("utf-8")) / 1024, 1),
+    }
+
+
+def _load_from_git(ref: str, relpath: str, modname: str):
+    src = subprocess.check_output(["git", "-C", ROOT, "show", f"{ref}:{relpath}"])
+    fd, path = tempfile.mkstemp(suffix=".py", prefix=f"{modname}_")
+    with os.fdopen(fd, "wb") as f:
+        f.write(src)
+    spec = importlib.util.spec_from_file_location(modname, path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _load_landing_module(loader):
+    # premium_service tire OpenAI/httpx… : le landing est mesuré seulement si l'import passe
+    try:
+        return loader()
+    except Exception as e:  # pragma: no cover - dépend de l'environnement
+        print(f"[bench] landing ignoré ({type(e).__name__}: {e})", file=sys.stderr)
+        return None
+
+
+def run(iterations: int, baseline: str | None) -> dict:
+    from backend.services import deliverable_service as ds
+    ps = _load_landing_module(lambda: __import__("backend.services.premium_service", fromlist=["x"]))
+    results = {"current": {name: measure(fn, iterations) for name, fn in _cases(ds, ps).items()}}
+
+    if baseline:
+        old_ds = _load_from_git(baseline, "backend/services/deliverable_service.py", "baseline_deliverable_service")
+        old_ps = _load_landing_module(
+            lambda: _load_from_git(baseline, "backend/services/premium_service.py", "baseline_premium_service"))
+        results["baseline"] = {name: measure(fn, iterations) for name, fn in _cases(old_ds, old_ps).items()}
+    return results
+
+
+def _print(results: dict) -> None:
+    cols = ("median_ms", "p95_ms", "peak_kib", "alloc_kib", "alloc_blocks", "html_kib")
+    for label, rows in results.items():
+        print(f"\n== {label}")
+        print(f"{'report':<15}" + "".join(f"{c:>14}" for c in cols))
+        for name, r in rows.items():
+            print(f"{name:<15}" + "".join(f"{r[c]:>14}" for c in cols))
+    if "baseline" in results:
+        print("\n== speed-up (baseline / current, médiane)")
+        for name, cur in results["current"].items():
+            base = results["baseline"].get(name)
+            if base and cur["median_ms"]:
+                print(f"{name:<15}{base['median_ms'] / cur['median_ms']:>8.2f}x"
+                      f"   alloc {base['alloc_kib']:>8} → {cur['alloc_kib']:<8} KiB")
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", "--iterations", type=int, default=200)
+    ap.add_argument("--baseline", help="révision git à comparer (ex: le commit avant les templates compilés)")
+    args = ap.parse_args(argv)
+    _print(run(args.iterations, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# benchmarks/fixtures.py
+"""Données de test réalistes pour les benchmarks de rendu (tailles proches d'un vrai livrable)."""
+from types import SimpleNamespace
+
+
+def offer_fixture() -> dict:
+    items = lambda p, n: [f"{p} {i} — détail représentatif d'une sortie GPT" for i in range(1, n + 1)]
+    return {
+        "offer": {
+            "market_overview": {"volume": "≈ 2,4 Md€ en France", "current_state": "progression",
+                                "trends": items("Tendance", 6), "products_services": items("Offre", 5),
+                                "main_players": items("Acteur", 6)},
+            "demand_analysis": {"segments": items("Segment", 4), "customer_count_trend": "en hausse",
+                                "locations": items("Zone", 3), "behaviors": items("Comportement", 5),
+                                "choice_criteria": items("Critère", 5), "budget": "moyen"},
+            "competitor_analysis": {
+                "direct": [{"name": f"Concurrent {i}", "positioning": "milieu de gamme", "strengths": "notoriété",
+                            "weaknesses": "prix"} for i in range(1, 6)],
+                "indirect": items("Alternative", 4), "differentiation_points": items("Différenciation", 4),
+                "success_factors": items("Facteur", 4), "failures_lessons": items("Leçon", 3)},
+            "environment_regulation": {"innovations": items("Innovation", 4), "regulatory_framework": items("Texte", 3),
+                                       "associations": items("Association", 3), "entry_barriers": items("Barrière", 3),
+                                       "tech_evolution_pace": "rapide"},
+            "synthesis": "Synthèse exécutive " * 40,
+        },
+        "persona": "Responsable opérations PME, 35-50 ans, cherche à gagner du temps",
+        "pain_points": [f"Douleur {i}" for i in range(1, 6)],
+    }
+
+
+def brand_fixture() -> dict:
+    return {
+        "brand_name": "Nova & Co", "slogan": "Le futur, simplement", "domain": "novaco.fr", "domain_available": True,
+        "structured": {
+            "mission": "Mission " * 30, "vision": "Vision " * 30, "values": ["Clarté", "Audace", "Fiabilité", "Impact"],
+            "color_palette": [{"name": f"Couleur {i}", "hex": f"#{i}{i}4F46", "usage": "Titres"} for i in range(1, 6)],
+            "typography": {"primary": {"font": "Inter", "usage": "Titres"}, "secondary": {"font": "Lora", "usage": "Corps"}},
+            "logo_guidelines": {"concept": "Monogramme", "variations": ["Couleur", "Mono", "Inversé"],
+                                "clear_space": "1x hauteur du N", "min_size": "24 px", "dos": ["Contraste"], "donts": ["Déformer"],
+                                "logo_set": []},
+            "storytelling": {"origins": "Origines " * 20, "values_engagement": "Engagement " * 20, "proof_points": ["Cas 1", "Cas 2"]},
+            "consistency": {"social": "Ton direct", "emails": "Signature unifiée", "documents": "Gabarits"},
+        },
+        "domain_checks": {f"novaco.{tld}": (i % 3 == 0) or None for i, tld in enumerate(["fr", "com", "io", "co", "app"])},
+    }
+
+
+def _scenarios() -> dict:
+    rows = lambda k: [{"month": f"M{i}", "leads": 40 * i * k, "impressions": 90000 * k, "clicks": 2100 * k,
+                       "mqls": 20 * i, "sqls": 9 * i, "sales": 2 * i} for i in range(1, 7)]
+    return {"Départ prudent": rows(0.8), "Vitesse de croisière": rows(1.0), "Accélération": rows(1.2)}
+
+
+def acquisition_fixture() -> dict:
+    return {
+        "objectives": {"north_star": "100 clients payants à M6", "targets": [f"Objectif {i}" for i in range(1, 5)]},
+        "icp": "PME 10-200 salariés, décideur ops",
+        "funnel": {k: [f"{k} {i}" for i in range(1, 5)] for k in ("awareness", "consideration", "conversion", "retention")},
+        "channel_mix": [{"name": f"Canal {i}", "budget_share": 0.2, "goal": "Leads qualifiés",
+                         "beginner_steps": [f"Étape {j}" for j in range(1, 6)], "kpis": ["CPC", "CTR", "CPL"]} for i in range(1, 6)],
+        "kpis": ["CAC", "LTV", "Payback", "MRR"],
+        "agenda": [{"week": w, "theme": "Acquisition", "time": "4 h", "owner": "fondateur",
+                    "tasks": [f"Tâche {j}" for j in range(1, 5)]} for w in range(1, 13)],
+        "assumptions": {"cpc": 3.2, "ctr": 0.02, "lp_cvr": 0.045, "mql_rate": 0.55, "sql_rate": 0.45, "close_rate": 0.22},
+        "monthly_budget": 4000,
+        "forecast_scenarios": _scenarios(),
+        "annexes": {"ads_strategy": "Plan Ads\n" * 40, "seo_plan": "Plan SEO\n" * 40, "social_plan": "Plan social\n" * 40},
+    }
+
+
+def business_plan_fixture() -> dict:
+    """BP complet (≈ 20 pages A4 une fois exporté)."""
+    rev = [0.0] + [4000.0 * (1.07 ** i) for i in range(1, 37)]
+    lst = lambda p, n: [f"{p} {i} — phrase de longueur réaliste pour un business plan" for i in range(1, n + 1)]
+    return {
+        "meta": {"sector": "SaaS B2B", "sector_category": "saas_b2b"},
+        "narrative": {
+            "executive_summary": "Résumé " * 120, "objectives": lst("Objectif", 4), "value_prop": "Gain de temps mesurable",
+            "team": "Équipe " * 60,
+            "project_detail": {"problem": "Problème " * 50, "solution": "Solution " * 50, "targets": lst("Cible", 4),
+                               "product_features": lst("Fonction", 6), "value_prop": "Valeur " * 20, "milestones": lst("Jalon", 5)},
+            "market": {"size_drivers": "Moteurs " * 40, "segments": lst("Segment", 4), "competition": lst("Concurrent", 5),
+                       "regulation": lst("Norme", 3)},
+            "go_to_market": {"segmentation": lst("Cible", 3), "positioning": "Positionnement " * 20, "mix": lst("Mix", 4),
+                             "sales_process": lst("Étape", 4)},
+            "operations": {"organization": "Organisation " * 30, "people": lst("Rôle", 5), "resources": lst("Outil", 5),
+                           "roadmap": lst("Trimestre", 6)},
+            "funding": {"ask": "150 k€", "recommended_ask_eur": 152340.5,
+                        "initial_plan": {"sources": {"equity": 50000, "loan": 100000, "total": 150000},
+                                         "uses": {"investments": 18000, "working_capital": 30000, "total": 48000}},
+                        "use_of_funds": lst("Poste", 5), "milestones": lst("Jalon", 4)},
+            "risks": lst("Risque", 8),
+            "legal": {"form": "SAS", "rationale": "Levée de fonds", "cap_table": lst("Associé", 3),
+                      "governance": lst("Organe", 3), "tax_social": lst("Régime", 2)},
+            "glossary": {f"Terme {i}": "définition " * 8 for i in range(1, 16)},
+        },
+        "investments": {"items": [{"label": f"Investissement {i}", "month": i, "life_years": 3, "amount": 6000.0 * i,
+                                   "amort_month": 166.67 * i} for i in range(1, 7)], "total": 126000},
+        "financing": {
+            "initial_uses": {"working_capital": 30000, "total": 48000},
+            "initial_sources": {"equity": 50000, "loan": 100000, "total": 150000},
+            "loan": {"schedule": [{"month": m, "payment": 2300.5, "interest": 410.2, "principal": 1890.3,
+                                   "balance": 100000 - 1890.3 * m} for m in range(1, 49)]},
+            "three_year_view": {"loan_outstanding_end_y1": 77315.4, "loan_outstanding_end_y2": 53500.1,
+                                "loan_outstanding_end_y3": 28110.9},
+        },
+        "pnl_3y": {k: [48000.12, 96000.34, 180000.56] for k in
+                   ("revenue", "cogs", "gross", "marketing", "fixed", "ebitda", "depreciation", "ebit", "interest", "ebt", "tax", "net")},
+        "cash_12m": {"months": [{"month": m, "in": 4000 * m, "out": 3500 * m, "end": 20000 + 500 * m} for m in range(1, 13)]},
+        "breakeven": {"revenue": 210000, "month": 19, "revenue_month": 17500},
+        "series_36m": {"revenue": rev, "ebitda": [v * 0.3 - 6000 for v in rev]},
+        "annexes": {f"Annexe {i}": "Contenu détaillé\n" * 60 for i in range(1, 6)},
+    }
+
+
+def action_plan_fixture() -> dict:
+    return {"weeks": [{"week": w, "theme": "Lancement", "goals": [f"Objectif {i}" for i in range(1, 4)],
+                       "kpis": ["Leads", "Démos"],
+                       "tasks": [{"title": f"Tâche {i}", "owner": "fondateur", "estimate_h": 2, "due_offset_days": i,
+                                  "desc": "Description courte"} for i in range(1, 7)]} for w in range(1, 5)]}
+
+
+def landing_fixture() -> dict:
+    copy = SimpleNamespace(
+        segments_badges=["PME", "ETI", "Ops"], hero_title="", hero_subtitle="Automatisez vos opérations",
+        hero_bullets=["Rapide", "Sécurisé", "Intégré"],
+        features=[{"title": f"Fonction {i}", "desc": "Description", "bullets": ["a", "b", "c"], "kpi": "-30 % de temps"} for i in range(3)],
+        differentiators=["Rapide — onboarding guidé", "RGPD : hébergement UE", "Support humain"],
+        pricing={"starter": {"name": "Starter", "price_per_month_eur": 29, "bullets": ["a", "b"]},
+                 "pro": {"name": "Pro", "price_per_month_eur": 79, "bullets": ["a", "b", "c"]},
+                 "enterprise": {"name": "Entreprise", "price_per_month_eur": None, "bullets": ["SSO", "SLA"]}},
+        trust_points=["RGPD", "Hébergement UE", "Chiffrement"],
+        testimonials=[{"quote": "Top", "name": "Alice", "role": "COO"}, {"quote": "Efficace", "name": "Bob", "role": "CEO"}],
+        faq=[{"q": f"Question {i} ?", "a": "Réponse détaillée."} for i in range(6)],
+    )
+    return {"copy": copy, "brand_name": "Nova & Co", "slogan": "Le futur, simplement", "sector": "SaaS B2B",
+            "project_id": 42, "logo_url": None}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Suite (benchmarks/suite.py) : livrables stockés, calibration, ICS, sorties LLM
+# ─────────────────────────────────────────────────────────────────────────────
+
+def profil_fixture() -> SimpleNamespace:
+    return SimpleNamespace(secteur="SaaS B2B pour PME", objectif="Levée seed puis croissance rapide",
+                           competences=["produit", "vente"])
+
+
+def idea_snapshot_fixture() -> dict:
+    return {"project_id": 42, "titre": "Nova — pilotage des opérations", "sector": "SaaS B2B",
+            "objective": "levée seed", "idee": "Plateforme de pilotage des opérations pour PME"}
+
+
+def deliverable_fixtures() -> dict:
+    """json_content par kind, au format stocké en base (sans pdf_path → fallback ReportLab)."""
+    off, br, acq = offer_fixture(), brand_fixture(), acquisition_fixture()
+    plan = [{"semaine": w["week"], "objectif": w["theme"], "tâches": [t["title"] for t in w["tasks"]]}
+            for w in action_plan_fixture()["weeks"]]
+    return {
+        "offer": {"persona": off["persona"], "pain_points": off["pain_points"], "structured_offer": off["offer"]},
+        "model": {"model": "Abonnement mensuel par siège, onboarding payant, upsell modules. " * 30},
+        "brand": {k: br[k] for k in ("brand_name", "slogan", "domain", "domain_available")},
+        "marketing": {"acquisition_structured": acq, **acq["annexes"]},
+        "plan": {"plan": plan},
+        "business_plan": business_plan_fixture(),
+    }
+
+
+def large_json_payload(copies: int = 20) -> dict:
+    """Gros json_content (BP × copies) avec caractères de contrôle, comme certaines sorties GPT."""
+    bp = business_plan_fixture()
+    bp["narrative"]["executive_summary"] += "\x00\x07 fin\x1f"
+    return {"versions": [bp for _ in range(copies)], "raw": "texte\x0b brut " * 2000}
+
+
+def deliverables_list_payload(projects: int = 3) -> list[dict]:
+    """Réponse de GET /api/me/deliverables : tous les livrables de quelques projets, json_content compris."""
+    from datetime import datetime, timedelta
+    kinds = deliverable_fixtures()
+    t0 = datetime(2026, 3, 1, 9, 30, 12, 345678)
+    return [{"id": 100 * p + i, "kind": kind, "title": f"{kind} — Projet {p}",
+             "created_at": (t0 + timedelta(hours=p, minutes=i)).isoformat(), "has_file": True, "json": content}
+            for p in range(projects) for i, (kind, content) in enumerate(kinds.items())]
+
+
+def ics_events_fixture(n: int = 200) -> list[dict]:
+    return [{"title": f"Tâche {i} — {'relance; clients, suivi' if i % 3 else 'démo'}",
+             "description": "Préparer le support\nEnvoyer l'invitation, confirmer la salle",
+             "start_iso": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T09:00:00+02:00",
+             "end_iso": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T10:30:00+02:00"} for i in range(n)]
+
+
+def llm_json_response(typographic_quotes: bool = False) -> str:
+    """Réponse de modèle typique : JSON BP entouré de fences markdown (± guillemets typographiques)."""
+    import json
+    body = json.dumps({"narrative": business_plan_fixture()["narrative"]}, ensure_ascii=False, indent=2)
+    if typographic_quotes:
+        body = body.replace('"Résumé', '“Résumé', 1).replace('Résumé "', 'Résumé ”', 1)
+    return "```json\n" + body + "\n```"
@@ -0,0 +1,337 @@
+# benchmarks/suite.py
+"""
+Suite de micro-benchmarks des chemins chauds purement Python (sans réseau, sans DB, sans Chromium).
+
+    python -m benchmarks.suite                                   # tous les cas, tableau
+    python -m benchmarks.suite -k render -k pdf                  # filtre (sous-chaîne du nom)
+    python -m benchmarks.suite --json out.json                   # résultats machine (JSON)
+    python -m benchmarks.suite --save-baseline                   # fige la référence (benchmarks/baseline.json)
+    python -m benchmarks.suite --compare                         # compare à la référence, exit 1 si régression
+
+Chaque cas est chronométré jusqu'à --min-time secondes (au moins 5 exécutions) après échauffement ;
+la comparaison porte sur la médiane, régression si current > baseline × (1 + --threshold).
+Un cas dont l'import échoue (reportlab, openai absents…) est listé dans "skipped" ; avec --compare,
+un cas de la référence absent du run courant (ignoré, renommé) est un échec ("missing"), exit 1.
+DATABASE_URL / OPENAI_API_KEY reçoivent des valeurs factices si absentes (aucune connexion ni appel :
+les modules backend les lisent seulement à l'import).
+Fixtures : benchmarks/fixtures.py (tailles proches de vrais livrables).
+
+Référence (benchmarks/baseline.json, propre à une machine : les médianes en dépendent) : la produire
+sur la machine qui compare (poste ou runner CI), avec requirements.txt installé, depuis la branche
+principale : `python -m benchmarks.suite --save-baseline`. L'enregistrement est refusé si un cas est
+ignoré (référence incomplète) ; puis, sur la branche à tester : `python -m benchmarks.suite --compare`.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# valeurs factices avant tout import backend (config lue à l'import ; ni connexion DB ni appel OpenAI)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from benchmarks import fixtures  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+PDF_KINDS = ("offer", "model", "brand", "marketing", "plan", "business_plan")
+
+# nom → setup() qui retourne la fonction à chronométrer (imports paresseux : un cas peut être ignoré)
+CASES: dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def case(name: str):
+    def deco(setup):
+        CASES[name] = setup
+        return setup
+    return deco
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cas
+# ─────────────────────────────────────────────────────────────────────────────
+
+@case("render.business_plan")
+def _render_bp():
+    from backend.services import deliverable_service as ds
+    bp = fixtures.business_plan_fixture()
+    return lambda: ds.render_business_plan_html(bp, "Business Plan — Nova", "Idée")
+
+
+@case("render.acquisition")
+def _render_acq():
+    from backend.services import deliverable_service as ds
+    acq = fixtures.acquisition_fixture()
+    return lambda: ds.render_acquisition_report_html(acq, "Nova", "Idée")
+
+
+@case("render.landing")
+def _render_landing():
+    from backend.services import premium_service as ps
+    lf = fixtures.landing_fixture()
+    return lambda: ps._render_landing_html(lf["copy"], lf["brand_name"], lf["slogan"], lf["sector"],
+                                           lf["project_id"], lf["logo_url"])
+
+
+@case("bp.calibration_snapshot")
+def _calibration():
+    from backend.services import premium_service as ps
+    profil, snap = fixtures.profil_fixture(), fixtures.idea_snapshot_fixture()
+    return lambda: ps.build_calibration_snapshot(1, snap["project_id"], snap["titre"], profil, snap)
+
+
+@case("bp.forecast_36m")
+def _forecast():
+    from backend.services import premium_service as ps
+    profil, snap = fixtures.profil_fixture(), fixtures.idea_snapshot_fixture()
+    cal = ps.build_calibration_snapshot(1, snap["project_id"], snap["titre"], profil, snap)
+    params = ps._bp_defaults(profil.secteur, profil.objectif)
+    return lambda: ps._forecast_36m_calibrated(cal, params)
+
+
+@case("json.sanitize_large")
+def _sanitize():
+    from backend.services import deliverable_service as ds
+    payload = fixtures.large_json_payload()
+    return lambda: ds._sanitize_for_json(payload)
+
+
+def _stdlib_dumps(obj) -> bytes:
+    # mêmes options que JSONResponse de Starlette
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+@case("json.encode_bp.stdlib")
+def _encode_bp_stdlib():
+    bp = fixtures.business_plan_fixture()
+    return lambda: _stdlib_dumps(bp)
+
+
+@case("json.encode_bp.orjson")
+def _encode_bp_orjson():
+    from backend.services import json_codec
+    bp = fixtures.business_plan_fixture()
+    return lambda: json_codec.dumps(bp)
+
+
+@case("json.decode_bp.stdlib")
+def _decode_bp_stdlib():
+    raw = _stdlib_dumps(fixtures.business_plan_fixture())
+    return lambda: json.loads(raw)
+
+
+@case("json.decode_bp.orjson")
+def _decode_bp_orjson():
+    from backend.services import json_codec
+    raw = _stdlib_dumps(fixtures.business_plan_fixture())
+    return lambda: json_codec.loads(raw)
+
+
+@case("json.response_deliverables.fastapi_default")
+def _deliverables_default():
+    # ancien chemin : response_model list[dict] + jsonable_encoder + JSONResponse (json stdlib)
+    from fastapi.encoders import jsonable_encoder
+    from starlette.responses import JSONResponse
+    payload = fixtures.deliverables_list_payload()
+    return lambda: JSONResponse(jsonable_encoder(payload)).body
+
+
+@case("json.response_deliverables.orjson")
+def _deliverables_orjson():
+    from backend.services import json_codec
+    payload = fixtures.deliverables_list_payload()
+    return lambda: json_codec.ORJSONResponse(payload).body
+
+
+def _pdf_case(kind: str):
+    def setup():
+        from backend.services import pdf_service
+        d = SimpleNamespace(id=1, kind=kind, title=f"{kind} — Nova", json_content=fixtures.deliverable_fixtures()[kind])
+        return lambda: pdf_service.make_pdf_from_deliverable(d)
+    return setup
+
+
+for _kind in PDF_KINDS:
+    case(f"pdf.reportlab.{_kind}")(_pdf_case(_kind))
+
+
+@case("ics.200_events")
+def _ics():
+    from backend.services import calendar_service
+    events = fixtures.ics_events_fixture(200)
+    return lambda: calendar_service.ics_from_events("Plan d'action — Nova", events)
+
+
+@case("llm.clean_fences")
+def _clean_fences():
+    from backend.services import openai_service
+    raw = fixtures.llm_json_response(typographic_quotes=True)
+    return lambda: openai_service._clean_fences(raw)
+
+
+@case("llm.parse_json_strict")
+def _parse_json_strict():
+    from backend.services import premium_service as ps
+    raw = fixtures.llm_json_response()
+    return lambda: ps._parse_json_strict(raw)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Mesure
+# ─────────────────────────────────────────────────────────────────────────────
+
+def measure(fn: Callable[[], Any], min_time: float, max_runs: int = 10_000) -> dict:
+    for _ in range(2):  # échauffement (templates compilés, caches, imports paresseux)
+        fn()
+    gc.collect()
+    times: list[float] = []
+    start = time.perf_counter()
+    while len(times) < 5 or (time.perf_counter() - start < min_time and len(times) < max_runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    times.sort()
+    return {
+        "runs": len(times),
+        "median_ms": round(statistics.median(times), 4),
+        "p95_ms": round(times[max(0, int(len(times) * 0.95) - 1)], 4),
+        "min_ms": round(times[0], 4),
+        "mean_ms": round(statistics.fmean(times), 4),
+        "stdev_ms": round(statistics.stdev(times), 4) if len(times) > 1 else 0.0,
+    }
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.check_output(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(selected: list[str] | None = None, min_time: float = 1.0) -> dict:
+    results: dict[str, dict] = {}
+    skipped: dict[str, str] = {}
+    for name, setup in CASES.items():
+        if selected and not any(s in name for s in selected):
+            continue
+        try:
+            fn = setup()
+        except Exception as e:  # dépendance absente, import qui exige une config (OPENAI_API_KEY…)
+            skipped[name] = f"{type(e).__name__}: {e}"
+            continue
+        results[name] = measure(fn, min_time)
+        print(f"  {name:<32}{results[name]['median_ms']:>12.3f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "min_time_s": min_time,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, selected: list[str] | None = None) -> dict:
+    """Ratio des médianes par cas ; status = regression | improvement | ok | missing (cas de la référence non mesuré)."""
+    out = {}
+    for name, base in baseline.get("results", {}).items():
+        if name in current["results"] or (selected and not any(s in name for s in selected)):
+            continue
+        why = current.get("skipped", {}).get(name, "cas absent de la suite")
+        out[name] = {"baseline_ms": base["median_ms"], "current_ms": None, "ratio": None,
+                     "status": "missing", "reason": why}
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["median_ms"]:
+            continue
+        ratio = cur["median_ms"] / base["median_ms"]
+        status = "regression" if ratio > 1 + threshold else "improvement" if ratio < 1 - threshold else "ok"
+        out[name] = {"baseline_ms": base["median_ms"], "current_ms": cur["median_ms"],
+                     "ratio": round(ratio, 3), "status": status}
+    return out
+
+
+def _print(report: dict) -> None:
+    cols = ("runs", "median_ms", "p95_ms", "min_ms", "stdev_ms")
+    print(f"\n{'case':<32}" + "".join(f"{c:>12}" for c in cols))
+    for name, r in report["results"].items():
+        print(f"{name:<32}" + "".join(f"{r[c]:>12}" for c in cols))
+    for name, why in report["skipped"].items():
+        print(f"{name:<32}  ignoré ({why})")
+    if report.get("comparison"):
+        print(f"\n== comparaison à la référence ({report['baseline_meta'].get('git_rev')}, seuil ±{report['threshold']:.0%})")
+        for name, c in report["comparison"].items():
+            if c["status"] == "missing":
+                print(f"{name:<32}{c['baseline_ms']:>12} → {'—':<12}          ❌ NON MESURÉ ({c['reason']})")
+                continue
+            flag = {"regression": "  ⚠️ RÉGRESSION", "improvement": "  ✅"}.get(c["status"], "")
+            print(f"{name:<32}{c['baseline_ms']:>12} → {c['current_ms']:<12} x{c['ratio']:<8}{flag}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-k", dest="selected", action="append", help="ne lancer que les cas contenant ce texte")
+    ap.add_argument("--min-time", type=float, default=1.0, help="secondes de mesure par cas")
+    ap.add_argument("--json", dest="json_out", help="écrit le rapport JSON dans ce fichier ('-' = stdout)")
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE, help="fichier de référence")
+    ap.add_argument("--save-baseline", action="store_true", help="enregistre ces résultats comme référence")
+    ap.add_argument("--compare", action="store_true", help="compare à la référence (exit 1 si régression)")
+    ap.add_argument("--threshold", type=float, default=0.15, help="écart relatif toléré sur la médiane")
+    ap.add_argument("--list", action="store_true", help="liste les cas")
+    args = ap.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+
+    report = run(args.selected, args.min_time)
+    if args.compare:
+        try:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            ap.error(f"référence introuvable : {args.baseline} (lancer d'abord --save-baseline)")
+        report["baseline_meta"] = baseline.get("meta", {})
+        report["threshold"] = args.threshold
+        report["comparison"] = compare(report, baseline, args.threshold, args.selected)
+
+    _print(report)
+    if args.json_out:
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.json_out == "-":
+            print(payload)
+        else:
+            with open(args.json_out, "w", encoding="utf-8") as f:
+                f.write(payload + "\n")
+    if args.save_baseline:
+        if report["skipped"]:
+            print(f"\nréférence NON enregistrée : cas ignorés {sorted(report['skipped'])}", file=sys.stderr)
+            return 1
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": report["meta"], "results": report["results"]}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\nréférence enregistrée : {args.baseline}")
+
+    failures = [n for n, c in report.get("comparison", {}).items() if c["status"] in ("regression", "missing")]
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -281,7 +281,9 @@ export function openPlanICS(projectId) {
   window.location.href = url;
 }
 
-export const adminListUsers = () => request("/api/admin/users", { method: "GET" });
+// { q?: préfixe email, plan?, cursor?, limit? } → { items, next_cursor, plan_counts? }
+export const adminListUsers = (params = {}) =>
+  request(`/api/admin/users${qs(params)}`, { method: "GET" });
 
 export const adminUpdateUser = (userId, patch) =>
   request(`/api/admin/users/${userId}`, {
@@ -1,17 +1,47 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { adminListUsers, adminUpdateUser } from "../api";
 
+const PLANS = ["", "free", "infinity", "startnow"];
+
 export default function AdminPage() {
   const [rows, setRows] = useState([]);
   const [err, setErr] = useState("");
+  const [q, setQ] = useState("");
+  const [plan, setPlan] = useState("");
+  const [cursor, setCursor] = useState(null);     // next_cursor renvoyé par l'API (null = fin)
+  const [planCounts, setPlanCounts] = useState(null);
+  const [loading, setLoading] = useState(false);
+  const reqId = useRef(0);
 
-  async function load() {
-    try { setRows(await adminListUsers()); } catch (e) { setErr(e.message); }
+  async function load({ append = false } = {}) {
+    const id = ++reqId.current;                  // ignore les réponses d'une recherche périmée
+    setLoading(true);
+    try {
+      const res = await adminListUsers({ q, plan, cursor: append ? cursor : undefined });
+      if (id !== reqId.current) return;
+      setRows(prev => (append ? [...prev, ...res.items] : res.items));
+      setCursor(res.next_cursor);
+      if (res.plan_counts) setPlanCounts(res.plan_counts);
+      setErr("");
+    } catch (e) {
+      if (id === reqId.current) setErr(e.message);
+    } finally {
+      if (id === reqId.current) setLoading(false);
+    }
   }
-  useEffect(() => { load(); }, []);
+
+  // recherche / filtre : 1re page, avec un petit debounce sur la saisie
+  useEffect(() => {
+    const t = setTimeout(() => load(), 250);
+    return () => clearTimeout(t);
+  }, [q, plan]); // eslint-disable-line react-hooks/exhaustive-deps
 
   async function onPatch(id, patch) {
-    try { await adminUpdateUser(id, patch); await load(); }
+    try {
+      await adminUpdateUser(id, patch);
+      const { cancel_stripe, ...fields } = patch;
+      setRows(prev => prev.map(u => (u.id === id ? { ...u, ...fields } : u)));
+    }
     catch (e) { alert(e.message); }
   }
 
@@ -19,6 +49,23 @@ export default function AdminPage() {
     <div className="p-6 text-gray-100">
       <h1 className="text-2xl font-bold mb-4">Admin — Utilisateurs</h1>
       {err && <p className="text-red-400 mb-3">{err}</p>}
+      <div className="flex flex-wrap items-center gap-3 mb-4">
+        <input
+          value={q}
+          onChange={e => setQ(e.target.value)}
+          placeholder="Rechercher par email (début)…"
+          className="px-3 py-2 rounded bg-gray-800 border border-gray-700 w-72"
+        />
+        <select value={plan} onChange={e => setPlan(e.target.value)}
+                className="px-3 py-2 rounded bg-gray-800 border border-gray-700">
+          {PLANS.map(p => <option key={p} value={p}>{p || "Tous les plans"}</option>)}
+        </select>
+        {planCounts && (
+          <span className="text-sm text-gray-400">
+            {Object.entries(planCounts).map(([p, n]) => `${p}: ${n}`).join(" · ")}
+          </span>
+        )}
+      </div>
       <div className="overflow-x-auto rounded border border-gray-700">
         <table className="min-w-[900px] w-full">
           <thead className="bg-gray-800">
@@ -28,6 +75,7 @@ export default function AdminPage() {
               <th className="px-3 py-2">Plan</th>
               <th className="px-3 py-2">Crédits</th>
               <th className="px-3 py-2">Idées utilisées</th>
+              <th className="px-3 py-2">Projets / Idées / Livrables</th>
               <th className="px-3 py-2">Admin</th>
               <th className="px-3 py-2">Stripe</th>
               <th className="px-3 py-2">Actions</th>
@@ -41,6 +89,7 @@ export default function AdminPage() {
                 <td className="px-3 py-2 text-center">{u.plan}</td>
                 <td className="px-3 py-2 text-center">{u.startnow_credits}</td>
                 <td className="px-3 py-2 text-center">{u.idea_used}</td>
+                <td className="px-3 py-2 text-center">{u.projects} / {u.ideas} / {u.deliverables}</td>
                 <td className="px-3 py-2 text-center">{u.is_admin ? "✅" : "—"}</td>
                 <td className="px-3 py-2 text-center">
                   {u.stripe_link ? <a href={u.stripe_link} className="text-indigo-300 underline" target="_blank" rel="noreferrer">Stripe</a> : "—"}
@@ -62,6 +111,15 @@ export default function AdminPage() {
           </tbody>
         </table>
       </div>
+      <div className="mt-4 flex items-center gap-3">
+        {cursor && (
+          <button onClick={() => load({ append: true })} disabled={loading}
+                  className="px-3 py-2 bg-slate-700 rounded disabled:opacity-50">
+            {loading ? "Chargement…" : "Charger plus"}
+          </button>
+        )}
+        {!cursor && !loading && <span className="text-sm text-gray-500">{rows.length} utilisateur(s) affiché(s)</span>}
+      </div>
     </div>
   );
 }
\ No newline at end of file
@@ -0,0 +1,67 @@
+# loadtest/canned.py
+"""Réponses JSON "cannées" par étape LLM, au format attendu par premium_service / openai_service."""
+from __future__ import annotations
+
+from benchmarks import fixtures
+
+
+def _weeks() -> list[dict]:
+    # ⚠️ vocabulaire 100 % FR : un mot anglais déclencherait l'étape plan_translate (_text_has_english)
+    owners = ("fondateur", "marketing", "ventes", "tech", "juridique", "finance")
+    return [{
+        "week": w,
+        "theme": ("Cadrage", "Mise en place", "Premiers clients", "Accélération")[w - 1],
+        "goals": [f"Résultat mesurable {i} de la semaine {w}" for i in range(1, 3)],
+        "kpis": ["Leads qualifiés", "Démos réalisées"],
+        "tasks": [{
+            "id": f"S{w}T{i}", "title": f"Action {i} de la semaine {w}", "desc": "Détails concrets et livrable attendu",
+            "owner": owners[i % len(owners)], "estimate_h": 2.5, "due_offset_days": i,
+            "tags": ["mise_en_place"], "deps": [],
+        } for i in range(1, 6)],
+    } for w in range(1, 5)]
+
+
+def _landing_copy() -> dict:
+    c = fixtures.landing_fixture()["copy"]
+    return {"copy": {
+        "hero_title": "Pilotez vos opérations sans tableur", "hero_subtitle": c.hero_subtitle,
+        "hero_bullets": c.hero_bullets, "segments_badges": c.segments_badges, "features": c.features,
+        "differentiators": c.differentiators, "pricing": c.pricing, "trust_points": c.trust_points,
+        "testimonials": c.testimonials, "faq": c.faq,
+    }}
+
+
+def _bp_copy() -> dict:
+    n = fixtures.business_plan_fixture()["narrative"]
+    pd = n["project_detail"]
+    return {"copy": {
+        "executive_summary": n["executive_summary"], "team": n["team"],
+        "project": f"{pd['problem']} {pd['solution']}",
+        "market": n["market"], "go_to_market": n["go_to_market"], "operations": n["operations"],
+        "legal": n["legal"],
+        "funding": {k: n["funding"][k] for k in ("ask", "use_of_funds", "milestones")},
+        "risks": n["risks"], "glossary": n["glossary"],
+    }}
+
+
+def response_for(stage: str) -> dict:
+    off, br, acq = fixtures.offer_fixture(), fixtures.brand_fixture(), fixtures.acquisition_fixture()
+    builders = {
+        "idea": lambda: {
+            "idee": "Concept — Plateforme de pilotage des opérations pour PME. Marché — PME industrielles. "
+                    "Projection — 200 clients en 18 mois.",
+            "persona": off["persona"], "nom": "Nova", "slogan": "Vos opérations, enfin sous contrôle",
+            "potential_rating": 7.4,
+        },
+        "offer": lambda: {"offer": off["offer"], "persona": off["persona"], "pain_points": off["pain_points"]},
+        "business_model": lambda: {"model": "Abonnement mensuel par site, onboarding payant, modules en option."},
+        "brand": lambda: {"brand_name": br["brand_name"], "slogan": br["slogan"]},
+        "brand_structured": lambda: {"brand_structured": br["structured"]},
+        "landing_copy": _landing_copy,
+        "marketing": lambda: {k: acq["annexes"][k] for k in ("ads_strategy", "seo_plan", "social_plan")},
+        "bp_copy": _bp_copy,
+        "plan": lambda: {"weeks": _weeks()},
+        "plan_translate": lambda: {"weeks": _weeks()},
+    }
+    build = builders.get(stage)
+    return build() if build else {}
@@ -0,0 +1,117 @@
+# loadtest/fake_openai.py
+"""
+Serveur compatible OpenAI (POST /v1/chat/completions) pour les tests de charge : zéro coût, latence réglable.
+
+    python -m loadtest.fake_openai --port 18001 --latency-ms 1500 --jitter 0.3
+    OPENAI_BASE_URL=http://127.0.0.1:18001/v1 OPENAI_API_KEY=sk-fake uvicorn backend.main:app
+
+L'étape (offer, brand_structured, bp_copy, plan…) est reconnue dans le prompt ; la réponse est le JSON
+"canné" de l'étape (loadtest/canned.py, ou <canned-dir>/<étape>.json s'il existe).
+La latence simule la génération : --latency-ms (± --jitter), surchargeable par étape (--stage-latency plan=4000).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from typing import Optional
+
+from fastapi import FastAPI, Request
+
+from loadtest import canned
+
+# ordre significatif : le premier motif trouvé l'emporte (le plan embarque le JSON des autres livrables)
+STAGE_PATTERNS: tuple[tuple[str, str], ...] = (
+    ("Traduire en FRANÇAIS", "plan_translate"),
+    ("EXACTEMENT la clé 'weeks'", "plan"),
+    ("'brand_structured'", "brand_structured"),
+    ("'brand_name' et 'slogan'", "brand"),
+    ("\"market_overview\"", "offer"),
+    ("EXACTEMENT la clé 'model'", "business_model"),
+    ("'ads_strategy'", "marketing"),
+    ("contenu d'une landing", "landing_copy"),
+    ("Business Plan", "bp_copy"),
+    ("potential_rating", "idea"),
+)
+
+
+def detect_stage(messages: list[dict]) -> str:
+    text = "\n".join(str(m.get("content") or "") for m in messages)
+    for needle, stage in STAGE_PATTERNS:
+        if needle in text:
+            return stage
+    return "unknown"
+
+
+def create_app(latency_ms: float = 800.0, jitter: float = 0.3, stage_latency: Optional[dict[str, float]] = None,
+               canned_dir: Optional[str] = None) -> FastAPI:
+    app = FastAPI(title="fake-openai")
+    stage_latency = stage_latency or {}
+    app.state.calls = {}
+
+    def _content(stage: str) -> str:
+        if canned_dir:
+            path = os.path.join(canned_dir, f"{stage}.json")
+            if os.path.isfile(path):
+                with open(path, encoding="utf-8") as f:
+                    return f.read()
+        return json.dumps(canned.response_for(stage), ensure_ascii=False)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+        stage = detect_stage(messages)
+        app.state.calls[stage] = app.state.calls.get(stage, 0) + 1
+
+        base = stage_latency.get(stage, latency_ms)
+        await asyncio.sleep(max(0.0, base * (1 + random.uniform(-jitter, jitter))) / 1000.0)
+
+        content = _content(stage)
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or "gpt-4o",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                      "total_tokens": prompt_tokens + len(content) // 4},
+        }
+
+    @app.get("/stats")
+    def stats():
+        return app.state.calls
+
+    return app
+
+
+def _parse_stage_latency(items: list[str]) -> dict[str, float]:
+    out = {}
+    for item in items or []:
+        stage, _, ms = item.partition("=")
+        out[stage] = float(ms)
+    return out
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18001)
+    ap.add_argument("--latency-ms", type=float, default=800.0)
+    ap.add_argument("--jitter", type=float, default=0.3, help="variation relative de la latence (0.3 = ±30 %%)")
+    ap.add_argument("--stage-latency", action="append", metavar="STAGE=MS")
+    ap.add_argument("--canned-dir", help="répertoire de réponses <étape>.json qui remplacent les défauts")
+    args = ap.parse_args(argv)
+    app = create_app(args.latency_ms, args.jitter, _parse_stage_latency(args.stage_latency), args.canned_dir)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# loadtest/fake_stripe.py
+"""
+Faux serveur Stripe (sous-ensemble de l'API REST utilisé par services/stripe_client.py).
+
+    python -m loadtest.fake_stripe --port 18002 --latency-ms 120
+    STRIPE_API_BASE=http://127.0.0.1:18002 STRIPE_SECRET_KEY=sk_test_fake uvicorn backend.main:app
+
+Les Checkout Sessions créées sont immédiatement "payées" (payment_status=paid, status=complete),
+ce qui permet d'enchaîner create-checkout-session → verify-checkout-session dans un parcours de charge.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import secrets
+import time
+from urllib.parse import parse_qsl
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def _unflatten(pairs: list[tuple[str, str]]) -> dict:
+    """metadata[user_id]=1, line_items[0][price]=… → dicts imbriqués (listes gardées en dicts indexés)."""
+    out: dict = {}
+    for key, value in pairs:
+        parts = key.replace("]", "").split("[")
+        node = out
+        for p in parts[:-1]:
+            node = node.setdefault(p, {})
+        node[parts[-1]] = value
+    return out
+
+
+def create_app(latency_ms: float = 100.0) -> FastAPI:
+    app = FastAPI(title="fake-stripe")
+    sessions: dict[str, dict] = {}
+    customers: dict[str, dict] = {}
+
+    async def _params(request: Request) -> dict:
+        await asyncio.sleep(latency_ms / 1000.0)
+        if request.method == "GET":
+            return _unflatten(list(request.query_params.multi_items()))
+        return _unflatten(parse_qsl((await request.body()).decode(), keep_blank_values=True))
+
+    @app.post("/v1/checkout/sessions")
+    async def create_session(request: Request):
+        p = await _params(request)
+        sid = f"cs_test_{secrets.token_hex(12)}"
+        cus = f"cus_{secrets.token_hex(7)}"
+        sessions[sid] = {
+            "id": sid, "object": "checkout.session", "created": int(time.time()),
+            "mode": p.get("mode"), "metadata": p.get("metadata") or {},
+            "client_reference_id": p.get("client_reference_id"), "customer_email": p.get("customer_email"),
+            "customer": cus, "subscription": f"sub_{secrets.token_hex(7)}" if p.get("mode") == "subscription" else None,
+            "payment_status": "paid", "status": "complete",
+            "url": f"https://checkout.stripe.test/{sid}",
+        }
+        return sessions[sid]
+
+    @app.get("/v1/checkout/sessions/{sid}")
+    async def get_session(sid: str, request: Request):
+        await _params(request)
+        if sid not in sessions:
+            return JSONResponse({"error": {"message": f"No such checkout.session: {sid}", "code": "resource_missing"}},
+                                status_code=404)
+        return sessions[sid]
+
+    @app.get("/v1/customers")
+    async def list_customers(request: Request):
+        p = await _params(request)
+        data = [c for c in customers.values() if c["email"] == p.get("email")]
+        return {"object": "list", "data": data[:1], "has_more": False}
+
+    @app.post("/v1/customers")
+    async def create_customer(request: Request):
+        p = await _params(request)
+        cid = f"cus_{secrets.token_hex(7)}"
+        customers[cid] = {"id": cid, "object": "customer", "email": p.get("email")}
+        return customers[cid]
+
+    @app.post("/v1/billing_portal/sessions")
+    async def portal(request: Request):
+        p = await _params(request)
+        return {"id": f"bps_{secrets.token_hex(7)}", "url": p.get("return_url") or "https://billing.stripe.test"}
+
+    @app.delete("/v1/subscriptions/{sub_id}")
+    async def cancel(sub_id: str, request: Request):
+        await _params(request)
+        return {"id": sub_id, "object": "subscription", "status": "canceled"}
+
+    return app
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18002)
+    ap.add_argument("--latency-ms", type=float, default=100.0)
+    args = ap.parse_args(argv)
+    uvicorn.run(create_app(args.latency_ms), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()